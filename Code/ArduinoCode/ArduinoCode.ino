@@ -8,6 +8,9 @@
 
 const unsigned long BAUD_RATE = 115200;
 
+// answer to IDENTIFY, the controller uses it to tell this board apart from other arduinos on the same PC
+const char DEVICE_IDENTITY[] = "PHOTOLOGIC RIG CONTROLLER";
+
 // door stepper motor constants
 const int STEPPER_UP_POSITION = 0;
 const int STEPPER_DOWN_POSITION = 6000;
@@ -121,6 +124,16 @@ void loop() {
   
   // a pointer to the side_data for the side that was licked most recently
   static SideData * side_data;
+
+  // utilized for a sample lick. we only move on from a lick once both valve close time AND 
+  // lick finish time have been marked.
+  static bool handling_lick = false;
+  static bool lick_marked = false;
+  static bool valve_marked = false;
+
+  // this is used to 'lock' a mode in so that if a lick begins in ttc it is 
+  // guaranteed to finish there. same applies to 'sample' (open_valves)
+  static bool ttc_lick = true;
   
   // if reset pin has been high for 3ms or longer reset it. 
   bool reset_pin_high = (PINH & (1 << PH6)) != 0;
@@ -204,6 +217,80 @@ void loop() {
       // reset the board
       wdt_enable(WDTO_1S);
     }
+    else if (command.equals("SOFT RESET")){
+      // clear all experiment state without restarting the board. unlike RESET this keeps the serial connection alive and skips
+      // the bootloader, so the controller can set up the next experiment right away. valve durations are kept, the schedule
+      // has to be sent again.
+      close_all();
+
+      open_valves = false;
+      accept_licks = false;
+      valve_open_trial_start = false;
+
+      handling_lick = false;
+      lick_marked = false;
+      valve_marked = false;
+      ttc_lick = true;
+
+      current_trial = 0;
+      program_start_time = 0;
+      trial_start_time = 0;
+      last_lick_end = 0;
+
+      schedules = ValveSchedules();
+
+      lick_time = {};
+      motor_time = {};
+      valve_time = {};
+
+      // let a door movement in progress finish, but do not report it
+      motor_running = false;
+      previous_command = "\0";
+
+      PORTB &= ~(1 << PB4); // digital 10 | clear start signal
+      PORTH &= ~(1 << PH5); // digital 8 | disable lick counting
+      PORTH |= (1 << PH6); // digital 9 | 1 resets the capacitive board (resets lick counters)
+      sent_reset_time = millis();
+
+      Serial.println("SOFT RESET COMPLETE");
+    }
+    else if (command.equals("IDENTIFY")){
+      Serial.println(DEVICE_IDENTITY);
+    }
+    else if (command.equals("RESYNC")){
+      // sent by the controller when the usb link dropped mid-experiment and the port was reopened, which restarts this board.
+      // variables, schedule and durations have already been sent again, this restores where the experiment was.
+      // 11 bytes, little endian: current trial (2), ms since program start (4), ms since trial start (4), flags (1)
+      while (Serial.available() < 11) {
+      }
+      uint8_t resync[11];
+      Serial.readBytes(resync, 11);
+
+      unsigned long program_elapsed = 0;
+      unsigned long trial_elapsed = 0;
+      for (int i = 3; i >= 0; i--) {
+        program_elapsed = (program_elapsed << 8) | resync[2 + i];
+        trial_elapsed = (trial_elapsed << 8) | resync[6 + i];
+      }
+
+      current_trial = resync[0] | (resync[1] << 8);
+      program_start_time = millis() - program_elapsed;
+      trial_start_time = millis() - trial_elapsed;
+
+      uint8_t flags = resync[10];
+      accept_licks = flags & 1;
+      open_valves = flags & 2;
+
+      // the door stayed where it was, but the stepper position was lost with the restart
+      stepper.setCurrentPosition((flags & 4) ? STEPPER_DOWN_POSITION : STEPPER_UP_POSITION);
+
+      if (open_valves) {
+        PORTH &= ~(1 << PH6); // digital 9 | capacitive arduino reset set to 0
+        PORTH |= (1 << PH5); // digital 8 | enable lick counting in sample state
+      }
+
+      Serial.println("RESYNC COMPLETE");
+    }
     else if(command.equals("PRIME VALVES")){
       prime_valves();             
     }
@@ -273,16 +360,6 @@ void loop() {
 
   // only if the schedule and durations have been recieved should we detect licks and open valves
   if(schedules.schedules_recieved && durations.durations_recieved){
-    // utilized for a sample lick. we only move on from a lick once both valve close time AND 
-    // lick finish time have been marked.
-    static bool handling_lick = false;
-    static bool lick_marked = false;
-    static bool valve_marked = false;
-
-    // this is used to 'lock' a mode in so that if a lick begins in ttc it is 
-    // guaranteed to finish there. same applies to 'sample' (open_valves)
-    static bool ttc_lick = true;
-    
     if (accept_licks && (!handling_lick)){
       // if no previous lick or valve movement is being handled
       bool lick_start_one = lick_started(&side_one_data); 
@@ -7,27 +7,37 @@ Before performing any actions, the StateMachine class initializes the instances
 Launching main_gui initializes a tkinter root and allows for a GUI to be created for the program.
 
 This module is launched from main to make restarting the program easier, which is done by destroying the
-instance of state machine and launcing a new one.
+instance of state machine and launcing a new one. By default a reset is 'warm' instead (see `WarmResetProgram`): the models and views are
+cleared in place and the Arduino is reset over the open serial connection, so the next experiment can be set up right away.
+
+State transitions, trial summaries and timing health are published to `monitor_server.monitor_bus` for the live session monitor. The
+depth of the Arduino data queue and how late each timed state transition fires are recorded in the `metrics` registry.
 """
 
 # external imports
+import math
 import time
 import threading
 import logging
-import toml
 import queue
 from typing import Callable
-import datetime
-from logging import FileHandler
 
 # imports for locally used modules and classes
 from models.experiment_process_data import ExperimentProcessData
 from views.gui_common import GUIUtils
-import system_config
+from rig_config_service import rig_config
+from metrics import metrics
+from monitor_server import monitor_bus
 from views.main_gui import MainGUI
 
 # these are just use for type hinting here
 from controllers.arduino_control import ArduinoManager
+from controllers.arduino_control import (
+    RESYNC_ACCEPT_LICKS,
+    RESYNC_OPEN_VALVES,
+    RESYNC_DOOR_DOWN,
+)
+from rig_status import RigStatusPublisher
 
 logger = logging.getLogger()
 """Logger used to log program runtime details for debugging"""
@@ -41,30 +51,46 @@ console_handler.setFormatter(
 )
 logger.addHandler(console_handler)
 
-RIG_CONFIG = system_config.get_rig_config()
+DOOR_CONFIG = rig_config.section("door_motor_config")
 """
-This utilizes `system_config` module to obtain a constant path for this machine regardless of OS to the Rig Files foler 
-at the current users documents folder.
+The door_motor_config section of the rig config. `DOOR_MOVE_TIME` is read from it each time the door moves, so an edit to the file applies
+to the next trial.
 """
 
-with open(RIG_CONFIG, "r") as f:
-    DOOR_CONFIG = toml.load(f)["door_motor_config"]
+RESET_CONFIG = rig_config.section("reset_config")
 
-DOOR_MOVE_TIME = DOOR_CONFIG["DOOR_MOVE_TIME"]
-"""Constant value stored in the door_motor_config section of `RIG CONFIG` config"""
+DATA_QUEUE_DEPTH = metrics.histogram(
+    "photologic_data_queue_depth",
+    "Lines waiting in the Arduino data queue each time it is processed.",
+    resolution=1,
+    highest=1_000_000,
+    export_buckets=(0, 1, 2, 5, 10, 20, 50, 100, 500, 1000),
+    unit="lines",
+)
+DATA_QUEUE_WAITING = metrics.gauge(
+    "photologic_data_queue_waiting", "Lines that were waiting in the Arduino data queue the last time it was processed."
+)
+STATE_LATENESS = metrics.histogram(
+    "photologic_state_transition_lateness_seconds",
+    "How much later than scheduled a timed state transition (ITI, door move, TTC, SAMPLE) was triggered.",
+)
 
 
-now = datetime.datetime.now()
-# configure logfile details such as name and the level at which information should be added to the log (INFO here)
-logfile_name = f"{now.hour}_{now.minute}_{now.second} - {now.date()} experiment log"
-logfile_path = system_config.get_log_path(logfile_name)
+def schedule_transition(main_gui: MainGUI, delay_ms: int, trigger: Callable[[str], None], event: str) -> str:
+    """
+    Triggers `event` after `delay_ms` from the tkinter main loop, like `main_gui.after`, and records how late it fired in `STATE_LATENESS`.
 
-file_handler = FileHandler(logfile_path)
-file_handler.setLevel(logging.INFO)
-file_handler.setFormatter(
-    logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-)
-logger.addHandler(file_handler)
+    Returns
+    -------
+    - *str*: The id of the scheduled task, for `after_cancel`.
+    """
+    due = time.perf_counter() + delay_ms / 1000
+
+    def fire():
+        STATE_LATENESS.observe(time.perf_counter() - due)
+        trigger(event)
+
+    return main_gui.after(delay_ms, fire)
 
 
 class StateMachine:
@@ -85,6 +111,8 @@ class StateMachine:
     - **prev_state** (*str*): Contains the state the program was previously in. Useful to restore state in case of erroneous transitions.
     - **app_result** (*list*): Mutable list with one element. Is a reference to list defined in `main`.
     - **transitions**  (*dict*): Program state transition table.
+    - **on_warm_reset** (*Callable[[], None] | None*): Called when a warm reset begins, `main` uses it to start a new logging session.
+    - **status_publisher** (*RigStatusPublisher | None*): Publishes `status` for `rig_manager` when this program runs one of several rigs.
 
     Methods
     -------
@@ -96,17 +124,37 @@ class StateMachine:
     - `process_queue`(data_queue)
         Processes incoming data from the Arduino board. Reads from queue that is added to by `controllers.arduino_control` module
         `listen_for_serial` method.
+    - `resync_arduino`()
+        Brings the Arduino back to where the experiment is after the USB link dropped and the board restarted.
+    - `report_resync_error`(message)
+        Shows a failure of `resync_arduino` from the main thread.
+    - `status`()
+        Summarizes the state of the experiment and the Arduino link for `rig_manager`.
+    - `timing_health`()
+        Adds the GUI lag and Arduino data backlog to `status` for the live session monitor.
+    - `publish_state`()
+        Publishes the current state to the live session monitor.
     - `reject_actions`(event)
         A static method that handles the rejection of actions that cannot be performed given a certain state transition.
     """
 
-    def __init__(self, result_container):
+    def __init__(
+        self,
+        result_container,
+        on_warm_reset: Callable[[], None] | None = None,
+        status_publisher: RigStatusPublisher | None = None,
+    ):
         """init method for `StateMachine`. Takes `main` module `result_container`.
-        the 'super' parent class which is the gui"""
+        the 'super' parent class which is the gui. `on_warm_reset` is called at the start of every warm reset. If a `status_publisher`
+        is given, it publishes `status` from here on."""
+
+        self.on_warm_reset = on_warm_reset
+        self.status_publisher = status_publisher
 
         self.exp_data = ExperimentProcessData()
 
         self.arduino_controller = ArduinoManager(self.exp_data)
+        self.arduino_controller.on_link_restored = self.resync_arduino
 
         self.main_gui = MainGUI(self.exp_data, self.trigger, self.arduino_controller)
         logging.info("GUI started successfully.")
@@ -147,10 +195,19 @@ class StateMachine:
         }
         """State transition table defines all transitions that the program can possibly take"""
 
+        if self.status_publisher is not None:
+            self.status_publisher.source = self.status
+        monitor_bus.health_source = self.timing_health
+        self.publish_state()
+
         # don't start the mainloop until AFTER the gui is setup so that the app_result property
         # is available if reset is desired
         self.main_gui.mainloop()
 
+        if self.status_publisher is not None:
+            self.status_publisher.source = None
+        monitor_bus.health_source = None
+
     def trigger(self, event):
         """
         This function takes a requested state and decides if the transition from this state is allowed.
@@ -222,6 +279,20 @@ class StateMachine:
                         self.trigger,
                     )
             case "RESET PROGRAM":
+                if RESET_CONFIG["WARM_RESET"]:
+                    warm_reset = WarmResetProgram(
+                        self.exp_data,
+                        self.main_gui,
+                        self.arduino_controller,
+                        self.on_warm_reset,
+                    )
+                    if warm_reset.completed:
+                        # the program is ready for the next experiment without a restart
+                        self.prev_state = None
+                        self.state = "IDLE"
+                        self.publish_state()
+                        return
+
                 ResetProgram(self.main_gui, self.app_result, self.arduino_controller)
             case "STOP PROGRAM":
                 StopProgram(self.main_gui, self.arduino_controller, self.trigger)
@@ -229,6 +300,7 @@ class StateMachine:
                 # because this will run in main thread, we need to return early to avoid self.state
                 # assignment confusion
                 self.state = new_state
+                self.publish_state()
                 GenerateSchedule(
                     self.main_gui,
                     self.arduino_controller,
@@ -288,6 +360,7 @@ class StateMachine:
 
         self.prev_state = self.state
         self.state = new_state
+        self.publish_state()
 
         if thread_target:
             threading.Thread(target=thread_target).start()
@@ -306,6 +379,10 @@ class StateMachine:
 
         arduino_data = self.exp_data.arduino_data
         try:
+            waiting = data_queue.qsize()
+            DATA_QUEUE_DEPTH.observe(waiting)
+            DATA_QUEUE_WAITING.set(waiting)
+
             while not data_queue.empty():
                 source, data = data_queue.get()
                 arduino_data.process_data(source, data, self.state, self.trigger)
@@ -319,6 +396,132 @@ class StateMachine:
             logging.error(f"Error processing data queue: {e}")
             raise
 
+    def resync_arduino(self) -> bool:
+        """
+        Called by `controllers.arduino_control` on its reconnect thread when the USB link to the Arduino came back. Reopening the port
+        restarted the board, so once a schedule has been generated the experiment variables, schedule and valve durations are sent (and
+        verified) again. If the experiment is running, the board is then told the trial, elapsed times and mode of the current state with
+        RESYNC, and the door is sent where the current state needs it. The listener thread waits until this returns.
+
+        This runs off the main thread, so failures are not shown from here: they are handed to the GUI with `report_resync_error`.
+
+        Returns
+        -------
+        - *bool*: True if the board was brought back to the running experiment, which replaces the commands buffered during the gap.
+        False if there was no experiment to bring it back to, so the buffered commands are still sent.
+        """
+        arduino_controller = self.arduino_controller
+        exp_data = self.exp_data
+        state = self.state
+
+        if not arduino_controller.schedule_sent:
+            return False
+
+        arduino_controller.send_experiment_variables()
+        schedule_verified = arduino_controller.send_schedule_data(show_errors=False)
+        durations_verified = arduino_controller.send_valve_durations(show_errors=False)
+        if not (schedule_verified and durations_verified):
+            self.report_resync_error(
+                "The Arduino did not receive the correct schedule or valve durations after its USB link was restored. "
+                "Stop the experiment and restart the program."
+            )
+
+        if state not in ("START PROGRAM", "ITI", "OPENING DOOR", "TTC", "SAMPLE", "TRIAL END"):
+            return False
+
+        door_should_be_down = state in ("OPENING DOOR", "TTC", "SAMPLE")
+        door_was_down = arduino_controller.door_down
+
+        flags = 0
+        if state in ("TTC", "SAMPLE"):
+            flags |= RESYNC_ACCEPT_LICKS
+        if state == "SAMPLE":
+            flags |= RESYNC_OPEN_VALVES
+        if door_was_down:
+            flags |= RESYNC_DOOR_DOWN
+
+        # the board counts a trial when the door finishes moving up, so if the trial end UP was lost in the gap it is one trial behind
+        current_trial = exp_data.current_trial_number - 1
+        if door_was_down and not door_should_be_down:
+            current_trial = max(current_trial - 1, 0)
+
+        now = time.time()
+        trial_start = exp_data.trial_start_time or exp_data.start_time
+
+        acknowledged = arduino_controller.send_resync(
+            current_trial,
+            (now - exp_data.start_time) * 1000,
+            (now - trial_start) * 1000,
+            flags,
+        )
+        if not acknowledged:
+            self.report_resync_error(
+                "The Arduino did not acknowledge where the experiment is after its USB link was restored, so trials and timestamps "
+                "may be wrong from here on. Stop the experiment and restart the program."
+            )
+
+        if door_should_be_down != door_was_down:
+            door_command = "DOWN\n" if door_should_be_down else "UP\n"
+            arduino_controller.send_command(door_command.encode("utf-8"))
+
+        return True
+
+    def report_resync_error(self, message: str) -> None:
+        """
+        Shows an error from `resync_arduino` in a message box. Called from the reconnect thread, so the message box is opened by the
+        `render_scheduler` on the main thread.
+        """
+        logger.error(message)
+        self.main_gui.render_scheduler.request(
+            "RESYNC ERROR",
+            lambda: GUIUtils.display_error("ARDUINO LINK ERROR", message),
+        )
+
+    def status(self) -> dict:
+        """
+        Returns the current state, trial and Arduino link of this rig. Called from the `rig_status` publisher thread, so it only reads
+        attributes.
+        """
+        arduino_controller = self.arduino_controller
+        exp_data = self.exp_data
+
+        if arduino_controller.arduino is None:
+            arduino = "NOT CONNECTED"
+        elif arduino_controller.link_up.is_set():
+            arduino = "CONNECTED"
+        else:
+            arduino = "LINK LOST"
+
+        return {
+            "state": self.state,
+            "trial": exp_data.current_trial_number,
+            "num_trials": exp_data.exp_var_entries["Num Trials"],
+            "experiment_started_at": exp_data.start_time or None,
+            "arduino": arduino,
+            "arduino_port": getattr(arduino_controller.arduino, "port", None),
+            "link_drops": len(arduino_controller.link_gaps),
+        }
+
+    def timing_health(self) -> dict:
+        """
+        Returns `status` along with how far behind the GUI and the processing of Arduino data are. Called from the monitor's fan-out
+        thread, so like `status` it only reads.
+        """
+        health = self.status()
+        health["gui_lag"] = self.main_gui.lag_watchdog.lag_stats()
+        health["data_queue_depth"] = self.arduino_controller.data_queue.qsize()
+        health["last_resync_ms"] = self.arduino_controller.last_resync_ms
+        return health
+
+    def publish_state(self) -> None:
+        monitor_bus.publish(
+            "state",
+            state=self.state,
+            prev_state=self.prev_state,
+            trial=self.exp_data.current_trial_number,
+            num_trials=self.exp_data.exp_var_entries["Num Trials"],
+        )
+
     @staticmethod
     def reject_actions(event):
         """
@@ -382,11 +585,13 @@ class GenerateSchedule:
         # create plots using generated number of trials as max Y values
         for window in main_gui.windows["Raster Plot"]:
             window.create_plot()
+        main_gui.windows["Lick Rate PSTH"].create_plot()
 
         # send exp variables, schedule, and valve open durations stored in arduino_data.toml to the arduino
         arduino_controller.send_experiment_variables()
         arduino_controller.send_schedule_data()
         arduino_controller.send_valve_durations()
+        arduino_controller.arduino_data.start_timing_analytics()
 
         # start Arduino process queue and listener thread so we know when Arduino tries to tell us something
         process_queue(arduino_controller.data_queue)
@@ -434,8 +639,7 @@ class StartProgram:
             start_command = "T=0\n".encode("utf-8")
             arduino_controller.send_command(command=start_command)
 
-            main_gui.update_clock_label()
-            main_gui.update_max_time()
+            main_gui.start_clock()
 
             # change the green start button into a red stop button, update the associated command
             main_gui.start_button.configure(
@@ -520,7 +724,9 @@ class StopProgram:
             queue_id = main_gui.scheduled_tasks["PROCESS QUEUE"]
             main_gui.after_cancel(queue_id)
 
-            arduino_controller.close_connection()
+            # a warm reset reuses the open connection for the next experiment
+            if not RESET_CONFIG["WARM_RESET"]:
+                arduino_controller.close_connection()
 
             main_gui.save_button_handler()
 
@@ -539,6 +745,11 @@ class ResetProgram:
         self, main_gui: MainGUI, app_result: list, arduino_controller: ArduinoManager
     ) -> None:
         try:
+            rig_config.unsubscribe("gui_config", main_gui.on_gui_config_change)
+            main_gui.render_scheduler.stop()
+            main_gui.lag_watchdog.stop()
+            main_gui.windows.stop_prewarm()
+
             # these two calls will stop the gui, halting the programs mainloop.
             main_gui.quit()
             main_gui.destroy()
@@ -559,6 +770,72 @@ class ResetProgram:
             logging.error(f"Error resetting the program: {e}")
 
 
+class WarmResetProgram:
+    """
+    Resets the program for the next experiment without restarting it. Unlike `ResetProgram`, the Tkinter root, the main window and the
+    serial connection are kept. The Arduino is sent a soft reset instead of restarting (which would wait for its bootloader), the
+    models are cleared in place and the views are returned to their launch state.
+
+    If the Arduino is not connected or does not acknowledge the soft reset (e.g. its firmware predates the command), `completed` is left
+    False and the caller falls back to a full `ResetProgram`.
+
+    Attributes
+    ----------
+    - **completed** (*bool*): Whether the program was reset and is ready for the next experiment.
+    """
+
+    def __init__(
+        self,
+        exp_data: ExperimentProcessData,
+        main_gui: MainGUI,
+        arduino_controller: ArduinoManager,
+        on_warm_reset: Callable[[], None] | None = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        - **exp_data** (*ExperimentProcessData*): Reference to the `models.experiment_process_data` instance, cleared in place.
+        - **main_gui** (*MainGUI*): Reference to the `views.main_gui` MainGUI instance, its scheduled tasks are cancelled and its widgets reset.
+        - **arduino_controller** (*ArduinoManager*): Reference to the `controllers.arduino_control` instance, used to stop the listener
+        thread and soft reset the Arduino.
+        - **on_warm_reset** (*Callable[[], None] | None*): Called before anything is reset, used by `main` to start a new logging session.
+        """
+        self.completed = False
+
+        start = time.perf_counter()
+        try:
+            # stop everything from the last experiment before touching the data it uses
+            for sched_task in main_gui.scheduled_tasks.values():
+                main_gui.after_cancel(sched_task)
+            main_gui.scheduled_tasks.clear()
+
+            if arduino_controller.listener_thread is not None:
+                arduino_controller.stop_listener_thread()
+
+            if not arduino_controller.soft_reset():
+                logger.warning("Warm reset not possible, restarting the program instead.")
+                return
+
+            if on_warm_reset is not None:
+                on_warm_reset()
+
+            exp_data.reset()
+            main_gui.reset_views()
+
+            self.completed = True
+            reset_ms = (time.perf_counter() - start) * 1000
+            logger.info(f"Warm reset done in {reset_ms:.0f} ms.")
+
+            # ready once the reset main window has been redrawn
+            main_gui.after_idle(
+                lambda: logger.info(
+                    f"Ready for the next experiment {(time.perf_counter() - start) * 1000:.0f} ms after reset."
+                )
+            )
+        except Exception as e:
+            logger.error(f"Error during warm reset: {e}")
+
+
 class InitialTimeInterval:
     """
     State class for initial time interval experiment state.
@@ -614,9 +891,8 @@ class InitialTimeInterval:
             main_gui.update_on_state_change(initial_time_interval, state)
 
             # tell tkinter main loop that we want to trigger DOOR OPEN state after initial_time_interval milliseconds
-            iti_ttc_transition = main_gui.after(
-                int(initial_time_interval),
-                lambda: trigger("DOOR OPEN"),
+            iti_ttc_transition = schedule_transition(
+                main_gui, int(initial_time_interval), trigger, "DOOR OPEN"
             )
 
             # add the transition to scheduled tasks dict so that
@@ -651,14 +927,16 @@ class OpeningDoor:
         down_command = "DOWN\n".encode("utf-8")
         arduino_controller.send_command(command=down_command)
 
+        door_move_time = DOOR_CONFIG["DOOR_MOVE_TIME"]
+
         # after the door is down, then we will begin the ttc state logic, found in run_ttc
-        main_gui.after(DOOR_MOVE_TIME, lambda: trigger("TTC"))
+        schedule_transition(main_gui, door_move_time, trigger, "TTC")
 
         # state start time begins
         exp_data.state_start_time = time.time()
 
         # show current_time / door close time to avoid confusion
-        main_gui.update_on_state_change(DOOR_MOVE_TIME, state)
+        main_gui.update_on_state_change(door_move_time, state)
 
 
 class TimeToContact:
@@ -716,8 +994,8 @@ class TimeToContact:
 
             # set a state change to occur after the time_to_contact time, this will be cancelled if the laser arduino
             # sends 3 licks befote the TTC_time
-            ttc_iti_transition = main_gui.after(
-                int(time_to_contact), lambda: trigger("TRIAL END")
+            ttc_iti_transition = schedule_transition(
+                main_gui, int(time_to_contact), trigger, "TRIAL END"
             )
 
             # store this task id so that it can be cancelled if the sample time transition is taken.
@@ -794,9 +1072,8 @@ class SampleTime:
 
             main_gui.update_on_state_change(sample_interval_value, state)
 
-            main_gui.after(
-                int(sample_interval_value),
-                lambda: trigger("TRIAL END"),
+            schedule_transition(
+                main_gui, int(sample_interval_value), trigger, "TRIAL END"
             )
 
             logging.info(
@@ -833,6 +1110,9 @@ class TrialEnd:
     - `handle_from_ttc`(logical_trial, trigger), exp_data): Call `update_ttc_actual` to update TTC time. Trigger transition to `ITI`.
     - `update_schedule_licks`(logical_trial, exp_data) -> None: Update program schedule df with licks for this trial on each port.
     - `update_raster_plots`(exp_data, logical_trial, main_gui) -> None: Update raster plot with licks from this trial.
+    - `update_psth`(logical_trial, main_gui) -> None: Add licks from this trial to the lick rate PSTH.
+    - `update_program_schedule`(logical_trial, main_gui) -> None: Show the results of this trial in the program schedule window.
+    - `publish_trial_summary`(logical_trial, exp_data, ended_in) -> None: Send the results of this trial to the live session monitor.
     """
 
     def __init__(
@@ -874,10 +1154,11 @@ class TrialEnd:
 
         #######TRIAL NUMBER IS INCREMENTED INSIDE OF END_TRIAL#######
         if self.end_trial(exp_data):
-            program_schedule = main_gui.windows["Program Schedule"]
             # if the experiment is over update the licks for the final trial
             self.update_schedule_licks(logical_trial, exp_data)
-            program_schedule.refresh_end_trial(logical_trial)
+            self.update_psth(logical_trial, main_gui)
+            self.update_program_schedule(logical_trial, main_gui)
+            self.publish_trial_summary(logical_trial, exp_data, prev_state)
 
             trigger("STOP")
             # return from the call / kill the working thread
@@ -885,6 +1166,8 @@ class TrialEnd:
 
         # update licks for this trial
         self.update_schedule_licks(logical_trial, exp_data)
+        # every trial presents both stimuli, so the PSTH counts trials that ended in TTC too
+        self.update_psth(logical_trial, main_gui)
 
         match prev_state:
             case "TTC":
@@ -897,7 +1180,8 @@ class TrialEnd:
                 # cases not explicitly defined go here
                 logger.error("UNDEFINED PREVIOUS TRANSITION IN TRIAL END STATE")
 
-        main_gui.windows["Program Schedule"].refresh_end_trial(logical_trial)
+        self.update_program_schedule(logical_trial, main_gui)
+        self.publish_trial_summary(logical_trial, exp_data, prev_state)
 
     def arduino_trial_end(self, arduino_controller: ArduinoManager) -> None:
         """
@@ -949,13 +1233,52 @@ class TrialEnd:
 
         program_df.loc[logical_trial, "Port 2 Licks"] = licks_sd_two
 
+    def publish_trial_summary(
+        self, logical_trial: int, exp_data: ExperimentProcessData, ended_in: str
+    ) -> None:
+        """Send the stimuli, licks and TTC time of this trial to the live session monitor, if it is running."""
+        if not monitor_bus.enabled:
+            return
+
+        row = exp_data.program_schedule_df.loc[logical_trial]
+        ttc_actual = float(row["TTC Actual"])
+
+        monitor_bus.publish(
+            "trial",
+            trial=logical_trial + 1,
+            port_1=str(row["Port 1"]),
+            port_2=str(row["Port 2"]),
+            port_1_licks=int(row["Port 1 Licks"]),
+            port_2_licks=int(row["Port 2 Licks"]),
+            ttc_actual=None if math.isnan(ttc_actual) else ttc_actual,
+            ended_in=ended_in,
+        )
+
     def update_raster_plots(
         self, exp_data: ExperimentProcessData, logical_trial: int, main_gui: MainGUI
     ) -> None:
-        """Instruct raster windows to update with new lick timestamps"""
+        """Instruct raster windows to update with new lick timestamps in the next GUI frame"""
         # gather lick timestamp data from the event data model
         lick_stamps = exp_data.event_data.get_lick_timestamps(logical_trial)
 
-        # send it to raster windows
-        for i, window in enumerate(main_gui.windows["Raster Plot"]):
-            window.update_plot(lick_stamps[i], logical_trial)
+        def draw():
+            # send it to raster windows
+            for i, window in enumerate(main_gui.windows["Raster Plot"]):
+                window.update_plot(lick_stamps[i], logical_trial)
+
+        main_gui.render_scheduler.request(("RASTER", logical_trial), draw)
+
+    def update_psth(self, logical_trial: int, main_gui: MainGUI) -> None:
+        """Instruct the lick rate PSTH window to bin the licks from this trial in the next GUI frame"""
+        # windows are looked up in the frame, on the main thread, since the registry builds a window that does not exist yet
+        main_gui.render_scheduler.request(
+            ("PSTH", logical_trial),
+            lambda: main_gui.windows["Lick Rate PSTH"].update_plot(logical_trial),
+        )
+
+    def update_program_schedule(self, logical_trial: int, main_gui: MainGUI) -> None:
+        """Instruct the program schedule window to show the results of this trial in the next GUI frame"""
+        main_gui.render_scheduler.request(
+            ("END TRIAL", logical_trial),
+            lambda: main_gui.windows["Program Schedule"].refresh_end_trial(logical_trial),
+        )
@@ -0,0 +1,133 @@
+"""
+Measures how long the program takes to recover from the Arduino's USB link dropping mid-experiment, using the emulated board of
+`controllers.arduino_emulator`. Each drop unplugs the board during a trial, plugs it back in after `outage_s` (under a new port name
+every other time) and times:
+
+- the gap, from the link failing to the listener resuming,
+- the resync, resending variables, schedule and durations and the RESYNC itself,
+- that the board kept counting trials and timestamps where it was.
+
+Run from the `src` directory with
+
+    python -m benchmarks.link_recovery_benchmark [num_drops] [outage_s] [boot_delay_s]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from controllers.arduino_control import ArduinoManager, RESYNC_ACCEPT_LICKS
+from controllers.arduino_emulator import EmulatedRig
+from controllers.device_registry import DeviceRegistry
+from models.experiment_process_data import ExperimentProcessData
+
+
+def make_manager(rig: EmulatedRig, registry_dir: str) -> tuple[ArduinoManager, ExperimentProcessData]:
+    exp_data = ExperimentProcessData()
+    exp_data.generate_schedule()
+
+    registry = DeviceRegistry(os.path.join(registry_dir, "device_registry.json"))
+    manager = ArduinoManager(exp_data, rig.list_ports, rig.open_port, registry)
+
+    manager.send_experiment_variables()
+    manager.send_schedule_data()
+    manager.send_valve_durations()
+
+    manager.listener_thread = threading.Thread(target=manager.listen_for_serial, daemon=True)
+    manager.listener_thread.start()
+
+    def resync():
+        # what app_logic.StateMachine.resync_arduino does for a trial in TTC with the door down
+        manager.send_experiment_variables()
+        manager.send_schedule_data()
+        manager.send_valve_durations()
+
+        now = time.time()
+        manager.send_resync(
+            exp_data.current_trial_number - 1,
+            (now - exp_data.start_time) * 1000,
+            (now - exp_data.trial_start_time) * 1000,
+            RESYNC_ACCEPT_LICKS,
+        )
+        return True
+
+    manager.on_link_restored = resync
+    return manager, exp_data
+
+
+def drop_link(rig: EmulatedRig, manager: ArduinoManager, outage_s: float, new_port: str | None) -> float:
+    """Unplugs the board for `outage_s` and returns the seconds until the link is back up."""
+    rig.unplug()
+    start = time.perf_counter()
+
+    # the listener notices the drop on its next poll
+    while manager.link_lost_at is None:
+        time.sleep(0.001)
+
+    time.sleep(max(outage_s - (time.perf_counter() - start), 0))
+    rig.plug_in(new_port)
+
+    deadline = time.perf_counter() + 30
+    while manager.link_lost_at is not None:
+        if time.perf_counter() > deadline:
+            raise RuntimeError("link was not restored within 30 s")
+        time.sleep(0.001)
+    return time.perf_counter() - start
+
+
+def run(num_drops: int, outage_s: float, boot_delay_s: float) -> None:
+    rig = EmulatedRig(boot_delay_s=boot_delay_s, door_move_s=0.05)
+
+    with tempfile.TemporaryDirectory() as registry_dir:
+        manager, exp_data = make_manager(rig, registry_dir)
+
+        manager.send_command(b"T=0\n")
+        exp_data.start_time = time.time()
+
+        gaps = np.empty(num_drops)
+        resyncs = np.empty(num_drops)
+        for drop in range(num_drops):
+            exp_data.current_trial_number = drop + 1
+            exp_data.trial_start_time = time.time()
+            manager.send_command(b"TRIAL START\n")
+            time.sleep(0.05)
+
+            new_port = f"/dev/ttyEMU{drop + 1}" if drop % 2 else None
+            gaps[drop] = drop_link(rig, manager, outage_s, new_port)
+            resyncs[drop] = manager.last_resync_ms or 0
+
+            if rig.current_trial != exp_data.current_trial_number - 1:
+                raise RuntimeError(f"board is on trial {rig.current_trial}, expected {exp_data.current_trial_number - 1}")
+
+            drift_ms = rig.millis() - rig.program_start_ms - (time.time() - exp_data.start_time) * 1000
+            if abs(drift_ms) > 50:
+                raise RuntimeError(f"board clock is {drift_ms:.0f} ms off after resync")
+
+        recorded = [gap[1] - gap[0] for gap in manager.link_gaps]
+
+        manager.stop_listener_thread()
+        manager.close_connection()
+
+    print(f"{num_drops} drops, {outage_s:.2f} s outage, {boot_delay_s:.2f} s boot delay, board restarted {rig.boots} times")
+    print(
+        f"time to recover  mean {gaps.mean() * 1000:8.1f} ms  median {np.median(gaps) * 1000:8.1f} ms  max {gaps.max() * 1000:8.1f} ms"
+    )
+    print(
+        f"  of which resync mean {resyncs.mean():7.1f} ms  median {np.median(resyncs):8.1f} ms  max {resyncs.max():8.1f} ms"
+    )
+    print(f"recorded gaps    mean {np.mean(recorded) * 1000:8.1f} ms over {len(recorded)} gaps")
+    print(f"unrecovered time beyond the outage  mean {(gaps.mean() - outage_s) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+
+    num_drops = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    outage_s = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    boot_delay_s = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    run(num_drops, outage_s, boot_delay_s)
@@ -0,0 +1,106 @@
+"""
+Measures what recording a metric costs the code being measured, and checks that nothing recorded is lost when many threads record at
+once, including short lived threads like the program's state threads. Prints the cost per call of `Counter.inc`, `Gauge.set` and
+`Histogram.observe`, alone and with other threads recording into the same metrics, then the summary and quantile error of the recorded
+values.
+
+Run from the `src` directory with
+
+    python -m benchmarks.metrics_benchmark [num_observations] [num_threads]
+"""
+
+import sys
+import threading
+import time
+
+import numpy as np
+
+from metrics import MetricsRegistry, quantile
+
+
+def cost_per_call_ns(function, values) -> float:
+    start = time.perf_counter_ns()
+    for value in values:
+        function(value)
+    return (time.perf_counter_ns() - start) / len(values)
+
+
+def loop_overhead_ns(values) -> float:
+    return cost_per_call_ns(lambda value: None, values)
+
+
+def run(num_observations: int, num_threads: int) -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter("benchmark_total", "Calls.")
+    gauge = registry.gauge("benchmark_value", "Last value.")
+    histogram = registry.histogram("benchmark_seconds", "Values.")
+
+    rng = np.random.default_rng(0)
+    # roughly the spread of line processing times, from tens of microseconds to tens of milliseconds
+    values = rng.lognormal(mean=np.log(2e-4), sigma=1.5, size=num_observations).tolist()
+
+    overhead = loop_overhead_ns(values)
+    print(f"{num_observations} calls on one thread, loop overhead of {overhead:.0f} ns per call removed")
+    print(f"  Counter.inc        {cost_per_call_ns(counter.inc, [1] * num_observations) - overhead:6.0f} ns")
+    print(f"  Gauge.set          {cost_per_call_ns(gauge.set, values) - overhead:6.0f} ns")
+    print(f"  Histogram.observe  {cost_per_call_ns(histogram.observe, values) - overhead:6.0f} ns")
+
+    # the same again while other threads record, each new thread recording a slice and exiting
+    stop = threading.Event()
+    recorded_by_threads = [0]
+
+    def short_lived_recorder(chunk):
+        for value in chunk:
+            histogram.observe(value)
+            counter.inc()
+
+    def spawner():
+        chunks = [values[i : i + 1000] for i in range(0, len(values), 1000)]
+        while not stop.is_set():
+            for chunk in chunks:
+                thread = threading.Thread(target=short_lived_recorder, args=(chunk,))
+                thread.start()
+                thread.join()
+                recorded_by_threads[0] += len(chunk)
+                if stop.is_set():
+                    break
+
+    spawners = [threading.Thread(target=spawner) for _ in range(num_threads)]
+    for thread in spawners:
+        thread.start()
+
+    contended = cost_per_call_ns(histogram.observe, values) - overhead
+    stop.set()
+    for thread in spawners:
+        thread.join()
+
+    print(f"  Histogram.observe  {contended:6.0f} ns while {num_threads} threads record (per call, including GIL hand offs)")
+
+    expected_counter = num_observations + recorded_by_threads[0]
+    expected_values = 2 * num_observations + recorded_by_threads[0]
+    counts, total = histogram.snapshot()
+    if counter.value() != expected_counter or counts.sum() != expected_values:
+        raise RuntimeError(
+            f"lost updates: counter {counter.value():.0f} of {expected_counter}, histogram {counts.sum()} of {expected_values}"
+        )
+    print(f"no updates lost over {recorded_by_threads[0]} values from short lived threads, {len(histogram._shards)} live shards")
+
+    # quantile error against the exact values, for a histogram holding only the single thread values
+    exact = registry.histogram("benchmark_exact_seconds", "Values.")
+    for value in values:
+        exact.observe(value)
+    counts, _ = exact.snapshot()
+    bounds = exact.bucket_upper_bounds()
+    for q in (0.5, 0.95, 0.99, 0.999):
+        true_value = float(np.quantile(values, q))
+        estimate = quantile(counts, bounds, q)
+        print(f"  p{q * 100:g}  exact {true_value * 1000:8.3f} ms  histogram {estimate * 1000:8.3f} ms  error {(estimate / true_value - 1) * 100:+5.1f}%")
+
+    print()
+    print(registry.summary())
+
+
+if __name__ == "__main__":
+    num_observations = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    num_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    run(num_observations, num_threads)
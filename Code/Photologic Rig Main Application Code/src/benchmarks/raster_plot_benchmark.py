@@ -0,0 +1,84 @@
+"""
+Times raster plot updates over a long session, comparing the blitted `views.lick_raster.LickRaster` with the previous
+approach of adding a scatter per trial and redrawing the whole figure.
+
+Runs off screen on the Agg canvas, so it needs no display. Run from the `src` directory with
+
+    python -m benchmarks.raster_plot_benchmark [num_trials] [licks_per_trial]
+"""
+
+import sys
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from views.lick_raster import LickRaster
+
+
+def make_axes(num_trials: int):
+    fig = Figure()
+    canvas = FigureCanvasAgg(fig)
+    axes = fig.add_subplot()
+    axes.set_xlim(0, 21)
+    axes.set_ylim(0, num_trials + 1)
+    return canvas, axes
+
+
+def session_licks(num_trials: int, licks_per_trial: int) -> list[list[float]]:
+    rng = np.random.default_rng(0)
+    return [
+        np.sort(rng.uniform(0, 20, licks_per_trial)).tolist() for _ in range(num_trials)
+    ]
+
+
+def time_updates(update, trials: list[list[float]]) -> np.ndarray:
+    times = np.empty(len(trials))
+    for trial, licks in enumerate(trials):
+        start = time.perf_counter()
+        update(licks, trial)
+        times[trial] = time.perf_counter() - start
+    return times
+
+
+def legacy(num_trials: int, trials: list[list[float]]) -> np.ndarray:
+    canvas, axes = make_axes(num_trials)
+    colors = matplotlib.colormaps["tab10"]
+
+    def update(licks, trial):
+        x = [stamp - licks[0] for stamp in licks]
+        axes.scatter(x, [trial] * len(x), marker="|", c=[colors(trial % 10)], s=100)
+        canvas.draw()
+
+    return time_updates(update, trials)
+
+
+def blitted(num_trials: int, trials: list[list[float]]) -> np.ndarray:
+    canvas, axes = make_axes(num_trials)
+    raster = LickRaster(canvas, axes)
+    canvas.draw()
+
+    return time_updates(raster.add_trial, trials)
+
+
+def report(name: str, times: np.ndarray):
+    tenth = max(len(times) // 10, 1)
+    print(
+        f"{name:>8}: total {times.sum():7.2f} s, mean {times.mean() * 1000:7.2f} ms, "
+        f"first 10% {times[:tenth].mean() * 1000:7.2f} ms, last 10% {times[-tenth:].mean() * 1000:7.2f} ms per trial"
+    )
+
+
+if __name__ == "__main__":
+    num_trials = int(sys.argv[1]) if len(sys.argv) > 1 else 320
+    licks_per_trial = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    trials = session_licks(num_trials, licks_per_trial)
+    print(f"{num_trials} trials x {licks_per_trial} licks")
+    report("legacy", legacy(num_trials, trials))
+    report("blitted", blitted(num_trials, trials))
@@ -1,8 +1,18 @@
 """
 This module is used to establish communication with the Arduino board. It sends information like schedule, experiment variable, and
 valve duration information to the boar, along with other commands important for the operation of the Experiment Rig.
+
+The board is found through `controllers.device_registry`: the port it was last seen on is tried first, and every port is confirmed to be
+the rig's Arduino with the IDENTIFY handshake before it is used. If the USB link drops while the program runs, the port is reopened in the
+background as soon as the board is back. Reopening the port restarts the board, so during an experiment `on_link_restored` (see
+`app_logic.StateMachine.resync_arduino`) sends it everything it had been sent again and tells it where the experiment is with RESYNC.
+Every gap is recorded in `link_gaps` and queued for the event data as a "LINK LOST" event.
+
+The serial ports can be replaced with `controllers.arduino_emulator` to run the program, or measure recovery, without a board.
 """
 
+import collections
+import functools
 import serial
 import serial.tools.list_ports
 import time
@@ -11,6 +21,12 @@ import queue
 import logging
 import numpy as np
 
+import system_config
+from controllers.device_registry import DeviceRegistry, rig_controller_role
+from metrics import metrics
+from typing import Callable
+from serial.tools.list_ports_common import ListPortInfo
+
 ### USED FOR TYPE HINTING ###
 from models.experiment_process_data import ExperimentProcessData
 import numpy.typing as npt
@@ -24,6 +40,41 @@ logger = logging.getLogger(__name__)
 # each side has 8 valves, therefore 8 durations in each array
 VALVES_PER_SIDE = 8
 
+READ_TIMEOUT_S = 5
+"""Seconds to wait for the Arduino to echo back data it was sent before assuming the transmission failed."""
+
+SOFT_RESET_TIMEOUT_S = 2
+"""Seconds to wait for the Arduino to acknowledge a soft reset. Firmware that predates the command never acknowledges it."""
+
+SOFT_RESET_ACK = "SOFT RESET COMPLETE"
+
+IDENTITY = "PHOTOLOGIC RIG CONTROLLER"
+"""What the rig firmware answers to IDENTIFY."""
+
+IDENTIFY_TIMEOUT_S = 4
+"""Seconds to wait for the IDENTIFY answer. Opening the port restarts the board, so this has to cover the bootloader delay."""
+
+IDENTIFY_RETRY_S = 0.5
+"""IDENTIFY is sent again this often until answered, since commands sent while the bootloader runs are lost."""
+
+RECONNECT_INTERVAL_S = 0.25
+"""Seconds between attempts to reopen the port after the USB link drops."""
+
+MAX_BUFFERED_COMMANDS = 256
+"""Most commands kept while the link is down, the oldest are dropped past this."""
+
+RESYNC_TIMEOUT_S = 2
+"""Seconds to wait for the Arduino to acknowledge RESYNC."""
+
+RESYNC_ACK = "RESYNC COMPLETE"
+
+RESYNC_ACCEPT_LICKS = 1
+RESYNC_OPEN_VALVES = 2
+RESYNC_DOOR_DOWN = 4
+"""Bits of the RESYNC flags byte."""
+
+LINK_DROPS = metrics.counter("photologic_arduino_link_drops_total", "Times the USB link to the Arduino dropped.")
+
 
 class ArduinoManager:
     """
@@ -46,19 +97,43 @@ class ArduinoManager:
     us to exit the listener thread to avoid leaving threads busy when exiting the main application.
     - **listener_thread** (*threading.Thread | None*): Previously discussed peripherally, this is the thread that listens constantly for new information
     from the arduino board. The threads target method is the `listen_for_serial` method.
+    - **read_lock** (*threading.Lock*): Held by anything reading from the serial port, so the listener thread, verification reads and the valve
+    test listener never consume each other's bytes.
+    - **device_registry** (*DeviceRegistry*): Remembers the fingerprint and last port of the rig's Arduino, see `controllers.device_registry`.
+    - **role** (*str*): The role this rig's Arduino is recorded as in the registry, one per rig when a PC runs several (see `rig_manager`).
+    - **link_up** (*threading.Event*): Set while the serial link to the Arduino is working.
+    - **link_lost_at** (*float | None*): `time.time()` when the link dropped, None while it is up.
+    - **link_gaps** (*list[tuple[float, float]]*): Start and end (`time.time()`) of every period the link was down.
+    - **outbound_buffer** (*collections.deque[bytes]*): Commands sent while the link was down, sent in order once it is back.
+    - **on_link_restored** (*Callable[[], bool] | None*): Called on the reconnect thread once the port is reopened, before anything else
+    is sent or read, to bring the restarted board back to where the experiment is. It returns whether it did, in which case the commands
+    buffered during the gap are dropped, since it replaces them. Otherwise they are sent once it returns.
+    - **last_resync_ms** (*float | None*): How long `on_link_restored` took the last time it ran.
+    - **schedule_sent** (*bool*): Whether the board has been sent a schedule since the last reset, i.e. there is an experiment to resync.
+    - **door_down** (*bool*): Whether the last door command actually written to the board was DOWN.
 
     Methods
     -------
     - `connect_to_arduino`()
-        Scans available ports for devices named 'Arduino' to establish a connection with the Arduino board.
+        Connects to the rig's Arduino, trying the port it was last seen on first and confirming each port with the IDENTIFY handshake.
+    - `identify`(connection: serial.Serial, timeout: float)
+        Asks the board on an open port whether it is the rig's Arduino.
+    - `mark_link_lost`(error: Exception)
+        Records that the link dropped and starts reopening the port in the background.
+    - `send_resync`(current_trial, program_elapsed_ms, trial_elapsed_ms, flags)
+        Tells a restarted board which trial the experiment is on, how long it has run and which mode it is in.
+    - `wait_for_line`(expected, timeout)
+        Reads lines from the board until one matches.
     - `listen_for_serial`()
         Continuously listens for incoming serial data from the Arduino, adding received messages to `data_queue`.
     - `stop_listener_thread`()
         Signals the listener thread to stop and safely joins it back to the main thread.
     - `reset_arduino`()
         Sends a reset command to the Arduino board. Used after connection is established to clear any residual data on the board.
+    - `soft_reset`(timeout: float)
+        Clears the experiment state on the Arduino without restarting it, keeping the serial connection open for the next experiment.
     - `close_connection`()
-        Closes the serial connection to the Arduino board.
+        Closes the serial connection to the Arduino board and stops any reconnect attempts.
     - `send_experiment_variables`()
         Transmits experimental variables (number of stimuli and trials) to the Arduino for schedule configuration.
     - `send_schedule_data`()
@@ -71,9 +146,19 @@ class ArduinoManager:
         Requests and verifies the valve durations received by the Arduino by comparing against the sent values.
     - `send_command`(command: bytes)
         Sends a given command to the Arduino, ensuring communication reliability.
+    - `read_exact`(num_bytes: int, timeout: float | None, cancel_event: threading.Event | None)
+        Blocks until exactly `num_bytes` bytes arrive, the timeout expires or the read is cancelled.
+    - `cancel_read`()
+        Wakes a thread blocked in `read_exact` so it can exit without polling.
     """
 
-    def __init__(self, exp_data: ExperimentProcessData) -> None:
+    def __init__(
+        self,
+        exp_data: ExperimentProcessData,
+        list_ports: Callable[[], list[ListPortInfo]] = serial.tools.list_ports.comports,
+        open_port: Callable[[str, int], serial.Serial] = functools.partial(serial.Serial, exclusive=True),
+        device_registry: DeviceRegistry | None = None,
+    ) -> None:
         """
         Initialize and handle the ArduinoManager class. Here we establish the Arduino connection and reset the board to clear any
         residual data left on the Arduino board from previous experimental runs.
@@ -82,7 +167,16 @@ class ArduinoManager:
         ----------
         - **exp_data** (*ExperimentProcessData*): An instance of `models.experiment_process_data` ExperimentProcessData. Used to access
         experiment variables and send them to the Arduino board.
+        - **list_ports** (*Callable[[], list[ListPortInfo]], optional*): Lists the serial ports present. Defaults to pyserial's `comports`.
+        - **open_port** (*Callable[[str, int], serial.Serial], optional*): Opens a port at a baud rate. Defaults to `serial.Serial` with
+        exclusive access, so a port another rig's program has open is never opened too. Both are
+        replaced by `controllers.arduino_emulator` to run without a board.
+        - **device_registry** (*DeviceRegistry | None, optional*): Where known boards are recorded. Defaults to the registry in the assets
+        directory, an emulated board should be given its own so it is never recorded as the rig.
         """
+        self.list_ports = list_ports
+        self.open_port = open_port
+
         self.BAUD_RATE: int = 115200
         self.arduino: None | serial.Serial = None
 
@@ -92,6 +186,26 @@ class ArduinoManager:
         self.data_queue: queue.Queue[tuple[str, str]] = queue.Queue()
         self.stop_event: threading.Event = threading.Event()
         self.listener_thread: threading.Thread | None = None
+        self.read_lock: threading.Lock = threading.Lock()
+
+        if device_registry is None:
+            device_registry = DeviceRegistry(system_config.get_device_registry())
+        self.device_registry = device_registry
+        self.role = rig_controller_role(system_config.get_rig_name())
+
+        self.link_up: threading.Event = threading.Event()
+        self.link_lost_at: float | None = None
+        self.link_gaps: list[tuple[float, float]] = []
+        self.outbound_buffer: collections.deque[bytes] = collections.deque(maxlen=MAX_BUFFERED_COMMANDS)
+
+        self.on_link_restored: Callable[[], bool] | None = None
+        self.last_resync_ms: float | None = None
+        self.schedule_sent = False
+        self.door_down = False
+
+        self._link_lock = threading.Lock()
+        self._stop_reconnect = threading.Event()
+        self._reconnect_thread: threading.Thread | None = None
 
         # connect to the Arduino board if it is connected to the PC.
         self.connect_to_arduino()
@@ -101,29 +215,188 @@ class ArduinoManager:
         self.send_command(command=reset_arduino)
 
     def connect_to_arduino(self) -> None:
-        """Connect to the Arduino board by searching all serial ports for a device with a manufacturer name 'Arduino'. If
-        found, establish serial.Serial connection. If not notify user."""
-        ports = serial.tools.list_ports.comports()
-        arduino_port = None
-
-        # find the arduino boards so we don't waste time trying to connect to empty ports
-        for p in ports:
-            if p.manufacturer is not None and "Arduino" in p.manufacturer:
-                arduino_port = p
+        """Connect to the rig's Arduino. Ports are tried in the order given by `DeviceRegistry.candidates` (the port the board was last
+        seen on first) and each is confirmed with the IDENTIFY handshake, so another Arduino on the same PC is never picked. The board found
+        is recorded in the registry for next launch. If no port answers, the last Arduino port is used as before, for firmware that predates
+        IDENTIFY. If there is no Arduino at all, notify user."""
+        start = time.perf_counter()
+
+        candidates = self.device_registry.candidates(
+            self.role, self.list_ports()
+        )
+
+        for port_info in candidates:
+            connection = self.open_identified(port_info.device)
+            if connection is not None:
+                self.arduino = connection
+                self.device_registry.remember(self.role, port_info)
+                self.link_up.set()
+                logger.info(
+                    f"Arduino connected on port {port_info.device} in {(time.perf_counter() - start) * 1000:.0f} ms"
+                )
+                return
 
         # if we cannot find the arduino, no connection can be established, inform user and return.
-        if arduino_port is None:
+        if not candidates:
             error_message = (
                 "Arduino not connected. Reconnect Arduino and relaunch the program."
             )
             GUIUtils.display_error("Arduino Not Found", error_message)
             logger.error(error_message)
             return
-        else:
-            port = arduino_port.device
 
-            self.arduino = serial.Serial(port, self.BAUD_RATE)
-            logger.info(f"Arduino connected on port {port}")
+        port = candidates[0].device
+        logger.warning(
+            f"No port answered IDENTIFY, connecting to {port} without confirming it is the rig. Update the Arduino firmware."
+        )
+        try:
+            self.arduino = self.open_port(port, self.BAUD_RATE)
+        except serial.SerialException as e:
+            # e.g. the port is held open by another rig's program on this PC
+            error_message = f"Could not open the Arduino on {port}: {e}. Reconnect Arduino and relaunch the program."
+            GUIUtils.display_error("Arduino Not Found", error_message)
+            logger.error(error_message)
+            return
+
+        self.link_up.set()
+        logger.info(f"Arduino connected on port {port}")
+
+    def open_identified(self, port: str) -> serial.Serial | None:
+        """
+        Opens `port` and returns the connection if the board on it identifies as the rig's Arduino, otherwise closes it again.
+        """
+        try:
+            connection = self.open_port(port, self.BAUD_RATE)
+        except serial.SerialException as e:
+            logger.info(f"Could not open {port}: {e}")
+            return None
+
+        if self.identify(connection):
+            return connection
+
+        logger.info(f"Board on {port} did not identify as the rig's Arduino.")
+        connection.close()
+        return None
+
+    def identify(self, connection: serial.Serial, timeout: float = IDENTIFY_TIMEOUT_S) -> bool:
+        """
+        Sends IDENTIFY every `IDENTIFY_RETRY_S` until the board answers with `IDENTITY` or `timeout` runs out.
+
+        Parameters
+        ----------
+        - **connection** (*serial.Serial*): An open port.
+        - **timeout** (*float, optional*): Seconds to wait for the answer. Defaults to `IDENTIFY_TIMEOUT_S`.
+
+        Returns
+        -------
+        - *bool*: True if the board is the rig's Arduino.
+        """
+        deadline = time.perf_counter() + timeout
+
+        try:
+            connection.timeout = IDENTIFY_RETRY_S
+            while time.perf_counter() < deadline:
+                connection.write("IDENTIFY\n".encode("utf-8"))
+                line = connection.readline().decode("utf-8", errors="replace").strip()
+
+                # keep reading what the board has already sent before asking again
+                while line:
+                    if line == IDENTITY:
+                        return True
+                    line = connection.readline().decode("utf-8", errors="replace").strip()
+        except serial.SerialException as e:
+            logger.info(f"Error identifying board on {connection.port}: {e}")
+            return False
+        finally:
+            connection.timeout = None
+
+        return False
+
+    def mark_link_lost(self, error: Exception) -> None:
+        """
+        Called when reading from or writing to the port fails. Closes the port and starts a thread that reopens it once the board is back,
+        unless one is already running. Commands sent until then are buffered by `send_command`.
+        """
+        with self._link_lock:
+            if self.link_lost_at is not None:
+                return
+
+            self.link_lost_at = time.time()
+            self.link_up.clear()
+            LINK_DROPS.inc()
+            logger.error(f"Lost the link to the Arduino: {error}. Reconnecting...")
+
+            if self.arduino is not None:
+                try:
+                    self.arduino.close()
+                except serial.SerialException:
+                    pass
+
+            self._stop_reconnect.clear()
+            self._reconnect_thread = threading.Thread(
+                target=self._reconnect, name="ArduinoReconnect", daemon=True
+            )
+            self._reconnect_thread.start()
+
+    def _reconnect(self) -> None:
+        while not self._stop_reconnect.wait(RECONNECT_INTERVAL_S):
+            # only the board recorded as the rig is tried, never an unknown Arduino in the middle of a session
+            ports = self.list_ports()
+            for port_info in [p for p in ports if self.device_registry.matches(self.role, p)]:
+                connection = self.open_identified(port_info.device)
+                if connection is None:
+                    continue
+
+                with self.read_lock:
+                    self.arduino = connection
+                self.device_registry.remember(self.role, port_info)
+
+                if self.on_link_restored is not None:
+                    with self._link_lock:
+                        buffered_in_gap = len(self.outbound_buffer)
+
+                    start = time.perf_counter()
+                    try:
+                        resynchronized = self.on_link_restored()
+                    except Exception as e:
+                        logger.error(f"Error resynchronizing the Arduino after the link was restored: {e}")
+                        resynchronized = False
+                    self.last_resync_ms = (time.perf_counter() - start) * 1000
+
+                    if resynchronized:
+                        # the resync replaced what was buffered during the gap, commands buffered while it ran are still sent
+                        with self._link_lock:
+                            for _ in range(min(buffered_in_gap, len(self.outbound_buffer))):
+                                self.outbound_buffer.popleft()
+                        if buffered_in_gap:
+                            logger.info(f"Dropped {buffered_in_gap} commands buffered during the gap, the Arduino was resynchronized instead.")
+
+                # commands buffered since (or all of them, without a resync) are sent before the link is marked up, so they stay ahead
+                # of any new command
+                with self._link_lock:
+                    try:
+                        while self.outbound_buffer:
+                            connection.write(self.outbound_buffer[0])
+                            self.outbound_buffer.popleft()
+                    except serial.SerialException as e:
+                        logger.error(f"Arduino link dropped again while sending buffered commands: {e}")
+                        connection.close()
+                        break
+
+                    lost_at = self.link_lost_at
+                    restored_at = time.time()
+                    self.link_gaps.append((lost_at, restored_at))
+                    self.link_lost_at = None
+                    self.link_up.set()
+
+                logger.warning(
+                    f"Arduino link restored on {port_info.device} after {restored_at - lost_at:.1f} s"
+                    + (f", resynchronized in {self.last_resync_ms:.0f} ms." if self.on_link_restored is not None else ".")
+                )
+
+                # recorded in the event data by models.arduino_data, on the main thread
+                self.data_queue.put(("Arduino Link", f"LINK|LOST|{(restored_at - lost_at) * 1000:.0f}|{lost_at}"))
+                return
 
     def listen_for_serial(self) -> None:
         """
@@ -139,13 +412,22 @@ class ArduinoManager:
         while 1:
             if self.stop_event.is_set():
                 break
+
+            # wait out a dropped link instead of exiting, the port is reopened by the reconnect thread
+            if not self.link_up.is_set():
+                self.link_up.wait(0.1)
+                continue
+
             try:
                 if self.arduino.in_waiting > 0:
-                    data = self.arduino.readline().decode("utf-8").strip()
+                    with self.read_lock:
+                        data = self.arduino.readline().decode("utf-8").strip()
                     self.data_queue.put(("Arduino", data))
 
                     # log the received data
                     logger.info(f"Received -> {data} from arduino")
+            except (serial.SerialException, OSError) as e:
+                self.mark_link_lost(e)
             except Exception as e:
                 logger.error(f"Error reading from Arduino: {e}")
                 break
@@ -180,10 +462,131 @@ class ArduinoManager:
             GUIUtils.display_error("RESET ERROR", error_msg)
             logger.error(error_msg)
 
+    def soft_reset(self, timeout: float = SOFT_RESET_TIMEOUT_S) -> bool:
+        """
+        Sends a soft reset command to the Arduino and waits for it to be acknowledged. Unlike `reset_arduino`, the board does not restart, so
+        the serial connection stays open and there is no bootloader delay before the next experiment can be set up. Afterwards the listener
+        thread can be started again for the next experiment.
+
+        The listener thread must not be running, since the acknowledgement is read here.
+
+        Parameters
+        ----------
+        - **timeout** (*float, optional*): Seconds to wait for the acknowledgement. Defaults to `SOFT_RESET_TIMEOUT_S`.
+
+        Returns
+        -------
+        - *bool*: True if the Arduino acknowledged the reset. False if it is not connected, the port was closed, or it did not answer in
+        time (e.g. firmware without the command), in which case a full reset is needed.
+        """
+        if self.arduino is None or not self.arduino.is_open:
+            logger.warning("Cannot soft reset the Arduino, it is not connected.")
+            return False
+
+        # a new listener thread and queue are used for the next experiment
+        self.stop_event.clear()
+        self.listener_thread = None
+        self.data_queue = queue.Queue()
+
+        deadline = time.perf_counter() + timeout
+
+        try:
+            with self.read_lock:
+                # anything left over from the last experiment is stale
+                self.arduino.reset_input_buffer()
+                self.arduino.write("SOFT RESET\n".encode("utf-8"))
+                logger.info(f"Sent SOFT RESET to arduino on -> {self.arduino.port}")
+
+                if self.wait_for_line(SOFT_RESET_ACK, deadline - time.perf_counter()):
+                    logger.info("Arduino soft reset.")
+                    self.schedule_sent = False
+                    return True
+        except (serial.SerialException, OSError) as e:
+            logger.error(f"Error soft resetting Arduino: {e}")
+            self.mark_link_lost(e)
+            return False
+
+        logger.warning(f"Arduino did not acknowledge SOFT RESET within {timeout} s.")
+        return False
+
+    def wait_for_line(self, expected: str, timeout: float) -> bool:
+        """
+        Reads lines from the Arduino until one equals `expected` or `timeout` seconds pass. Other lines are logged and discarded. The
+        caller must hold `read_lock`.
+
+        Raises
+        ------
+        - *serial.SerialException*: If reading from the port fails.
+        """
+        deadline = time.perf_counter() + timeout
+
+        try:
+            while (remaining := deadline - time.perf_counter()) > 0:
+                self.arduino.timeout = remaining
+                line = self.arduino.readline().decode("utf-8", errors="replace").strip()
+
+                if line == expected:
+                    return True
+                if line:
+                    logger.info(f"Received -> {line} from arduino")
+        finally:
+            self.arduino.timeout = None
+
+        return False
+
+    def send_resync(
+        self,
+        current_trial: int,
+        program_elapsed_ms: float,
+        trial_elapsed_ms: float,
+        flags: int,
+        timeout: float = RESYNC_TIMEOUT_S,
+    ) -> bool:
+        """
+        Tells a board that restarted mid-experiment where the experiment is. Its variables, schedule and durations must have been sent
+        again first. Only used from `on_link_restored`, while the listener thread is waiting for the link.
+
+        Parameters
+        ----------
+        - **current_trial** (*int*): The board's 0-indexed trial number.
+        - **program_elapsed_ms** (*float*): Milliseconds since the experiment started (T=0), so timestamps continue where they were.
+        - **trial_elapsed_ms** (*float*): Milliseconds since the current trial started (TRIAL START).
+        - **flags** (*int*): `RESYNC_ACCEPT_LICKS`, `RESYNC_OPEN_VALVES` and `RESYNC_DOOR_DOWN` combined.
+        - **timeout** (*float, optional*): Seconds to wait for the acknowledgement. Defaults to `RESYNC_TIMEOUT_S`.
+
+        Returns
+        -------
+        - *bool*: True if the board acknowledged.
+        """
+        packet = (
+            np.array([current_trial], dtype="<u2").tobytes()
+            + np.array([program_elapsed_ms, trial_elapsed_ms], dtype="<u4").tobytes()
+            + np.uint8(flags).tobytes()
+        )
+
+        try:
+            with self.read_lock:
+                self.send_command("RESYNC\n".encode("utf-8"))
+                self.send_command(packet)
+
+                if self.wait_for_line(RESYNC_ACK, timeout):
+                    logger.info(f"Arduino resynchronized to trial {current_trial + 1}, {program_elapsed_ms / 1000:.1f} s into the experiment.")
+                    return True
+        except (serial.SerialException, OSError) as e:
+            logger.error(f"Error resynchronizing Arduino: {e}")
+            # a no-op on the reconnect thread, which is still recovering the link
+            self.mark_link_lost(e)
+            return False
+
+        logger.error(f"Arduino did not acknowledge RESYNC within {timeout} s.")
+        return False
+
     def close_connection(self) -> None:
-        """Close the serial connection to the Arduino board."""
+        """Close the serial connection to the Arduino board, and stop trying to reopen it if the link had dropped."""
+        self._stop_reconnect.set()
         if self.arduino is not None:
             self.arduino.close()
+        self.link_up.clear()
         logger.info("Closed connections to Arduino.")
 
     def send_experiment_variables(self):
@@ -205,12 +608,13 @@ class ArduinoManager:
         packet = num_stimuli + num_trials
         self.send_command(packet)
 
-    def send_schedule_data(self) -> None:
+    def send_schedule_data(self, show_errors: bool = True) -> bool:
         """
         Method to send valve schedule to the arduino so it know which valve to
         open on a given trial.
         First load np schedule arrays for both sides, turn them into bytes, and
-        set them back to back in a packet. i.e side two will follow side one
+        set them back to back in a packet. i.e side two will follow side one.
+        Returns whether the Arduino echoed the schedule back correctly, see `verify_schedule`.
         """
         side_one, side_two = self.arduino_data.load_schedule_indices()
 
@@ -221,13 +625,15 @@ class ArduinoManager:
         self.send_command(sched_command)
 
         self.send_command(schedule_packet)
+        self.schedule_sent = True
 
-        self.verify_schedule(side_one, side_two)
+        return self.verify_schedule(side_one, side_two, show_errors)
 
-    def send_valve_durations(self) -> None:
+    def send_valve_durations(self, show_errors: bool = True) -> bool:
         """
         Get side_one and side_two durations from `models.arduino_data` Arduino data model
         will load from arduino_data.toml from the last_used 'profile'.
+        Returns whether the Arduino echoed the durations back correctly, see `verify_durations`.
         """
         side_one, side_two, _ = self.arduino_data.load_durations()
 
@@ -242,17 +648,25 @@ class ArduinoManager:
 
         self.send_command(dur_packet)
 
-        self.verify_durations(side_one, side_two)
+        return self.verify_durations(side_one, side_two, show_errors)
 
     def verify_schedule(
-        self, side_one: npt.NDArray[np.int8], side_two: npt.NDArray[np.int8]
-    ) -> None:
+        self,
+        side_one: npt.NDArray[np.int8],
+        side_two: npt.NDArray[np.int8],
+        show_errors: bool = True,
+    ) -> bool:
         """
         Method to tell arduino to give us the schedules that it
         recieved. It will send data byte by byte in the order that it
         recieved it (side one schedule, then side two) it will send EXACTLY
         num_trials * 2 bytes (8 bit / 1 byte int for each trial on each side).
-        if successful we continue execution and log success message.
+        if successful we continue execution and log success message. Errors are logged, and also shown in a message box
+        if `show_errors` is True, which must only be done from the main thread.
+
+        Returns
+        -------
+        - *bool*: True if the Arduino echoed back the schedule it was sent.
         """
         try:
             ver_sched_command = "VER SCHED\n".encode("utf-8")
@@ -266,22 +680,22 @@ class ArduinoManager:
             if self.arduino is None:
                 msg = "ARDUINO IS NOT CONNECTED! Try reconnecting and restart the program."
                 logger.error(msg)
-                GUIUtils.display_error("ARDUINO ERROR", msg)
+                if show_errors:
+                    GUIUtils.display_error("ARDUINO ERROR", msg)
 
-                return
+                return False
 
-            # wait for the data to arrive
-            while self.arduino.in_waiting < 0:
-                pass
+            # wait for the data to arrive, one byte per trial for each side
+            data = self.read_exact(num_trials * 2, timeout=READ_TIMEOUT_S)
+            if data is None:
+                msg = "Arduino did not echo back the schedule in time."
+                logger.error(msg)
+                if show_errors:
+                    GUIUtils.display_error("======SCHEDULE ERROR======", msg)
+                return False
 
-            for i in range(num_trials):
-                ver1[i] = int.from_bytes(
-                    self.arduino.read(), byteorder="little", signed=False
-                )
-            for i in range(num_trials):
-                ver2[i] = int.from_bytes(
-                    self.arduino.read(), byteorder="little", signed=False
-                )
+            ver1[:] = np.frombuffer(data[:num_trials], dtype=np.uint8)
+            ver2[:] = np.frombuffer(data[num_trials:], dtype=np.uint8)
             logger.info(f"Arduino recieved side one as => {ver1}")
             logger.info(f"Arduino recieved side two as => {ver2}")
 
@@ -289,7 +703,10 @@ class ArduinoManager:
                 logger.info(
                     "arduino has recieved and verified experiment valve schedule"
                 )
-            else:
+                return True
+
+            logger.error("Arduino did not receive the correct schedule.")
+            if show_errors:
                 GUIUtils.display_error(
                     "======SCHEDULE ERROR======",
                     "ARDUINO did not recieve the correct schedule. Please restart the program and attempt\
@@ -297,16 +714,25 @@ class ArduinoManager:
                 )
         except Exception as e:
             logger.error(f"error verifying arduino schedule {e}")
+        return False
 
     def verify_durations(
-        self, side_one: npt.NDArray[np.int32], side_two: npt.NDArray[np.int32]
-    ) -> None:
+        self,
+        side_one: npt.NDArray[np.int32],
+        side_two: npt.NDArray[np.int32],
+        show_errors: bool = True,
+    ) -> bool:
         """
         Method to tell arduino to give us the schedules that it
         recieved. It will send data byte by byte in the order that it
         recieved it (side one schedule, then side two) it will send EXACTLY
         num_trials * 2 bytes (8 bit / 1 byte int for each trial on each side).
-        if successful we continue execution and log success message.
+        if successful we continue execution and log success message. Errors are logged, and also shown in a message box
+        if `show_errors` is True, which must only be done from the main thread.
+
+        Returns
+        -------
+        - *bool*: True if the Arduino echoed back the durations it was sent.
         """
         try:
             ver_dur_command = "VER DURATIONS\n".encode("utf-8")
@@ -318,30 +744,33 @@ class ArduinoManager:
             if self.arduino is None:
                 msg = "ARDUINO IS NOT CONNECTED! Try reconnecting and restart the program."
                 logger.error(msg)
-                GUIUtils.display_error("ARDUINO ERROR", msg)
+                if show_errors:
+                    GUIUtils.display_error("ARDUINO ERROR", msg)
 
-                return
+                return False
 
-            # wait for the data to arrive
-            while self.arduino.in_waiting < 4 * 8:
-                pass
-            for i in range(VALVES_PER_SIDE):
-                duration = int.from_bytes(
-                    self.arduino.read(4), byteorder="little", signed=False
-                )
-                ver1[i] = duration
-            for i in range(VALVES_PER_SIDE):
-                duration = int.from_bytes(
-                    self.arduino.read(4), byteorder="little", signed=False
-                )
-                ver2[i] = duration
+            # wait for the data to arrive, 4 bytes per duration for each side
+            data = self.read_exact(4 * VALVES_PER_SIDE * 2, timeout=READ_TIMEOUT_S)
+            if data is None:
+                msg = "Arduino did not echo back the valve durations in time."
+                logger.error(msg)
+                if show_errors:
+                    GUIUtils.display_error("======DURATIONS ERROR======", msg)
+                return False
+
+            durations = np.frombuffer(data, dtype="<u4")
+            ver1[:] = durations[:VALVES_PER_SIDE]
+            ver2[:] = durations[VALVES_PER_SIDE:]
 
             logger.info(f"Arduino recieved side one as => {ver1}")
             logger.info(f"Arduino recieved side two as => {ver2}")
 
             if np.array_equal(side_one, ver1) and np.array_equal(side_two, ver2):
                 logger.info("arduino has recieved and verified valve durations")
-            else:
+                return True
+
+            logger.error("Arduino did not receive the correct valve durations.")
+            if show_errors:
                 GUIUtils.display_error(
                     "======DURATIONS ERROR======",
                     "ARDUINO did not recieve the correct valve durations. Please restart the program and attempt\
@@ -349,6 +778,7 @@ class ArduinoManager:
                 )
         except Exception as e:
             logger.error(f"error verifying arduino durations -> {e}")
+        return False
 
     def send_command(self, command: bytes):
         """
@@ -363,10 +793,91 @@ class ArduinoManager:
             logger.error(error_message)
             return
 
+        with self._link_lock:
+            # the reconnect thread writes to the reopened port while resynchronizing, everyone else waits for the link
+            if self.link_lost_at is not None and threading.current_thread() is not self._reconnect_thread:
+                if len(self.outbound_buffer) == self.outbound_buffer.maxlen:
+                    logger.error(f"Arduino command buffer full, dropping {self.outbound_buffer[0]}")
+                self.outbound_buffer.append(command)
+                logger.warning(f"Arduino link is down, buffered {command}")
+                return
+
         try:
             self.arduino.write(command)
             logger.info(f"Sent {command} to arduino on -> {self.arduino.port}: ")
+
+            if command in (b"UP\n", b"DOWN\n"):
+                self.door_down = command == b"DOWN\n"
+        except (serial.SerialException, OSError) as e:
+            # the link dropped, send the command again once it is back
+            self.mark_link_lost(e)
+            with self._link_lock:
+                self.outbound_buffer.append(command)
         except Exception as e:
             error_message = f"Error sending command to {self.arduino.port} Arduino: {e}"
             GUIUtils.display_error("Error sending command to Arduino:", error_message)
             logger.error(error_message)
+
+    def read_exact(
+        self,
+        num_bytes: int,
+        timeout: float | None = None,
+        cancel_event: threading.Event | None = None,
+    ) -> bytes | None:
+        """
+        Reads exactly `num_bytes` bytes from the Arduino. The calling thread sleeps inside the serial driver until the bytes arrive
+        instead of spinning on `in_waiting`, so waiting costs no CPU.
+
+        Parameters
+        ----------
+        - **num_bytes** (*int*): Number of bytes to read.
+        - **timeout** (*float | None, optional*): Seconds to wait before giving up. None waits until the bytes arrive or `cancel_read`
+        is called.
+        - **cancel_event** (*threading.Event | None, optional*): If this event is set before or during the read, the read is treated as
+        cancelled.
+
+        Returns
+        -------
+        - *bytes | None*: The bytes read, or None if the Arduino is not connected, the read timed out, it was cancelled or the link dropped
+        (in which case the port is reopened by `mark_link_lost`).
+        """
+        if self.arduino is None:
+            logger.error("Attempted to read from the Arduino, but it is not connected.")
+            return None
+
+        with self.read_lock:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+
+            self.arduino.timeout = timeout
+            try:
+                data = self.arduino.read(num_bytes)
+            except (serial.SerialException, OSError) as e:
+                logger.error(f"Error reading from Arduino: {e}")
+                self.mark_link_lost(e)
+                return None
+            finally:
+                self.arduino.timeout = None
+
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+
+        if len(data) < num_bytes:
+            logger.error(
+                f"Timed out waiting for the Arduino, expected {num_bytes} bytes and received {len(data)}."
+            )
+            return None
+
+        return data
+
+    def cancel_read(self) -> None:
+        """
+        Interrupts a read blocked in `read_exact` on another thread. Used to stop listener threads immediately on abort.
+        """
+        if self.arduino is None:
+            return
+
+        try:
+            self.arduino.cancel_read()
+        except (AttributeError, NotImplementedError, serial.SerialException) as e:
+            logger.error(f"Could not cancel pending Arduino read: {e}")
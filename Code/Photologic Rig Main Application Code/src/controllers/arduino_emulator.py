@@ -0,0 +1,396 @@
+"""
+This module defines the EmulatedRig class, a stand-in for the rig's Arduino (`ArduinoCode.ino`) that `controllers.arduino_control`
+can talk to in place of a real serial port.
+
+It answers the same commands with the same replies and report formats as the firmware, so the program (or a benchmark) can run a
+session without a board. The USB link can be pulled with `unplug` and restored with `plug_in`, optionally under a different port name.
+Like the real board, the emulated one restarts whenever its port is opened, so everything it was sent is lost and commands sent during
+the bootloader delay are ignored. This is what `benchmarks.link_recovery_benchmark` uses to measure how fast a dropped link recovers.
+
+Pass `list_ports` and `open_port` of an EmulatedRig to `controllers.arduino_control.ArduinoManager`.
+"""
+
+import threading
+import time
+
+import numpy as np
+import serial
+from serial.tools.list_ports_common import ListPortInfo
+
+from rig_config_service import rig_config
+
+DEVICE_IDENTITY = "PHOTOLOGIC RIG CONTROLLER"
+"""What the firmware answers to IDENTIFY."""
+
+VALVES_PER_SIDE = 8
+
+BOOT_DELAY_S = 0.0
+"""Default time the emulated bootloader ignores input after the port is opened. A real Mega takes about 1.5 s."""
+
+PAYLOAD_COMMANDS = ("REC VAR", "REC SCHED", "REC DURATIONS", "RESYNC")
+"""Commands followed by binary data."""
+
+DOOR_CONFIG = rig_config.section("door_motor_config")
+
+
+class EmulatedRig:
+    """
+    One emulated rig Arduino and the USB port it is plugged into.
+
+    Attributes
+    ----------
+    - **port** (*str*): The port name the board is currently on.
+    - **serial_number** (*str*): USB serial number of the board, so the device registry can recognise it.
+    - **plugged_in** (*bool*): Whether the board is currently present.
+    - **boot_delay_s** (*float*): Seconds after opening the port during which input is ignored.
+    - **door_move_s** (*float | None*): Seconds a door movement takes, None to use `DOOR_MOVE_TIME` from the rig config.
+    - **connection** (*EmulatedSerial | None*): The open connection to the board, if any.
+    - **boots** (*int*): How many times the board has restarted.
+
+    Methods
+    -------
+    - `list_ports`()
+        Returns the port of the board, if plugged in, like `serial.tools.list_ports.comports`.
+    - `open_port`(port, baud_rate)
+        Opens the board's port, like `serial.Serial`. This restarts the board.
+    - `unplug`()
+        Pulls the USB cable, failing every read and write on the open connection.
+    - `plug_in`(port)
+        Plugs the board back in, optionally on a different port.
+    - `lick`(side, duration_ms)
+        Reports a lick on a side as the firmware would, if licks are being accepted.
+    """
+
+    def __init__(
+        self,
+        port: str = "/dev/ttyEMU0",
+        serial_number: str = "EMULATED0001",
+        boot_delay_s: float = BOOT_DELAY_S,
+        door_move_s: float | None = None,
+    ):
+        self.port = port
+        self.serial_number = serial_number
+        self.plugged_in = True
+        self.boot_delay_s = boot_delay_s
+        self.door_move_s = door_move_s
+
+        self.connection: EmulatedSerial | None = None
+        self.boots = 0
+
+        self._lock = threading.RLock()
+        self._boot()
+
+    def list_ports(self) -> list[ListPortInfo]:
+        if not self.plugged_in:
+            return []
+
+        port_info = ListPortInfo(self.port, skip_link_detection=True)
+        port_info.vid = 0x2341
+        port_info.pid = 0x0042
+        port_info.serial_number = self.serial_number
+        port_info.manufacturer = "Arduino (www.arduino.cc)"
+        port_info.description = "Emulated Photologic rig controller"
+        return [port_info]
+
+    def open_port(self, port: str, baud_rate: int = 115200) -> "EmulatedSerial":
+        """
+        Raises
+        ------
+        - *serial.SerialException*: If the board is unplugged or not on `port`.
+        """
+        with self._lock:
+            if not self.plugged_in or port != self.port:
+                raise serial.SerialException(f"could not open port {port}: No such file or directory")
+
+            if self.connection is not None:
+                self.connection.fail("port reopened")
+
+            self._boot()
+            self.connection = EmulatedSerial(self, port)
+            return self.connection
+
+    def unplug(self) -> None:
+        with self._lock:
+            self.plugged_in = False
+            if self.connection is not None:
+                self.connection.fail("device reports readiness to read but returned no data (device disconnected?)")
+                self.connection = None
+
+    def plug_in(self, port: str | None = None) -> None:
+        with self._lock:
+            if port is not None:
+                self.port = port
+            self.plugged_in = True
+
+    def _boot(self) -> None:
+        """Clears everything the firmware keeps in memory, as a restart does."""
+        self.boots += 1
+        self._booted_at = time.monotonic()
+        self._generation = self.boots
+
+        self._buffer = bytearray()
+        self._pending: str | None = None
+
+        self.num_stimuli = 0
+        self.num_trials = 0
+        self.schedule = (np.zeros(0, dtype=np.uint8), np.zeros(0, dtype=np.uint8))
+        self.durations = (np.zeros(VALVES_PER_SIDE, dtype="<u4"), np.zeros(VALVES_PER_SIDE, dtype="<u4"))
+
+        self.current_trial = 0
+        self.program_start_ms = 0
+        self.trial_start_ms = 0
+        self.accept_licks = False
+        self.open_valves = False
+        # the stepper counts from wherever the door is at startup as the up position
+        self._stepper_down = False
+
+    def millis(self) -> int:
+        return int((time.monotonic() - self._booted_at) * 1000)
+
+    def _payload_size(self, command: str) -> int:
+        return {
+            "REC VAR": 2,
+            "REC SCHED": self.num_trials * 2,
+            "REC DURATIONS": 4 * VALVES_PER_SIDE * 2,
+            "RESYNC": 11,
+        }.get(command, 0)
+
+    def receive(self, data: bytes) -> None:
+        """Handles bytes written to the board by the controller."""
+        with self._lock:
+            if time.monotonic() - self._booted_at < self.boot_delay_s:
+                # the bootloader is still running
+                return
+
+            self._buffer += data
+            while True:
+                if self._pending is not None:
+                    size = self._payload_size(self._pending)
+                    if len(self._buffer) < size:
+                        return
+                    payload = bytes(self._buffer[:size])
+                    del self._buffer[:size]
+                    self._handle_payload(self._pending, payload)
+                    self._pending = None
+                    continue
+
+                newline = self._buffer.find(b"\n")
+                if newline < 0:
+                    return
+                command = self._buffer[:newline].decode("utf-8", errors="replace")
+                del self._buffer[: newline + 1]
+
+                if command in PAYLOAD_COMMANDS:
+                    self._pending = command
+                else:
+                    self._handle_command(command)
+
+    def _send(self, data: bytes) -> None:
+        if self.connection is not None:
+            self.connection.feed(data)
+
+    def _println(self, line: str) -> None:
+        self._send(f"{line}\r\n".encode("utf-8"))
+
+    def _handle_payload(self, command: str, payload: bytes) -> None:
+        if command == "REC VAR":
+            self.num_stimuli, self.num_trials = payload[0], payload[1]
+        elif command == "REC SCHED":
+            self.schedule = (
+                np.frombuffer(payload[: self.num_trials], dtype=np.uint8),
+                np.frombuffer(payload[self.num_trials :], dtype=np.uint8),
+            )
+        elif command == "REC DURATIONS":
+            durations = np.frombuffer(payload, dtype="<u4")
+            self.durations = (durations[:VALVES_PER_SIDE], durations[VALVES_PER_SIDE:])
+        elif command == "RESYNC":
+            current_trial = int(np.frombuffer(payload[:2], dtype="<u2")[0])
+            program_elapsed, trial_elapsed = np.frombuffer(payload[2:10], dtype="<u4")
+            flags = payload[10]
+
+            now = self.millis()
+            self.current_trial = current_trial
+            self.program_start_ms = now - int(program_elapsed)
+            self.trial_start_ms = now - int(trial_elapsed)
+            self.accept_licks = bool(flags & 1)
+            self.open_valves = bool(flags & 2)
+            self._stepper_down = bool(flags & 4)
+
+            self._println("RESYNC COMPLETE")
+
+    def _handle_command(self, command: str) -> None:
+        if command == "IDENTIFY":
+            self._println(DEVICE_IDENTITY)
+        elif command == "T=0":
+            self.program_start_ms = self.millis()
+            self.trial_start_ms = self.program_start_ms
+        elif command == "TRIAL START":
+            self.trial_start_ms = self.millis()
+            self.accept_licks = True
+        elif command == "BEGIN OPEN VALVES":
+            self.open_valves = True
+        elif command == "STOP OPEN VALVES":
+            self.open_valves = False
+        elif command in ("UP", "DOWN"):
+            self._move_door(command)
+        elif command == "VER SCHED":
+            self._send(self.schedule[0].tobytes() + self.schedule[1].tobytes())
+        elif command == "VER DURATIONS":
+            self._send(self.durations[0].tobytes() + self.durations[1].tobytes())
+        elif command == "SOFT RESET":
+            generation = self._generation
+            durations = self.durations
+            self._boot()
+            # a soft reset keeps the connection, the clock and the valve durations
+            self.boots -= 1
+            self._generation = generation
+            self.durations = durations
+            self._println("SOFT RESET COMPLETE")
+        elif command == "RESET":
+            # the watchdog restarts the board, which closes nothing on the pc side
+            self._boot()
+        else:
+            self._println(f"Unknown command received: {command}")
+
+    def _move_door(self, movement: str) -> None:
+        down = movement == "DOWN"
+        start = self.millis()
+        generation = self._generation
+
+        if self._stepper_down == down:
+            move_s = 0.0
+        elif self.door_move_s is not None:
+            move_s = self.door_move_s
+        else:
+            move_s = DOOR_CONFIG["DOOR_MOVE_TIME"] / 1000
+        self._stepper_down = down
+
+        def finish():
+            with self._lock:
+                # a restart during the movement loses the report, like the firmware
+                if generation != self._generation:
+                    return
+
+                end = self.millis()
+                self._println(
+                    f"MOTOR|{movement}|{end - start}|{end - self.program_start_ms}|{end - self.trial_start_ms}"
+                )
+                if movement == "UP":
+                    self.current_trial += 1
+                    self.accept_licks = False
+
+        timer = threading.Timer(move_s, finish)
+        timer.daemon = True
+        timer.start()
+
+    def lick(self, side: int, duration_ms: int = 50) -> None:
+        """
+        Reports a lick on `side` (0 or 1) that started `duration_ms` ago, in the TTC format or, while valves are being opened, the
+        SAMPLE format with the scheduled valve's duration. Does nothing if the board is not accepting licks.
+        """
+        with self._lock:
+            if not self.accept_licks:
+                return
+
+            onset = self.millis() - duration_ms
+            timing = f"{onset - self.program_start_ms}|{onset - self.trial_start_ms}"
+
+            if not self.open_valves:
+                self._println(f"{side}|{duration_ms}|{timing}")
+                return
+
+            valve = 0
+            if self.current_trial < len(self.schedule[side]):
+                valve = self.schedule[side][self.current_trial]
+            valve_duration = self.durations[side][valve]
+            self._println(f"{side}|{duration_ms}|{valve_duration}|{timing}")
+
+
+class EmulatedSerial:
+    """
+    The part of `serial.Serial` that `controllers.arduino_control` uses, connected to an `EmulatedRig`. Once the board is unplugged
+    or the port is reopened, every read and write raises `serial.SerialException` like a real port whose device went away.
+    """
+
+    def __init__(self, rig: EmulatedRig, port: str):
+        self.rig = rig
+        self.port = port
+        self.is_open = True
+        self.timeout: float | None = None
+
+        self._output = bytearray()
+        self._condition = threading.Condition()
+        self._error: str | None = None
+        self._cancelled = False
+
+    def feed(self, data: bytes) -> None:
+        """Queues bytes sent by the board for the controller to read."""
+        with self._condition:
+            self._output += data
+            self._condition.notify_all()
+
+    def fail(self, reason: str) -> None:
+        with self._condition:
+            self._error = reason
+            self._condition.notify_all()
+
+    def _check(self) -> None:
+        if not self.is_open:
+            raise serial.PortNotOpenError()
+        if self._error is not None:
+            raise serial.SerialException(self._error)
+
+    @property
+    def in_waiting(self) -> int:
+        with self._condition:
+            self._check()
+            return len(self._output)
+
+    def write(self, data: bytes) -> int:
+        with self._condition:
+            self._check()
+        self.rig.receive(bytes(data))
+        return len(data)
+
+    def _wait_for(self, ready) -> None:
+        """Blocks until `ready`() is true, the timeout expires or the read is cancelled. Called holding the condition."""
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while not ready():
+            self._check()
+            if self._cancelled:
+                break
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            self._condition.wait(remaining)
+        self._cancelled = False
+        self._check()
+
+    def read(self, size: int = 1) -> bytes:
+        with self._condition:
+            self._wait_for(lambda: len(self._output) >= size)
+            data = bytes(self._output[:size])
+            del self._output[:size]
+            return data
+
+    def readline(self) -> bytes:
+        with self._condition:
+            self._wait_for(lambda: b"\n" in self._output)
+            end = self._output.find(b"\n") + 1 or len(self._output)
+            data = bytes(self._output[:end])
+            del self._output[:end]
+            return data
+
+    def reset_input_buffer(self) -> None:
+        with self._condition:
+            self._output.clear()
+
+    def cancel_read(self) -> None:
+        with self._condition:
+            self._cancelled = True
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        with self._condition:
+            self.is_open = False
+            self._condition.notify_all()
@@ -0,0 +1,400 @@
+"""
+This module is used to read dispensed mass from laboratory balances during valve testing, so that a calibration can run without a person
+weighing each tube and typing the result in.
+
+One balance sits under each side of the rig. Balances are configured in the `balance_config` section of the rig config file: either real
+balances connected over a serial/USB port, or simulated balances that model the flow of each valve so the automatic calibration flow can be
+exercised without the hardware. Most laboratory balances accept a short text command to tare and another to print the current reading,
+those commands are configurable since they vary between manufacturers.
+"""
+
+import logging
+import re
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+import serial
+
+from rig_config_service import rig_config
+
+logger = logging.getLogger(__name__)
+
+BALANCE_CONFIG = rig_config.section("balance_config")
+
+READING_PATTERN = re.compile(r"([-+]?\s*\d+(?:\.\d+)?)\s*(mg|kg|g)?", re.IGNORECASE)
+"""Matches the numeric reading and optional unit in a balance's response, e.g. `"+   12.3456 g"`."""
+
+UNIT_TO_GRAMS = {"mg": 0.001, "g": 1.0, "kg": 1000.0}
+
+
+class BalanceError(Exception):
+    """Raised when a balance cannot be reached or does not settle on a stable reading in time."""
+
+
+class Balance(ABC):
+    """
+    Base class for a balance under one side of the rig. Subclasses implement `tare` and `read_mass`, stable readings are built on top of them.
+
+    Attributes
+    ----------
+    - **name** (*str*): Name used in logs and error messages, e.g. "Side One".
+    - **stable_readings** (*int*): Number of consecutive readings that must agree for a reading to count as stable.
+    - **stable_tolerance_g** (*float*): Maximum spread in grams between those readings.
+    - **read_timeout_s** (*float*): Seconds to wait for a stable reading before giving up.
+
+    Methods
+    -------
+    - `tare`()
+        Zeroes the balance.
+    - `read_mass`()
+        Takes a single reading in grams.
+    - `read_stable_mass`()
+        Takes readings until `stable_readings` in a row agree, then returns their mean.
+    - `notify_dispense`(valve, duration_us, actuations)
+        Called after a valve's actuation block. Real balances ignore this, the simulated balance uses it to add mass.
+    - `close`()
+        Releases the connection to the balance.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        stable_readings: int,
+        stable_tolerance_g: float,
+        read_timeout_s: float,
+    ):
+        self.name = name
+        self.stable_readings = stable_readings
+        self.stable_tolerance_g = stable_tolerance_g
+        self.read_timeout_s = read_timeout_s
+
+    @abstractmethod
+    def tare(self) -> None:
+        """
+        Zeroes the balance, so the next reading is the mass added after this call.
+
+        Raises
+        ------
+        - *BalanceError*: If the balance cannot be reached or does not settle at zero.
+        """
+
+    @abstractmethod
+    def read_mass(self) -> float:
+        """
+        Takes a single reading, which may still be moving. Use `read_stable_mass` for a reading that is used as a result.
+
+        Returns
+        -------
+        - *float*: The reading in grams.
+
+        Raises
+        ------
+        - *BalanceError*: If the balance cannot be reached or its answer cannot be read.
+        """
+
+    def read_stable_mass(self) -> float:
+        """
+        Reads the balance until `stable_readings` consecutive readings span no more than `stable_tolerance_g`, so a reading is not taken
+        while the last drops are still landing or the pan is still settling.
+
+        Returns
+        -------
+        - *float*: Mean of the stable readings in grams.
+
+        Raises
+        ------
+        - *BalanceError*: If no stable reading is found within `read_timeout_s`.
+        """
+        readings = []
+        deadline = time.monotonic() + self.read_timeout_s
+
+        while time.monotonic() < deadline:
+            readings.append(self.read_mass())
+            readings = readings[-self.stable_readings :]
+
+            if (
+                len(readings) == self.stable_readings
+                and max(readings) - min(readings) <= self.stable_tolerance_g
+            ):
+                return float(np.mean(readings))
+
+        raise BalanceError(
+            f"{self.name} balance did not settle within {self.read_timeout_s} seconds, last readings {readings}"
+        )
+
+    def notify_dispense(self, valve: int, duration_us: int, actuations: int) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SerialBalance(Balance):
+    """
+    A balance connected over a serial or USB-serial port that answers text commands.
+
+    Attributes
+    ----------
+    - **port** (*str*): Serial port the balance is connected to, e.g. "COM5".
+    - **connection** (*serial.Serial*): The open serial connection.
+    - **tare_command** (*bytes*): Command that zeroes the balance.
+    - **read_command** (*bytes*): Command that makes the balance print its current reading.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        port: str,
+        baud_rate: int,
+        tare_command: str,
+        read_command: str,
+        **stability,
+    ):
+        """
+        Opens the serial connection to the balance.
+
+        Raises
+        ------
+        - *BalanceError*: If the port cannot be opened.
+        """
+        super().__init__(name, **stability)
+        self.port = port
+        self.tare_command = f"{tare_command}\r\n".encode("ascii")
+        self.read_command = f"{read_command}\r\n".encode("ascii")
+
+        try:
+            self.connection = serial.Serial(port, baud_rate, timeout=1)
+        except serial.SerialException as e:
+            raise BalanceError(f"Could not open {name} balance on {port}: {e}")
+
+        logger.info(f"{name} balance connected on port {port}")
+
+    def tare(self) -> None:
+        """
+        Sends the tare command and waits for the balance to settle at zero.
+
+        Raises
+        ------
+        - *BalanceError*: If the port fails while the command is sent, or the balance does not settle in time.
+        """
+        try:
+            self.connection.reset_input_buffer()
+            self.connection.write(self.tare_command)
+            self.connection.flush()
+        except (serial.SerialException, OSError) as e:
+            raise BalanceError(f"Could not tare {self.name} balance on {self.port}: {e}") from e
+        self.read_stable_mass()
+
+    def read_mass(self) -> float:
+        """
+        Requests one reading and parses the number and unit from the response.
+
+        Returns
+        -------
+        - *float*: The reading in grams.
+
+        Raises
+        ------
+        - *BalanceError*: If the balance does not answer or the answer has no number in it.
+        """
+        try:
+            self.connection.reset_input_buffer()
+            self.connection.write(self.read_command)
+            response = self.connection.readline().decode("ascii", errors="ignore")
+        except (serial.SerialException, OSError) as e:
+            raise BalanceError(f"Could not read {self.name} balance on {self.port}: {e}") from e
+
+        match = READING_PATTERN.search(response)
+        if match is None:
+            raise BalanceError(f"{self.name} balance sent unreadable response {response!r}")
+
+        value = float(match.group(1).replace(" ", ""))
+        unit = (match.group(2) or "g").lower()
+        return value * UNIT_TO_GRAMS[unit]
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class SimulatedBalance(Balance):
+    """
+    A balance that models dispensing instead of weighing, used to run the calibration flow without hardware.
+
+    Each valve is given a fixed random affine flow curve (microliters per actuation = slope * (duration - dead time)), and each
+    `notify_dispense` adds the resulting mass plus a little measurement noise.
+
+    Attributes
+    ----------
+    - **mass_g** (*float*): Mass currently on the simulated pan.
+    - **density** (*float*): Liquid density in g/mL used to convert dispensed volume to mass.
+    """
+
+    def __init__(self, name: str, density: float, seed: int, **stability):
+        super().__init__(name, **stability)
+        self.mass_g = 0.0
+        self.density = density
+
+        self._rng = np.random.default_rng(seed)
+        self._valve_flow: dict[int, tuple[float, float]] = {}
+
+    def tare(self) -> None:
+        self.mass_g = 0.0
+
+    def read_mass(self) -> float:
+        # a real balance takes a moment to answer
+        time.sleep(0.01)
+        return self.mass_g
+
+    def notify_dispense(self, valve: int, duration_us: int, actuations: int) -> None:
+        """
+        Adds the mass a valve would dispense in `actuations` openings of `duration_us` microseconds.
+        """
+        if valve not in self._valve_flow:
+            # microliters per millisecond open, and milliseconds before liquid starts to flow
+            self._valve_flow[valve] = (
+                self._rng.uniform(0.25, 0.35),
+                self._rng.uniform(2.0, 5.0),
+            )
+
+        slope, dead_time = self._valve_flow[valve]
+        ul_per_actuation = max(slope * (duration_us / 1000 - dead_time), 0)
+        volume_ml = ul_per_actuation * actuations / 1000 * self._rng.normal(1, 0.01)
+
+        self.mass_g += volume_ml * self.density
+
+
+class BalanceManager:
+    """
+    Owns the balance under each side of the rig and turns mass readings into dispensed volumes for `views.valve_testing.valve_testing_window`.
+
+    Attributes
+    ----------
+    - **balances** (*tuple[Balance, Balance]*): Side one and side two balances.
+    - **density** (*float*): Liquid density in g/mL used to convert mass to volume.
+    - **valves_per_side** (*int*): Number of valves on each side, used to find the balance under a valve.
+
+    Methods
+    -------
+    - `from_config`(valves_per_side)
+        Builds a manager from the `balance_config` section of the rig config. Returns None if balances are disabled.
+    - `balance_for`(valve)
+        Returns the balance under a 1-indexed valve.
+    - `tare_all`()
+        Zeroes both balances.
+    - `measure_dispensed`(valve, duration_us, actuations)
+        Reads the stable mass dispensed by a valve, converts it to mL and re-tares for the next valve.
+    - `close`()
+        Closes both balances.
+    """
+
+    def __init__(self, balances: tuple[Balance, Balance], density: float, valves_per_side: int):
+        self.balances = balances
+        self.density = density
+        self.valves_per_side = valves_per_side
+
+    @classmethod
+    def from_config(cls, valves_per_side: int) -> "BalanceManager | None":
+        """
+        Builds a manager from `BALANCE_CONFIG`.
+
+        Parameters
+        ----------
+        - **valves_per_side** (*int*): Number of valves currently in use on each side.
+
+        Returns
+        -------
+        - *BalanceManager | None*: The manager, or None if `ENABLED` is false.
+
+        Raises
+        ------
+        - *BalanceError*: If a serial balance cannot be opened.
+        """
+        config = BALANCE_CONFIG
+        if not config["ENABLED"]:
+            return None
+
+        stability = {
+            "stable_readings": config["STABLE_READINGS"],
+            "stable_tolerance_g": config["STABLE_TOLERANCE_G"],
+            "read_timeout_s": config["READ_TIMEOUT_S"],
+        }
+
+        names = ("Side One", "Side Two")
+        if config["MODE"] == "simulated":
+            balances = tuple(
+                SimulatedBalance(name, config["LIQUID_DENSITY_G_PER_ML"], seed, **stability)
+                for seed, name in enumerate(names)
+            )
+        else:
+            ports = (config["SIDE_ONE_PORT"], config["SIDE_TWO_PORT"])
+            opened: list[Balance] = []
+            try:
+                for name, port in zip(names, ports):
+                    opened.append(
+                        SerialBalance(
+                            name,
+                            port,
+                            config["BAUD_RATE"],
+                            config["TARE_COMMAND"],
+                            config["READ_COMMAND"],
+                            **stability,
+                        )
+                    )
+            except BalanceError:
+                # release side one so the next attempt (or another program) can open its port
+                for balance in opened:
+                    balance.close()
+                raise
+            balances = tuple(opened)
+
+        logger.info(f"Balances enabled in {config['MODE']} mode.")
+        return cls(balances, config["LIQUID_DENSITY_G_PER_ML"], valves_per_side)
+
+    def balance_for(self, valve: int) -> Balance:
+        """
+        Returns the balance under a 1-indexed valve, side one valves come first.
+        """
+        return self.balances[0] if valve <= self.valves_per_side else self.balances[1]
+
+    def tare_all(self) -> None:
+        """
+        Zeroes both balances, used before a test begins.
+        """
+        for balance in self.balances:
+            balance.tare()
+
+    def measure_dispensed(self, valve: int, duration_us: int, actuations: int) -> float:
+        """
+        Reads the volume a valve dispensed during its actuation block, then re-tares its balance for the next valve on that side.
+
+        Parameters
+        ----------
+        - **valve** (*int*): 1-indexed valve number that just finished its actuations.
+        - **duration_us** (*int*): The duration the valve was opened for, used only by simulated balances.
+        - **actuations** (*int*): Number of times the valve was opened, used only by simulated balances.
+
+        Returns
+        -------
+        - *float*: Dispensed volume in mL.
+
+        Raises
+        ------
+        - *BalanceError*: If the balance does not settle in time.
+        """
+        balance = self.balance_for(valve)
+        balance.notify_dispense(valve, duration_us, actuations)
+
+        mass_g = balance.read_stable_mass()
+        balance.tare()
+
+        dispensed_ml = mass_g / self.density
+        logger.info(f"{balance.name} balance measured {dispensed_ml:.4f} mL from valve {valve}")
+        return dispensed_ml
+
+    def close(self) -> None:
+        """
+        Closes both balances.
+        """
+        for balance in self.balances:
+            balance.close()
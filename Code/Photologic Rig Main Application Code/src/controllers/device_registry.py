@@ -0,0 +1,175 @@
+"""
+This module defines the DeviceRegistry class, which remembers which USB serial device plays which role on this PC so the program can
+connect to the right board on the first try.
+
+Previously `controllers.arduino_control` connected to the last port whose manufacturer mentioned "Arduino". On benches with more than one
+Arduino plugged in (e.g. the capacitive touch board connected for debugging) that could be the wrong board. Now each board that answers
+the rig's IDENTIFY handshake is recorded in `device_registry.json` in the assets directory by its USB fingerprint (vendor id, product id
+and serial number) and the port it was last seen on. On the next launch that port is tried first, and if the OS gave the board a
+different port name it is still found by its fingerprint. Ports fingerprinted as a different role are never tried.
+
+When one PC runs several rigs (see `rig_manager`), each rig's controller is its own role (`rig_controller_role`) in the same registry
+file, so a rig never opens a board another rig has claimed. A board recorded before the PC ran several rigs, under the unnamed
+`RIG_CONTROLLER` role, can still be claimed by a named rig. Every rig's program writes to the file, so `remember` merges in what the
+others recorded since it was read.
+"""
+
+import datetime
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from serial.tools.list_ports_common import ListPortInfo
+
+logger = logging.getLogger(__name__)
+
+RIG_CONTROLLER = "rig_controller"
+"""Role of the Arduino Mega that runs the experiment (`ArduinoCode.ino`)."""
+
+
+def rig_controller_role(rig_name: str | None) -> str:
+    """
+    Returns
+    -------
+    - *str*: The role of the controller board of the named rig, or `RIG_CONTROLLER` when the PC runs a single unnamed rig.
+    """
+    return RIG_CONTROLLER if rig_name is None else f"{RIG_CONTROLLER}:{rig_name}"
+
+
+class DeviceRegistry:
+    """
+    Persists the USB fingerprint and last port of each known board, by role.
+
+    Attributes
+    ----------
+    - **path** (*str*): Path to the registry JSON file.
+    - **devices** (*dict[str, dict]*): For each role, the board's `port`, `vid`, `pid`, `serial_number` and `last_connected` date.
+
+    Methods
+    -------
+    - `fingerprint`(port_info)
+        Returns the USB identity of a port.
+    - `matches`(role, port_info)
+        Returns whether a port has the fingerprint recorded for a role.
+    - `candidates`(role, ports)
+        Orders the ports worth trying for a role, most likely first.
+    - `remember`(role, port_info)
+        Records the board found on a port for a role and saves the registry.
+    """
+
+    def __init__(self, path: str):
+        """
+        Parameters
+        ----------
+        - **path** (*str*): Path to the registry file, usually from `system_config.get_device_registry`. It is created on the first
+          `remember` if it does not exist yet.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        self.devices: dict[str, dict] = self._read()
+
+    def _read(self) -> dict[str, dict]:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as e:
+            # the registry is only a cache, boards are found by scanning without it
+            logger.error(f"Could not read device registry {self.path}, ignoring it: {e}")
+        return {}
+
+    @staticmethod
+    def fingerprint(port_info: ListPortInfo) -> dict:
+        return {
+            "vid": port_info.vid,
+            "pid": port_info.pid,
+            "serial_number": port_info.serial_number,
+        }
+
+    def matches(self, role: str, port_info: ListPortInfo) -> bool:
+        """
+        Returns
+        -------
+        - *bool*: True if the port's vendor and product id match the board recorded for `role`, and so does its serial number when both
+          have one (some clone boards report none).
+        """
+        device = self.devices.get(role)
+        if device is None or port_info.vid is None:
+            return False
+
+        if (port_info.vid, port_info.pid) != (device.get("vid"), device.get("pid")):
+            return False
+
+        recorded_serial = device.get("serial_number")
+        if recorded_serial and port_info.serial_number:
+            return recorded_serial == port_info.serial_number
+        return True
+
+    def candidates(self, role: str, ports: list[ListPortInfo]) -> list[ListPortInfo]:
+        """
+        Orders the ports that may hold the board for `role`.
+
+        Parameters
+        ----------
+        - **role** (*str*): The role being looked for, e.g. `RIG_CONTROLLER`.
+        - **ports** (*list[ListPortInfo]*): The ports currently present, from `serial.tools.list_ports.comports`.
+
+        Returns
+        -------
+        - *list[ListPortInfo]*: The port the board was last seen on if it still has the right fingerprint, then other ports with that
+          fingerprint, then any other Arduino port (last found first, as the old scan picked it) that is not recorded as another role.
+          For a named rig's controller, boards recorded under the unnamed `RIG_CONTROLLER` role do not count as another role.
+        """
+        device = self.devices.get(role, {})
+
+        recorded = [p for p in ports if self.matches(role, p)]
+        recorded.sort(key=lambda p: p.device != device.get("port"))
+
+        # a board recorded by the single unnamed rig is free to be claimed by a named rig once the PC switches to `rig_manager`
+        other_roles = [
+            r
+            for r in self.devices
+            if r != role and not (r == RIG_CONTROLLER and role.startswith(f"{RIG_CONTROLLER}:"))
+        ]
+        unknown = [
+            p
+            for p in reversed(ports)
+            if p not in recorded
+            and p.manufacturer is not None
+            and "Arduino" in p.manufacturer
+            and not any(self.matches(r, p) for r in other_roles)
+        ]
+
+        return recorded + unknown
+
+    def remember(self, role: str, port_info: ListPortInfo) -> None:
+        """
+        Records that the board for `role` was found on `port_info`, then writes the registry to a temporary file and renames it over the
+        old one. Roles other rigs recorded in the file meanwhile are kept. A failed write is logged and otherwise ignored, the board is
+        simply scanned for again next launch.
+        """
+        with self._lock:
+            self.devices = {**self.devices, **self._read()}
+            self.devices[role] = {
+                "port": port_info.device,
+                **self.fingerprint(port_info),
+                "last_connected": datetime.datetime.now().isoformat(timespec="seconds"),
+            }
+
+            directory = os.path.dirname(self.path)
+            tmp_path = None
+            try:
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(prefix=".device_registry.", suffix=".tmp", dir=directory)
+                with os.fdopen(fd, "w") as f:
+                    json.dump(self.devices, f, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.error(f"Could not save device registry {self.path}: {e}")
+
+                if tmp_path is not None and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
@@ -0,0 +1,135 @@
+"""
+This module records how long every module takes to import, like running Python with `-X importtime`, but into the session log on
+every launch instead of to the console.
+
+`ImportProfiler.install` must run before the rest of the program is imported (see `main`). It puts a finder in front of the normal
+import machinery that times each module's execution, separating the time spent in the module itself from the time spent importing
+the modules it imports. Imports deferred with `lazy_imports.lazy_import` (or made inside functions) are timed when they finally run,
+and are reported when the session that loaded them ends.
+"""
+
+import importlib.abc
+import logging
+import sys
+import time
+
+logger = logging.getLogger()
+
+REPORT_TOP = 25
+"""Number of slowest imports listed in each report."""
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """
+    Finds modules with the rest of `sys.meta_path` and wraps the `exec_module` of their loader with a timer.
+    """
+
+    def __init__(self, profiler: "ImportProfiler"):
+        self.profiler = profiler
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                self.profiler.wrap_loader(spec.loader)
+                return spec
+
+        return None
+
+
+class ImportProfiler:
+    """
+    Times module imports and reports the slowest ones.
+
+    Attributes
+    ----------
+    - **records** (*list[tuple[str, float, float]]*): For each imported module, in the order they finished importing, its name, its
+      self time and its cumulative time (including the modules it imported) in microseconds.
+    - **reported** (*int*): Number of records already included in a report.
+
+    Methods
+    -------
+    - `install`()
+        Starts timing imports.
+    - `wrap_loader`(loader)
+        Times the `exec_module` of a loader.
+    - `report_lines`()
+        Formats the imports since the last report, importtime-style.
+    - `log_report`(title)
+        Writes `report_lines` to the log.
+    """
+
+    def __init__(self):
+        self.records: list[tuple[str, float, float]] = []
+        self.reported = 0
+
+        # time spent importing children of each module currently being imported
+        self._child_time_stack: list[float] = []
+        self._finder = _TimingFinder(self)
+
+    def install(self) -> None:
+        if self._finder not in sys.meta_path:
+            sys.meta_path.insert(0, self._finder)
+
+    def wrap_loader(self, loader) -> None:
+        """
+        Replaces `exec_module` on a loader instance with a timed version. Builtin and frozen modules, whose loaders are classes,
+        are not timed.
+        """
+        if loader is None or isinstance(loader, type) or getattr(loader, "_import_profiler_wrapped", False):
+            return
+
+        exec_module = getattr(loader, "exec_module", None)
+        if exec_module is None:
+            return
+
+        profiler = self
+
+        def timed_exec_module(module):
+            profiler._child_time_stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                cumulative = (time.perf_counter() - start) * 1e6
+                children = profiler._child_time_stack.pop()
+                if profiler._child_time_stack:
+                    profiler._child_time_stack[-1] += cumulative
+                profiler.records.append((module.__name__, cumulative - children, cumulative))
+
+        try:
+            loader.exec_module = timed_exec_module
+            loader._import_profiler_wrapped = True
+        except AttributeError:
+            # loaders that do not allow new attributes are left untimed
+            pass
+
+    def report_lines(self) -> list[str]:
+        """
+        Returns
+        -------
+        - *list[str]*: A summary line with the number of modules imported since the last report and the total time spent in top
+        level imports, then the `REPORT_TOP` slowest of them by cumulative time, formatted like `-X importtime` output.
+        """
+        records = self.records[self.reported :]
+        self.reported = len(self.records)
+
+        if not records:
+            return ["No modules imported."]
+
+        total_ms = sum(self_us for _, self_us, _ in records) / 1000
+        lines = [
+            f"{len(records)} modules imported in {total_ms:.0f} ms, slowest {min(REPORT_TOP, len(records))} by cumulative time:",
+            "import time: self [us] | cumulative | imported package",
+        ]
+        for name, self_us, cumulative_us in sorted(records, key=lambda r: r[2], reverse=True)[:REPORT_TOP]:
+            lines.append(f"import time: {self_us:9.0f} | {cumulative_us:10.0f} | {name}")
+        return lines
+
+    def log_report(self, title: str) -> None:
+        logger.info(title)
+        for line in self.report_lines():
+            logger.info(line)
@@ -0,0 +1,44 @@
+"""
+This module lets the program import its heavy dependencies (pandas, matplotlib) without paying for them at launch.
+
+`lazy_import` returns a module object right away, but the module's code only runs the first time one of its attributes is used, so
+`pd = lazy_import("pandas")` at the top of a module costs nothing until a DataFrame is actually created. Modules that use a lazy import
+in annotations must start with `from __future__ import annotations`, otherwise evaluating the annotation would load the module.
+"""
+
+import importlib.util
+import sys
+import types
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Imports a module lazily, using `importlib.util.LazyLoader`.
+
+    Parameters
+    ----------
+    - **name** (*str*): Full name of the module, e.g. "pandas".
+
+    Returns
+    -------
+    - *types.ModuleType*: The module, loaded on first attribute access. If the module was already imported it is returned as is.
+
+    Raises
+    ------
+    - *ModuleNotFoundError*: If the module is not installed.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+
+    return module
@@ -0,0 +1,405 @@
+"""
+This module manages the logfiles written by the program. Logfiles were previously created once at import time and grew without
+bound, this module instead gives each launch (including each 'reset' launched by `main`) its own session directory under the
+logfiles directory in the Photologic-Experiment-Rig-Files folder.
+
+Inside of a session directory the active log is rotated into numbered segments when it grows past a size limit or gets too old.
+Closed segments are gzip compressed on a background thread so that the GUI and Arduino listener threads never wait on
+compression. Each session keeps a `manifest.json` file describing its segments, and when a session ends a retention policy
+removes the oldest sessions so the logfiles directory stays within the limits set in the `logging_config` section of the rig
+config file.
+"""
+
+import datetime
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+
+import system_config
+from rig_config_service import rig_config
+
+logger = logging.getLogger()
+
+LOGGING_CONFIG = rig_config.section("logging_config")
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+"""Format used for every line written to the logfiles."""
+
+ACTIVE_LOG_NAME = "experiment log.txt"
+"""Name of the segment currently being written to inside of a session directory."""
+
+MANIFEST_NAME = "manifest.json"
+"""Name of the per-session manifest file."""
+
+
+class SegmentedFileHandler(logging.FileHandler):
+    """
+    A logging FileHandler that closes its file and starts a new one once the file reaches `max_bytes` in size or has been open
+    for `max_seconds`. Closed files are renamed to numbered segments and handed to the `on_segment_closed` callback, which
+    the `SessionLogManager` uses to queue them for compression.
+
+    Attributes
+    ----------
+    - **directory** (*str*): Session directory the segments are written to.
+    - **max_bytes** (*int*): Size in bytes at which the active file is rotated. 0 disables size based rotation.
+    - **max_seconds** (*float*): Age in seconds at which the active file is rotated. 0 disables time based rotation.
+    - **segment_index** (*int*): Number given to the next segment closed by this handler.
+    - **segment_opened** (*float*): Unix time at which the active file was opened.
+
+    Methods
+    -------
+    - `emit`(record)
+        Rotates the active file if required, then writes the record.
+    - `should_rollover`()
+        Decides whether the active file has reached its size or age limit.
+    - `do_rollover`()
+        Closes the active file, renames it to the next segment name and opens a fresh active file.
+    - `close_final_segment`()
+        Closes the handler and treats whatever was left in the active file as the final segment of the session.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_seconds: float, on_segment_closed):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.segment_index = 1
+        self.segment_opened = time.time()
+        self._on_segment_closed = on_segment_closed
+
+        super().__init__(os.path.join(directory, ACTIVE_LOG_NAME), encoding="utf-8")
+
+    def emit(self, record):
+        """
+        Called by `logging.Handler.handle` with the handler lock held, so rotation cannot interleave with another thread's write.
+        """
+        try:
+            if self.should_rollover():
+                self.do_rollover()
+        except Exception:
+            self.handleError(record)
+            return
+
+        super().emit(record)
+
+    def should_rollover(self) -> bool:
+        """
+        Checks the size of the active file against `max_bytes` and its age against `max_seconds`.
+
+        Returns
+        -------
+        - *bool*: True if the active file should be closed and a new one started.
+        """
+        if self.stream is None:
+            return False
+
+        if self.max_bytes > 0 and self.stream.tell() >= self.max_bytes:
+            return True
+
+        if self.max_seconds > 0 and time.time() - self.segment_opened >= self.max_seconds:
+            return True
+
+        return False
+
+    def _close_segment(self):
+        """
+        Closes the active file and renames it to the next segment name, then hands it to `on_segment_closed`.
+        """
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        if not os.path.exists(self.baseFilename) or os.path.getsize(self.baseFilename) == 0:
+            return
+
+        segment_name = f"segment_{self.segment_index:04d}.txt"
+        segment_path = os.path.join(self.directory, segment_name)
+        os.replace(self.baseFilename, segment_path)
+
+        self._on_segment_closed(segment_path, self.segment_opened, time.time())
+        self.segment_index += 1
+
+    def do_rollover(self):
+        """
+        Closes the current segment and opens a fresh active file.
+        """
+        self._close_segment()
+        self.segment_opened = time.time()
+        self.stream = self._open()
+
+    def close_final_segment(self):
+        """
+        Closes the handler, then closes the active file as the final segment of the session.
+        """
+        self.acquire()
+        try:
+            self._close_segment()
+        finally:
+            self.release()
+        self.close()
+
+
+class SessionLogManager:
+    """
+    This class owns the logfile handler for one session of the program, compresses closed segments in the background, keeps the
+    session manifest up to date and applies the retention policy to old sessions.
+
+    Attributes
+    ----------
+    - **log_dir** (*str*): The logfiles directory in the Photologic-Experiment-Rig-Files folder.
+    - **config** (*dict*): Rotation and retention limits, the `logging_config` section of the rig config.
+    - **session_dir** (*str*): Directory holding the segments and manifest of the current session. None outside of a session.
+    - **handler** (*SegmentedFileHandler*): Handler attached to the root logger for the current session.
+    - **manifest** (*dict*): In memory copy of the current session manifest.
+
+    Methods
+    -------
+    - `start_session`()
+        Creates a session directory and attaches a new `SegmentedFileHandler` to the root logger.
+    - `end_session`()
+        Applies the retention policy, detaches the handler, waits for outstanding compression and finalizes the manifest.
+    - `apply_retention`()
+        Removes the oldest finished sessions and legacy logfiles until every retention limit is met.
+    """
+
+    def __init__(self, log_dir: str | None = None, config: dict | None = None):
+        self.log_dir = log_dir if log_dir is not None else system_config.get_log_dir()
+        self.config = config if config is not None else LOGGING_CONFIG
+
+        self.session_dir = None
+        self.handler = None
+        self.manifest = {}
+
+        self._manifest_lock = threading.Lock()
+        self._compress_queue = queue.Queue()
+        self._compress_thread = None
+
+    def start_session(self):
+        """
+        Creates the directory for a new session, writes its initial manifest, starts the compression thread and attaches the
+        session file handler to the root logger.
+        """
+        os.makedirs(self.log_dir, exist_ok=True)
+
+        now = datetime.datetime.now()
+        session_name = now.strftime("%Y-%m-%d %H_%M_%S session")
+        session_dir = os.path.join(self.log_dir, session_name)
+
+        # two resets within the same second would otherwise share a directory
+        suffix = 1
+        while os.path.exists(session_dir):
+            suffix += 1
+            session_dir = os.path.join(self.log_dir, f"{session_name} ({suffix})")
+
+        os.makedirs(session_dir)
+        self.session_dir = session_dir
+
+        with self._manifest_lock:
+            self.manifest = {
+                "session": os.path.basename(session_dir),
+                "started": now.isoformat(timespec="seconds"),
+                "ended": None,
+                "pid": os.getpid(),
+                "segments": [],
+            }
+            self._write_manifest()
+
+        self._compress_thread = threading.Thread(
+            target=self._compression_worker, name="log compression", daemon=True
+        )
+        self._compress_thread.start()
+
+        self.handler = SegmentedFileHandler(
+            session_dir,
+            max_bytes=int(self.config["MAX_SEGMENT_MB"] * 1024 * 1024),
+            max_seconds=self.config["MAX_SEGMENT_MINUTES"] * 60,
+            on_segment_closed=self._segment_closed,
+        )
+        self.handler.setLevel(logging.INFO)
+        self.handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logger.addHandler(self.handler)
+
+        logger.info(f"Logging session started in {session_dir}")
+
+    def end_session(self):
+        """
+        Applies the retention policy, then detaches and closes the session file handler, waits for every queued segment to be compressed
+        and records the end time in the manifest. Safe to call when no session is active.
+        """
+        if self.handler is None:
+            return
+
+        # applied while the handler is still attached so what it removes is recorded in this session's log
+        try:
+            self.apply_retention()
+        except Exception as e:
+            logger.error(f"Error applying logfile retention policy: {e}")
+
+        logger.info("Logging session ended.")
+        logger.removeHandler(self.handler)
+        self.handler.close_final_segment()
+        self.handler = None
+
+        # sentinel tells the worker to exit once every segment queued before it has been compressed
+        self._compress_queue.put(None)
+        self._compress_thread.join()
+        self._compress_thread = None
+
+        with self._manifest_lock:
+            self.manifest["ended"] = datetime.datetime.now().isoformat(timespec="seconds")
+            self._write_manifest()
+
+        self.session_dir = None
+
+    def _segment_closed(self, segment_path: str, opened: float, closed: float):
+        """
+        Callback given to `SegmentedFileHandler`. Records the segment in the manifest and queues it for compression.
+        """
+        entry = {
+            "file": os.path.basename(segment_path),
+            "opened": datetime.datetime.fromtimestamp(opened).isoformat(timespec="seconds"),
+            "closed": datetime.datetime.fromtimestamp(closed).isoformat(timespec="seconds"),
+            "bytes": os.path.getsize(segment_path),
+            "compressed_bytes": None,
+        }
+        with self._manifest_lock:
+            self.manifest["segments"].append(entry)
+            self._write_manifest()
+
+        self._compress_queue.put((segment_path, entry))
+
+    def _compression_worker(self):
+        """
+        Runs on a background thread for the lifetime of a session, gzip compressing closed segments as they arrive.
+        """
+        while True:
+            item = self._compress_queue.get()
+            if item is None:
+                break
+
+            segment_path, entry = item
+            compressed_path = f"{segment_path}.gz"
+            try:
+                with open(segment_path, "rb") as src, gzip.open(compressed_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(segment_path)
+            except OSError as e:
+                # leave the plain text segment in place, it is still a valid log
+                logger.error(f"Error compressing log segment {segment_path}: {e}")
+                continue
+
+            with self._manifest_lock:
+                entry["file"] = os.path.basename(compressed_path)
+                entry["compressed_bytes"] = os.path.getsize(compressed_path)
+                self._write_manifest()
+
+    def _write_manifest(self):
+        """
+        Writes the manifest to a temporary file and swaps it into place so a crash never leaves a half written manifest.
+        Must be called with `_manifest_lock` held.
+        """
+        manifest_path = os.path.join(self.session_dir, MANIFEST_NAME)
+        tmp_path = f"{manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    def _collect_entries(self) -> list[tuple[float, int, str]]:
+        """
+        Lists every finished session directory and legacy single file log in the logfiles directory.
+
+        A session whose manifest has no `ended` time may still be running in another copy of the program sharing this logfiles directory
+        (see `rig_manager`), so it is left out. The exception is a session none of whose files changed in RETAIN_DAYS, which was left
+        unfinished by a crash and would otherwise never be removed.
+
+        Returns
+        -------
+        - *list[tuple[float, int, str]]*: (modified time, size in bytes, path) for each entry, oldest first.
+        """
+        max_age = self.config["RETAIN_DAYS"] * 24 * 60 * 60
+        now = time.time()
+
+        entries = []
+        for name in os.listdir(self.log_dir):
+            path = os.path.join(self.log_dir, name)
+
+            if os.path.isdir(path):
+                if path == self.session_dir:
+                    continue
+                size = 0
+                last_modified = os.path.getmtime(path)
+                for root, _, files in os.walk(path):
+                    for file in files:
+                        try:
+                            stat = os.stat(os.path.join(root, file))
+                        except FileNotFoundError:
+                            # a running session compressed the segment away while the directory was being walked
+                            continue
+                        size += stat.st_size
+                        last_modified = max(last_modified, stat.st_mtime)
+
+                abandoned = max_age > 0 and now - last_modified > max_age
+                if not self._session_ended(path) and not abandoned:
+                    continue
+            elif name.endswith(".txt"):
+                # logfiles written before sessions existed
+                size = os.path.getsize(path)
+            else:
+                continue
+
+            entries.append((os.path.getmtime(path), size, path))
+
+        entries.sort()
+        return entries
+
+    @staticmethod
+    def _session_ended(session_dir: str) -> bool:
+        """
+        Returns
+        -------
+        - *bool*: False if the session's manifest records no end time, True otherwise. Directories without a readable manifest are not
+          sessions this module is writing to, so they count as ended.
+        """
+        try:
+            with open(os.path.join(session_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+                return json.load(f).get("ended") is not None
+        except (OSError, ValueError, AttributeError):
+            return True
+
+    def apply_retention(self):
+        """
+        Removes the oldest sessions until there are no more than RETAIN_SESSIONS of them, none are older than RETAIN_DAYS and
+        together they take up no more than RETAIN_TOTAL_MB. A limit of 0 disables that check.
+        """
+        max_sessions = self.config["RETAIN_SESSIONS"]
+        max_age = self.config["RETAIN_DAYS"] * 24 * 60 * 60
+        max_bytes = self.config["RETAIN_TOTAL_MB"] * 1024 * 1024
+
+        entries = self._collect_entries()
+        total_bytes = sum(size for _, size, _ in entries)
+        now = time.time()
+
+        removed = 0
+        for mtime, size, path in entries:
+            remaining = len(entries) - removed
+            over_count = max_sessions > 0 and remaining > max_sessions
+            over_age = max_age > 0 and now - mtime > max_age
+            over_size = max_bytes > 0 and total_bytes > max_bytes
+
+            if not (over_count or over_age or over_size):
+                break
+
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+            removed += 1
+            total_bytes -= size
+
+        if removed:
+            logger.info(f"Removed {removed} old logfile sessions.")
@@ -5,12 +5,102 @@ location.
 If the user requests a 'reset' from the Main GUI, the program controlling 'StateMachine' module destroys itself,
 then, this module handles the launcing of a new instance of the program. This is made possible through the mutable `result_container`
 object which we can pass to other modules for them to modify, then read the result later.
+
+Each launch of a StateMachine instance is also its own logging session, see `log_manager`. A warm reset keeps the StateMachine instance
+running, so it starts the next logging session itself through the `on_warm_reset` callback. Every session log starts with how long
+the program took to import, and ends with the modules that were only imported on demand during the session, see `import_profiler`.
+
+Once the first session has started, the rig config file is watched for edits for as long as the program runs, see `rig_config_service`.
+
+When a PC runs several rigs, `rig_manager` starts this module once per rig with `--rig NAME`. The name selects the rig's own files (see
+`system_config`), so `main` applies it before importing the rest of the program, and the program publishes its status for the manager
+(see `rig_status`). Importing this module has no side effects: the import profiler is installed and the command line is read only
+when `main` runs.
+
+If the live session monitor is enabled in the rig config, its server is started with the first session and runs until the program exits,
+see `monitor_server`.
+
+Runtime metrics (see `metrics`) are summarized in the log at the end of every session, and written to a Prometheus textfile while the
+program runs if the rig config asks for it.
 """
 
-from app_logic import StateMachine
+import argparse
+import logging
+import os
+
+import system_config
+from import_profiler import ImportProfiler
+
+import_profiler = ImportProfiler()
+"""Installed by `main` before the rest of the program is imported, so every import after it is timed."""
+
+
+def apply_rig_argument(argv: list[str] | None = None) -> None:
+    """
+    Reads the `--rig` command line option and, if given, sets `system_config.RIG_NAME_ENV` to it. Must run before any path is looked up.
+    Other arguments are ignored.
+    """
+    parser = argparse.ArgumentParser(description="Samuelsen Lab Photologic Rig")
+    parser.add_argument(
+        "--rig",
+        help="name of the rig to run, when this PC runs several rigs (see rig_manager)",
+    )
+    args, _ = parser.parse_known_args(argv)
+
+    if args.rig is not None:
+        if not system_config.is_valid_rig_name(args.rig):
+            parser.error(f"invalid rig name {args.rig!r}, use up to 32 letters, digits, '-' or '_'")
+        os.environ[system_config.RIG_NAME_ENV] = args.rig
+
+
+def main(argv: list[str] | None = None):
+    import_profiler.install()
+    apply_rig_argument(argv)
 
+    # imported only now, so the imports are timed and every path they look up belongs to the rig given with --rig
+    from app_logic import StateMachine
+    from log_manager import SessionLogManager
+    from metrics import METRICS_CONFIG, MetricsTextfileWriter, metrics
+    from monitor_server import start_monitor_server
+    from rig_config_service import rig_config
+    from rig_status import RigStatusPublisher
+
+    log_manager = SessionLogManager()
+    """Owns the logfile handler, a new logging session is started for every StateMachine instance."""
+
+    first_session = True
+    monitor = None
+
+    rig_name = system_config.get_rig_name()
+    status_publisher = RigStatusPublisher(rig_name) if rig_name is not None else None
+    """Tells `rig_manager` how this rig is doing, when it runs one of several rigs."""
+    if status_publisher is not None:
+        status_publisher.start()
+
+    metrics_writer = None
+    if METRICS_CONFIG["WRITE_TEXTFILE"]:
+        metrics_writer = MetricsTextfileWriter(
+            METRICS_CONFIG["TEXTFILE_PATH"] or system_config.get_metrics_textfile(),
+            labels={"rig": rig_name} if rig_name is not None else None,
+        )
+        metrics_writer.start()
+
+    session_metrics = metrics.snapshot()
+
+    def log_session_metrics():
+        """Logs what the metrics recorded during the session that is ending."""
+        nonlocal session_metrics
+        if METRICS_CONFIG["LOG_SUMMARY"]:
+            logging.getLogger().info("Runtime metrics for this session:\n" + metrics.summary(since=session_metrics))
+        session_metrics = metrics.snapshot()
+
+    def new_session():
+        """Called by the StateMachine on a warm reset, so each experiment still gets its own logging session."""
+        import_profiler.log_report("Imports loaded on demand during this session:")
+        log_session_metrics()
+        log_manager.end_session()
+        log_manager.start_session()
 
-def main():
     while 1:
         # we pass in a list with one element, because lists in python are mutable items. so we can pass this
         # into the StateMachine, modify the object and view the result when we are done with this instance
@@ -18,10 +108,28 @@ def main():
         result_container = [0]
         """init result container as mutable list with initial value of 0 (do not restart)"""
 
-        StateMachine(result_container)
-        """
-        Startup a StateMachine instance to handle experiment logic.
-        """
+        log_manager.start_session()
+        if first_session:
+            import_profiler.log_report("Imports at launch:")
+            # started here so that reloads are written to the session log
+            rig_config.start_watching()
+            monitor = start_monitor_server()
+            first_session = False
+
+        try:
+            StateMachine(
+                result_container,
+                on_warm_reset=new_session,
+                status_publisher=status_publisher,
+            )
+            """
+            Startup a StateMachine instance to handle experiment logic.
+            """
+        finally:
+            import_profiler.log_report("Imports loaded on demand during this session:")
+            log_session_metrics()
+            # close, compress and prune logs even if the instance crashed so its segments are finalized
+            log_manager.end_session()
 
         """ Match on the result to determine whether or not to restart program upon StateMachine return."""
         match result_container[0]:
@@ -30,6 +138,17 @@ def main():
             case 1:
                 continue
 
+    rig_config.stop_watching()
+
+    if monitor is not None:
+        monitor.stop()
+
+    if metrics_writer is not None:
+        metrics_writer.stop()
+
+    if status_publisher is not None:
+        status_publisher.stop()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,458 @@
+"""
+This module holds the program's runtime metrics: counters, gauges and latency histograms recorded at the places where the program has to
+keep up with the rig, i.e. the Arduino data queue, processing each line the Arduino sends, inserting events into `models.event_data`,
+the GUI heartbeat of `views.lag_watchdog` and how late timed state transitions fire in `app_logic`.
+
+Every metric is created once at import time with `metrics.counter`, `metrics.gauge` or `metrics.histogram`, and recording into it is
+cheap enough for those hot paths (well under a microsecond, see `benchmarks.metrics_benchmark`). Counters and histograms take no lock:
+each thread records into its own shard, and a thread's shard is folded into the metric's totals when the thread exits, so the many
+short lived state threads do not leave shards behind. Only reading a metric takes its lock.
+
+Histograms are log-linear in the style of HDR histograms: values below 64 units of the histogram's resolution get a bucket each, above
+that every power of two is split into 32 buckets, so any value is recorded within about 3% using a few hundred buckets, from
+microseconds to hours.
+
+The metrics can be read in the Prometheus text format from `/metrics` of the monitor server (see `monitor_server`) or, with
+`WRITE_TEXTFILE` in the `metrics_config` section of the rig config, from a file rewritten every `TEXTFILE_INTERVAL_S` (see
+`MetricsTextfileWriter`) for the textfile collector of a Prometheus node exporter. `main` logs a summary of each session's metrics when
+the session ends.
+"""
+
+import logging
+import math
+import os
+import tempfile
+import threading
+from typing import Any
+
+import numpy as np
+
+from rig_config_service import rig_config
+
+logger = logging.getLogger()
+
+METRICS_CONFIG = rig_config.section("metrics_config")
+
+SUB_BUCKET_BITS = 5
+"""Each power of two above the linear range is split into 2 ** SUB_BUCKET_BITS buckets."""
+
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+LINEAR_RANGE_BITS = SUB_BUCKET_BITS + 1
+"""Values with fewer bits than this (below 64) are recorded exactly."""
+
+SUMMARY_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _Shard:
+    """The part of a counter or histogram recorded by one thread."""
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self, num_buckets: int):
+        self.counts = [0] * num_buckets
+        self.total = 0.0
+
+
+class _ShardOwner:
+    """Lives in a thread's local storage and folds the thread's shard into its metric when the thread exits."""
+
+    __slots__ = ("metric", "shard")
+
+    def __init__(self, metric: "_ShardedMetric", shard: _Shard):
+        self.metric = metric
+        self.shard = shard
+
+    def __del__(self):
+        self.metric._retire(self.shard)
+
+
+class _ShardedMetric:
+    """
+    Base of the metrics recorded without a lock, see the module docstring.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, num_buckets: int):
+        self.name = name
+        self.help_text = help_text
+        self.num_buckets = num_buckets
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: list[_Shard] = []
+        self._retired = _Shard(num_buckets)
+
+    def _new_shard(self) -> _Shard:
+        shard = _Shard(self.num_buckets)
+        with self._lock:
+            self._shards.append(shard)
+        self._local.owner = _ShardOwner(self, shard)
+        self._local.shard = shard
+        return shard
+
+    def _retire(self, shard: _Shard) -> None:
+        with self._lock:
+            retired = self._retired
+            for i, count in enumerate(shard.counts):
+                retired.counts[i] += count
+            retired.total += shard.total
+            self._shards.remove(shard)
+
+    def _merged(self) -> tuple[np.ndarray, float]:
+        """Returns the counts and total of every thread's shard added together."""
+        with self._lock:
+            shards = [self._retired, *self._shards]
+            counts = np.sum([shard.counts for shard in shards], axis=0, dtype=np.int64)
+            total = sum(shard.total for shard in shards)
+        return counts, total
+
+
+class Counter(_ShardedMetric):
+    """
+    A count that only goes up, e.g. the number of lines received from the Arduino.
+
+    Methods
+    -------
+    - `inc`(amount)
+        Adds `amount` to the count.
+    - `value`()
+        Returns the count.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text, 0)
+
+    def inc(self, amount: float = 1) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard.total += amount
+
+    def value(self) -> float:
+        return self._merged()[1]
+
+
+class Gauge:
+    """
+    A value that can go up and down, e.g. the number of lines waiting in the Arduino data queue. Setting it is a single assignment,
+    so no lock is needed.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Histogram(_ShardedMetric):
+    """
+    The distribution of a measured value, e.g. how long processing a line from the Arduino took.
+
+    Attributes
+    ----------
+    - **resolution** (*float*): The smallest difference the histogram tells apart, e.g. 1e-6 for times in seconds.
+    - **highest** (*float*): Largest value recorded, larger values are recorded as this.
+    - **export_buckets** (*tuple[float, ...]*): Upper bounds of the `le` buckets written in the Prometheus format.
+    - **unit** (*str*): "seconds" for durations, which summaries show in milliseconds, otherwise what the values count.
+
+    Methods
+    -------
+    - `observe`(value)
+        Records a value. NaN and infinite values are dropped.
+    - `snapshot`()
+        Returns the counts of every bucket and the sum of the values recorded so far.
+    - `bucket_upper_bounds`()
+        Returns the largest value recorded in each bucket.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        resolution: float,
+        highest: float,
+        export_buckets: tuple[float, ...],
+        unit: str = "seconds",
+    ):
+        self.resolution = resolution
+        self.highest = highest
+        self.export_buckets = export_buckets
+        self.unit = unit
+
+        self._scale = 1 / resolution
+        self._max_units = int(highest * self._scale)
+        super().__init__(name, help_text, bucket_index(self._max_units) + 1)
+
+    def observe(self, value: float) -> None:
+        try:
+            units = int(value * self._scale)
+        except (ValueError, OverflowError):
+            # NaN or infinite, e.g. from a failed measurement. Dropped here rather than raising in the code being measured, and the
+            # try costs nothing for finite values
+            return
+        if units < 0:
+            units = 0
+        elif units > self._max_units:
+            units = self._max_units
+
+        shift = units.bit_length() - LINEAR_RANGE_BITS
+        if shift < 0:
+            shift = 0
+
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard.counts[(shift << SUB_BUCKET_BITS) + (units >> shift)] += 1
+        shard.total += value
+
+    def snapshot(self) -> tuple[np.ndarray, float]:
+        return self._merged()
+
+    def bucket_upper_bounds(self) -> np.ndarray:
+        return np.array([bucket_upper_bound(i) for i in range(self.num_buckets)]) * self.resolution
+
+
+def bucket_index(units: int) -> int:
+    """
+    Returns the histogram bucket of a non-negative value in units of the histogram's resolution. Values below 64 are their own bucket,
+    above that each power of two is split into `SUB_BUCKETS` buckets. This is the index `Histogram.observe` computes inline.
+    """
+    shift = max(units.bit_length() - LINEAR_RANGE_BITS, 0)
+    return (shift << SUB_BUCKET_BITS) + (units >> shift)
+
+
+def bucket_upper_bound(index: int) -> int:
+    """Returns the largest value in units of the resolution that falls into bucket `index`."""
+    if index < 2 * SUB_BUCKETS:
+        return index
+
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    top = index - (shift << SUB_BUCKET_BITS)
+    return ((top + 1) << shift) - 1
+
+
+def quantile(counts: np.ndarray, upper_bounds: np.ndarray, q: float) -> float:
+    """
+    Returns the value below which fraction `q` of the recorded values fall, as the largest value of the bucket it falls in.
+    """
+    cumulative = np.cumsum(counts)
+    if cumulative[-1] == 0:
+        return 0.0
+    index = int(np.searchsorted(cumulative, math.ceil(q * cumulative[-1])))
+    return float(upper_bounds[index])
+
+
+class MetricsRegistry:
+    """
+    All of the program's metrics, by name.
+
+    Methods
+    -------
+    - `counter`(name, help_text)
+        Returns the counter of that name, creating it the first time.
+    - `gauge`(name, help_text)
+        Returns the gauge of that name, creating it the first time.
+    - `histogram`(name, help_text, ...)
+        Returns the histogram of that name, creating it the first time.
+    - `snapshot`()
+        Returns the current value of every metric, to compare against later with `summary`.
+    - `summary`(since)
+        Returns a readable summary of every metric, since `since` if given.
+    - `exposition`(labels)
+        Returns every metric in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name: str, kind: type, *args: Any, **kwargs: Any):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = kind(name, *args, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, kind):
+                raise ValueError(f"Metric {name} already exists as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get_or_create(name, Counter, help_text)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._get_or_create(name, Gauge, help_text)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        resolution: float = 1e-6,
+        highest: float = 3600.0,
+        export_buckets: tuple[float, ...] = (1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+        unit: str = "seconds",
+    ) -> Histogram:
+        return self._get_or_create(name, Histogram, help_text, resolution, highest, export_buckets, unit)
+
+    def metrics(self) -> list[Counter | Gauge | Histogram]:
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+    def snapshot(self) -> dict[str, Any]:
+        snapshot: dict[str, Any] = {}
+        for metric in self.metrics():
+            if isinstance(metric, Histogram):
+                snapshot[metric.name] = metric.snapshot()
+            elif isinstance(metric, Counter):
+                snapshot[metric.name] = metric.value()
+        return snapshot
+
+    def summary(self, since: dict[str, Any] | None = None) -> str:
+        """
+        Returns one line per metric: the count of each counter, the value of each gauge, and the number of values, mean, quantiles and
+        maximum of each histogram. With `since` (from `snapshot`), only what was recorded after that snapshot is summarized.
+        """
+        since = since or {}
+        lines = []
+        for metric in self.metrics():
+            if isinstance(metric, Gauge):
+                lines.append(f"{metric.name}: {metric.value:g}")
+            elif isinstance(metric, Counter):
+                lines.append(f"{metric.name}: {metric.value() - since.get(metric.name, 0):g}")
+            else:
+                lines.append(f"{metric.name}: {self._summarize_histogram(metric, since.get(metric.name))}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _summarize_histogram(histogram: Histogram, since: tuple[np.ndarray, float] | None) -> str:
+        counts, total = histogram.snapshot()
+        if since is not None:
+            counts = counts - since[0]
+            total -= since[1]
+
+        num_values = int(counts.sum())
+        if num_values == 0:
+            return "no values"
+
+        if histogram.unit == "seconds":
+            scale, unit = 1000, " ms"
+        else:
+            scale, unit = 1, ""
+
+        upper_bounds = histogram.bucket_upper_bounds()
+        max_value = float(upper_bounds[np.flatnonzero(counts)[-1]])
+        parts = [f"{num_values} values", f"mean {total / num_values * scale:.3g}{unit}"]
+        for q in SUMMARY_QUANTILES:
+            parts.append(f"p{q * 100:g} {quantile(counts, upper_bounds, q) * scale:.3g}{unit}")
+        parts.append(f"max {max_value * scale:.3g}{unit}")
+        return ", ".join(parts)
+
+    def exposition(self, labels: dict[str, str] | None = None) -> str:
+        """
+        Returns every metric in the Prometheus text exposition format. `labels` are added to every sample, e.g. the rig's name when
+        several rigs run on one PC.
+        """
+        label_text = ",".join(f'{key}="{value}"' for key, value in (labels or {}).items())
+
+        def sample(name: str, value: float, extra: str = "") -> str:
+            all_labels = ",".join(part for part in (label_text, extra) if part)
+            text = repr(value)
+            return f"{name}{{{all_labels}}} {text}" if all_labels else f"{name} {text}"
+
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+
+            if isinstance(metric, Gauge):
+                lines.append(sample(metric.name, metric.value))
+            elif isinstance(metric, Counter):
+                lines.append(sample(metric.name, metric.value()))
+            else:
+                counts, total = metric.snapshot()
+                cumulative = np.cumsum(counts)
+                upper_bounds = metric.bucket_upper_bounds()
+                for bound in metric.export_buckets:
+                    # the last bucket whose values are all within the bound
+                    index = int(np.searchsorted(upper_bounds, bound, side="right")) - 1
+                    count = int(cumulative[index]) if index >= 0 else 0
+                    lines.append(sample(f"{metric.name}_bucket", count, f'le="{bound:g}"'))
+                lines.append(sample(f"{metric.name}_bucket", int(cumulative[-1]), 'le="+Inf"'))
+                lines.append(sample(f"{metric.name}_sum", total))
+                lines.append(sample(f"{metric.name}_count", int(cumulative[-1])))
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+"""The program's metrics registry, shared by every module."""
+
+
+class MetricsTextfileWriter:
+    """
+    Rewrites a Prometheus textfile with every metric every `TEXTFILE_INTERVAL_S`, from a daemon thread. The file is written to a
+    temporary file and renamed over the old one, so a collector never reads it half written.
+
+    Methods
+    -------
+    - `start`()
+        Starts writing the file.
+    - `write`()
+        Writes the file now.
+    - `stop`()
+        Stops the thread and writes the file one last time.
+    """
+
+    def __init__(self, path: str, registry: MetricsRegistry = metrics, labels: dict[str, str] | None = None):
+        self.path = path
+        self.registry = registry
+        self.labels = labels
+
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._failed = False
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="MetricsTextfileWriter", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(METRICS_CONFIG["TEXTFILE_INTERVAL_S"]):
+            self.write()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write()
+
+    def write(self) -> None:
+        directory = os.path.dirname(self.path)
+        tmp_path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".metrics.", suffix=".tmp", dir=directory)
+            with os.fdopen(fd, "w") as f:
+                f.write(self.registry.exposition(self.labels))
+            os.replace(tmp_path, self.path)
+            self._failed = False
+        except OSError as e:
+            if not self._failed:
+                logger.warning(f"Could not write metrics to {self.path}: {e}")
+            self._failed = True
+
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -4,7 +4,13 @@ data related to the Arduino controller that persists over different sesssions,
 primarily valve open durations and experimental schedule information.
 
 It handles loading and saving valve timing profiles (including archiving) to a
-TOML configuration file at the current user's `Documents/Photologic-Experiment-Rig-Files` directory.
+TOML configuration file at the current user's `Documents/Photologic-Experiment-Rig-Files` directory. File access
+goes through `models.valve_durations_repository`, which caches parsed profiles and writes atomically. Every
+saved profile is also appended to the versioned `models.valve_duration_history` store, and valve test results feed
+the per valve calibration curves of `models.valve_calibration`. The valve open times reported with SAMPLE licks are
+compared against the commanded durations by `models.valve_timing_analytics`. Every line processed is also
+published to `monitor_server.monitor_bus` for the live session monitor, and the time taken to process it is
+recorded in the `metrics` registry.
 
 It also processes incoming data strings from the Arduino
 during an experiment, parsing lick events and motor movements, and recording
@@ -15,13 +21,19 @@ instance passed during initialization.
 
 import logging
 import datetime
-import copy
+import time
 from typing import Callable
-import toml
 import numpy as np
 import numpy.typing as npt
 from models.event_data import EventData
+from models.valve_durations_repository import ValveDurationsRepository
+from models.valve_duration_history import ValveDurationHistory
+from models.valve_calibration import ValveCalibrationModel
+from models.valve_timing_analytics import ValveTimingAnalytics
 import system_config
+from metrics import metrics
+from monitor_server import monitor_bus
+from rig_config_service import rig_config
 
 from typing import TYPE_CHECKING
 
@@ -33,15 +45,17 @@ if TYPE_CHECKING:
 # Get the logger in use for the app
 logger = logging.getLogger()
 
-rig_config = system_config.get_rig_config()
-
-with open(rig_config, "r") as f:
-    VALVE_CONFIG = toml.load(f)["valve_config"]
+VALVE_CONFIG = rig_config.section("valve_config")
 
 # pull total valves constant from toml config
 TOTAL_POSSIBLE_VALVES = VALVE_CONFIG["TOTAL_POSSIBLE_VALVES"]
 VALVES_PER_SIDE = TOTAL_POSSIBLE_VALVES // 2
 
+LINE_PROCESSING_TIME = metrics.histogram(
+    "photologic_arduino_line_processing_seconds",
+    "Time taken to process one line received from the Arduino, including recording its event.",
+)
+
 
 class ArduinoData:
     """
@@ -57,17 +71,25 @@ class ArduinoData:
     Attributes
     ----------
     - **`exp_data`** (*ExperimentProcessData*): A reference to the main experiment data object, used for accessing schedule information and recording processed events.
+    - **`durations_repo`** (*ValveDurationsRepository*): Cached, atomically written store for the valve durations TOML file.
+    - **`duration_history`** (*ValveDurationHistory*): Append-only, versioned history of every saved duration profile.
+    - **`calibration_model`** (*ValveCalibrationModel*): Every valve test measurement and the calibration curves fitted to them.
+    - **`timing_analytics`** (*ValveTimingAnalytics*): Running statistics of actual against commanded valve open time for the current experiment.
 
     Methods
     -------
-    - `find_first_not_filled`(...)
-        Helper method to find the first available archive slot in the durations TOML file.
+    - `migrate_archives`()
+        Moves the legacy `archive_1..3` slots of the durations TOML file into the duration history.
     - `save_durations`(...)
-        Saves provided valve durations (side_one, side_two) either as the 'selected' profile or into an archive slot.
+        Saves provided valve durations (side_one, side_two) either as the 'selected' profile or into the duration history.
     - `load_durations`(...)
         Loads a specified valve duration profile (defaulting to 'selected') from the TOML file.
+    - `load_history_version`(...)
+        Loads a specific version of a valve duration profile from the duration history.
     - `load_schedule_indices`()
         Generates 0-indexed numpy arrays representing the valve schedule for an experiment based on `ExperimentProcessData` program_schedule_df.
+    - `start_timing_analytics`()
+        Resets `timing_analytics` with the schedule and durations sent to the Arduino for a new experiment.
     - `increment_licks`(...)
         Increments the appropriate lick counter in the `ExperimentProcessData`.
     - `handle_licks`(...)
@@ -88,126 +110,118 @@ class ArduinoData:
         """
         self.exp_data = exp_data
 
-    def find_first_not_filled(self, toml_file: dict) -> int:
-        """
-        Searches the loaded TOML file structure for the first available archive slot.
+        self.durations_repo = ValveDurationsRepository(
+            system_config.get_valve_durations(), VALVES_PER_SIDE
+        )
 
-        Checks `archive_1`, `archive_2`, then `archive_3` for attribute `filled = false`.
+        self.duration_history = ValveDurationHistory(
+            system_config.get_valve_duration_history(), VALVES_PER_SIDE
+        )
 
-        Parameters
-        ----------
-        - **toml_file** (*dict*): The dictionary representation of the loaded valve durations TOML file.
+        if len(self.duration_history) == 0:
+            self.migrate_archives()
 
-        Returns
-        -------
-        - *int*: The index (1, 2, or 3) of the first unfilled archive slot. Returns 0 if all slots (1, 2, 3) are marked as filled.
+        self.calibration_model = ValveCalibrationModel(
+            system_config.get_valve_calibration_measurements()
+        )
+        self.calibration_model.backfill_from_history(self.duration_history)
+
+        self.timing_analytics = ValveTimingAnalytics()
+
+    def migrate_archives(self) -> None:
         """
-        first_available = 0
+        Seeds an empty duration history from the durations TOML file.
+
+        Filled `archive_3`, `archive_2` and `archive_1` slots are appended oldest first with their original dates, followed by the
+        current 'selected' profile, so the newest history version always matches what the Arduino is using. The archive slots are
+        then removed from the TOML file since the history replaces them.
 
-        for i in range(1, 4):
-            archive = toml_file[f"archive_{i}"]
-            if archive["filled"]:
+        Raises
+        ------
+        - Propagates exceptions from `durations_repo` and `duration_history`.
+        """
+        toml_file = self.durations_repo.get_document()
+
+        for name in ["archive_3", "archive_2", "archive_1", "selected_durations"]:
+            profile = toml_file.get(name)
+            if profile is None or not profile.get("filled", True):
                 continue
-            else:
-                first_available = i
-        return first_available
+
+            side_one, side_two, date_used = self.durations_repo.get_profile(name)
+            self.duration_history.append(
+                side_one,
+                side_two,
+                source="migrated",
+                calibration=None,
+                timestamp=date_used,
+            )
+
+        archives = [name for name in toml_file if name.startswith("archive_")]
+        if archives:
+            for name in archives:
+                del toml_file[name]
+            self.durations_repo.write_document(toml_file)
+
+        logger.info(
+            f"Seeded valve duration history with {len(self.duration_history)} profiles."
+        )
 
     def save_durations(
         self,
         side_one: npt.NDArray[np.int32],
         side_two: npt.NDArray[np.int32],
         type_durations: str,
+        source: str | None = None,
+        calibration: dict | None = None,
     ) -> None:
         """
-        Saves valve open durations to the `valve_durations.toml` configuration file.
+        Saves valve open durations to the `valve_durations.toml` configuration file and the duration history.
 
         This function handles saving durations either as the primary 'selected' profile
-        or archiving them. When archiving, it implements a FIFO (First-In, First-Out)
-        logic using three archive slots:
-        1. If slot 1 is free, save there.
-        2. If slot 1 is full but 2 is free, move 1->2, save new to 1.
-        3. If slots 1 and 2 are full (or all slots are full), move 2->3 (overwriting 3 if necessary), move 1->2, save new to 1.
+        or archiving them. Both are appended to `duration_history` as a new version, which keeps every profile
+        ever saved along with the calibration inputs that produced it. Archiving a profile identical to the most
+        recent version is a no-op, so archiving the current 'selected' profile before replacing it costs nothing.
 
         Converts NumPy arrays to Python lists before saving to TOML for compatibility reasons. Records the
-        current datetime for the saved profile to mark when the profile was created.
+        current datetime for the saved profile to mark when the profile was created. The whole document is written
+        atomically by `durations_repo`.
 
         Parameters
         ----------
         - **side_one** (*npt.NDArray[np.int32]*): Numpy array of durations (microseconds) for side one valves.
         - **side_two** (*npt.NDArray[np.int32]*): Numpy array of durations (microseconds) for side two valves.
         - **type_durations** (*str*): Specifies the save location. Must be either `"selected"` (to update the main profile) or `"archive"`
-        (to save to the next available archive slot).
+        (to only record the profile in the duration history).
+        - **source** (*str | None, optional*): What produced the profile (e.g. `"manual"`, `"calibration"`), recorded in the history.
+        Defaults to `type_durations`.
+        - **calibration** (*dict | None, optional*): JSON serializable calibration inputs that produced the profile, recorded in the history.
 
         Raises
         ------
         - *FileNotFoundError*: If the `valve_durations.toml` file cannot be found at the path specified by `system_config`.
         - *toml.TomlDecodeError*: If the TOML file is malformed.
         - *IOError*: If there are issues reading or writing the TOML file.
-        - *KeyError*: If the expected keys (`selected_durations`, `archive_1`, etc.) are missing in the TOML structure.
+        - *KeyError*: If the expected keys (`selected_durations`, etc.) are missing in the TOML structure.
         """
-
-        dur_path = system_config.get_valve_durations()
-
-        with open(dur_path, "r") as f:
-            toml_file = toml.load(f)
+        source = source if source is not None else type_durations
 
         if type_durations == "selected":
-            selected_durations = toml_file["selected_durations"]
+            toml_file = self.durations_repo.get_document()
 
             # toml only knows how to deal with python native types (list, int, etc)
             # so we convert np arrays to lists
-            selected_durations["date_used"] = datetime.datetime.now()
-            selected_durations["side_one_durations"] = side_one.tolist()
-            selected_durations["side_two_durations"] = side_two.tolist()
+            toml_file["selected_durations"] = {
+                "side_one_durations": side_one.tolist(),
+                "side_two_durations": side_two.tolist(),
+                "date_used": datetime.datetime.now(),
+            }
 
             # save the file with the updated content
-            with open(dur_path, "w") as f:
-                toml.dump(toml_file, f)
-        elif type_durations == "archive":
-            # find first archive not filled
-            first_avail = self.find_first_not_filled(toml_file)
-
-            match first_avail:
-                case 1:
-                    # 1 is available just insert
-                    archive = toml_file["archive_1"]
-
-                    archive["filled"] = True
-                    archive["date_used"] = datetime.datetime.now()
-                    archive["side_one_durations"] = side_one.tolist()
-                    archive["side_two_durations"] = side_two.tolist()
-
-                    with open(dur_path, "w") as f:
-                        toml.dump(toml_file, f)
-                case 2:
-                    # move 1-> 2, insert 1
-                    toml_file["archive_2"] = copy.deepcopy(toml_file["archive_1"])
-
-                    archive_1 = toml_file["archive_1"]
-
-                    archive_1["filled"] = True
-                    archive_1["date_used"] = datetime.datetime.now()
-                    archive_1["side_one_durations"] = side_one.tolist()
-                    archive_1["side_two_durations"] = side_two.tolist()
-
-                    with open(dur_path, "w") as f:
-                        toml.dump(toml_file, f)
-
-                case 3 | 0:
-                    # case 3) 2 -> 3, 1-> 2, insert 1
-                    # case 0 (no available archives) ) del / overwrite 3 (oldest), 2 -> 3, 1-> 2, insert 1
-                    toml_file["archive_3"] = copy.deepcopy(toml_file["archive_2"])
-                    toml_file["archive_2"] = copy.deepcopy(toml_file["archive_1"])
-
-                    archive_1 = toml_file["archive_1"]
-
-                    archive_1["filled"] = True
-                    archive_1["date_used"] = datetime.datetime.now()
-                    archive_1["side_one_durations"] = side_one.tolist()
-                    archive_1["side_two_durations"] = side_two.tolist()
-
-                    with open(dur_path, "w") as f:
-                        toml.dump(toml_file, f)
+            self.durations_repo.write_document(toml_file)
+        elif type_durations != "archive":
+            return
+
+        self.duration_history.append(side_one, side_two, source, calibration)
 
     def load_durations(
         self, type_durations="selected_durations"
@@ -216,19 +230,22 @@ class ArduinoData:
         Loads a specific valve duration profile from the `valve_durations.toml` file.
 
         Retrieves the durations for side one and side two, along with the timestamp
-        when that profile was created. Converts the lists from the TOML file back
-        into NumPy `np.int32` arrays for efficient operations.
+        when that profile was created. Profiles are served from the `durations_repo` cache, which
+        only re-reads the file when it has changed on disk.
+
+        The returned arrays are read-only views into the cache. Call `.copy()` on them before modifying durations.
 
         Parameters
         ----------
         - **type_durations** (*str, optional*): The key corresponding to the desired profile in the TOML file
-        (e.g., `"selected_durations"`, `"default_durations"`, `"archive_1"`). Defaults to `"selected_durations"`.
+        (e.g., `"selected_durations"`, `"default_durations"`). Defaults to `"selected_durations"`. Older profiles are loaded
+        with `load_history_version`.
 
         Returns
         -------
         - *tuple[npt.NDArray[np.int32], npt.NDArray[np.int32], datetime.datetime]*: A tuple containing:
-            - Numpy array of durations for side one.
-            - Numpy array of durations for side two.
+            - Read-only numpy array of durations for side one.
+            - Read-only numpy array of durations for side two.
             - The datetime object indicating when the loaded profile was saved.
 
         Raises
@@ -238,31 +255,28 @@ class ArduinoData:
         - *IOError*: If there are issues reading the TOML file.
         - *KeyError*: If the specified `type_durations` key or expected sub-keys (`side_one_durations`, `date_used`, etc.) are missing.
         """
-        valve_durations_toml = system_config.get_valve_durations()
+        return self.durations_repo.get_profile(type_durations)
 
-        with open(valve_durations_toml, "r") as f:
-            toml_file = toml.load(f)
-
-        file_durations = toml_file[type_durations]
-
-        # create 2 np arrays 8 n long with np.int32s
-        dur_side_one = np.full(VALVES_PER_SIDE, np.int32(0))
-        dur_side_two = np.full(VALVES_PER_SIDE, np.int32(0))
+    def load_history_version(
+        self, version: int
+    ) -> tuple[npt.NDArray[np.int32], npt.NDArray[np.int32], datetime.datetime]:
+        """
+        Loads a specific version of a valve duration profile from `duration_history`. Only that version is read from disk.
 
-        # keys here are names of durations i.e side_one_dur or side_two_dur, values
-        # are lists of durations, VALVES_PER_SIDE long. Will produce two lists
-        # VALVES_PER_SIDE long so that each valve in the rig is assigned a duration.
-        for key, value in file_durations.items():
-            if key == "side_one_durations":
-                for i, duration in enumerate(value):
-                    dur_side_one[i] = duration
-            elif key == "side_two_durations":
-                for i, duration in enumerate(value):
-                    dur_side_two[i] = duration
+        Parameters
+        ----------
+        - **version** (*int*): The history version number to load.
 
-        date_used = file_durations["date_used"]
+        Returns
+        -------
+        - *tuple[npt.NDArray[np.int32], npt.NDArray[np.int32], datetime.datetime]*: Side one durations, side two durations and the
+        datetime the version was saved.
 
-        return dur_side_one, dur_side_two, date_used
+        Raises
+        ------
+        - *KeyError*: If the version does not exist in the history.
+        """
+        return self.duration_history.load_version(version)
 
     def load_schedule_indices(
         self,
@@ -316,6 +330,19 @@ class ArduinoData:
 
         return sched_side_one, sched_side_two
 
+    def start_timing_analytics(self) -> None:
+        """
+        Resets `timing_analytics` for a new experiment using the same schedule and 'selected' durations that are sent to the Arduino.
+
+        Raises
+        ------
+        - Propagates exceptions from `load_schedule_indices` and `load_durations`.
+        """
+        side_one_sched, side_two_sched = self.load_schedule_indices()
+        side_one, side_two, _ = self.load_durations()
+
+        self.timing_analytics.start(side_one_sched, side_two_sched, side_one, side_two)
+
     def increment_licks(self, side: int, event_data: EventData):
         """
         Increments the lick counter for the specified side within the EventData object.
@@ -377,8 +404,9 @@ class ArduinoData:
                 # insert the values held in licks for respective sides in a shorter variable name
                 side_one = self.exp_data.event_data.side_one_licks
                 side_two = self.exp_data.event_data.side_two_licks
-                # if 3 or more licks in a ttc time, jump straight to sample
-                if side_one > 2 or side_two > 2:
+                # if enough licks in a ttc time, jump straight to sample
+                threshold = self.exp_data.TTC_LICK_THRESHOLD
+                if side_one >= threshold or side_two >= threshold:
                     trigger("SAMPLE")
                 self.record_event(
                     side, lick_duration, time_rel_to_start, time_rel_to_trial, state
@@ -404,6 +432,10 @@ class ArduinoData:
                         valve_duration,
                     )
 
+                    self.timing_analytics.record(
+                        side, self.exp_data.current_trial_number - 1, valve_duration
+                    )
+
                 except Exception as e:
                     logging.error(f"IMPROPER DATA.... IGNORING.....{e}")
 
@@ -462,8 +494,8 @@ class ArduinoData:
         Processes incoming data strings received from the Arduino via the serial connection.
 
         Splits the raw data string by the '|' content separator. Determines the type of
-        data based on the first element (`split_data[0]`). Directly handles "MOTOR" events,
-        and routes lick data (`split_data[0]` is '0' or '1')
+        data based on the first element (`split_data[0]`). Directly handles "MOTOR" and "LINK" (a dropped
+        and restored Arduino link) events, and routes lick data (`split_data[0]` is '0' or '1')
         to `handle_licks` for further processing.
 
         Parameters
@@ -478,8 +510,12 @@ class ArduinoData:
         - *IndexError*: If `data.split('|')` results in an empty list or accessing `split_data[0]` fails.
         - Propagates exceptions from `handle_licks` or `record_event`.
         """
+        start = time.perf_counter()
         event_data = self.exp_data.event_data
         split_data = data.split("|")
+
+        # parsed on the monitor's own thread, only queued here
+        monitor_bus.publish("arduino", line=data, state=state)
         try:
             if split_data[0] == "MOTOR":
                 # data will arrive in the following format
@@ -499,7 +535,29 @@ class ArduinoData:
                 )
             elif split_data[0] == "0" or split_data[0] == "1":
                 self.handle_licks(split_data, event_data, state, trigger)
+            elif split_data[0] == "LINK":
+                # queued by controllers.arduino_control once a dropped link is restored
+                # LINK|LOST|GAP_MS|TIME_LOST (time.time() when the link dropped)
+                gap_ms = float(split_data[2])
+                lost_at = float(split_data[3])
+
+                if not self.exp_data.start_time:
+                    logging.warning(f"Arduino link was lost for {gap_ms:.0f} ms before the experiment started.")
+                    return
+
+                trial_start = self.exp_data.trial_start_time or self.exp_data.start_time
+
+                event_data.insert_row_into_df(
+                    self.exp_data.current_trial_number,
+                    None,
+                    gap_ms,
+                    lost_at - self.exp_data.start_time,
+                    lost_at - trial_start,
+                    "LINK LOST",
+                )
 
         except Exception as e:
             logging.error(f"Error processing data from {source}: {e}")
             raise
+        finally:
+            LINE_PROCESSING_TIME.observe(time.perf_counter() - start)
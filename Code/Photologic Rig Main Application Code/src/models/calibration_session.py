@@ -0,0 +1,167 @@
+"""
+This module defines the CalibrationSession class, which tracks a multi-round automatic valve calibration.
+
+A single valve test pass rarely lands every valve within tolerance of the desired volume, and each extra pass used to be started by
+hand. A calibration session remembers the tolerance and round limit chosen by the user, records the volume error of every valve in
+every round, and decides which valves still need to be retested. `views.valve_testing.valve_testing_window.ValveTestWindow` drives the
+rounds and `views.valve_testing.calibration_report_window.CalibrationReport` displays the result.
+"""
+
+import datetime
+import logging
+
+logger = logging.getLogger()
+
+
+class CalibrationSession:
+    """
+    Holds the state of one multi-round calibration session.
+
+    Attributes
+    ----------
+    - **desired_ul** (*float*): Target volume per actuation in microliters.
+    - **tolerance_pct** (*float*): A valve has converged once its dispensed volume is within this percentage of `desired_ul`.
+    - **max_rounds** (*int*): Maximum number of test rounds before the session stops regardless of convergence.
+    - **valves** (*list[int]*): 1-indexed valve numbers included in the session.
+    - **rounds** (*list[dict[int, dict]]*): One entry per completed round mapping each tested valve to its `duration`, `measured_ul`,
+    `error_pct` and `converged` flag.
+    - **pending** (*list[int]*): Valves that still need to be tested in the next round.
+    - **started** (*datetime.datetime*): When the session began.
+    - **aborted** (*bool*): True if the session was stopped before finishing.
+
+    Methods
+    -------
+    - `record_round`(results)
+        Records the results of a round and works out which valves must be retested.
+    - `is_finished`()
+        Whether every valve converged or the round limit was reached.
+    - `abort`()
+        Marks the session as stopped early.
+    - `summary`()
+        Returns the final error, duration and status of each valve.
+    - `report_lines`()
+        Returns a plain text report of the error of each valve in each round, used for the log.
+    """
+
+    def __init__(
+        self,
+        desired_ul: float,
+        tolerance_pct: float,
+        max_rounds: int,
+        valves: list[int],
+    ):
+        """
+        Parameters
+        ----------
+        - **desired_ul** (*float*): Target volume per actuation in microliters.
+        - **tolerance_pct** (*float*): Allowed error as a percentage of `desired_ul`.
+        - **max_rounds** (*int*): Maximum number of test rounds.
+        - **valves** (*list[int]*): 1-indexed valve numbers to calibrate.
+        """
+        self.desired_ul = desired_ul
+        self.tolerance_pct = tolerance_pct
+        self.max_rounds = max_rounds
+        self.valves = list(valves)
+
+        self.rounds: list[dict[int, dict]] = []
+        self.pending: list[int] = list(valves)
+        self.started = datetime.datetime.now()
+        self.aborted = False
+
+    @property
+    def round_number(self) -> int:
+        """The 1-indexed number of the round currently being run (or about to be run)."""
+        return len(self.rounds) + 1
+
+    def record_round(self, results: list[tuple[int, int, float]]) -> list[int]:
+        """
+        Records the results of a completed round.
+
+        Parameters
+        ----------
+        - **results** (*list[tuple[int, int, float]]*): (valve number, tested duration in microseconds, measured microliters per
+        actuation) for each valve tested this round.
+
+        Returns
+        -------
+        - *list[int]*: The valves outside of tolerance, which are the valves tested in the next round if the session continues.
+        """
+        round_results = {}
+        for valve, duration, measured_ul in results:
+            error_pct = (measured_ul - self.desired_ul) / self.desired_ul * 100
+            round_results[valve] = {
+                "duration": int(duration),
+                "measured_ul": measured_ul,
+                "error_pct": error_pct,
+                "converged": abs(error_pct) <= self.tolerance_pct,
+            }
+
+        self.rounds.append(round_results)
+        self.pending = [
+            valve for valve, result in round_results.items() if not result["converged"]
+        ]
+
+        logger.info(
+            f"Calibration round {len(self.rounds)} complete, {len(self.pending)} valves outside of +/-{self.tolerance_pct}%."
+        )
+        return self.pending
+
+    def is_finished(self) -> bool:
+        """
+        Returns
+        -------
+        - *bool*: True if the session was aborted, every valve converged, or `max_rounds` rounds have been run.
+        """
+        return self.aborted or not self.pending or len(self.rounds) >= self.max_rounds
+
+    def abort(self):
+        """
+        Marks the session as stopped before finishing.
+        """
+        self.aborted = True
+
+    def summary(self) -> dict[int, dict]:
+        """
+        Returns the most recent result of each valve along with the round it was measured in.
+
+        Returns
+        -------
+        - *dict[int, dict]*: For each valve, its latest `duration`, `measured_ul`, `error_pct`, `converged` flag and `round`. Valves that
+        were never tested are omitted.
+        """
+        summary = {}
+        for round_index, round_results in enumerate(self.rounds):
+            for valve, result in round_results.items():
+                summary[valve] = {**result, "round": round_index + 1}
+        return summary
+
+    def report_lines(self) -> list[str]:
+        """
+        Builds a plain text table of the error of each valve in each round.
+
+        Returns
+        -------
+        - *list[str]*: Lines of the report, a header followed by one line per valve.
+        """
+        header = "Valve | " + " | ".join(
+            f"Round {i + 1} error %" for i in range(len(self.rounds))
+        ) + " | Status"
+        lines = [
+            f"Calibration session started {self.started:%Y-%m-%d %H:%M}, target {self.desired_ul} uL +/- {self.tolerance_pct}%",
+            header,
+        ]
+
+        summary = self.summary()
+        for valve in self.valves:
+            errors = []
+            for round_results in self.rounds:
+                result = round_results.get(valve)
+                errors.append(f"{result['error_pct']:+.1f}" if result else "-")
+
+            status = "converged" if summary.get(valve, {}).get("converged") else "NOT converged"
+            lines.append(f"{valve} | " + " | ".join(errors) + f" | {status}")
+
+        if self.aborted:
+            lines.append("Session aborted before completion.")
+
+        return lines
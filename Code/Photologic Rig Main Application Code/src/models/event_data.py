@@ -8,14 +8,37 @@ about each event, such as trial number, event state (program state for licks/mot
 duration, and timestamps relative to both the program start and the trial start.
 
 It provides methods for initializing the DataFrame, inserting new event rows in a standardized way, and
-retrieving specific data like lick timestamps for analysis.
+retrieving specific data like lick timestamps for analysis. The time taken by each insert is recorded in the `metrics` registry.
 """
 
-import pandas as pd
+from __future__ import annotations
+
 import logging
+import time
+
+from lazy_imports import lazy_import
+from metrics import metrics
+
+pd = lazy_import("pandas")
 
 logger = logging.getLogger(__name__)
 
+INSERT_TIME = metrics.histogram(
+    "photologic_event_insert_seconds",
+    "Time taken to insert one event into the event DataFrame.",
+)
+
+EVENT_COLUMNS = {
+    "Trial Number": "float64",
+    "Licked Port": "float64",
+    "Event Duration": "float64",
+    "Valve Duration": "float64",
+    "Time Stamp": "float64",
+    "Trial Relative Stamp": "float64",
+    "State": "str",
+}
+"""Columns of the event dataframe and their data types, in order."""
+
 
 class EventData:
     """
@@ -31,7 +54,8 @@ class EventData:
     ----------
     - **`side_one_licks`** (*int*): Counter for the total number of licks detected on side one (Port 1) during a given trial.
     - **`side_two_licks`** (*int*): Counter for the total number of licks detected on side two (Port 2) during a given trial.
-    - **`event_dataframe`** (*pd.DataFrame*): The core pandas DataFrame storing event records. Columns include:
+    - **`event_dataframe`** (*pd.DataFrame*): The core pandas DataFrame storing event records, created the first time it is used. Columns
+    (`EVENT_COLUMNS`) include:
         - `Trial Number` (*float64*): The 1-indexed trial in which the event occurred.
         - `Licked Port` (*float64*): The port number licked (1.0 or 2.0), or NaN for non-lick events.
         - `Event Duration` (*float64*): Duration of the event (e.g., lick contact time, motor movement time) in milliseconds. NaN if not applicable.
@@ -46,33 +70,62 @@ class EventData:
         Adds a new row representing a single event to the `event_dataframe`.
     - `get_lick_timestamps`(...)
         Retrieves lists of lick timestamps for a specific trial, separated by port.
+    - `get_rows`(...)
+        Retrieves a range of event rows as plain tuples.
+    - `num_events`()
+        Returns the number of events recorded, without creating the DataFrame.
+    - `reset`()
+        Discards every recorded event and zeroes the lick counters.
     """
 
     def __init__(self):
         """
         Initializes the EventData object.
 
-        Sets up the `event_dataframe`, defining columns and expected data types
-        for storing lick and motor event data. Initializes lick counters
-        (`side_one_licks`, `side_two_licks`) to zero.
+        Initializes lick counters (`side_one_licks`, `side_two_licks`) to zero. The `event_dataframe` is
+        set up with the columns and data types in `EVENT_COLUMNS` the first time it is used, so pandas
+        does not need to be loaded when the program launches.
         """
 
         self.side_one_licks = 0
         self.side_two_licks = 0
 
-        self.event_dataframe = pd.DataFrame(
-            {
-                "Trial Number": pd.Series(dtype="float64"),
-                "Licked Port": pd.Series(dtype="float64"),
-                "Event Duration": pd.Series(dtype="float64"),
-                "Valve Duration": pd.Series(dtype="float64"),
-                "Time Stamp": pd.Series(dtype="float64"),
-                "Trial Relative Stamp": pd.Series(dtype="float64"),
-                "State": pd.Series(dtype="str"),
-            }
-        )
+        self._event_dataframe: pd.DataFrame | None = None
+
+    @property
+    def event_dataframe(self) -> pd.DataFrame:
+        if self._event_dataframe is None:
+            self._event_dataframe = pd.DataFrame(
+                {
+                    column: pd.Series(dtype=dtype)
+                    for column, dtype in EVENT_COLUMNS.items()
+                }
+            )
+            logger.info("Licks dataframe initialized.")
+        return self._event_dataframe
+
+    @event_dataframe.setter
+    def event_dataframe(self, dataframe: pd.DataFrame) -> None:
+        self._event_dataframe = dataframe
+
+    def reset(self) -> None:
+        """
+        Discards every recorded event and zeroes the lick counters, leaving the object as if it was just created. Views holding a
+        reference to this instance (such as `views.event_window`) keep working with it for the next experiment.
+        """
+        self.side_one_licks = 0
+        self.side_two_licks = 0
+
+        self._event_dataframe = None
 
-        logger.info("Licks dataframe initialized.")
+    def num_events(self) -> int:
+        """
+        Returns the number of events recorded so far. Unlike `len(event_dataframe)` this does not create the DataFrame
+        (and load pandas) if no event has been recorded yet.
+        """
+        if self._event_dataframe is None:
+            return 0
+        return len(self._event_dataframe)
 
     def insert_row_into_df(
         self,
@@ -108,6 +161,7 @@ class EventData:
         # current length in rows of the dataframe, this is where we are going
         # to insert our next element
 
+        start = time.perf_counter()
         event_df = self.event_dataframe
         cur_len = len(event_df)
 
@@ -124,18 +178,41 @@ class EventData:
         event_df.loc[cur_len, "Trial Relative Stamp"] = trial_rel_stamp
         event_df.loc[cur_len, "State"] = state
 
-    def get_lick_timestamps(self, logical_trial: int) -> tuple[list, list]:
+        INSERT_TIME.observe(time.perf_counter() - start)
+
+    def get_rows(self, start: int, stop: int | None = None) -> list[tuple]:
+        """
+        Retrieves a range of rows of the `event_dataframe` in bulk as plain tuples, in column order. Used by the
+        `views.event_window` table, which would otherwise build a pandas Series for every row it displays.
+
+        Parameters
+        ----------
+        - **start** (*int*): The 0-indexed first row to retrieve.
+        - **stop** (*int | None, optional*): One past the last row to retrieve. Defaults to the end of the dataframe.
+
+        Returns
+        -------
+        - *list[tuple]*: One tuple of values per row, empty if the range holds no rows.
+        """
+        rows = self.event_dataframe.iloc[start:stop]
+        return list(rows.itertuples(index=False, name=None))
+
+    def get_lick_timestamps(
+        self, logical_trial: int, trial_relative: bool = False
+    ) -> tuple[list, list]:
         """
         Retrieves lists of lick timestamps for a specific trial, separated by port.
 
         Filters the `event_dataframe` based on the provided `logical_trial` number
         (0-indexed, converted to 1-indexed for filtering) and the 'Licked Port' column.
         Extracts the 'Time Stamp' (relative to program start) for each port. Used for filling the
-        `RasterizedDataWindow` raster plots.
+        `RasterizedDataWindow` raster plots. With `trial_relative` the 'Trial Relative Stamp' (relative to the start of the trial) is
+        extracted instead, which is used by the `LickRatePSTHWindow` histograms.
 
         Parameters
         ----------
         - **logical_trial** (*int*): The 0-indexed trial number for which to retrieve lick timestamps.
+        - **trial_relative** (*bool, optional*): Return timestamps relative to the start of the trial instead of program start.
 
         Returns
         -------
@@ -161,8 +238,10 @@ class EventData:
                 & (self.event_dataframe["Licked Port"].isin([2.0]))
             ]
 
-            timestamps_side_one = filtered_df_side_one["Time Stamp"].tolist()
-            timestamps_side_two = filtered_df_side_two["Time Stamp"].tolist()
+            column = "Trial Relative Stamp" if trial_relative else "Time Stamp"
+
+            timestamps_side_one = filtered_df_side_one[column].tolist()
+            timestamps_side_two = filtered_df_side_two[column].tolist()
 
             logger.info(f"Lick timestamps retrieved for trial {trial_number}.")
 
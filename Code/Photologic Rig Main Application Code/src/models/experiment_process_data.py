@@ -9,21 +9,46 @@ methods for generating the experimental schedule, updating parameters from the G
 calculating runtime, and saving collected data.
 """
 
+from __future__ import annotations
+
 import logging
 from tkinter import filedialog
 import numpy as np
-import pandas as pd
 from typing import Tuple, List
 import datetime
 from pathlib import Path
 
+from lazy_imports import lazy_import
+
 from models.stimuli_data import StimuliData
 from models.event_data import EventData
 from models.arduino_data import ArduinoData
+from rig_config_service import rig_config
 from views.gui_common import GUIUtils
 
+pd = lazy_import("pandas")
+
 logger = logging.getLogger(__name__)
 
+LICK_CONFIG = rig_config.section("lick_config")
+
+DEFAULT_INTERVAL_VARS = {
+    "ITI_var": 30000,
+    "TTC_var": 20000,
+    "sample_var": 15000,
+    "ITI_random_entry": 0,
+    "TTC_random_entry": 5000,
+    "sample_random_entry": 5000,
+}
+"""Values of `interval_vars` (ms) when the program starts or is reset."""
+
+DEFAULT_EXP_VAR_ENTRIES = {
+    "Num Trial Blocks": 10,
+    "Num Stimuli": 4,
+    "Num Trials": 0,
+}
+"""Values of `exp_var_entries` when the program starts or is reset."""
+
 
 class ExperimentProcessData:
     """
@@ -52,6 +77,7 @@ class ExperimentProcessData:
     - **`sample_intervals_final`** (*npt.NDArray[np.int64] | None*): Numpy array holding the calculated Sample period duration (ms) for each trial.
     None until schedule generated.
     - **`TTC_LICK_THRESHOLD`** (*int*): The number of licks required during the TTC state to trigger an early transition to the SAMPLE state.
+    Read from the `lick_config` section of the rig config each time, so an edit to the file applies to the next lick.
     - **`interval_vars`** (*dict[str, int]*): Dictionary storing base and random variation values (ms) for timing intervals (ITI, TTC, Sample), sourced from GUI entries.
     - **`exp_var_entries`** (*dict[str, int]*): Dictionary storing core experiment parameters (Num Trial Blocks, Num Stimuli), sourced from GUI entries.
     `Num Trials` is calculated based on these other values.
@@ -84,6 +110,8 @@ class ExperimentProcessData:
         Static method to handle saving a pandas DataFrame to an .xlsx file using a file dialog.
     - `convert_seconds_to_minutes_seconds`(...)
         Static method to convert a total number of seconds into minutes and remaining seconds.
+    - `reset`()
+        Restores every experiment parameter and discards all experiment data, keeping the same model instances.
     """
 
     def __init__(self):
@@ -93,7 +121,6 @@ class ExperimentProcessData:
         Sets initial timestamps to 0.0, starts `current_trial_number` at 1.
         Instantiates `EventData`, `StimuliData`, and `ArduinoData` (passing self reference).
         Initializes interval arrays (`ITI_intervals_final`, etc.) to None.
-        Sets the `TTC_LICK_THRESHOLD`.
         Defines default values for `interval_vars` and `exp_var_entries`.
         Initializes `program_schedule_df` as an empty DataFrame.
         """
@@ -114,26 +141,52 @@ class ExperimentProcessData:
         self.TTC_intervals_final = None
         self.sample_intervals_final = None
 
-        # this constant should be used in arduino_data to say how many licks moves to sample
-        self.TTC_LICK_THRESHOLD: int = 3
+        self.interval_vars: dict[str, int] = dict(DEFAULT_INTERVAL_VARS)
+        self.exp_var_entries: dict[str, int] = dict(DEFAULT_EXP_VAR_ENTRIES)
 
-        self.interval_vars: dict[str, int] = {
-            "ITI_var": 30000,
-            "TTC_var": 20000,
-            "sample_var": 15000,
-            "ITI_random_entry": 0,
-            "TTC_random_entry": 5000,
-            "sample_random_entry": 5000,
-        }
-        self.exp_var_entries: dict[str, int] = {
-            "Num Trial Blocks": 10,
-            "Num Stimuli": 4,
-            "Num Trials": 0,
-        }
+        # program_schedule_df starts as a blank df to avoid type errors, it is created on first use so that
+        # pandas is not loaded at launch
+        self._program_schedule_df: pd.DataFrame | None = None
+
+    def reset(self) -> None:
+        """
+        Returns the data hub to the state it was created in, for a warm reset between experiments.
+
+        Timestamps, the trial number, generated intervals, `interval_vars`, `exp_var_entries` and the program schedule are restored to their
+        defaults, and the recorded events and stimuli names are cleared in place so every view keeps its references. `arduino_data` is kept
+        as is, since the valve durations, duration history and calibration measurements it caches are not tied to one experiment.
+        """
+        self.start_time = 0.0
+        self.trial_start_time = 0.0
+        self.state_start_time = 0.0
 
-        # include an initial definition of program_schedule_df here as a blank df to avoid type errors and to
-        # make it clear that this is a class attriute
-        self.program_schedule_df = pd.DataFrame()
+        self.current_trial_number = 1
+
+        self.ITI_intervals_final = None
+        self.TTC_intervals_final = None
+        self.sample_intervals_final = None
+
+        self.interval_vars = dict(DEFAULT_INTERVAL_VARS)
+        self.exp_var_entries = dict(DEFAULT_EXP_VAR_ENTRIES)
+
+        self._program_schedule_df = None
+
+        self.event_data.reset()
+        self.stimuli_data.reset()
+
+    @property
+    def TTC_LICK_THRESHOLD(self) -> int:
+        return LICK_CONFIG["TTC_LICK_THRESHOLD"]
+
+    @property
+    def program_schedule_df(self) -> pd.DataFrame:
+        if self._program_schedule_df is None:
+            self._program_schedule_df = pd.DataFrame()
+        return self._program_schedule_df
+
+    @program_schedule_df.setter
+    def program_schedule_df(self, dataframe: pd.DataFrame) -> None:
+        self._program_schedule_df = dataframe
 
     def update_model(self, variable_name: str, value: int | None) -> None:
         """
@@ -452,13 +505,20 @@ class ExperimentProcessData:
 
         Iterates through a dictionary mapping descriptive names to the DataFrame
         references (`program_schedule_df`, `event_data.event_dataframe`) and calls
-        the static `save_df_to_xlsx` method for each.
+        the static `save_df_to_xlsx` method for each. If any valve was actuated, the
+        per-valve open time statistics and delivered volume estimates from `arduino_data.timing_analytics` are saved too.
         """
         dataframes = {
             "Experiment Schedule": self.program_schedule_df,
             "Detailed Event Log Data": self.event_data.event_dataframe,
         }
 
+        timing_analytics = self.arduino_data.timing_analytics
+        if timing_analytics.counts.any():
+            dataframes["Valve Timing Analytics"] = timing_analytics.summary(
+                self.arduino_data.calibration_model
+            )
+
         for name, df_reference in dataframes.items():
             self.save_df_to_xlsx(name, df_reference)
 
@@ -0,0 +1,157 @@
+"""
+This module defines the LickRateHistogram class, which keeps running peri-stimulus time histograms (PSTHs) of licking for every
+stimulus in an experiment.
+
+Licks are binned by their time relative to the start of their trial, which is when the door opens and the stimuli become available.
+Each port's licks are credited to the stimulus presented on that port in that trial, according to the "Port 1"/"Port 2" columns of the
+program schedule. Only the licks of the newest trial are binned on each update, so the cost of an update does not grow with the number
+of trials. The raw lick times are kept so the histograms can be rebinned when the bin width is changed.
+"""
+
+import numpy as np
+import numpy.typing as npt
+
+
+class LickRateHistogram:
+    """
+    Running per stimulus lick histograms.
+
+    Attributes
+    ----------
+    - **stimuli** (*list[str]*): Stimulus names, in the order of the histogram rows.
+    - **window_s** (*float*): Length in seconds of the histogram, licks later than this in their trial are not binned.
+    - **bin_width_s** (*float*): Width of each bin in seconds.
+    - **counts** (*npt.NDArray[np.int64]*): (stimuli, bins) lick counts.
+    - **presentations** (*npt.NDArray[np.int64]*): Number of times each stimulus has been presented on a port.
+
+    Methods
+    -------
+    - `add_trial`(port_licks)
+        Bins the licks of one trial.
+    - `set_bin_width`(bin_width_s)
+        Rebins every recorded lick with a new bin width.
+    - `bin_edges`()
+        Returns the edges of the bins in seconds.
+    - `rates`()
+        Returns the mean lick rate of each stimulus in each bin, in licks per second per presentation.
+    """
+
+    def __init__(self, stimuli: list[str], window_s: float, bin_width_s: float):
+        """
+        Parameters
+        ----------
+        - **stimuli** (*list[str]*): Names of every stimulus that appears in the schedule.
+        - **window_s** (*float*): Longest time after trial start to histogram, usually the longest TTC plus sample time.
+        - **bin_width_s** (*float*): Width of each bin in seconds.
+        """
+        self.stimuli = list(stimuli)
+        self.window_s = window_s
+        self._index = {stimulus: i for i, stimulus in enumerate(self.stimuli)}
+
+        self.presentations = np.zeros(len(self.stimuli), dtype=np.int64)
+
+        # every lick binned so far, kept to rebin when the bin width changes
+        self._lick_stimuli = np.empty(1024, dtype=np.int64)
+        self._lick_times = np.empty(1024, dtype=np.float64)
+        self._num_licks = 0
+
+        self.set_bin_width(bin_width_s)
+
+    @property
+    def num_bins(self) -> int:
+        return self.counts.shape[1]
+
+    def bin_edges(self) -> npt.NDArray[np.float64]:
+        """
+        Returns
+        -------
+        - *npt.NDArray[np.float64]*: The `num_bins + 1` bin edges in seconds after trial start.
+        """
+        return np.arange(self.num_bins + 1) * self.bin_width_s
+
+    def _bin(self, times: npt.NDArray[np.float64]) -> npt.NDArray[np.int64]:
+        """
+        Returns the bin of each time, -1 for times outside the histogram window.
+        """
+        bins = np.floor(times / self.bin_width_s).astype(np.int64)
+        bins[(bins < 0) | (bins >= self.num_bins)] = -1
+        return bins
+
+    def set_bin_width(self, bin_width_s: float) -> None:
+        """
+        Rebins every recorded lick with a new bin width, using a single `np.bincount` over a combined stimulus and bin index.
+
+        Parameters
+        ----------
+        - **bin_width_s** (*float*): New bin width in seconds, must be positive.
+        """
+        self.bin_width_s = bin_width_s
+        num_bins = max(int(np.ceil(self.window_s / bin_width_s)), 1)
+        self.counts = np.zeros((len(self.stimuli), num_bins), dtype=np.int64)
+
+        stimuli = self._lick_stimuli[: self._num_licks]
+        bins = self._bin(self._lick_times[: self._num_licks])
+        keep = bins >= 0
+
+        flat = np.bincount(
+            stimuli[keep] * num_bins + bins[keep], minlength=self.counts.size
+        )
+        self.counts += flat.reshape(self.counts.shape)
+
+    def add_trial(self, port_licks: list[tuple[str, list[float]]]) -> list[int]:
+        """
+        Bins the licks of one trial.
+
+        Parameters
+        ----------
+        - **port_licks** (*list[tuple[str, list[float]]]*): For each port, the stimulus presented on it during the trial and the lick
+        times on that port relative to trial start, in seconds.
+
+        Returns
+        -------
+        - *list[int]*: Rows of the stimuli whose histograms changed.
+        """
+        changed = []
+        for stimulus, times in port_licks:
+            row = self._index.get(stimulus)
+            if row is None:
+                continue
+
+            self.presentations[row] += 1
+            changed.append(row)
+
+            times = np.asarray(times, dtype=np.float64)
+            if times.size == 0:
+                continue
+
+            self._store(row, times)
+
+            bins = self._bin(times)
+            bins = bins[bins >= 0]
+            self.counts[row] += np.bincount(bins, minlength=self.num_bins)
+
+        return changed
+
+    def _store(self, row: int, times: npt.NDArray[np.float64]):
+        """
+        Appends lick times to the raw buffers, doubling their capacity when full.
+        """
+        needed = self._num_licks + times.size
+        if needed > self._lick_times.size:
+            capacity = max(needed, 2 * self._lick_times.size)
+            self._lick_stimuli = np.resize(self._lick_stimuli, capacity)
+            self._lick_times = np.resize(self._lick_times, capacity)
+
+        self._lick_stimuli[self._num_licks : needed] = row
+        self._lick_times[self._num_licks : needed] = times
+        self._num_licks = needed
+
+    def rates(self) -> npt.NDArray[np.float64]:
+        """
+        Returns
+        -------
+        - *npt.NDArray[np.float64]*: (stimuli, bins) mean lick rate in licks per second for each presentation of each stimulus. Rows
+        of stimuli that have not been presented yet are zero.
+        """
+        presentations = np.maximum(self.presentations, 1)[:, None]
+        return self.counts / (presentations * self.bin_width_s)
@@ -32,6 +32,8 @@ class StimuliData:
         Updates the substance name in `stimuli_vars` for a given valve based on GUI input.
     - `get_default_value`(...)
         Retrieves the current substance name for a given valve key.
+    - `reset`()
+        Restores the default placeholder name of every valve.
     """
 
     def __init__(self) -> None:
@@ -41,6 +43,12 @@ class StimuliData:
         Creates the `stimuli_vars` dictionary and populates it with default
         placeholder names for each of the 8 possible valves currently supported (e.g., "Valve 1 Substance").
         """
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Restores the default placeholder name of every valve. Used on a warm reset, where the same instance is reused for the next experiment.
+        """
         self.stimuli_vars = {
             f"Valve {1} Substance": "Valve 1 Substance",
             f"Valve {2} Substance": "Valve 2 Substance",
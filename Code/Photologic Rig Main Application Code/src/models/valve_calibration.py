@@ -0,0 +1,352 @@
+"""
+This module defines the ValveCalibrationModel class, which keeps every valve test measurement ever taken and fits a per valve
+calibration curve to them.
+
+Previously each valve test calculated a new duration with a single proportional correction (`old_duration * (desired / actual)`),
+which assumes flow is linear through the origin and ignores every earlier test. Real valves have a dead time before they start to
+pass liquid, so the volume dispensed per actuation is modeled here as an affine function of the open duration,
+
+    volume_per_actuation = intercept + slope * duration
+
+fitted for all valves at once with iteratively reweighted least squares using Huber weights, so a single mistyped volume does not
+drag the curve. The fitted curve is inverted to predict the duration for a target volume, along with a 95% confidence band.
+
+Measurements are stored one JSON object per line in `valve_calibration_measurements.jsonl` in the assets directory.
+"""
+
+import datetime
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+import numpy.typing as npt
+
+logger = logging.getLogger()
+
+MAX_MEASUREMENTS_PER_VALVE = 20
+"""Only the most recent measurements of each valve are fitted, so the curve follows slow changes in the valve over months."""
+
+HUBER_K = 1.345
+"""Huber tuning constant, residuals beyond this many robust standard deviations are down-weighted."""
+
+IRLS_ITERATIONS = 20
+"""Maximum number of reweighting passes used when fitting."""
+
+T_975 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228]
+"""Two sided 95% Student's t critical values for 1 to 10 degrees of freedom."""
+
+
+def t_critical(dof: int) -> float:
+    """
+    Returns the two sided 95% Student's t critical value for `dof` degrees of freedom, approximated by 2.0 then 1.96 beyond the table.
+    """
+    if dof <= len(T_975):
+        return T_975[dof - 1]
+    return 2.0 if dof <= 30 else 1.96
+
+
+class ValveCalibrationModel:
+    """
+    Stores valve test measurements and fits a robust affine calibration curve for each valve.
+
+    Valves are identified by the same 1-indexed numbers the valve testing window uses. Fitted curves are cached and refitted lazily the
+    next time a prediction is requested after new measurements are added.
+
+    Attributes
+    ----------
+    - **path** (*str*): Path of the JSON lines measurement file.
+    - **valves** (*npt.NDArray[np.int16]*): Valve number of each stored measurement.
+    - **durations** (*npt.NDArray[np.float64]*): Tested open duration of each measurement in microseconds.
+    - **volumes** (*npt.NDArray[np.float64]*): Volume dispensed per actuation of each measurement in microliters.
+    - **timestamps** (*npt.NDArray[np.datetime64]*): When each measurement was taken, to the second.
+
+    Methods
+    -------
+    - `add_measurements`(measurements)
+        Stores new (valve, duration, actuations, dispensed mL) measurements.
+    - `backfill_from_history`(history)
+        Seeds an empty model with the calibration inputs recorded in the valve duration history.
+    - `fit`()
+        Fits every valve's curve at once with vectorized, Huber weighted least squares.
+    - `predict_duration`(valve, target_ul)
+        Predicts the duration that dispenses `target_ul` per actuation, with a 95% confidence band.
+    - `measurement_count`(valve)
+        Returns how many measurements are stored for a valve.
+    """
+
+    def __init__(self, path: str):
+        """
+        Loads every stored measurement.
+
+        Parameters
+        ----------
+        - **path** (*str*): Path of the measurement file, usually from `system_config.get_valve_calibration_measurements`.
+        """
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._fits: dict[int, dict] | None = None
+
+        valves, durations, volumes, timestamps = [], [], [], []
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.error("Skipping corrupt valve calibration measurement.")
+                        continue
+                    valves.append(record["valve"])
+                    durations.append(record["duration_us"])
+                    volumes.append(record["dispensed_ml"] * 1000 / record["actuations"])
+                    timestamps.append(record["timestamp"])
+
+        self.valves = np.array(valves, dtype=np.int16)
+        self.durations = np.array(durations, dtype=np.float64)
+        self.volumes = np.array(volumes, dtype=np.float64)
+        self.timestamps = np.array(timestamps, dtype="datetime64[s]")
+
+    def add_measurements(
+        self,
+        measurements: list[tuple[int, int, int, float]],
+        timestamp: datetime.datetime | None = None,
+    ) -> None:
+        """
+        Stores new measurements on disk and in memory. Measurements with no actuations or no dispensed volume are ignored.
+
+        Parameters
+        ----------
+        - **measurements** (*list[tuple[int, int, int, float]]*): (valve number, tested duration in microseconds, number of actuations,
+        total dispensed volume in mL) for each tested valve.
+        - **timestamp** (*datetime.datetime | None, optional*): When the measurements were taken. Defaults to now.
+        """
+        timestamp = timestamp if timestamp is not None else datetime.datetime.now()
+
+        lines = []
+        new_valves, new_durations, new_volumes = [], [], []
+        for valve, duration, actuations, dispensed_ml in measurements:
+            if actuations <= 0 or dispensed_ml <= 0:
+                continue
+
+            lines.append(
+                json.dumps(
+                    {
+                        "timestamp": timestamp.isoformat(),
+                        "valve": int(valve),
+                        "duration_us": int(duration),
+                        "actuations": int(actuations),
+                        "dispensed_ml": float(dispensed_ml),
+                    }
+                )
+                + "\n"
+            )
+            new_valves.append(valve)
+            new_durations.append(duration)
+            new_volumes.append(dispensed_ml * 1000 / actuations)
+
+        if not lines:
+            return
+
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+
+            self.valves = np.concatenate([self.valves, np.array(new_valves, dtype=np.int16)])
+            self.durations = np.concatenate([self.durations, np.array(new_durations, dtype=np.float64)])
+            self.volumes = np.concatenate([self.volumes, np.array(new_volumes, dtype=np.float64)])
+            self.timestamps = np.concatenate(
+                [self.timestamps, np.full(len(new_valves), np.datetime64(timestamp, "s"))]
+            )
+            self._fits = None
+
+        logger.info(f"Stored {len(lines)} valve calibration measurements.")
+
+    def backfill_from_history(self, history) -> None:
+        """
+        Seeds the model from the calibration inputs recorded with each version of a `models.valve_duration_history.ValveDurationHistory`.
+        Only does anything if no measurements are stored yet.
+
+        Parameters
+        ----------
+        - **history** (*ValveDurationHistory*): The duration history to read calibration versions from.
+        """
+        if self.valves.size > 0:
+            return
+
+        entries, _ = history.page(0, len(history))
+        for entry in reversed(entries):
+            if entry["source"] != "calibration":
+                continue
+
+            record = history.read(entry["version"])
+            calibration = record.get("calibration") or {}
+            actuations = calibration.get("actuations", 0)
+
+            measurements = [
+                (int(valve), result["tested_duration"], actuations, result["dispensed_ml"])
+                for valve, result in calibration.get("valves", {}).items()
+            ]
+            self.add_measurements(
+                measurements, datetime.datetime.fromisoformat(record["timestamp"])
+            )
+
+    def measurement_count(self, valve: int) -> int:
+        """
+        Returns the number of measurements stored for `valve`.
+        """
+        return int(np.count_nonzero(self.valves == valve))
+
+    def _recent_mask(self) -> npt.NDArray[np.bool_]:
+        """
+        Returns a mask selecting the most recent `MAX_MEASUREMENTS_PER_VALVE` measurements of each valve.
+        """
+        mask = np.zeros(self.valves.size, dtype=bool)
+        for valve in np.unique(self.valves):
+            indices = np.flatnonzero(self.valves == valve)
+            mask[indices[-MAX_MEASUREMENTS_PER_VALVE:]] = True
+        return mask
+
+    @staticmethod
+    def _group_medians(
+        values: npt.NDArray[np.float64], groups: npt.NDArray[np.intp], num_groups: int
+    ) -> npt.NDArray[np.float64]:
+        """
+        Computes the median of `values` within each group without looping over groups.
+        """
+        order = np.lexsort((values, groups))
+        counts = np.bincount(groups, minlength=num_groups)
+        starts = np.cumsum(counts) - counts
+        sorted_values = values[order]
+
+        lower = sorted_values[starts + (counts - 1) // 2]
+        upper = sorted_values[starts + counts // 2]
+        return (lower + upper) / 2
+
+    def fit(self) -> dict[int, dict]:
+        """
+        Fits an affine curve of volume per actuation against duration for every valve simultaneously.
+
+        All per valve sums are computed with `np.bincount` over a group index, so each reweighting pass is a handful of vectorized
+        operations regardless of the number of valves. Valves whose measurements were all taken at a single duration cannot support
+        an intercept, they are fitted through the origin instead (the old proportional correction, but averaged over every test).
+
+        Returns
+        -------
+        - *dict[int, dict]*: For each valve number, a dictionary with keys `intercept`, `slope`, `cov` (2 x 2 parameter covariance),
+        `dof` (residual degrees of freedom), `count` and `method` (`"affine"` or `"proportional"`).
+        """
+        with self._lock:
+            if self._fits is not None:
+                return self._fits
+
+            mask = self._recent_mask()
+            valve_numbers, groups = np.unique(self.valves[mask], return_inverse=True)
+            num_groups = valve_numbers.size
+            # work in milliseconds to keep the normal equations well conditioned
+            x = self.durations[mask] / 1000
+            y = self.volumes[mask]
+
+            fits = {}
+            if num_groups == 0:
+                self._fits = fits
+                return fits
+
+            counts = np.bincount(groups, minlength=num_groups)
+            weights = np.ones_like(x)
+
+            for _ in range(IRLS_ITERATIONS):
+                sw = np.bincount(groups, weights, num_groups)
+                swx = np.bincount(groups, weights * x, num_groups)
+                swy = np.bincount(groups, weights * y, num_groups)
+                swxx = np.bincount(groups, weights * x * x, num_groups)
+                swxy = np.bincount(groups, weights * x * y, num_groups)
+
+                det = sw * swxx - swx**2
+                # a spread of durations is required to estimate an intercept
+                affine = (det > 1e-9 * sw * swxx) & (counts >= 2)
+
+                safe_det = np.where(affine, det, 1.0)
+                slope = np.where(affine, (sw * swxy - swx * swy) / safe_det, swxy / swxx)
+                intercept = np.where(affine, (swy - slope * swx) / sw, 0.0)
+
+                residuals = y - (intercept[groups] + slope[groups] * x)
+
+                # robust scale per valve from the median absolute residual
+                scale = 1.4826 * self._group_medians(np.abs(residuals), groups, num_groups)
+                threshold = HUBER_K * scale[groups]
+                abs_res = np.abs(residuals)
+                new_weights = np.where(
+                    (threshold > 0) & (abs_res > threshold),
+                    threshold / np.where(abs_res > 0, abs_res, 1.0),
+                    1.0,
+                )
+
+                if np.allclose(new_weights, weights, atol=1e-6):
+                    break
+                weights = new_weights
+
+            params = np.where(affine, 2, 1)
+            dof = counts - params
+            rss = np.bincount(groups, weights * residuals**2, num_groups)
+            s2 = np.where(dof > 0, rss / np.maximum(dof, 1), np.nan)
+
+            for g, valve in enumerate(valve_numbers):
+                if affine[g]:
+                    inv = np.array([[swxx[g], -swx[g]], [-swx[g], sw[g]]]) / det[g]
+                else:
+                    inv = np.array([[0.0, 0.0], [0.0, 1 / swxx[g]]])
+
+                fits[int(valve)] = {
+                    "intercept": float(intercept[g]),
+                    "slope": float(slope[g]),
+                    "cov": inv * s2[g],
+                    "dof": int(dof[g]),
+                    "count": int(counts[g]),
+                    "method": "affine" if affine[g] else "proportional",
+                }
+
+            self._fits = fits
+            return fits
+
+    def predict_duration(
+        self, valve: int, target_ul: float
+    ) -> tuple[int, int, int, str] | None:
+        """
+        Predicts the open duration that dispenses `target_ul` microliters per actuation on `valve`.
+
+        The confidence band comes from the uncertainty of the fitted curve at the predicted duration, converted from volume to duration
+        through the slope of the curve. If there are too few measurements to estimate the uncertainty the band collapses to the
+        prediction itself.
+
+        Parameters
+        ----------
+        - **valve** (*int*): 1-indexed valve number.
+        - **target_ul** (*float*): Desired volume per actuation in microliters.
+
+        Returns
+        -------
+        - *tuple[int, int, int, str] | None*: (predicted duration, lower bound, upper bound) in microseconds and the fit method used,
+        or None if the valve has no usable measurements.
+        """
+        fit = self.fit().get(valve)
+        if fit is None or fit["slope"] <= 0:
+            return None
+
+        duration_ms = (target_ul - fit["intercept"]) / fit["slope"]
+        if duration_ms <= 0:
+            return None
+
+        half_width_ms = 0.0
+        if fit["dof"] > 0:
+            point = np.array([1.0, duration_ms])
+            var_volume = float(point @ fit["cov"] @ point)
+            if np.isfinite(var_volume) and var_volume > 0:
+                half_width_ms = t_critical(fit["dof"]) * np.sqrt(var_volume) / fit["slope"]
+
+        duration = round(duration_ms * 1000)
+        lower = round(max(duration_ms - half_width_ms, 0) * 1000)
+        upper = round((duration_ms + half_width_ms) * 1000)
+
+        return duration, lower, upper, fit["method"]
@@ -0,0 +1,424 @@
+"""
+This module defines the ValveDurationHistory class, an append-only, versioned store of every valve duration profile the program has
+saved. It replaces the three `archive_N` slots that used to live in `valve_durations.toml`, which meant calibration history older than
+three runs was lost.
+
+Profiles are stored one JSON object per line in `valve_duration_history.jsonl` in the assets directory. Each record holds a version
+number, a timestamp, the source of the profile (manual adjustment, automatic calibration, ...), any calibration inputs that produced it
+and a sha256 hash of its durations. A small sidecar index file records the byte offset of every record along with its date and which
+valves it changed, so the history can be paged through and filtered by date or valve without loading every profile into memory.
+"""
+
+import bisect
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+import numpy.typing as npt
+
+logger = logging.getLogger()
+
+
+class ValveDurationHistory:
+    """
+    Append-only history of valve duration profiles with an index by date and valve.
+
+    Index entries are small dictionaries with the keys `version`, `timestamp`, `source`, `hash`, `changed` (1-indexed valve numbers whose
+    durations differ from the previous version), `offset` and `length` (location of the full record in the history file).
+
+    Attributes
+    ----------
+    - **path** (*str*): Path of the JSON lines history file.
+    - **index_path** (*str*): Path of the sidecar index file.
+    - **valves_per_side** (*int*): Number of durations stored for each side of the rig.
+
+    Methods
+    -------
+    - `append`(side_one, side_two, source, calibration)
+        Appends a new version unless its durations match the most recent version.
+    - `read`(version)
+        Reads one full record from disk using the index.
+    - `load_version`(version)
+        Reads a version and returns its durations as np.int32 arrays, mirroring `ArduinoData.load_durations`.
+    - `page`(page, page_size, valve)
+        Returns one page of index entries, newest first, optionally only versions that changed a given valve.
+    - `entries_between`(start, end)
+        Returns the index entries saved between two datetimes.
+    - `latest`()
+        Returns the index entry of the most recent version.
+    - `durations_matrix`()
+        Reads every version in one pass and returns their timestamps, durations and changed valves as arrays.
+    """
+
+    def __init__(self, path: str, valves_per_side: int):
+        """
+        Opens the history file and loads its index, rebuilding the index from the history file if it is missing or out of date.
+
+        Parameters
+        ----------
+        - **path** (*str*): Path of the JSON lines history file, usually from `system_config.get_valve_duration_history`.
+        - **valves_per_side** (*int*): Number of durations stored for each side of the rig.
+        """
+        self.path = path
+        self.index_path = f"{os.path.splitext(path)[0]}.index.jsonl"
+        self.valves_per_side = valves_per_side
+
+        self._lock = threading.Lock()
+        self._entries: list[dict] = []
+        self._timestamps: list[str] = []
+        self._by_valve: dict[int, list[int]] = {}
+        self._last_durations: npt.NDArray[np.int32] | None = None
+
+        self._load_index()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def content_hash(
+        side_one: npt.NDArray[np.int32], side_two: npt.NDArray[np.int32]
+    ) -> str:
+        """
+        Computes the sha256 hash of a profile's durations. Only the durations are hashed, so saving the same durations twice yields the
+        same hash regardless of when or why they were saved.
+        """
+        durations = np.concatenate([side_one, side_two]).astype("<i4")
+        return hashlib.sha256(durations.tobytes()).hexdigest()
+
+    def _add_entry(self, entry: dict):
+        """
+        Adds an index entry to the in memory date and valve indices.
+        """
+        position = len(self._entries)
+        self._entries.append(entry)
+        self._timestamps.append(entry["timestamp"])
+        for valve in entry["changed"]:
+            self._by_valve.setdefault(valve, []).append(position)
+
+    def _reset_index(self):
+        self._entries = []
+        self._timestamps = []
+        self._by_valve = {}
+        self._last_durations = None
+
+    def _load_index(self):
+        """
+        Loads the sidecar index. If the index does not describe every byte of the history file (e.g. the program closed between writing
+        a record and its index entry) the index is rebuilt from the history file instead.
+        """
+        if not os.path.exists(self.path):
+            return
+
+        history_size = os.path.getsize(self.path)
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                try:
+                    for line in f:
+                        self._add_entry(json.loads(line))
+                except json.JSONDecodeError:
+                    self._reset_index()
+
+            if self._entries:
+                last = self._entries[-1]
+                if last["offset"] + last["length"] == history_size:
+                    self._last_durations = self._durations_of(self.read(last["version"]))
+                    return
+
+            elif history_size == 0:
+                return
+
+        logger.info("Valve duration history index missing or stale, rebuilding.")
+        self._rebuild_index()
+
+    def _rebuild_index(self):
+        """
+        Scans the history file, recreating the index. A partially written final record is truncated away.
+        """
+        self._reset_index()
+
+        good_end = 0
+        previous = None
+        with open(self.path, "rb") as f:
+            offset = 0
+            for raw in f:
+                try:
+                    if not raw.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(raw)
+                except ValueError:
+                    logger.error(
+                        f"Discarding corrupt valve duration history record at byte {offset}."
+                    )
+                    break
+
+                durations = self._durations_of(record)
+                self._add_entry(
+                    self._index_entry(record, offset, len(raw), previous, durations)
+                )
+                previous = durations
+                offset += len(raw)
+                good_end = offset
+
+        if good_end != os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good_end)
+
+        self._last_durations = previous
+
+        with open(self.index_path, "w", encoding="utf-8") as f:
+            for entry in self._entries:
+                f.write(json.dumps(entry) + "\n")
+
+    def _durations_of(self, record: dict) -> npt.NDArray[np.int32]:
+        """
+        Returns the durations of a record as one array, side one followed by side two.
+        """
+        return np.array(
+            record["side_one_durations"] + record["side_two_durations"], dtype=np.int32
+        )
+
+    def _index_entry(
+        self,
+        record: dict,
+        offset: int,
+        length: int,
+        previous: npt.NDArray[np.int32] | None,
+        durations: npt.NDArray[np.int32],
+    ) -> dict:
+        """
+        Builds the index entry for a record, including the 1-indexed valves it changed relative to `previous`.
+        """
+        if previous is None or previous.shape != durations.shape:
+            changed = np.arange(durations.size)
+        else:
+            changed = np.flatnonzero(previous != durations)
+
+        return {
+            "version": record["version"],
+            "timestamp": record["timestamp"],
+            "source": record["source"],
+            "hash": record["hash"],
+            "changed": (changed + 1).tolist(),
+            "offset": offset,
+            "length": length,
+        }
+
+    def append(
+        self,
+        side_one: npt.NDArray[np.int32],
+        side_two: npt.NDArray[np.int32],
+        source: str,
+        calibration: dict | None = None,
+        timestamp: datetime.datetime | None = None,
+    ) -> int:
+        """
+        Appends a profile to the history as a new version. If the durations are identical to the most recent version nothing is written,
+        so archiving the same profile twice does not clutter the history.
+
+        Parameters
+        ----------
+        - **side_one** (*npt.NDArray[np.int32]*): Durations (microseconds) for side one valves.
+        - **side_two** (*npt.NDArray[np.int32]*): Durations (microseconds) for side two valves.
+        - **source** (*str*): What produced the profile, e.g. `"manual"`, `"calibration"`, `"archive"` or `"migrated"`.
+        - **calibration** (*dict | None, optional*): Calibration inputs that produced the profile, stored as-is. Must be JSON serializable.
+        - **timestamp** (*datetime.datetime | None, optional*): When the profile was created. Defaults to now.
+
+        Returns
+        -------
+        - *int*: The version number of the new record, or of the existing most recent record if it was a duplicate.
+
+        Raises
+        ------
+        - *OSError*: If the history or index file cannot be written.
+        """
+        digest = self.content_hash(side_one, side_two)
+
+        with self._lock:
+            if self._entries and self._entries[-1]["hash"] == digest:
+                return self._entries[-1]["version"]
+
+            version = self._entries[-1]["version"] + 1 if self._entries else 1
+            timestamp = timestamp if timestamp is not None else datetime.datetime.now()
+
+            record = {
+                "version": version,
+                "timestamp": timestamp.isoformat(),
+                "source": source,
+                "hash": digest,
+                "side_one_durations": np.asarray(side_one).tolist(),
+                "side_two_durations": np.asarray(side_two).tolist(),
+                "calibration": calibration,
+            }
+            line = (json.dumps(record) + "\n").encode("utf-8")
+
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+            durations = self._durations_of(record)
+            entry = self._index_entry(
+                record, offset, len(line), self._last_durations, durations
+            )
+
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+            self._add_entry(entry)
+            self._last_durations = durations
+
+        logger.info(f"Valve durations saved to history as version {version} ({source}).")
+        return version
+
+    def _entry_for(self, version: int) -> dict:
+        """
+        Finds the index entry of a version. Versions are sequential, so this is usually a direct lookup.
+        """
+        position = version - self._entries[0]["version"] if self._entries else -1
+        if 0 <= position < len(self._entries) and self._entries[position]["version"] == version:
+            return self._entries[position]
+
+        for entry in self._entries:
+            if entry["version"] == version:
+                return entry
+
+        raise KeyError(f"valve duration history has no version {version}")
+
+    def read(self, version: int) -> dict:
+        """
+        Reads the full record of a version from disk, seeking directly to it using the index.
+
+        Parameters
+        ----------
+        - **version** (*int*): The version number to read.
+
+        Returns
+        -------
+        - *dict*: The stored record.
+
+        Raises
+        ------
+        - *KeyError*: If the version does not exist.
+        """
+        entry = self._entry_for(version)
+        with open(self.path, "rb") as f:
+            f.seek(entry["offset"])
+            return json.loads(f.read(entry["length"]))
+
+    def load_version(
+        self, version: int
+    ) -> tuple[npt.NDArray[np.int32], npt.NDArray[np.int32], datetime.datetime]:
+        """
+        Reads a version and returns it in the same form as `models.arduino_data.ArduinoData.load_durations`.
+
+        Parameters
+        ----------
+        - **version** (*int*): The version number to load.
+
+        Returns
+        -------
+        - *tuple[npt.NDArray[np.int32], npt.NDArray[np.int32], datetime.datetime]*: Side one durations, side two durations and the
+        datetime the version was saved.
+        """
+        record = self.read(version)
+
+        side_one = np.zeros(self.valves_per_side, dtype=np.int32)
+        side_two = np.zeros(self.valves_per_side, dtype=np.int32)
+        stored_one = record["side_one_durations"][: self.valves_per_side]
+        stored_two = record["side_two_durations"][: self.valves_per_side]
+        side_one[: len(stored_one)] = stored_one
+        side_two[: len(stored_two)] = stored_two
+
+        return side_one, side_two, datetime.datetime.fromisoformat(record["timestamp"])
+
+    def page(
+        self, page: int = 0, page_size: int = 25, valve: int | None = None
+    ) -> tuple[list[dict], int]:
+        """
+        Returns one page of index entries, newest first. Only the index is consulted, no records are read.
+
+        Parameters
+        ----------
+        - **page** (*int, optional*): 0-indexed page number, page 0 holds the most recent versions.
+        - **page_size** (*int, optional*): Number of entries per page.
+        - **valve** (*int | None, optional*): If given, only versions that changed this 1-indexed valve are included.
+
+        Returns
+        -------
+        - *tuple[list[dict], int]*: The index entries on the page and the total number of matching entries.
+        """
+        with self._lock:
+            if valve is None:
+                positions = range(len(self._entries))
+            else:
+                positions = self._by_valve.get(valve, [])
+
+            total = len(positions)
+            stop = total - page * page_size
+            start = max(stop - page_size, 0)
+            if stop <= 0:
+                return [], total
+
+            return [self._entries[p] for p in reversed(positions[start:stop])], total
+
+    def entries_between(
+        self, start: datetime.datetime, end: datetime.datetime
+    ) -> list[dict]:
+        """
+        Returns the index entries saved between `start` and `end` (inclusive), oldest first.
+        """
+        with self._lock:
+            lo = bisect.bisect_left(self._timestamps, start.isoformat())
+            hi = bisect.bisect_right(self._timestamps, end.isoformat())
+            return self._entries[lo:hi]
+
+    def latest(self) -> dict | None:
+        """
+        Returns the index entry of the most recent version, or None if the history is empty.
+        """
+        with self._lock:
+            return self._entries[-1] if self._entries else None
+
+    def durations_matrix(
+        self,
+    ) -> tuple[npt.NDArray[np.datetime64], npt.NDArray[np.int32], npt.NDArray[np.bool_]]:
+        """
+        Reads the whole history file in a single sequential pass, for analyses that need every version at once.
+
+        Returns
+        -------
+        - *tuple[npt.NDArray[np.datetime64], npt.NDArray[np.int32], npt.NDArray[np.bool_]]*: The timestamp of each version, a
+        (versions, 2 * valves_per_side) matrix of durations with side one followed by side two, and a matrix of the same shape that is
+        True where a version changed a valve's duration.
+        """
+        with self._lock:
+            entries = list(self._entries)
+
+        size = 2 * self.valves_per_side
+        timestamps = np.array([entry["timestamp"] for entry in entries], dtype="datetime64[s]")
+        durations = np.zeros((len(entries), size), dtype=np.int32)
+        changed = np.zeros((len(entries), size), dtype=bool)
+
+        if not entries:
+            return timestamps, durations, changed
+
+        with open(self.path, "rb") as f:
+            for row, entry in enumerate(entries):
+                f.seek(entry["offset"])
+                record = json.loads(f.read(entry["length"]))
+
+                side_one = record["side_one_durations"][: self.valves_per_side]
+                side_two = record["side_two_durations"][: self.valves_per_side]
+                durations[row, : len(side_one)] = side_one
+                durations[row, self.valves_per_side : self.valves_per_side + len(side_two)] = side_two
+
+                changed_valves = [valve - 1 for valve in entry["changed"] if valve <= size]
+                changed[row, changed_valves] = True
+
+        return timestamps, durations, changed
@@ -0,0 +1,186 @@
+"""
+This module defines the ValveDurationsRepository class, which owns all reads and writes of the `valve_durations.toml` file located
+in the current user's `Documents/Photologic-Experiment-Rig-Files/assets` directory.
+
+Parsed duration profiles are cached in memory and only re-parsed when the modification time or size of the file on disk changes,
+so repeated reads from the valve testing windows and the Arduino controller do not touch the disk. Writes go to a temporary file in the
+same directory which is flushed to disk and then renamed over the original, so a crash or power loss mid-write can never leave a
+half-written TOML file behind.
+"""
+
+import datetime
+import logging
+import os
+import tempfile
+import threading
+
+import numpy as np
+import numpy.typing as npt
+import toml
+
+logger = logging.getLogger()
+
+
+class ValveDurationsRepository:
+    """
+    Caches and persists the valve duration profiles stored in `valve_durations.toml`.
+
+    Each profile (`default_durations`, `selected_durations`, `archive_1`, ...) is stored in the cache as a single read-only
+    2 x valves_per_side `np.int32` array. Reads hand out row views of that array, so they are zero-copy; callers that need to modify
+    durations must `.copy()` them first.
+
+    Attributes
+    ----------
+    - **path** (*str*): Path to the valve durations TOML file.
+    - **valves_per_side** (*int*): Number of durations stored for each side of the rig.
+
+    Methods
+    -------
+    - `get_profile`(profile)
+        Returns the side one durations, side two durations and date used for a profile.
+    - `get_document`()
+        Returns a shallow copy of the parsed TOML document, suitable for building an updated document to pass to `write_document`.
+    - `write_document`(document)
+        Atomically writes a complete document to disk and refreshes the cache from it.
+    - `invalidate`()
+        Drops the cache, forcing the next read to re-parse the file.
+    """
+
+    def __init__(self, path: str, valves_per_side: int):
+        """
+        Parameters
+        ----------
+        - **path** (*str*): Path to the valve durations TOML file, usually from `system_config.get_valve_durations`.
+        - **valves_per_side** (*int*): Number of durations stored for each side of the rig.
+        """
+        self.path = path
+        self.valves_per_side = valves_per_side
+
+        self._lock = threading.Lock()
+        self._stamp: tuple[int, int] | None = None
+        self._document: dict = {}
+        self._profiles: dict[str, tuple[npt.NDArray[np.int32], datetime.datetime]] = {}
+
+    def _file_stamp(self) -> tuple[int, int]:
+        """
+        Returns the modification time in nanoseconds and the size of the file, used to decide whether the cache is stale.
+        """
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _build_profiles(self, document: dict):
+        """
+        Converts every duration section in `document` into a read-only int32 array and stores it in the cache.
+        """
+        profiles = {}
+        for name, section in document.items():
+            if not isinstance(section, dict) or "side_one_durations" not in section:
+                continue
+
+            durations = np.zeros((2, self.valves_per_side), dtype=np.int32)
+            side_one = section["side_one_durations"][: self.valves_per_side]
+            side_two = section["side_two_durations"][: self.valves_per_side]
+            durations[0, : len(side_one)] = side_one
+            durations[1, : len(side_two)] = side_two
+            durations.flags.writeable = False
+
+            profiles[name] = (durations, section["date_used"])
+
+        self._document = document
+        self._profiles = profiles
+
+    def _ensure_fresh(self):
+        """
+        Re-parses the file if it has changed on disk since it was last read or written. Must be called with `_lock` held.
+        """
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+
+        with open(self.path, "r") as f:
+            document = toml.load(f)
+
+        self._build_profiles(document)
+        self._stamp = stamp
+        logger.info("Valve durations loaded from disk.")
+
+    def get_profile(
+        self, profile: str
+    ) -> tuple[npt.NDArray[np.int32], npt.NDArray[np.int32], datetime.datetime]:
+        """
+        Returns a duration profile from the cache, re-reading the file first only if it has changed on disk.
+
+        Parameters
+        ----------
+        - **profile** (*str*): Name of the profile section, e.g. `"selected_durations"` or `"archive_1"`.
+
+        Returns
+        -------
+        - *tuple[npt.NDArray[np.int32], npt.NDArray[np.int32], datetime.datetime]*: Read-only views of the side one and side two
+        durations, and the datetime the profile was saved.
+
+        Raises
+        ------
+        - *FileNotFoundError*: If the durations file does not exist.
+        - *toml.TomlDecodeError*: If the durations file is malformed.
+        - *KeyError*: If `profile` is not a duration section of the file.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            durations, date_used = self._profiles[profile]
+
+        return durations[0], durations[1], date_used
+
+    def get_document(self) -> dict:
+        """
+        Returns a shallow copy of the parsed document. Sections are shared with the cache, so replace sections rather than
+        modifying them in place.
+
+        Returns
+        -------
+        - *dict*: The top level of the parsed TOML document.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            return dict(self._document)
+
+    def write_document(self, document: dict):
+        """
+        Writes `document` to a temporary file next to the durations file, flushes it to disk and renames it over the
+        original, then refreshes the cache without re-reading the file.
+
+        Parameters
+        ----------
+        - **document** (*dict*): The complete TOML document to store.
+
+        Raises
+        ------
+        - *OSError*: If the temporary file cannot be written or renamed. The original file is left untouched in that case.
+        """
+        directory = os.path.dirname(self.path)
+
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(
+                prefix=".valve_durations.", suffix=".tmp", dir=directory
+            )
+            try:
+                with os.fdopen(fd, "w") as f:
+                    toml.dump(document, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.error(f"Error writing valve durations, file left unchanged: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+            self._build_profiles(document)
+            self._stamp = self._file_stamp()
+
+    def invalidate(self):
+        """
+        Drops the cached profiles so the next read re-parses the file.
+        """
+        with self._lock:
+            self._stamp = None
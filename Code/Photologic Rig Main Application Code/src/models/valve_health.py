@@ -0,0 +1,268 @@
+"""
+This module defines the ValveHealthMonitor class, which looks for valves that are slowly clogging or wearing by following their
+calibration results over time.
+
+A clogging valve passes less liquid per millisecond it is open, so each calibration pushes its duration a little higher, and a wearing
+valve drifts the other way. Neither shows up in a single calibration, but both show up as a trend across many of them. The monitor uses
+two sources:
+
+- every valve test measurement stored by `models.valve_calibration.ValveCalibrationModel`, from which the flow rate of each valve
+  (microliters dispensed per millisecond open) is computed, and
+- every duration profile stored in `models.valve_duration_history.ValveDurationHistory`, from which the durations each valve was set to
+  over time are taken.
+
+A straight line is fitted through each valve's flow rate and durations against time. All valves are fitted together with `np.bincount`
+sums over a valve index, so a report over years of history takes a few milliseconds once the files are read. A valve is flagged if its
+fitted flow rate is projected to drift further than `MAX_DRIFT_PCT` from where it started by the time of the next session, if its
+durations are trending the same way, or if its measurements scatter widely around the trend.
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+
+import numpy as np
+import numpy.typing as npt
+
+from rig_config_service import rig_config
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger()
+
+VALVE_CONFIG = rig_config.section("valve_config")
+
+TOTAL_CURRENT_VALVES = VALVE_CONFIG["TOTAL_CURRENT_VALVES"]
+VALVES_PER_SIDE = TOTAL_CURRENT_VALVES // 2
+
+HORIZON_DAYS = 30
+"""Trends are projected this many days past today, roughly the time until the next session."""
+
+MAX_DRIFT_PCT = 10.0
+"""A valve is flagged if its trend is projected to move this many percent away from where it started."""
+
+MAX_SCATTER_PCT = 10.0
+"""A valve is flagged if its measurements scatter around the trend by more than this percentage (residual standard deviation)."""
+
+MIN_POINTS = 3
+"""Fewest points needed before a trend is fitted for a valve."""
+
+SECONDS_PER_DAY = 86400
+
+
+def group_trends(
+    groups: npt.NDArray[np.intp],
+    days: npt.NDArray[np.float64],
+    values: npt.NDArray[np.float64],
+    num_groups: int,
+) -> dict[str, npt.NDArray[np.float64]]:
+    """
+    Fits `values = intercept + slope * days` separately for every group using per group sums, without looping over groups.
+
+    Parameters
+    ----------
+    - **groups** (*npt.NDArray[np.intp]*): Group (valve) index of each point.
+    - **days** (*npt.NDArray[np.float64]*): Time of each point in days.
+    - **values** (*npt.NDArray[np.float64]*): Value of each point.
+    - **num_groups** (*int*): Number of groups.
+
+    Returns
+    -------
+    - *dict[str, npt.NDArray[np.float64]]*: Arrays of length `num_groups` holding the `count`, `slope` (per day), `intercept`,
+    residual standard deviation `scatter`, and the `first_day` and `last_day` of each group. Groups with fewer than `MIN_POINTS`
+    points or no spread in time have NaN fits.
+    """
+
+    def sums(weights):
+        return np.bincount(groups, weights=weights, minlength=num_groups)
+
+    n = sums(None)
+    sx, sy = sums(days), sums(values)
+    sxx, sxy, syy = sums(days * days), sums(days * values), sums(values * values)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denominator = n * sxx - sx * sx
+        valid = (n >= MIN_POINTS) & (denominator > 1e-12 * np.maximum(n * sxx, 1))
+
+        slope = np.where(valid, (n * sxy - sx * sy) / denominator, np.nan)
+        intercept = np.where(valid, (sy - slope * sx) / n, np.nan)
+
+        # residual sum of squares from the same sums, clipped at zero against rounding
+        rss = syy - intercept * sy - slope * sxy
+        scatter = np.where(valid, np.sqrt(np.clip(rss, 0, None) / (n - 2)), np.nan)
+
+    first_day = np.full(num_groups, np.inf)
+    last_day = np.full(num_groups, -np.inf)
+    np.minimum.at(first_day, groups, days)
+    np.maximum.at(last_day, groups, days)
+
+    return {
+        "count": n,
+        "slope": slope,
+        "intercept": intercept,
+        "scatter": scatter,
+        "first_day": first_day,
+        "last_day": last_day,
+    }
+
+
+class ValveHealthMonitor:
+    """
+    Computes per valve drift and scatter from the calibration measurements and duration history.
+
+    Valves are identified by the same 1-indexed numbers the valve testing window uses (1 to `TOTAL_CURRENT_VALVES`).
+
+    Attributes
+    ----------
+    - **history** (*ValveDurationHistory*): Every duration profile ever saved.
+    - **calibration_model** (*ValveCalibrationModel*): Every valve test measurement ever taken.
+
+    Methods
+    -------
+    - `report`(now)
+        Returns a table with one row per valve holding its trends and any health warnings.
+    - `report_lines`(report)
+        Formats a report as plain text for the log.
+    """
+
+    def __init__(self, history, calibration_model):
+        """
+        Parameters
+        ----------
+        - **history** (*ValveDurationHistory*): The duration history of `models.arduino_data.ArduinoData`.
+        - **calibration_model** (*ValveCalibrationModel*): The calibration model of `models.arduino_data.ArduinoData`.
+        """
+        self.history = history
+        self.calibration_model = calibration_model
+
+    @staticmethod
+    def _relative_drift(
+        trends: dict[str, npt.NDArray[np.float64]], horizon_day: float
+    ) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """
+        Returns the fitted slope per 30 days and the projected change at `horizon_day`, both as a percentage of the fitted value at
+        each valve's first point.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            start = trends["intercept"] + trends["slope"] * trends["first_day"]
+            monthly_pct = trends["slope"] * 30 / start * 100
+            projected_pct = trends["slope"] * (horizon_day - trends["first_day"]) / start * 100
+        return monthly_pct, projected_pct
+
+    def _flow_trends(self, origin: np.datetime64) -> dict[str, npt.NDArray[np.float64]]:
+        """
+        Fits the flow rate (microliters per millisecond open) of each valve against time.
+        """
+        model = self.calibration_model
+        valves = model.valves.astype(np.intp)
+        keep = (valves >= 1) & (valves <= TOTAL_CURRENT_VALVES) & (model.durations > 0)
+
+        days = (model.timestamps[keep] - origin) / np.timedelta64(1, "s") / SECONDS_PER_DAY
+        flow = model.volumes[keep] / (model.durations[keep] / 1000)
+
+        return group_trends(
+            valves[keep] - 1, days.astype(np.float64), flow, TOTAL_CURRENT_VALVES
+        )
+
+    def _duration_trends(self, origin: np.datetime64) -> dict[str, npt.NDArray[np.float64]]:
+        """
+        Fits the durations each valve was set to against time, using only the versions that changed that valve's duration.
+        """
+        timestamps, durations, changed = self.history.durations_matrix()
+
+        # keep the physical valves of each side, history stores a fixed number of slots per side
+        slots = np.r_[
+            0:VALVES_PER_SIDE,
+            self.history.valves_per_side : self.history.valves_per_side + VALVES_PER_SIDE,
+        ]
+        durations = durations[:, slots]
+        changed = changed[:, slots] & (durations > 0)
+
+        rows, valves = np.nonzero(changed)
+        days = (timestamps[rows] - origin) / np.timedelta64(1, "s") / SECONDS_PER_DAY
+
+        return group_trends(
+            valves,
+            days.astype(np.float64),
+            durations[rows, valves].astype(np.float64),
+            TOTAL_CURRENT_VALVES,
+        )
+
+    def report(self, now: datetime.datetime | None = None) -> pd.DataFrame:
+        """
+        Builds the health report.
+
+        Parameters
+        ----------
+        - **now** (*datetime.datetime | None, optional*): The time to project trends from. Defaults to now.
+
+        Returns
+        -------
+        - *pd.DataFrame*: One row per valve with the number of measurements and duration changes it has, its current fitted flow rate,
+        flow and duration drift in percent per 30 days, the flow change projected `HORIZON_DAYS` from now, the measurement scatter in
+        percent, and a `Warnings` column that is empty for healthy valves.
+        """
+        now = now if now is not None else datetime.datetime.now()
+        origin = np.datetime64(now, "s")
+        horizon_day = float(HORIZON_DAYS)
+
+        flow = self._flow_trends(origin)
+        duration = self._duration_trends(origin)
+
+        flow_monthly, flow_projected = self._relative_drift(flow, horizon_day)
+        duration_monthly, duration_projected = self._relative_drift(duration, horizon_day)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # today is day 0, so the fitted value now is the intercept
+            flow_now = flow["intercept"]
+            scatter_pct = flow["scatter"] / np.abs(flow_now) * 100
+
+        warnings = []
+        for i in range(TOTAL_CURRENT_VALVES):
+            reasons = []
+            if flow_projected[i] < -MAX_DRIFT_PCT:
+                reasons.append(
+                    f"flow projected {-flow_projected[i]:.0f}% below first calibration by next session (clogging?)"
+                )
+            elif flow_projected[i] > MAX_DRIFT_PCT:
+                reasons.append(
+                    f"flow projected {flow_projected[i]:.0f}% above first calibration by next session (wear?)"
+                )
+            if abs(duration_projected[i]) > MAX_DRIFT_PCT:
+                reasons.append(f"durations trending {duration_projected[i]:+.0f}%")
+            if scatter_pct[i] > MAX_SCATTER_PCT:
+                reasons.append(f"measurements scatter {scatter_pct[i]:.0f}%")
+            warnings.append("; ".join(reasons))
+
+        return pd.DataFrame(
+            {
+                "Valve": np.arange(1, TOTAL_CURRENT_VALVES + 1),
+                "Measurements": flow["count"].astype(int),
+                "Duration Changes": duration["count"].astype(int),
+                "Flow Now (uL/ms)": flow_now,
+                "Flow Drift (%/30 days)": flow_monthly,
+                "Projected Flow Change (%)": flow_projected,
+                "Duration Drift (%/30 days)": duration_monthly,
+                "Scatter (%)": scatter_pct,
+                "Warnings": warnings,
+            }
+        )
+
+    @staticmethod
+    def report_lines(report: pd.DataFrame) -> list[str]:
+        """
+        Formats a report from `report` as plain text, one line per valve.
+        """
+        lines = [
+            f"Valve health report, trends projected {HORIZON_DAYS} days ahead, flagged beyond +/-{MAX_DRIFT_PCT}% drift or "
+            f"{MAX_SCATTER_PCT}% scatter"
+        ]
+        for row in report.itertuples(index=False):
+            status = row.Warnings if row.Warnings else "ok"
+            lines.append(
+                f"Valve {row.Valve}: {row.Measurements} measurements, flow drift {row[4]:+.1f}%/30d, "
+                f"duration drift {row[6]:+.1f}%/30d, scatter {row[7]:.1f}% -> {status}"
+            )
+        return lines
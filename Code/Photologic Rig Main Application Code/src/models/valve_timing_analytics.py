@@ -0,0 +1,215 @@
+"""
+This module defines the ValveTimingAnalytics class, which compares how long each valve was actually open during an experiment with how
+long it was commanded to be open.
+
+Every SAMPLE lick reported by the Arduino carries the measured open time of the valve that answered it. Those times are folded into
+running per-valve statistics as they arrive (Welford's online mean and variance), so keeping the analytics up to date costs a handful
+of arithmetic operations per lick and no history is stored. Valves that consistently overshoot their commanded time, or whose open time
+varies too much from lick to lick, are flagged in the log as soon as they cross the thresholds in the `valve_timing_config` section of
+the rig config. At the end of an experiment the statistics are exported together with an estimate of the volume each valve delivered,
+computed from the valve calibration curves of `models.valve_calibration`.
+"""
+
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import numpy.typing as npt
+
+from lazy_imports import lazy_import
+from rig_config_service import rig_config
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger()
+
+VALVE_CONFIG = rig_config.section("valve_config")
+TIMING_CONFIG = rig_config.section("valve_timing_config")
+
+TOTAL_CURRENT_VALVES = VALVE_CONFIG["TOTAL_CURRENT_VALVES"]
+VALVES_PER_SIDE = TOTAL_CURRENT_VALVES // 2
+
+
+class ValveTimingAnalytics:
+    """
+    Online per-valve statistics of actual against commanded valve open time for one experiment.
+
+    Valves are tracked by their 0-indexed physical number (0 to `TOTAL_CURRENT_VALVES` - 1, side two valves follow side one), the same
+    numbering used by the experiment schedule sent to the Arduino.
+
+    Attributes
+    ----------
+    - **commanded** (*npt.NDArray[np.float64]*): Commanded open time of each valve in microseconds.
+    - **counts** (*npt.NDArray[np.int64]*): Number of actuations recorded for each valve.
+    - **mean_actual** (*npt.NDArray[np.float64]*): Running mean of the actual open time of each valve in microseconds.
+    - **min_actual** (*npt.NDArray[np.float64]*): Shortest actual open time seen for each valve.
+    - **max_actual** (*npt.NDArray[np.float64]*): Longest actual open time seen for each valve.
+    - **skipped** (*int*): SAMPLE licks reported without a valve actuation (reported open time of 0), which are not counted.
+    - **flagged** (*dict[int, str]*): Valves currently out of spec mapped to the reason.
+
+    Methods
+    -------
+    - `start`(side_one_schedule, side_two_schedule, side_one_durations, side_two_durations)
+        Resets the statistics and records the schedule and commanded durations of a new experiment.
+    - `record`(side, trial_index, actual_us)
+        Folds the open time of one SAMPLE lick into the statistics of the valve scheduled on that side for that trial.
+    - `jitter`()
+        Returns the standard deviation of the actual open time of each valve.
+    - `summary`(calibration_model)
+        Builds a table of the statistics of each actuated valve along with its estimated delivered volume.
+    """
+
+    def __init__(self):
+        self.commanded = np.zeros(TOTAL_CURRENT_VALVES, dtype=np.float64)
+        self._schedule: npt.NDArray[np.int8] = np.zeros((2, 0), dtype=np.int8)
+        self._reset()
+
+    def _reset(self):
+        self.counts = np.zeros(TOTAL_CURRENT_VALVES, dtype=np.int64)
+        self.mean_actual = np.zeros(TOTAL_CURRENT_VALVES, dtype=np.float64)
+        self._m2 = np.zeros(TOTAL_CURRENT_VALVES, dtype=np.float64)
+        self.min_actual = np.full(TOTAL_CURRENT_VALVES, np.inf)
+        self.max_actual = np.full(TOTAL_CURRENT_VALVES, -np.inf)
+        self.skipped = 0
+        self.flagged: dict[int, str] = {}
+
+    def start(
+        self,
+        side_one_schedule: npt.NDArray[np.int8],
+        side_two_schedule: npt.NDArray[np.int8],
+        side_one_durations: npt.NDArray[np.int32],
+        side_two_durations: npt.NDArray[np.int32],
+    ) -> None:
+        """
+        Resets the statistics for a new experiment.
+
+        Parameters
+        ----------
+        - **side_one_schedule** (*npt.NDArray[np.int8]*): 0-indexed valve used on side one in each trial, from
+        `ArduinoData.load_schedule_indices`.
+        - **side_two_schedule** (*npt.NDArray[np.int8]*): 0-indexed valve used on side two in each trial.
+        - **side_one_durations** (*npt.NDArray[np.int32]*): Durations (microseconds) sent to the Arduino for side one.
+        - **side_two_durations** (*npt.NDArray[np.int32]*): Durations (microseconds) sent to the Arduino for side two.
+        """
+        self._reset()
+        self._schedule = np.stack([side_one_schedule, side_two_schedule])
+
+        self.commanded[:VALVES_PER_SIDE] = side_one_durations[:VALVES_PER_SIDE]
+        self.commanded[VALVES_PER_SIDE:] = side_two_durations[:VALVES_PER_SIDE]
+
+    def record(self, side: int, trial_index: int, actual_us: float) -> None:
+        """
+        Updates the running statistics of the valve scheduled on `side` in trial `trial_index` with one measured open time. Runs in
+        constant time, only the affected valve is touched.
+
+        Parameters
+        ----------
+        - **side** (*int*): 0 for side one, 1 for side two.
+        - **trial_index** (*int*): 0-indexed trial the lick happened in.
+        - **actual_us** (*float*): Open time reported by the Arduino in microseconds.
+        """
+        if actual_us <= 0:
+            # the arduino reports 0 when a lick did not open a valve
+            self.skipped += 1
+            return
+
+        if not 0 <= trial_index < self._schedule.shape[1]:
+            return
+
+        valve = int(self._schedule[side, trial_index])
+
+        # welford's online update, stable even after many thousands of licks
+        count = self.counts[valve] + 1
+        delta = actual_us - self.mean_actual[valve]
+        self.mean_actual[valve] += delta / count
+        self._m2[valve] += delta * (actual_us - self.mean_actual[valve])
+        self.counts[valve] = count
+
+        if actual_us < self.min_actual[valve]:
+            self.min_actual[valve] = actual_us
+        if actual_us > self.max_actual[valve]:
+            self.max_actual[valve] = actual_us
+
+        if count >= TIMING_CONFIG["MIN_SAMPLES"]:
+            self._check_valve(valve)
+
+    def _check_valve(self, valve: int):
+        """
+        Flags or clears a valve based on its mean overshoot and jitter, logging only when its status changes.
+        """
+        overshoot = self.mean_actual[valve] - self.commanded[valve]
+        jitter = np.sqrt(self._m2[valve] / (self.counts[valve] - 1))
+
+        reasons = []
+        if abs(overshoot) > TIMING_CONFIG["MAX_MEAN_OVERSHOOT_US"]:
+            reasons.append(f"mean open time off by {overshoot:+.0f} us")
+        if jitter > TIMING_CONFIG["MAX_JITTER_US"]:
+            reasons.append(f"open time jitter {jitter:.0f} us")
+
+        if reasons:
+            reason = ", ".join(reasons)
+            if valve not in self.flagged:
+                logger.warning(
+                    f"Valve {valve + 1} out of spec: {reason} (commanded {self.commanded[valve]:.0f} us)."
+                )
+            self.flagged[valve] = reason
+        elif self.flagged.pop(valve, None) is not None:
+            logger.info(f"Valve {valve + 1} open time back within spec.")
+
+    def jitter(self) -> npt.NDArray[np.float64]:
+        """
+        Returns
+        -------
+        - *npt.NDArray[np.float64]*: Sample standard deviation of the actual open time of each valve in microseconds, NaN for valves
+        with fewer than two actuations.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.counts > 1, np.sqrt(self._m2 / (self.counts - 1)), np.nan)
+
+    def summary(self, calibration_model=None) -> pd.DataFrame:
+        """
+        Builds a table of the timing statistics of every valve that was actuated, one row per valve.
+
+        If a calibration model is given, the volume each valve delivered is estimated from its calibration curve. The curve is affine
+        in open time, so the total is exact from the count and the mean open time without revisiting individual licks.
+
+        Parameters
+        ----------
+        - **calibration_model** (*ValveCalibrationModel | None, optional*): Calibration curves used to estimate delivered volume.
+
+        Returns
+        -------
+        - *pd.DataFrame*: Per-valve statistics with columns for the commanded, mean, minimum and maximum open time, the mean
+        overshoot, the jitter, the estimated volume per lick and in total, and the flag reason of out of spec valves.
+        """
+        valves = np.flatnonzero(self.counts)
+        counts = self.counts[valves]
+        mean_actual = self.mean_actual[valves]
+
+        per_lick_ul = np.full(valves.size, np.nan)
+        if calibration_model is not None:
+            fits = calibration_model.fit()
+            for i, valve in enumerate(valves):
+                fit = fits.get(int(valve) + 1)
+                if fit is not None:
+                    per_lick_ul[i] = max(
+                        fit["intercept"] + fit["slope"] * mean_actual[i] / 1000, 0
+                    )
+
+        return pd.DataFrame(
+            {
+                "Valve": valves + 1,
+                "Side": np.where(valves < VALVES_PER_SIDE, 1, 2),
+                "Actuations": counts,
+                "Commanded Duration (us)": self.commanded[valves],
+                "Mean Actual Duration (us)": mean_actual,
+                "Mean Overshoot (us)": mean_actual - self.commanded[valves],
+                "Jitter (us)": self.jitter()[valves],
+                "Min Actual Duration (us)": self.min_actual[valves],
+                "Max Actual Duration (us)": self.max_actual[valves],
+                "Est. Volume Per Lick (uL)": per_lick_ul,
+                "Est. Total Volume (mL)": per_lick_ul * counts / 1000,
+                "Out Of Spec": [self.flagged.get(int(valve), "") for valve in valves],
+            }
+        )
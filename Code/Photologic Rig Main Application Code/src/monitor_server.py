@@ -0,0 +1,472 @@
+"""
+This module serves a live view of the running session to web browsers, so a session can be watched from another room. It is switched on
+with `ENABLED` in the `monitor_config` section of the rig config and only listens on this PC (`HOST`, 127.0.0.1 by default) at `PORT`.
+Open `http://127.0.0.1:PORT/` for the dashboard, `/events` is the raw stream, `/status` the current state as JSON and `/metrics` the
+program's runtime metrics (see `metrics`) in the Prometheus text format.
+
+The program reports what happens through `monitor_bus`: state transitions (`app_logic.StateMachine`), every line the Arduino sends (licks,
+door movements and link drops, from `models.arduino_data.ArduinoData.process_data`) and a summary of each finished trial. Publishing only
+puts a tuple on a queue, so the Tkinter thread and the Arduino threads never wait on a viewer. The server's fan-out thread takes events
+off that queue, turns Arduino lines into structured events, encodes each event once as a Server-Sent Events message and hands it to every
+connected viewer's own bounded queue. Every `HEALTH_INTERVAL_S` it also publishes the timing health reported by the health source (GUI lag,
+Arduino data queue depth, link drops). Each viewer is written to by its own server thread, so a slow or stalled browser only loses its own
+oldest events, and ten open dashboards cost the session nothing but the fan-out thread's time.
+
+Browsers reconnect to an event stream on their own, and a newly connected viewer is sent the latest state, trial and health first.
+"""
+
+import http.server
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable
+
+import system_config
+from metrics import metrics
+from rig_config_service import rig_config
+
+logger = logging.getLogger()
+
+MONITOR_CONFIG = rig_config.section("monitor_config")
+
+KEEPALIVE_S = 15
+"""A comment is sent to idle viewers this often, so closed connections are noticed and proxies keep the stream open."""
+
+SNAPSHOT_EVENTS = ("hello", "state", "trial", "health")
+"""Events whose latest message is sent to a viewer as soon as it connects."""
+
+
+class MonitorBus:
+    """
+    Where the program publishes what happens during a session, for `MonitorServer`. Publishing does nothing until a server is running.
+
+    Attributes
+    ----------
+    - **enabled** (*bool*): Whether a server is consuming events.
+    - **health_source** (*Callable[[], dict[str, Any]] | None*): Returns the current timing health, `app_logic.StateMachine.timing_health`
+      while a StateMachine is running. Called on the fan-out thread.
+
+    Methods
+    -------
+    - `publish`(kind, **fields)
+        Queues an event for the viewers.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.health_source: Callable[[], dict[str, Any]] | None = None
+        self.events: queue.SimpleQueue[tuple[str, float, dict[str, Any]] | None] = queue.SimpleQueue()
+
+    def publish(self, kind: str, **fields: Any) -> None:
+        """
+        Queues an event. Callable from any thread, and cheap enough for the Tkinter and Arduino threads: the fields are not copied or
+        serialized here, so they should be numbers and strings, not objects the caller goes on to change.
+        """
+        if not self.enabled:
+            return
+        self.events.put((kind, time.time(), fields))
+
+
+monitor_bus = MonitorBus()
+"""The program's monitor bus, shared by every module."""
+
+
+def describe_arduino_line(line: str) -> tuple[str, dict[str, Any]] | None:
+    """
+    Turns a line sent by the Arduino into a monitor event, following the formats handled by `models.arduino_data.ArduinoData`.
+
+    Returns
+    -------
+    - *tuple[str, dict[str, Any]] | None*: The event kind ("lick", "motor" or "link") and fields, None for lines that are not events.
+    """
+    fields = line.split("|")
+    try:
+        if fields[0] == "MOTOR":
+            # MOTOR|MOVEMENT|DURATION|END_TIME_REL_TO_PROG_START|END_TIME_REL_TO_PROG_TRIAL_START
+            return "motor", {
+                "movement": fields[1],
+                "duration_ms": int(fields[2]),
+                "time_s": int(fields[3]) / 1000,
+                "trial_time_s": int(fields[4]) / 1000,
+            }
+        if fields[0] in ("0", "1"):
+            # TTC: SIDE|DURATION|ONSET_REL_START|ONSET_REL_TRIAL, SAMPLE: SIDE|DURATION|VALVE_DURATION|ONSET_REL_START|ONSET_REL_TRIAL
+            sample = len(fields) == 5
+            return "lick", {
+                "port": int(fields[0]) + 1,
+                "duration_ms": int(fields[1]),
+                "valve_duration_us": int(fields[2]) if sample else None,
+                "time_s": int(fields[-2]) / 1000,
+                "trial_time_s": int(fields[-1]) / 1000,
+            }
+        if fields[0] == "LINK":
+            # LINK|LOST|GAP_MS|TIME_LOST
+            return "link", {"gap_ms": float(fields[2]), "lost_at": float(fields[3])}
+    except (IndexError, ValueError):
+        logger.warning(f"Monitor could not parse Arduino line {line!r}")
+    return None
+
+
+class ViewerStream:
+    """
+    The events waiting to be sent to one connected viewer.
+
+    Attributes
+    ----------
+    - **messages** (*queue.Queue[bytes | None]*): Encoded messages, None closes the stream.
+    - **dropped** (*int*): Messages dropped because the viewer fell too far behind.
+    """
+
+    def __init__(self, max_messages: int):
+        self.messages: queue.Queue[bytes | None] = queue.Queue(maxsize=max_messages)
+        self.dropped = 0
+
+    def offer(self, message: bytes | None) -> None:
+        """Queues a message, dropping the oldest one if the viewer is too far behind. Called only from the fan-out thread."""
+        while True:
+            try:
+                self.messages.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self.messages.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class MonitorServer(http.server.ThreadingHTTPServer):
+    """
+    The HTTP server and the fan-out thread feeding its viewers.
+
+    Attributes
+    ----------
+    - **bus** (*MonitorBus*): Where events come from.
+    - **viewers** (*set[ViewerStream]*): The connected viewers.
+    - **latest** (*dict[str, bytes]*): The latest message of each of `SNAPSHOT_EVENTS`, sent to new viewers.
+    - **sent** (*int*): Events fanned out so far.
+
+    Methods
+    -------
+    - `start`()
+        Starts serving and fanning out events, and enables the bus.
+    - `stop`()
+        Disables the bus, closes every viewer's stream and stops the server.
+    - `encode`(kind, timestamp, fields)
+        Encodes an event as a Server-Sent Events message.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, bus: MonitorBus, host: str, port: int, max_messages: int):
+        """
+        Raises
+        ------
+        - *OSError*: If the address cannot be bound, e.g. another rig's server is using the port.
+        """
+        super().__init__((host, port), MonitorRequestHandler)
+        self.bus = bus
+        self.max_messages = max_messages
+
+        self.viewers: set[ViewerStream] = set()
+        self.latest: dict[str, bytes] = {}
+        self.viewers_lock = threading.Lock()
+        self.sent = 0
+
+        self._serve_thread: threading.Thread | None = None
+        self._fan_out_thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self.bus.enabled = True
+        self.bus.publish("hello", started_at=time.time())
+
+        self._fan_out_thread = threading.Thread(target=self._fan_out, name="MonitorFanOut", daemon=True)
+        self._fan_out_thread.start()
+        self._serve_thread = threading.Thread(target=self.serve_forever, name="MonitorServer", daemon=True)
+        self._serve_thread.start()
+
+        host, port = self.server_address[:2]
+        logger.info(f"Monitor server listening on http://{host}:{port}/")
+
+    def stop(self) -> None:
+        self.bus.enabled = False
+        self.bus.events.put(None)
+        if self._fan_out_thread is not None:
+            self._fan_out_thread.join()
+
+        self.shutdown()
+        self.server_close()
+        logger.info(f"Monitor server stopped after sending {self.sent} events.")
+
+    def add_viewer(self) -> tuple[ViewerStream, list[bytes]]:
+        """Registers a viewer and returns it with the snapshot messages to send it first."""
+        viewer = ViewerStream(self.max_messages)
+        with self.viewers_lock:
+            self.viewers.add(viewer)
+            snapshot = [self.latest[kind] for kind in SNAPSHOT_EVENTS if kind in self.latest]
+        return viewer, snapshot
+
+    def remove_viewer(self, viewer: ViewerStream) -> None:
+        with self.viewers_lock:
+            self.viewers.discard(viewer)
+        if viewer.dropped:
+            logger.warning(f"Monitor viewer fell behind and missed {viewer.dropped} events.")
+
+    @staticmethod
+    def encode(kind: str, timestamp: float, fields: dict[str, Any]) -> bytes:
+        data = json.dumps({"type": kind, "time": timestamp, **fields}, default=str)
+        return f"event: {kind}\ndata: {data}\n\n".encode("utf-8")
+
+    def status(self) -> dict[str, Any]:
+        """The latest snapshot events, decoded, for `/status`."""
+        with self.viewers_lock:
+            latest = dict(self.latest)
+            num_viewers = len(self.viewers)
+
+        status: dict[str, Any] = {"viewers": num_viewers, "events_sent": self.sent}
+        for kind, message in latest.items():
+            status[kind] = json.loads(message.decode("utf-8").split("data: ", 1)[1])
+        return status
+
+    def _fan_out(self) -> None:
+        next_health = time.monotonic()
+
+        while True:
+            # checked on every pass, a running session publishes steadily and would otherwise hold the health feed back
+            if time.monotonic() >= next_health:
+                self._deliver("health", time.time(), self._health())
+                next_health = time.monotonic() + MONITOR_CONFIG["HEALTH_INTERVAL_S"]
+
+            try:
+                item = self.bus.events.get(timeout=max(next_health - time.monotonic(), 0))
+            except queue.Empty:
+                continue
+
+            if item is None:
+                break
+
+            self._deliver(*item)
+
+        with self.viewers_lock:
+            viewers = list(self.viewers)
+        for viewer in viewers:
+            viewer.offer(None)
+
+    def _deliver(self, kind: str, timestamp: float, fields: dict[str, Any]) -> None:
+        """
+        Encodes one event and offers it to every viewer, keeping it as the latest of its kind for viewers that connect later.
+        """
+        if kind == "arduino":
+            described = describe_arduino_line(fields["line"])
+            if described is None:
+                return
+            kind, parsed = described
+            fields = {**parsed, "state": fields.get("state")}
+
+        try:
+            message = self.encode(kind, timestamp, fields)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Monitor could not encode {kind} event: {e}")
+            return
+
+        with self.viewers_lock:
+            if kind in SNAPSHOT_EVENTS:
+                self.latest[kind] = message
+            viewers = list(self.viewers)
+
+        for viewer in viewers:
+            viewer.offer(message)
+        self.sent += 1
+
+    def _health(self) -> dict[str, Any]:
+        source = self.bus.health_source
+        if source is None:
+            return {}
+        try:
+            return source()
+        except Exception as e:
+            logger.error(f"Error collecting timing health for the monitor: {e}")
+            return {}
+
+
+class MonitorRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the dashboard, the event stream, the status and the metrics. Each request runs on its own thread of the server."""
+
+    server: MonitorServer
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0]
+        if path == "/":
+            self.send_body(DASHBOARD_HTML.encode("utf-8"), "text/html; charset=utf-8")
+        elif path == "/status":
+            self.send_body(json.dumps(self.server.status(), default=str).encode("utf-8"), "application/json")
+        elif path == "/metrics":
+            rig_name = system_config.get_rig_name()
+            exposition = metrics.exposition({"rig": rig_name} if rig_name is not None else None)
+            self.send_body(exposition.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+        elif path == "/events":
+            self.stream_events()
+        else:
+            self.send_error(404)
+
+    def send_body(self, body: bytes, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_events(self) -> None:
+        with self.server.viewers_lock:
+            num_viewers = len(self.server.viewers)
+        if num_viewers >= MONITOR_CONFIG["MAX_VIEWERS"]:
+            self.send_error(503, "Too many viewers")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        viewer, snapshot = self.server.add_viewer()
+        try:
+            for message in snapshot:
+                self.wfile.write(message)
+            self.wfile.flush()
+
+            while True:
+                try:
+                    message = viewer.messages.get(timeout=KEEPALIVE_S)
+                except queue.Empty:
+                    message = b": keepalive\n\n"
+                if message is None:
+                    break
+
+                self.wfile.write(message)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+            # the viewer closed the page
+            pass
+        finally:
+            self.server.remove_viewer(viewer)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"Monitor {self.address_string()} - {format % args}")
+
+
+def start_monitor_server(bus: MonitorBus = monitor_bus) -> MonitorServer | None:
+    """
+    Starts the monitor server if it is enabled in the rig config.
+
+    Returns
+    -------
+    - *MonitorServer | None*: The running server, None if it is disabled or could not be started. A failure is logged, the program runs
+      the same without it.
+    """
+    if not MONITOR_CONFIG["ENABLED"]:
+        return None
+
+    try:
+        server = MonitorServer(bus, MONITOR_CONFIG["HOST"], MONITOR_CONFIG["PORT"], MONITOR_CONFIG["VIEWER_QUEUE_SIZE"])
+    except OSError as e:
+        logger.error(
+            f"Could not start the monitor server on {MONITOR_CONFIG['HOST']}:{MONITOR_CONFIG['PORT']}: {e}. "
+            "When several rigs run on this PC, give each its own PORT in its rig_config.toml."
+        )
+        return None
+
+    server.start()
+    return server
+
+
+DASHBOARD_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Photologic Rig Monitor</title>
+<style>
+  body { font-family: Helvetica, sans-serif; margin: 1em; }
+  .row { display: flex; gap: 2em; flex-wrap: wrap; }
+  .box { border: 1px solid black; padding: 0.5em 1em; min-width: 12em; }
+  .value { font-size: 2em; }
+  table { border-collapse: collapse; }
+  td, th { border: 1px solid #999; padding: 2px 8px; text-align: right; }
+  #connection.lost { color: red; }
+</style>
+</head>
+<body>
+<h1>Photologic Rig Monitor <small id="connection">connecting...</small></h1>
+<div class="row">
+  <div class="box">State<div class="value" id="state">-</div></div>
+  <div class="box">Trial<div class="value" id="trial">-</div></div>
+  <div class="box">Arduino<div class="value" id="arduino">-</div></div>
+  <div class="box">GUI lag p95 / max<div class="value" id="lag">-</div></div>
+  <div class="box">Data queue<div class="value" id="queue">-</div></div>
+</div>
+<div class="row">
+  <div>
+    <h2>Trials</h2>
+    <table><thead><tr><th>Trial</th><th>Port 1</th><th>Port 2</th><th>Licks 1</th><th>Licks 2</th><th>Ended in</th></tr></thead>
+    <tbody id="trials"></tbody></table>
+  </div>
+  <div>
+    <h2>Events</h2>
+    <table><thead><tr><th>Time (s)</th><th>Trial time (s)</th><th>Event</th><th>Duration (ms)</th></tr></thead>
+    <tbody id="events"></tbody></table>
+  </div>
+</div>
+<script>
+const MAX_ROWS = 50;
+const $ = (id) => document.getElementById(id);
+
+function addRow(tbodyId, cells) {
+  const row = document.createElement("tr");
+  for (const cell of cells) {
+    const td = document.createElement("td");
+    td.textContent = cell === null || cell === undefined ? "" : cell;
+    row.appendChild(td);
+  }
+  const tbody = $(tbodyId);
+  tbody.insertBefore(row, tbody.firstChild);
+  while (tbody.children.length > MAX_ROWS) tbody.removeChild(tbody.lastChild);
+}
+
+const source = new EventSource("/events");
+source.onopen = () => { $("connection").textContent = "live"; $("connection").className = ""; };
+source.onerror = () => { $("connection").textContent = "reconnecting..."; $("connection").className = "lost"; };
+
+source.addEventListener("state", (e) => {
+  const d = JSON.parse(e.data);
+  $("state").textContent = d.state;
+  $("trial").textContent = d.trial + " / " + d.num_trials;
+});
+source.addEventListener("trial", (e) => {
+  const d = JSON.parse(e.data);
+  addRow("trials", [d.trial, d.port_1, d.port_2, d.port_1_licks, d.port_2_licks, d.ended_in]);
+});
+source.addEventListener("lick", (e) => {
+  const d = JSON.parse(e.data);
+  const kind = d.valve_duration_us === null ? "lick" : "lick, valve " + d.valve_duration_us + " us";
+  addRow("events", [d.time_s.toFixed(3), d.trial_time_s.toFixed(3), "port " + d.port + " " + kind, d.duration_ms]);
+});
+source.addEventListener("motor", (e) => {
+  const d = JSON.parse(e.data);
+  addRow("events", [d.time_s.toFixed(3), d.trial_time_s.toFixed(3), "door " + d.movement.toLowerCase(), d.duration_ms]);
+});
+source.addEventListener("link", (e) => {
+  const d = JSON.parse(e.data);
+  addRow("events", ["", "", "Arduino link lost", d.gap_ms]);
+});
+source.addEventListener("health", (e) => {
+  const d = JSON.parse(e.data);
+  if (d.arduino !== undefined) $("arduino").textContent = d.arduino;
+  if (d.gui_lag !== undefined) $("lag").textContent = d.gui_lag.p95_ms.toFixed(0) + " / " + d.gui_lag.max_ms.toFixed(0) + " ms";
+  if (d.data_queue_depth !== undefined) $("queue").textContent = d.data_queue_depth;
+});
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,366 @@
+"""
+This module is the single place the rig configuration file (`rig_config.toml`, see `system_config`) is read from.
+
+The file used to be opened and parsed separately by every module that needed a value from it, each with its own fallback values. Now
+`rig_config` parses it once, the first time a section is asked for, and checks every value against `SCHEMA`: the type, allowed range
+and default of every setting the program uses. A missing section or key falls back to its default, and a value of the wrong type or
+out of range is logged and replaced by its default, so a typo in the file cannot crash the program at startup.
+
+`RigConfig.section` returns the same dict for a section every time. Once `RigConfig.start_watching` has been called (see `main`), the
+file is checked for changes every `WATCH_INTERVAL_S` and the dicts are updated in place, so code that reads a value when it needs it
+(like `app_logic` reading `DOOR_MOVE_TIME` each time the door closes) picks up an edit without a restart. Code that needs to act on a
+change, such as the render scheduler's frame rate, registers a callback with `RigConfig.subscribe`. Settings that only take effect at
+startup (e.g. the number of valves, which sizes the GUI) are marked as not live and are not changed until the program is restarted.
+"""
+
+import dataclasses
+import logging
+import os
+import threading
+from typing import Any, Callable
+
+import toml
+
+import system_config
+
+logger = logging.getLogger()
+
+WATCH_INTERVAL_S = 1.0
+"""How often the watcher checks whether the config file has been modified."""
+
+
+@dataclasses.dataclass(frozen=True)
+class Setting:
+    """
+    Describes one key of the rig config file.
+
+    Attributes
+    ----------
+    - **type** (*type*): int, float, bool or str. An int is accepted for a float setting.
+    - **default** (*Any*): Used when the key is missing or its value is invalid.
+    - **minimum** (*float | None*): Smallest allowed value of a number.
+    - **maximum** (*float | None*): Largest allowed value of a number.
+    - **choices** (*tuple | None*): The allowed values, if only a few are.
+    - **live** (*bool*): Whether a change in the file is applied while the program runs. False for settings only read at startup.
+    """
+
+    type: type
+    default: Any
+    minimum: float | None = None
+    maximum: float | None = None
+    choices: tuple | None = None
+    live: bool = True
+
+    def validate(self, value: Any) -> Any:
+        """
+        Returns
+        -------
+        - *Any*: `value` converted to the setting's type.
+
+        Raises
+        ------
+        - *ValueError*: If `value` has the wrong type, is out of range or is not one of the choices.
+        """
+        # bool is a subclass of int, so it has to be excluded explicitly
+        if isinstance(value, bool) != (self.type is bool):
+            raise ValueError(f"expected {self.type.__name__}, got {value!r}")
+
+        if self.type is float and isinstance(value, int):
+            value = float(value)
+        elif not isinstance(value, self.type):
+            raise ValueError(f"expected {self.type.__name__}, got {value!r}")
+
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError(f"{value!r} is below the minimum of {self.minimum}")
+        if self.maximum is not None and value > self.maximum:
+            raise ValueError(f"{value!r} is above the maximum of {self.maximum}")
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(f"{value!r} is not one of {self.choices}")
+
+        return value
+
+
+SCHEMA: dict[str, dict[str, Setting]] = {
+    "valve_config": {
+        "TOTAL_POSSIBLE_VALVES": Setting(int, 16, minimum=2, live=False),
+        "TOTAL_CURRENT_VALVES": Setting(int, 8, minimum=2, live=False),
+    },
+    "door_motor_config": {
+        "DOOR_MOVE_TIME": Setting(int, 2338, minimum=0),
+    },
+    "lick_config": {
+        "TTC_LICK_THRESHOLD": Setting(int, 3, minimum=1),
+    },
+    "logging_config": {
+        "MAX_SEGMENT_MB": Setting(float, 5.0, minimum=0),
+        "MAX_SEGMENT_MINUTES": Setting(float, 60.0, minimum=0),
+        "RETAIN_SESSIONS": Setting(int, 50, minimum=0),
+        "RETAIN_DAYS": Setting(float, 90.0, minimum=0),
+        "RETAIN_TOTAL_MB": Setting(float, 500.0, minimum=0),
+    },
+    "balance_config": {
+        "ENABLED": Setting(bool, False),
+        "MODE": Setting(str, "serial", choices=("serial", "simulated")),
+        "SIDE_ONE_PORT": Setting(str, ""),
+        "SIDE_TWO_PORT": Setting(str, ""),
+        "BAUD_RATE": Setting(int, 9600, minimum=1),
+        "TARE_COMMAND": Setting(str, "T"),
+        "READ_COMMAND": Setting(str, "IP"),
+        "STABLE_READINGS": Setting(int, 5, minimum=1),
+        "STABLE_TOLERANCE_G": Setting(float, 0.002, minimum=0),
+        "READ_TIMEOUT_S": Setting(float, 30.0, minimum=0),
+        "LIQUID_DENSITY_G_PER_ML": Setting(float, 1.0, minimum=0),
+    },
+    "valve_timing_config": {
+        "MIN_SAMPLES": Setting(int, 10, minimum=1),
+        "MAX_MEAN_OVERSHOOT_US": Setting(float, 200.0, minimum=0),
+        "MAX_JITTER_US": Setting(float, 200.0, minimum=0),
+    },
+    "gui_config": {
+        "REFRESH_RATE_HZ": Setting(float, 25.0, minimum=1, maximum=1000),
+        "HEARTBEAT_MS": Setting(int, 20, minimum=1),
+        "STALL_THRESHOLD_MS": Setting(float, 100.0, minimum=0),
+        "LAG_LOG_INTERVAL_S": Setting(float, 60.0, minimum=1),
+        "PREWARM_WINDOWS": Setting(bool, True),
+        "PREWARM_INTERVAL_MS": Setting(int, 50, minimum=0),
+    },
+    "reset_config": {
+        "WARM_RESET": Setting(bool, True),
+    },
+    "monitor_config": {
+        "ENABLED": Setting(bool, False, live=False),
+        "HOST": Setting(str, "127.0.0.1", live=False),
+        "PORT": Setting(int, 8765, minimum=1, maximum=65535, live=False),
+        "MAX_VIEWERS": Setting(int, 10, minimum=1),
+        "VIEWER_QUEUE_SIZE": Setting(int, 1000, minimum=1, live=False),
+        "HEALTH_INTERVAL_S": Setting(float, 1.0, minimum=0.1),
+    },
+    "metrics_config": {
+        "WRITE_TEXTFILE": Setting(bool, False, live=False),
+        "TEXTFILE_PATH": Setting(str, "", live=False),
+        "TEXTFILE_INTERVAL_S": Setting(float, 15.0, minimum=1),
+        "LOG_SUMMARY": Setting(bool, True),
+    },
+}
+"""Every section and key of the rig config file the program uses."""
+
+TOP_LEVEL_KEYS = {"title"}
+"""Keys outside of any section that are expected in the file."""
+
+
+class RigConfig:
+    """
+    Parses, validates and caches the rig config file, and reloads it when it changes.
+
+    Attributes
+    ----------
+    - **path** (*str*): Path of the rig config file.
+
+    Methods
+    -------
+    - `section`(name)
+        Returns the validated values of a section.
+    - `subscribe`(name, callback)
+        Calls `callback` whenever live values of a section change.
+    - `unsubscribe`(name, callback)
+        Stops calling a callback.
+    - `reload`()
+        Reads the file again and applies what changed.
+    - `start_watching`()
+        Starts reloading the file whenever it is modified.
+    - `stop_watching`()
+        Stops the watcher.
+    """
+
+    def __init__(self, path: str, schema: dict[str, dict[str, Setting]] = SCHEMA):
+        self.path = path
+        self.schema = schema
+
+        self._lock = threading.RLock()
+        self._sections: dict[str, dict[str, Any]] | None = None
+        self._subscribers: dict[str, list[Callable[[dict[str, Any]], None]]] = {}
+
+        self._mtime: float | None = None
+        self._stop_event = threading.Event()
+        self._watcher: threading.Thread | None = None
+
+    def section(self, name: str) -> dict[str, Any]:
+        """
+        Returns the values of a section, parsing the file if this is the first call. The same dict is returned on every call and is updated in
+        place on reload, so it should be kept rather than copied to see changes.
+
+        Raises
+        ------
+        - *KeyError*: If `name` is not a section of the schema.
+        """
+        with self._lock:
+            if self._sections is None:
+                self._sections = self._load()
+            return self._sections[name]
+
+    def subscribe(self, name: str, callback: Callable[[dict[str, Any]], None]) -> None:
+        """
+        Parameters
+        ----------
+        - **name** (*str*): The section to watch.
+        - **callback** (*Callable[[dict[str, Any]], None]*): Called with the keys that changed and their new values. It runs on the watcher
+          thread, so GUI code should hand the change to the main thread (e.g. with `views.render_scheduler.RenderScheduler.request`).
+        """
+        with self._lock:
+            self._subscribers.setdefault(name, []).append(callback)
+
+    def unsubscribe(self, name: str, callback: Callable[[dict[str, Any]], None]) -> None:
+        with self._lock:
+            callbacks = self._subscribers.get(name, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def _read(self) -> dict:
+        """
+        Parses the file, also recording its modification time.
+
+        Raises
+        ------
+        - *OSError*: If the file cannot be read.
+        - *toml.TomlDecodeError*: If it is not valid TOML.
+        """
+        self._mtime = os.stat(self.path).st_mtime
+        with open(self.path, "r") as f:
+            return toml.load(f)
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        try:
+            data = self._read()
+        except (OSError, toml.TomlDecodeError) as e:
+            logger.error(f"Could not read rig config {self.path}, using default values: {e}")
+            data = {}
+
+        self._warn_unknown(data)
+
+        return {
+            name: self._validate_section(name, data.get(name, {}), None)
+            for name in self.schema
+        }
+
+    def _warn_unknown(self, data: dict) -> None:
+        for key, value in data.items():
+            if key in TOP_LEVEL_KEYS:
+                continue
+            if key not in self.schema:
+                logger.warning(f"Unknown section or key '{key}' in rig config, it is ignored.")
+            elif isinstance(value, dict):
+                for setting in value.keys() - self.schema[key].keys():
+                    logger.warning(f"Unknown key '{setting}' in section '{key}' of rig config, it is ignored.")
+
+    def _validate_section(self, name: str, raw: Any, current: dict[str, Any] | None) -> dict[str, Any]:
+        """
+        Validates every key of a section. Invalid values are replaced by the current value if there is one (on reload), otherwise by the
+        default.
+        """
+        if not isinstance(raw, dict):
+            logger.error(f"Section '{name}' of rig config is not a table, using {'current' if current else 'default'} values.")
+            raw = {}
+
+        values = {}
+        for key, setting in self.schema[name].items():
+            fallback = current[key] if current is not None else setting.default
+            if key not in raw:
+                values[key] = setting.default
+                continue
+
+            try:
+                values[key] = setting.validate(raw[key])
+            except ValueError as e:
+                logger.error(f"Invalid value for {name}.{key} in rig config ({e}), using {fallback!r}.")
+                values[key] = fallback
+
+        return values
+
+    def reload(self) -> dict[str, dict[str, Any]]:
+        """
+        Reads the file again and applies every live value that changed, then calls the subscribers of each changed section. If the file
+        cannot be parsed the current values are kept.
+
+        Returns
+        -------
+        - *dict[str, dict[str, Any]]*: The changed values that were applied, by section.
+        """
+        with self._lock:
+            current = self._sections
+            if current is None:
+                self._sections = self._load()
+                return {}
+
+            try:
+                data = self._read()
+            except (OSError, toml.TomlDecodeError) as e:
+                logger.error(f"Could not reload rig config, keeping current values: {e}")
+                return {}
+
+            self._warn_unknown(data)
+
+            applied: dict[str, dict[str, Any]] = {}
+            for name, settings in self.schema.items():
+                new_values = self._validate_section(name, data.get(name, {}), current[name])
+
+                changed = {}
+                for key, value in new_values.items():
+                    old = current[name][key]
+                    if value == old:
+                        continue
+                    if not settings[key].live:
+                        logger.warning(f"Rig config {name}.{key} changed to {value!r}, restart the program to apply it.")
+                        continue
+
+                    logger.info(f"Rig config {name}.{key} changed from {old!r} to {value!r}.")
+                    changed[key] = value
+
+                if changed:
+                    # update in place so every holder of the section dict sees the new values
+                    current[name].update(changed)
+                    applied[name] = changed
+
+            subscribers = {name: list(self._subscribers.get(name, [])) for name in applied}
+
+        for name, changed in applied.items():
+            for callback in subscribers[name]:
+                try:
+                    callback(changed)
+                except Exception as e:
+                    logger.error(f"Error applying rig config change to {name}: {e}")
+
+        return applied
+
+    def start_watching(self, interval_s: float = WATCH_INTERVAL_S) -> None:
+        """
+        Starts a daemon thread that calls `reload` whenever the file's modification time changes.
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        # make sure the values being watched have been loaded
+        self.section(next(iter(self.schema)))
+
+        self._stop_event.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval_s,), name="RigConfigWatcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop_event.set()
+
+    def _watch(self, interval_s: float) -> None:
+        while not self._stop_event.wait(interval_s):
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                # the file is being replaced by an editor, check again next time
+                continue
+
+            if mtime != self._mtime:
+                self.reload()
+
+
+rig_config = RigConfig(system_config.get_rig_config())
+"""The program's rig config, shared by every module."""
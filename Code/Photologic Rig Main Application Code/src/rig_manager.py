@@ -0,0 +1,221 @@
+"""
+This module is the launcher for running several rigs from one PC. Run it from the `src` directory with the names of the rigs, e.g.
+
+    python rig_manager.py box1 box2 box3
+
+The program was written for one rig per PC: `app_logic.StateMachine`, `controllers.arduino_control.ArduinoManager` and `views.main_gui`
+each exist once per program. Rather than changing that, every rig is run by its own copy of the program, started as a separate process
+with `main.py --rig NAME`. Each rig then has its own interpreter, Tkinter main loop, Arduino connection, schedule, data files and
+logfiles (see `system_config`), and a busy or crashed rig cannot hold up another rig's threads, since they no longer share a GIL. Where
+the OS allows it the rig processes are also pinned to separate CPU cores, and this supervisor's window runs at a lower priority, so the
+only thing the rigs share is the machine's I/O.
+
+Rigs are started one at a time, each once the rig before it has connected to its Arduino, so that rigs meeting their boards for the first
+time never probe the same port. Each rig's board is recorded under its own role in the shared device registry (see
+`controllers.device_registry`), so after the first launch every rig goes straight to its own board.
+
+The supervisor window (`views.rig_manager_window`) shows the status each rig publishes (see `rig_status`) and can start or stop rigs.
+Closing it leaves running rigs running.
+"""
+
+import argparse
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+import system_config
+from rig_status import read_status
+
+logger = logging.getLogger()
+
+STARTUP_TIMEOUT_S = 60
+"""Longest a rig is given to connect to its Arduino before the next rig is started anyway."""
+
+SUPERVISOR_NICENESS = 10
+"""How much the supervisor lowers its own priority on Linux, so polling statuses never competes with the rigs."""
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+def assign_cpus(num_rigs: int) -> list[set[int] | None]:
+    """
+    Splits the CPU cores this process may use between the rigs, keeping the first core for the supervisor and the OS. Each rig gets an
+    equal share of the rest.
+
+    Returns
+    -------
+    - *list[set[int] | None]*: The cores of each rig, all None if the OS does not support pinning (e.g. Windows without extra packages)
+      or there are not more cores than rigs.
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        return [None] * num_rigs
+
+    cores = sorted(os.sched_getaffinity(0))
+    if len(cores) <= num_rigs:
+        return [None] * num_rigs
+
+    available = cores[1:]
+    share = len(available) // num_rigs
+    return [set(available[i * share : (i + 1) * share]) for i in range(num_rigs)]
+
+
+class RigProcess:
+    """
+    One rig's copy of the program.
+
+    Attributes
+    ----------
+    - **name** (*str*): The rig's name.
+    - **cpus** (*set[int] | None*): Cores the rig is pinned to, None to leave it to the OS.
+    - **process** (*subprocess.Popen | None*): The rig's process, None until it is started.
+
+    Methods
+    -------
+    - `start`()
+        Starts the rig's program.
+    - `is_running`()
+        Returns whether the rig's program is running.
+    - `wait_until_connected`(timeout)
+        Waits for the rig to publish that it has connected to its Arduino.
+    - `stop`()
+        Asks the rig's program to exit.
+    - `status`()
+        Returns the last status the rig published.
+    """
+
+    def __init__(self, name: str, cpus: set[int] | None = None):
+        self.name = name
+        self.cpus = cpus
+        self.process: subprocess.Popen | None = None
+
+    def command(self) -> list[str]:
+        # a frozen build (see setup_photologic.iss) is the program itself
+        if getattr(sys, "frozen", False):
+            return [sys.executable, "--rig", self.name]
+        return [sys.executable, MAIN_PATH, "--rig", self.name]
+
+    def start(self) -> None:
+        if self.is_running():
+            return
+
+        env = dict(os.environ)
+        env[system_config.RIG_NAME_ENV] = self.name
+
+        self.process = subprocess.Popen(self.command(), env=env, cwd=os.path.dirname(MAIN_PATH))
+
+        if self.cpus is not None:
+            try:
+                os.sched_setaffinity(self.process.pid, self.cpus)
+            except OSError as e:
+                logger.warning(f"Could not pin rig {self.name} to cores {sorted(self.cpus)}: {e}")
+
+        logger.info(f"Started rig {self.name} as process {self.process.pid}.")
+
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def status(self) -> dict | None:
+        """
+        Returns the rig's last published status, or None if it has not published one since this process was started.
+        """
+        status = read_status(self.name)
+        if status is None or self.process is None or status.get("pid") != self.process.pid:
+            return None
+        return status
+
+    def wait_until_connected(self, timeout: float = STARTUP_TIMEOUT_S) -> bool:
+        """
+        Returns
+        -------
+        - *bool*: True once the rig's program has tried to connect to its Arduino, False if it exited or `timeout` ran out first.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.is_running():
+                return False
+
+            status = self.status()
+            if status is not None and "arduino" in status:
+                return True
+            time.sleep(0.25)
+
+        logger.warning(f"Rig {self.name} did not connect within {timeout} s.")
+        return False
+
+    def stop(self) -> None:
+        """
+        Terminates the rig's program without the questions its own window asks before closing, so it is only meant for a rig that is
+        idle or not responding.
+        """
+        if self.is_running():
+            self.process.terminate()
+            logger.info(f"Stopped rig {self.name}.")
+
+
+def start_rigs(start_queue: "queue.Queue[RigProcess | None]") -> None:
+    """
+    Starts the rigs put in `start_queue` one at a time, each once the previous one has connected to its Arduino, until None is put in
+    it. Meant to run on a thread of its own.
+    """
+    while (rig := start_queue.get()) is not None:
+        rig.start()
+        rig.wait_until_connected()
+
+
+def lower_priority() -> None:
+    """
+    Lowers the priority of the calling thread by `SUPERVISOR_NICENESS` on Linux, where priority is kept per thread. Only the window's
+    thread is lowered, since processes inherit the priority of the thread that starts them and the rigs must keep the normal one.
+    """
+    if not hasattr(os, "setpriority") or not sys.platform.startswith("linux"):
+        return
+
+    thread_id = threading.get_native_id()
+    try:
+        niceness = os.getpriority(os.PRIO_PROCESS, thread_id)
+        os.setpriority(os.PRIO_PROCESS, thread_id, niceness + SUPERVISOR_NICENESS)
+    except OSError as e:
+        logger.warning(f"Could not lower the rig manager's priority: {e}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run several Photologic rigs from one PC.")
+    parser.add_argument("rigs", nargs="+", help="names of the rigs to run")
+    parser.add_argument("--no-pin", action="store_true", help="do not pin each rig to its own CPU cores")
+    args = parser.parse_args(argv)
+
+    for name in args.rigs:
+        if not system_config.is_valid_rig_name(name):
+            parser.error(f"invalid rig name {name!r}, use up to 32 letters, digits, '-' or '_'")
+    if len(set(args.rigs)) != len(args.rigs):
+        parser.error("every rig needs a different name")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    cpus = [None] * len(args.rigs) if args.no_pin else assign_cpus(len(args.rigs))
+    rigs = [RigProcess(name, rig_cpus) for name, rig_cpus in zip(args.rigs, cpus)]
+
+    # every rig is started from this one thread, including rigs started again from the window
+    start_queue: queue.Queue[RigProcess | None] = queue.Queue()
+    for rig in rigs:
+        start_queue.put(rig)
+    threading.Thread(target=start_rigs, args=(start_queue,), name="RigStarter", daemon=True).start()
+
+    # after the starter thread exists, so it and the rigs it starts keep the normal priority
+    lower_priority()
+
+    # imported here since views.rig_manager_window imports RigProcess from this module
+    from views.rig_manager_window import RigManagerWindow
+
+    window = RigManagerWindow(rigs, request_start=start_queue.put)
+    window.mainloop()
+
+    start_queue.put(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+This module lets the program of a named rig report how it is doing to `rig_manager`, which runs several rigs from one PC.
+
+Each rig runs in its own process, so rather than sharing memory or a pipe with the manager, a rig's `RigStatusPublisher` writes a small
+JSON status file in the rig's directory (`system_config.get_rig_status_path`) once every `STATUS_INTERVAL_S` from a daemon thread, and
+the manager reads it with `read_status`. The file is written to a temporary file and renamed over the old one, so it is never read half
+written, and a rig whose program hangs or crashes is noticed by its status going stale. Publishing only reads a few attributes of the
+state machine and writes a few hundred bytes, so it does not disturb the rig's timing.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable
+
+import system_config
+
+logger = logging.getLogger()
+
+STATUS_INTERVAL_S = 1.0
+"""How often a rig writes its status file."""
+
+STALE_AFTER_S = 5.0
+"""A running rig whose status is older than this is shown as not responding."""
+
+
+class RigStatusPublisher:
+    """
+    Periodically writes the status of this program's rig for `rig_manager`.
+
+    Attributes
+    ----------
+    - **rig_name** (*str*): Name of the rig, from `system_config.get_rig_name`.
+    - **path** (*str*): The status file.
+    - **source** (*Callable[[], dict[str, Any]] | None*): Returns the current status, `app_logic.StateMachine.status` once a StateMachine
+      is running. Until then only the process details are published.
+    - **started_at** (*float*): `time.time()` when the publisher was created.
+
+    Methods
+    -------
+    - `start`()
+        Starts writing the status file every `STATUS_INTERVAL_S`.
+    - `publish`(**extra)
+        Writes the status file now.
+    - `stop`()
+        Stops the thread and writes a final status saying the program exited.
+    """
+
+    def __init__(self, rig_name: str, path: str | None = None):
+        self.rig_name = rig_name
+        self.path = path if path is not None else system_config.get_rig_status_path(rig_name)
+        self.source: Callable[[], dict[str, Any]] | None = None
+        self.started_at = time.time()
+
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._failed = False
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="RigStatusPublisher", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        self.publish()
+        while not self._stop_event.wait(STATUS_INTERVAL_S):
+            self.publish()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.publish(exited=True)
+
+    def publish(self, **extra: Any) -> None:
+        """
+        Writes the status file. Any keyword arguments are added to the status. Failures are logged once and otherwise ignored, the next
+        write will try again.
+        """
+        status: dict[str, Any] = {
+            "rig": self.rig_name,
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "updated_at": time.time(),
+        }
+
+        source = self.source
+        if source is not None:
+            try:
+                status.update(source())
+            except Exception as e:
+                logger.error(f"Error collecting rig status: {e}")
+        status.update(extra)
+
+        directory = os.path.dirname(self.path)
+        tmp_path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".status.", suffix=".tmp", dir=directory)
+            with os.fdopen(fd, "w") as f:
+                json.dump(status, f)
+            os.replace(tmp_path, self.path)
+            self._failed = False
+        except OSError as e:
+            # on Windows the rename fails while the manager has the file open, the next write will succeed
+            if not self._failed:
+                logger.warning(f"Could not write rig status {self.path}: {e}")
+            self._failed = True
+
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def read_status(rig_name: str) -> dict[str, Any] | None:
+    """
+    Returns
+    -------
+    - *dict[str, Any] | None*: The last status the named rig published, None if it has not published one or it cannot be read.
+    """
+    try:
+        with open(system_config.get_rig_status_path(rig_name), "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
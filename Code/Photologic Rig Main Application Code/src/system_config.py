@@ -2,12 +2,29 @@
 This module is used to locate files on the current PC regardless of OS, user, etc.
 Useful for finding application documents like the configuration .toml files and program icon at the
 Photologic-Experiment-Rig-Files directory under the users documents folder.
+
+The paths never change while the program runs, so each one is computed on the first call and cached.
+
+When several rigs are run from one PC (see `rig_manager`), each rig's program is started with a rig name in the `RIG_NAME_ENV` environment
+variable (`main.py --rig NAME` sets it). The files that belong to one rig's hardware and experiments, its valve durations and their
+history, valve calibration measurements and logfiles, are then kept in its own directory under `rigs`, and a `rig_config.toml` placed
+there overrides the shared one. The icons and the device registry stay shared.
 """
 
+import functools
 import os
 import platform
+import re
+import shutil
+
+RIG_NAME_ENV = "PHOTOLOGIC_RIG"
+"""Environment variable holding the name of the rig this program runs, unset when the PC runs a single rig."""
 
+RIG_NAME_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,32}")
+"""Rig names are used as directory names, so they are limited to letters, digits, '-' and '_'."""
 
+
+@functools.cache
 def get_documents_dir():
     """
     This method grabs the documents directory for the current user of the PC in use.
@@ -20,6 +37,7 @@ def get_documents_dir():
         return os.path.join(os.getenv("HOME"), "Documents")
 
 
+@functools.cache
 def get_assets_path():
     """
     This method grabs the assets directory under the Photologic-Experiment-Rig-Files directory for current user of the PC in use.
@@ -33,10 +51,87 @@ def get_assets_path():
     return assets_dir
 
 
+def is_valid_rig_name(name: str) -> bool:
+    return RIG_NAME_PATTERN.fullmatch(name) is not None
+
+
+@functools.cache
+def get_rig_name() -> str | None:
+    """
+    This method grabs the name of the rig this program runs from `RIG_NAME_ENV`, None if it is not set.
+
+    Raises
+    ------
+    - *ValueError*: If the name is not a valid rig name.
+    """
+    name = os.getenv(RIG_NAME_ENV) or None
+
+    if name is not None and not is_valid_rig_name(name):
+        raise ValueError(f"Invalid rig name {name!r}, use up to 32 letters, digits, '-' or '_'.")
+
+    return name
+
+
+@functools.cache
+def get_rigs_dir():
+    """
+    utilizes previous methods to grab the directory holding one directory per named rig.
+    """
+    documents_dir = get_documents_dir()
+
+    return os.path.join(documents_dir, "Photologic-Experiment-Rig-Files", "rigs")
+
+
+@functools.cache
+def get_rig_dir():
+    """
+    utilizes previous methods to grab the directory of the named rig this program runs, None if no rig name is set. It is created on the first
+    call, and a new rig starts out with a copy of the shared valve durations so it can run before its valves have been calibrated.
+    """
+    rig_name = get_rig_name()
+    if rig_name is None:
+        return None
+
+    rig_dir = os.path.join(get_rigs_dir(), rig_name)
+    os.makedirs(rig_dir, exist_ok=True)
+
+    rig_durations = os.path.join(rig_dir, "valve_durations.toml")
+    shared_durations = os.path.join(get_assets_path(), "valve_durations.toml")
+    if not os.path.exists(rig_durations) and os.path.exists(shared_durations):
+        shutil.copy2(shared_durations, rig_durations)
+
+    return rig_dir
+
+
+def get_rig_status_path(rig_name: str):
+    """
+    utilizes previous methods to grab the status file a named rig publishes for `rig_manager`, see `rig_status`.
+    """
+    return os.path.join(get_rigs_dir(), rig_name, "status.json")
+
+
+@functools.cache
+def get_data_dir():
+    """
+    utilizes previous methods to grab the directory holding the valve duration and calibration files: the named rig's directory if there is
+    one, otherwise the assets directory.
+    """
+    rig_dir = get_rig_dir()
+
+    return rig_dir if rig_dir is not None else get_assets_path()
+
+
+@functools.cache
 def get_rig_config():
     """
-    utilizes previous methods to grab the rig configuration toml file.
+    utilizes previous methods to grab the rig configuration toml file. a named rig uses its own file if it has one.
     """
+    rig_dir = get_rig_dir()
+    if rig_dir is not None:
+        rig_config_path = os.path.join(rig_dir, "rig_config.toml")
+        if os.path.exists(rig_config_path):
+            return rig_config_path
+
     documents_dir = get_documents_dir()
 
     toml_config_path = os.path.join(
@@ -45,27 +140,92 @@ def get_rig_config():
     return toml_config_path
 
 
-def get_log_path(file_name: str):
+@functools.cache
+def get_log_dir():
     """
-    utilizes previous methods to grab the logfile directory.
+    utilizes previous methods to grab the logfile directory. `log_manager` creates one session directory per launch in here. a named rig
+    keeps its logfiles in its own directory.
     """
+    rig_dir = get_rig_dir()
+    if rig_dir is not None:
+        return os.path.join(rig_dir, "logfiles")
+
     documents_dir = get_documents_dir()
 
     log_dir = os.path.join(documents_dir, "Photologic-Experiment-Rig-Files", "logfiles")
 
+    return log_dir
+
+
+@functools.cache
+def get_log_path(file_name: str):
+    """
+    utilizes previous methods to grab the path of a file in the logfile directory.
+    """
+    log_dir = get_log_dir()
+
     logfile_path = os.path.join(log_dir, f"{file_name}.txt")
 
     return logfile_path
 
 
+@functools.cache
 def get_valve_durations():
     """
     utilizes previous methods to grab the valve duration configurtion toml file. this is used to store durations long term for the Arduino.
     """
-    documents_dir = get_documents_dir()
-
-    log_dir = os.path.join(documents_dir, "Photologic-Experiment-Rig-Files", "assets")
+    data_dir = get_data_dir()
 
-    durations_path = os.path.join(log_dir, "valve_durations.toml")
+    durations_path = os.path.join(data_dir, "valve_durations.toml")
 
     return durations_path
+
+
+@functools.cache
+def get_valve_duration_history():
+    """
+    utilizes previous methods to grab the append-only valve duration history file. every profile ever saved is kept here.
+    """
+    data_dir = get_data_dir()
+
+    history_path = os.path.join(data_dir, "valve_duration_history.jsonl")
+
+    return history_path
+
+
+@functools.cache
+def get_valve_calibration_measurements():
+    """
+    utilizes previous methods to grab the valve calibration measurement file. every valve test result is kept here to fit calibration curves.
+    """
+    data_dir = get_data_dir()
+
+    measurements_path = os.path.join(data_dir, "valve_calibration_measurements.jsonl")
+
+    return measurements_path
+
+
+@functools.cache
+def get_metrics_textfile():
+    """
+    utilizes previous methods to grab the default prometheus textfile the runtime metrics are written to, see `metrics`. a named rig writes
+    its own in its directory.
+    """
+    data_dir = get_data_dir()
+
+    metrics_path = os.path.join(data_dir, "metrics.prom")
+
+    return metrics_path
+
+
+@functools.cache
+def get_device_registry():
+    """
+    utilizes previous methods to grab the device registry file. it records which usb serial device is the rig's arduino and the port it was last seen on.
+    it is shared by every rig on the pc, so no rig connects to a board another rig has claimed.
+    """
+    assets_dir = get_assets_path()
+
+    registry_path = os.path.join(assets_dir, "device_registry.json")
+
+    return registry_path
@@ -1,17 +1,33 @@
 """
 This module defines the EventWindow class, a tkinter Toplevel window used to display timestamps
 and other details for experiment event data (licks, motor movments) in a table format using a ttk.Treeview element.
+
+New events are pulled from the `models.event_data` model in bulk as plain tuples and inserted into the table in chunks of `CHUNK_SIZE`
+rows, one chunk per idle callback, so catching up after a long session never blocks the GUI for long. While the window is visible the
+table refreshes itself every `REFRESH_INTERVAL_MS`. Only the newest `MAX_LIVE_ROWS` events are kept in the table, older events are
+reached a page at a time with the paging buttons.
 """
 
 import tkinter as tk
 from tkinter import ttk
 
+from models.event_data import EVENT_COLUMNS
+
 #### USED FOR TYPE HINTS ####
 from models.event_data import EventData
 #### USED FOR TYPE HINTS ####
 
 from views.gui_common import GUIUtils
 
+CHUNK_SIZE = 250
+"""Most rows inserted into the table per idle callback."""
+
+REFRESH_INTERVAL_MS = 500
+"""How often the table pulls new events while the window is visible."""
+
+MAX_LIVE_ROWS = 1000
+"""Most rows kept in the table at once, this is also the page size. 0 keeps every row and disables paging."""
+
 
 class EventWindow(tk.Toplevel):
     """
@@ -19,29 +35,43 @@ class EventWindow(tk.Toplevel):
     It pulls in data from an `models.event_data` `EventData` instance and is updated as new events occur.
     After creation, window is hidden and can be shown using the `show`() method.
 
+    The table either follows the newest events (live) or shows a fixed page of older events. In both cases it holds
+    the rows `first_item` to `last_item` of the event DataFrame.
+
     Attributes
     ----------
     - **event_data** (*EventData*): A reference to the data model instance (`models.event_data.EventData`)
       that holds the event DataFrame containing the data to be displayed.
-    - **last_item** (*int*): Tracks the index of the last row added from the DataFrame to the Treeview.
+    - **max_live_rows** (*int*): Most rows kept in the table, 0 for no limit.
+    - **first_item** (*int*): Index of the first DataFrame row in the Treeview.
+    - **last_item** (*int*): One past the index of the last DataFrame row added to the Treeview.
       This is used to efficiently update the table by only adding new rows.
+    - **page_start** (*int | None*): Index of the first row of the page being viewed, None while following the newest events.
     - **licks_frame** (*tk.Frame*): The main tkinter Frame widget within the window that contains the Treeview table.
     - **timestamped_events** (*ttk.Treeview*): The Treeview widget used to display the event data in a table format.
 
     Methods
     -------
     - `show`()
-        Updates the table with the latest data from the `event_data` model and makes the window visible (deiconifies it).
+        Updates the table with the latest data from the `event_data` model, makes the window visible (deiconifies it) and
+        starts refreshing the table while it stays visible.
     - `update_table`()
-        Efficiently adds new rows from the event DataFrame (held by `event_data`) to the Treeview display. It only adds rows
-        that haven't been added previously, based on the `last_item` attribute.
+        Adds the next chunk of rows from the event DataFrame (held by `event_data`) to the Treeview display, scheduling
+        itself again until the table is caught up.
+    - `show_older`()
+        Shows the page of events before the rows in the table.
+    - `show_newer`()
+        Shows the page of events after the rows in the table, returning to live once the newest events are reached.
+    - `show_live`()
+        Returns to following the newest events.
     - `build_table`()
-        Creates the main frame (`licks_frame`) and the `ttk.Treeview` widget (`timestamped_events`). Configures the Treeview columns
-        and headings based on the columns present in the `event_data.event_dataframe`.
+        Creates the main frame (`licks_frame`), the `ttk.Treeview` widget (`timestamped_events`) and the paging controls.
+    - `destroy`()
+        Cancels pending table updates, then destroys the window.
     """
 
     # inject the event dataframe when we create the class so we have access to that data
-    def __init__(self, event_data: EventData) -> None:
+    def __init__(self, event_data: EventData, max_live_rows: int = MAX_LIVE_ROWS) -> None:
         """
         Initialize the EventWindow. Sets up the window title, icon, key bindings (Ctrl+W to hide),
         and the close protocol (also hides the window). It builds the table structure and initially
@@ -51,10 +81,12 @@ class EventWindow(tk.Toplevel):
         ----------
         - **event_data** (*EventData*): An instance of the `models.event_data.EventData` model containing the
           event DataFrame to be displayed.
+        - **max_live_rows** (*int, optional*): Most rows kept in the table, 0 for no limit. Defaults to `MAX_LIVE_ROWS`.
         """
         super().__init__()
         # reference to event model
         self.event_data = event_data
+        self.max_live_rows = max_live_rows
 
         self.title("Experiment Event Data")
         self.bind("<Control-w>", lambda event: self.withdraw())
@@ -65,9 +97,15 @@ class EventWindow(tk.Toplevel):
         window_icon_path = GUIUtils.get_window_icon_path()
         GUIUtils.set_program_icon(self, icon_path=window_icon_path)
 
-        # init last_item in the table to zero we haven't added anything into the table
+        # the table holds rows first_item to last_item of the dataframe, nothing has been added yet
         # this is used to efficiently update the table when program is running
+        self.first_item = 0
         self.last_item = 0
+        self.page_start: int | None = None
+
+        # pending after_idle chunk and after refresh callbacks, so neither is ever scheduled twice
+        self.chunk_job: str | None = None
+        self.refresh_job: str | None = None
 
         self.build_table()
 
@@ -76,56 +114,179 @@ class EventWindow(tk.Toplevel):
     def show(self):
         """
         Updates the table with the latest event data and makes the window visible.
-        Calls `update_table()` first, then `deiconify()` to show the window.
+        Calls `update_table()` first, then `deiconify()` to show the window, then starts the refresh loop.
         """
         self.update_table()
         self.deiconify()
 
+        if self.refresh_job is None:
+            self.refresh_job = self.after(REFRESH_INTERVAL_MS, self.refresh)
+
+    def refresh(self):
+        """
+        Pulls new events into the table every `REFRESH_INTERVAL_MS` while the window is visible. Stops once the window is hidden,
+        `show` starts it again.
+        """
+        if self.state() == "withdrawn":
+            self.refresh_job = None
+            return
+
+        if self.chunk_job is None:
+            self.update_table()
+
+        self.refresh_job = self.after(REFRESH_INTERVAL_MS, self.refresh)
+
+    def destroy(self) -> None:
+        # pending callbacks would otherwise fire on the destroyed table
+        for job in (self.chunk_job, self.refresh_job):
+            if job is not None:
+                self.after_cancel(job)
+        self.chunk_job = None
+        self.refresh_job = None
+
+        super().destroy()
+
+    def clear_table(self, start: int) -> None:
+        """
+        Removes every row from the table and makes `start` the next DataFrame row to be added.
+        """
+        self.timestamped_events.delete(*self.timestamped_events.get_children())
+        self.first_item = start
+        self.last_item = start
+
     def update_table(self):
         """
-        Updates the Treeview widget by adding only the new rows from the event DataFrame
-        since the last update. It uses `self.last_item` to determine the starting index
-        for adding new rows, ensuring efficient updates without reprocessing existing entries.
+        Adds up to `CHUNK_SIZE` new rows from the event DataFrame to the Treeview. If more rows are waiting, the next chunk is
+        scheduled for when Tkinter is idle again, so the GUI stays responsive while a large backlog is inserted.
+
+        While live, rows older than the newest `max_live_rows` are removed, and a backlog larger than that skips straight to the
+        newest rows. While paging, rows are added until the page is full.
+        """
+        self.chunk_job = None
+
+        total = self.event_data.num_events()
+        limit = self.max_live_rows
+
+        # the model was reset and holds fewer rows than the table
+        if total < self.last_item:
+            self.page_start = None
+            self.clear_table(0)
+
+        if self.page_start is None:
+            stop = total
+            if limit and stop - self.last_item > limit:
+                self.clear_table(stop - limit)
+        else:
+            stop = min(self.page_start + limit, total)
+
+        chunk_stop = min(stop, self.last_item + CHUNK_SIZE)
+
+        if chunk_stop > self.last_item:
+            rows = self.event_data.get_rows(self.last_item, chunk_stop)
+
+            for i, row in enumerate(rows, start=self.last_item):
+                self.timestamped_events.insert("", tk.END, iid=f"item {i}", values=row)
+
+            # update the last item with the LAST item that was added on this iteration, next time we will start
+            # the loop with this, so that we don't unneccesarily update entries already there
+            self.last_item = chunk_stop
+
+            if self.page_start is None:
+                self.trim_table()
+                self.timestamped_events.see(f"item {self.last_item - 1}")
+
+        if chunk_stop < stop:
+            self.chunk_job = self.after_idle(self.update_table)
+
+        self.update_page_label(total)
+
+    def trim_table(self) -> None:
+        """
+        Removes the oldest rows so the table holds no more than `max_live_rows` rows.
+        """
+        if not self.max_live_rows:
+            return
+
+        new_first = self.last_item - self.max_live_rows
+        if new_first <= self.first_item:
+            return
+
+        self.timestamped_events.delete(
+            *(f"item {i}" for i in range(self.first_item, new_first))
+        )
+        self.first_item = new_first
+
+    def show_page(self, start: int | None) -> None:
+        """
+        Refills the table starting at row `start`, or with the newest rows if `start` is None.
         """
-        # df we are working with is self.event_data.event_dataframe, get rid of self prefix and such to save room
-        df = self.event_data.event_dataframe
-        # num rows in that df currently
-        len_event_df = len(df)
+        if self.chunk_job is not None:
+            self.after_cancel(self.chunk_job)
+            self.chunk_job = None
+
+        total = self.event_data.num_events()
+        if start is not None and start + self.max_live_rows >= total:
+            # the page reaches the newest rows, so follow them live
+            start = None
+
+        self.page_start = start
+        self.clear_table(start if start is not None else max(total - self.max_live_rows, 0))
+        self.update_table()
+
+    def show_older(self) -> None:
+        self.show_page(max(self.first_item - self.max_live_rows, 0))
 
-        last_item = self.last_item
+    def show_newer(self) -> None:
+        if self.page_start is not None:
+            self.show_page(self.page_start + self.max_live_rows)
 
-        # Insert data from the DataFrame. iterrows() returns an iterator over the rows of a df of form (index, series (of data))
-        for i in range(last_item, len_event_df):
-            row_content = df.iloc[i]
+    def show_live(self) -> None:
+        self.show_page(None)
 
-            item_iid = f"item {i}"
+    def update_page_label(self, total: int) -> None:
+        """
+        Shows which rows are in the table.
+        """
+        if not self.max_live_rows:
+            return
 
-            self.timestamped_events.insert(
-                "", tk.END, iid=item_iid, values=list(row_content)
-            )
-        # update the last item with the LAST item that was added on this iteration, next time we will start
-        # the loop with this, so that we don't unneccesarily update entries already there
-        self.last_item = len(df)
+        mode = "live" if self.page_start is None else "paused"
+        shown = f"{self.first_item + 1}-{self.last_item}" if self.last_item else "0"
+        self.page_label.configure(text=f"Events {shown} of {total} ({mode})")
 
     def build_table(self) -> None:
         """
         Creates the main frame (`licks_frame`) and the `ttk.Treeview` widget (`timestamped_events`)
         used to display the event data. Configures the Treeview columns and headings based on the
-        columns present in the `event_data.event_dataframe`. Calls `update_table()` to initially
-        populate the table.
+        columns of the event DataFrame (`models.event_data.EVENT_COLUMNS`). If the table is limited to `max_live_rows`,
+        adds the paging buttons above it. Calls `update_table()` to initially populate the table.
         """
         self.licks_frame = tk.Frame(self)
         self.licks_frame.grid(row=0, column=0, sticky="nsew")
 
+        if self.max_live_rows:
+            paging_frame = tk.Frame(self.licks_frame)
+            paging_frame.pack(fill="x")
+
+            for text, command in (
+                ("Older", self.show_older),
+                ("Newer", self.show_newer),
+                ("Live", self.show_live),
+            ):
+                tk.Button(paging_frame, text=text, command=command, bg="grey").pack(
+                    side=tk.LEFT, padx=5, pady=5
+                )
+
+            self.page_label = tk.Label(paging_frame, font=("Helvetica", 10))
+            self.page_label.pack(side=tk.LEFT, padx=5)
+
         # Create a Treeview widget
         # show='headings' ensures we only see columns with headings defined
         self.timestamped_events = ttk.Treeview(
             self.licks_frame, show="headings", height=25
         )
 
-        self.timestamped_events["columns"] = list(
-            self.event_data.event_dataframe.columns
-        )
+        self.timestamped_events["columns"] = list(EVENT_COLUMNS)
 
         # Configure the names of the colums to reflect the heaader labels
         for col in self.timestamped_events["columns"]:
@@ -0,0 +1,301 @@
+"""
+This module defines the LagWatchdog class, which measures how responsive the Tkinter event loop is and finds out what is blocking it
+when it is not.
+
+The watchdog schedules a heartbeat with `after` every `HEARTBEAT_MS` and records how late each beat fires. A late beat means the main
+thread was busy (running a long callback, a full plot redraw, saving data, ...) or waiting for another thread to release the GIL, and
+while it is late the clocks and every other widget are frozen. To find the culprit a small sampling thread checks for an overdue beat
+and, while one is overdue, takes snapshots of the main thread's stack. When the late beat finally fires, stalls longer than
+`STALL_THRESHOLD_MS` are logged with the code the main thread was most often found in, for example
+`RenderScheduler._tick > LickRaster.add_trial > FigureCanvasTkAgg.draw`. If the main thread was idle in the event loop, the busiest
+other thread is named instead.
+
+Lag percentiles over the recent beats are written to the session log every `LAG_LOG_INTERVAL_S` and shown live in the main window.
+Every beat's lag and every stall are also recorded in the `metrics` registry.
+"""
+
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+import tkinter as tk
+from typing import Callable
+
+import numpy as np
+
+from metrics import metrics
+from rig_config_service import rig_config
+
+logger = logging.getLogger()
+
+WATCHDOG_CONFIG = rig_config.section("gui_config")
+
+LAG_HISTORY = 4096
+"""Number of most recent heartbeat lags kept for percentiles, a little over a minute of beats at the default rate."""
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+"""Frames from files under this directory are program code, everything else is the standard library or a dependency."""
+
+TKINTER_FILE = os.path.abspath(tk.__file__)
+
+GUI_LAG = metrics.histogram("photologic_gui_lag_seconds", "How late each GUI heartbeat fired.")
+GUI_STALLS = metrics.counter("photologic_gui_stalls_total", "GUI heartbeats late by more than STALL_THRESHOLD_MS.")
+
+
+def is_program_frame(frame) -> bool:
+    return os.path.abspath(frame.f_code.co_filename).startswith(SRC_DIR)
+
+
+def is_tkinter_frame(frame) -> bool:
+    return os.path.abspath(frame.f_code.co_filename) == TKINTER_FILE
+
+
+def stack_frames(frame) -> list:
+    """
+    Returns the frames of a stack from the outermost to `frame`.
+    """
+    stack = []
+    while frame is not None:
+        stack.append(frame)
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def describe_stack(frame) -> str | None:
+    """
+    Names the work a stack is doing as its entry point (the Tkinter callback being run, or the outermost program function of a
+    worker thread), the deepest program function in it and the library function that program function called, e.g.
+    `RenderScheduler._tick > LickRaster.add_trial > FigureCanvasTkAgg.draw`.
+
+    Parameters
+    ----------
+    - **frame** (*FrameType*): The innermost frame of the stack.
+
+    Returns
+    -------
+    - *str | None*: The description, or None if the stack is idle in the Tkinter event loop or runs no program code.
+    """
+    stack = stack_frames(frame)
+
+    if is_tkinter_frame(stack[-1]):
+        # waiting in mainloop
+        return None
+
+    program = [i for i, f in enumerate(stack) if is_program_frame(f)]
+    if not program:
+        return None
+
+    # the entry point is the program frame called by the innermost tkinter frame, if there is one
+    entry = program[0]
+    for i in program:
+        if i > 0 and is_tkinter_frame(stack[i - 1]):
+            entry = i
+
+    deepest = program[-1]
+
+    names = [stack[entry].f_code.co_qualname, stack[deepest].f_code.co_qualname]
+    if deepest + 1 < len(stack):
+        names.append(stack[deepest + 1].f_code.co_qualname)
+
+    # drop repeats when the entry point is itself the deepest program frame
+    return " > ".join(dict.fromkeys(names))
+
+
+class LagWatchdog:
+    """
+    Measures Tkinter event loop lag with an `after` heartbeat and attributes stalls to the code running during them.
+
+    Attributes
+    ----------
+    - **root** (*tk.Tk*): The Tkinter root whose event loop is watched.
+    - **heartbeat_ms** (*int*): Time between beats in milliseconds.
+    - **stall_threshold_ms** (*float*): Beats later than this are logged as stalls.
+    - **stalls** (*int*): Number of stalls seen.
+    - **stall_culprits** (*collections.Counter*): Total stalled milliseconds attributed to each culprit.
+    - **on_stats** (*Callable[[dict[str, float]], None] | None*): Called on the main thread about once a second with `lag_stats`,
+      used to drive the live indicator.
+
+    Methods
+    -------
+    - `start`()
+        Starts the heartbeat and the sampling thread.
+    - `stop`()
+        Stops both.
+    - `lag_stats`()
+        Returns percentiles of the recent heartbeat lags.
+    - `log_lag_stats`()
+        Writes `lag_stats` and the worst culprits to the log.
+    """
+
+    def __init__(
+        self,
+        root: tk.Tk,
+        on_stats: Callable[[dict[str, float]], None] | None = None,
+        heartbeat_ms: int | None = None,
+        stall_threshold_ms: float | None = None,
+    ):
+        """
+        Parameters
+        ----------
+        - **root** (*tk.Tk*): The Tkinter root, must be created on the main thread.
+        - **on_stats** (*Callable[[dict[str, float]], None] | None, optional*): Receives `lag_stats` about once a second.
+        - **heartbeat_ms** (*int | None, optional*): Time between beats. Defaults to `HEARTBEAT_MS` from the rig config.
+        - **stall_threshold_ms** (*float | None, optional*): Stall threshold. Defaults to `STALL_THRESHOLD_MS` from the rig config.
+        """
+        self.root = root
+        self.on_stats = on_stats
+        # both are read on every beat, so changing them while running takes effect from the next beat
+        self.heartbeat_ms = heartbeat_ms if heartbeat_ms is not None else WATCHDOG_CONFIG["HEARTBEAT_MS"]
+        self.stall_threshold_ms = (
+            stall_threshold_ms if stall_threshold_ms is not None else WATCHDOG_CONFIG["STALL_THRESHOLD_MS"]
+        )
+
+        self._main_thread_id = threading.main_thread().ident
+
+        self._lags_ms = np.zeros(LAG_HISTORY, dtype=np.float64)
+        self._beats = 0
+        self.stalls = 0
+        self.stall_culprits: collections.Counter[str] = collections.Counter()
+
+        # samples of what the main thread was doing since the last beat, filled by the sampling thread
+        self._lock = threading.Lock()
+        self._samples: collections.Counter[str] = collections.Counter()
+        self._expected_at = 0.0
+
+        self._job: str | None = None
+        self._stop_event = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+        self._last_stats_at = 0.0
+        self._last_log_at = 0.0
+
+    def start(self) -> None:
+        if self._job is not None:
+            return
+
+        now = time.perf_counter()
+        self._expected_at = now + self.heartbeat_ms / 1000
+        self._last_log_at = now
+        self._job = self.root.after(self.heartbeat_ms, self._beat)
+
+        self._stop_event.clear()
+        self._sampler = threading.Thread(target=self._sample, name="LagWatchdog", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        self._stop_event.set()
+
+    def _beat(self) -> None:
+        """
+        Records how late this beat fired, reports stalls and schedules the next beat. Runs on the main thread.
+        """
+        now = time.perf_counter()
+        lag_ms = max((now - self._expected_at) * 1000, 0.0)
+
+        with self._lock:
+            samples = self._samples
+            self._samples = collections.Counter()
+            self._expected_at = now + self.heartbeat_ms / 1000
+
+        self._lags_ms[self._beats % LAG_HISTORY] = lag_ms
+        self._beats += 1
+        GUI_LAG.observe(lag_ms / 1000)
+
+        if lag_ms > self.stall_threshold_ms:
+            culprit = samples.most_common(1)[0][0] if samples else "unknown"
+            self.stalls += 1
+            GUI_STALLS.inc()
+            self.stall_culprits[culprit] += lag_ms
+            logger.warning(f"GUI stalled for {lag_ms:.0f} ms in {culprit}")
+
+        if now - self._last_stats_at >= 1 and self.on_stats is not None:
+            self._last_stats_at = now
+            self.on_stats(self.lag_stats())
+
+        if now - self._last_log_at >= WATCHDOG_CONFIG["LAG_LOG_INTERVAL_S"]:
+            self._last_log_at = now
+            self.log_lag_stats()
+
+        self._job = self.root.after(self.heartbeat_ms, self._beat)
+
+    def _sample(self) -> None:
+        """
+        Runs in the sampling thread. While a beat is overdue by more than half the stall threshold, records what the main thread is
+        doing every heartbeat period.
+        """
+        period = self.heartbeat_ms / 1000
+
+        while not self._stop_event.wait(period):
+            with self._lock:
+                overdue_ms = (time.perf_counter() - self._expected_at) * 1000
+
+            if overdue_ms < self.stall_threshold_ms / 2:
+                continue
+
+            culprit = self._describe_main_thread()
+
+            with self._lock:
+                self._samples[culprit] += 1
+
+    def _describe_main_thread(self) -> str:
+        """
+        Describes what the main thread is running. If it is idle in the event loop, it is waiting for the GIL, so the other threads
+        that are running program code are named instead.
+        """
+        frames = sys._current_frames()
+
+        main_frame = frames.get(self._main_thread_id)
+        if main_frame is not None:
+            description = describe_stack(main_frame)
+            if description is not None:
+                return description
+
+        threads = {thread.ident: thread.name for thread in threading.enumerate()}
+        busy = []
+        for ident, frame in frames.items():
+            if ident in (self._main_thread_id, threading.get_ident()):
+                continue
+            description = describe_stack(frame)
+            if description is not None:
+                busy.append(f"{description} ({threads.get(ident, ident)})")
+
+        if busy:
+            return "event loop waiting on " + ", ".join(sorted(busy))
+        return "event loop"
+
+    def lag_stats(self) -> dict[str, float]:
+        """
+        Returns
+        -------
+        - *dict[str, float]*: The number of beats and stalls so far, and the median, 95th and 99th percentile and maximum lag in
+        milliseconds over the most recent `LAG_HISTORY` beats.
+        """
+        recent = self._lags_ms[: min(self._beats, LAG_HISTORY)]
+        if recent.size == 0:
+            return {"beats": 0, "stalls": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+
+        p50, p95, p99 = np.percentile(recent, [50, 95, 99])
+        return {
+            "beats": self._beats,
+            "stalls": self.stalls,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(recent.max()),
+        }
+
+    def log_lag_stats(self) -> None:
+        stats = self.lag_stats()
+        logger.info(
+            f"GUI lag over last {min(stats['beats'], LAG_HISTORY)} beats: p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, "
+            f"p99 {stats['p99_ms']:.1f} ms, max {stats['max_ms']:.1f} ms, {stats['stalls']} stalls so far."
+        )
+        for culprit, total_ms in self.stall_culprits.most_common(3):
+            logger.info(f"GUI stalled {total_ms:.0f} ms in total in {culprit}")
+
@@ -0,0 +1,158 @@
+"""
+Defines the `LickRaster` class, which draws a lick raster onto a Matplotlib axes, and the `RasterLines` collection holding its ticks.
+
+All licks are held in a single `RasterLines` collection whose data grows in place, and new trials are painted with blitting by
+`LickRaster`: the rendered plot is cached as a background image and each update only draws the new trial's row on top of it, so the
+cost of an update does not grow as the session goes on. `LickRaster` only needs a Matplotlib canvas, which lets
+`benchmarks.raster_plot_benchmark` time it without a display.
+
+This module imports Matplotlib, so `views.rasterized_data_window` only imports it once a plot is created.
+"""
+
+import matplotlib
+import numpy as np
+import numpy.typing as npt
+from matplotlib.axes import Axes
+from matplotlib.backend_bases import FigureCanvasBase
+from matplotlib.collections import LineCollection
+
+TICK_HALF_HEIGHT = 0.4
+"""Each lick is drawn as a vertical tick this far above and below its trial's row."""
+
+
+class RasterLines(LineCollection):
+    """
+    A LineCollection holding every lick tick of the raster, whose segments and colors are kept in growable numpy buffers.
+
+    New ticks are appended to the buffers with `extend`, which does not touch the underlying Matplotlib paths. The paths are only
+    rebuilt from the buffers the next time the collection is fully drawn (first draw, resize, zoom or pan), which is already a full
+    redraw, so extending the raster costs nothing beyond the copy into the buffer.
+
+    Methods
+    -------
+    - `extend`(segments, color)
+        Appends tick segments in a single color.
+    - `draw`(renderer)
+        Synchronizes the collection with the buffers before drawing it.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__([], **kwargs)
+        self._segments = np.empty((256, 2, 2), dtype=np.float64)
+        self._colors = np.empty((256, 4), dtype=np.float64)
+        self._count = 0
+        self._synced = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def extend(self, segments: npt.NDArray[np.float64], color: tuple) -> None:
+        """
+        Appends tick segments to the buffers, doubling their capacity when full.
+
+        Parameters
+        ----------
+        - **segments** (*npt.NDArray[np.float64]*): (N, 2, 2) array of segment endpoints.
+        - **color** (*tuple*): RGBA color of every new segment.
+        """
+        needed = self._count + len(segments)
+        if needed > len(self._segments):
+            capacity = max(needed, 2 * len(self._segments))
+            self._segments = np.resize(self._segments, (capacity, 2, 2))
+            self._colors = np.resize(self._colors, (capacity, 4))
+
+        self._segments[self._count : needed] = segments
+        self._colors[self._count : needed] = color
+        self._count = needed
+
+    def draw(self, renderer):
+        """
+        Rebuilds the collection's paths from the buffers if ticks were added since the last full draw, then draws it.
+        """
+        if self._synced != self._count:
+            self.set_segments(self._segments[: self._count])
+            self.set_color(self._colors[: self._count])
+            self._synced = self._count
+        super().draw(renderer)
+
+
+class LickRaster:
+    """
+    Draws a lick raster onto a Matplotlib axes, painting each new trial with blitting.
+
+    Attributes
+    ----------
+    - **canvas** (*FigureCanvasBase*): The canvas the axes are drawn on.
+    - **axes** (*Axes*): The axes holding the raster.
+    - **raster_lines** (*RasterLines*): Every lick tick drawn so far.
+    - **new_row** (*LineCollection*): Animated collection holding only the latest trial, blitted on top of the cached background.
+    - **color_cycle** (*Colormap*): A Matplotlib colormap instance (`tab10`) used to cycle through colors for each trial.
+    - **color_index** (*int*): The current index into the `color_cycle`.
+
+    Methods
+    -------
+    - `add_trial`(lick_times, logical_trial)
+        Adds a trial's licks to the raster and paints its row.
+    """
+
+    def __init__(self, canvas: FigureCanvasBase, axes: Axes):
+        self.canvas = canvas
+        self.axes = axes
+
+        self.color_cycle = matplotlib.colormaps["tab10"]
+        self.color_index = 0
+
+        self.raster_lines = RasterLines(linewidths=1.5)
+        self.new_row = LineCollection([], linewidths=1.5, animated=True)
+        axes.add_collection(self.raster_lines)
+        axes.add_collection(self.new_row)
+
+        self._background = None
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event) -> None:
+        """
+        Caches the freshly drawn axes as the background that new rows are blitted onto.
+        """
+        self._background = self.canvas.copy_from_bbox(self.axes.bbox)
+
+    def add_trial(self, lick_times: list[float], logical_trial: int) -> None:
+        """
+        Adds a trial's licks to the raster, as ticks positioned relative to the first lick of the trial.
+
+        If the plot has been drawn before, the cached background is restored, only the new row is drawn over it and the result is
+        blitted to the screen and cached as the new background. Otherwise a full draw is scheduled, which draws every row.
+
+        Parameters
+        ----------
+        - **lick_times** (*list[float]*): Timestamps (in seconds) of the licks in the trial.
+        - **logical_trial** (*int*): The zero-based index of the trial, used as the row of the ticks.
+        """
+        self.color_index = (self.color_index + 1) % 10
+
+        if not lick_times:
+            return
+
+        x = np.asarray(lick_times, dtype=np.float64)
+        x -= x[0]
+
+        segments = np.empty((x.size, 2, 2), dtype=np.float64)
+        segments[:, :, 0] = x[:, None]
+        segments[:, 0, 1] = logical_trial - TICK_HALF_HEIGHT
+        segments[:, 1, 1] = logical_trial + TICK_HALF_HEIGHT
+
+        color = self.color_cycle(self.color_index)
+        self.raster_lines.extend(segments, color)
+
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+
+        self.new_row.set_segments(segments)
+        self.new_row.set_color(color)
+
+        self.canvas.restore_region(self._background)
+        self.axes.draw_artist(self.new_row)
+        self.canvas.blit(self.axes.bbox)
+
+        self._background = self.canvas.copy_from_bbox(self.axes.bbox)
@@ -0,0 +1,137 @@
+"""
+Defines the `LickRatePSTH` class, which draws the lick rate histograms of `models.lick_rate_histogram.LickRateHistogram` onto a
+Matplotlib axes.
+
+Each stimulus is an animated step line drawn over a cached background, so only the lines are redrawn after each trial. A full redraw only
+happens when the rates outgrow the y axis or the bin width is changed.
+
+This module imports Matplotlib, so `views.psth_window` only imports it once a plot is created.
+"""
+
+import matplotlib
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.backend_bases import FigureCanvasBase
+
+from models.lick_rate_histogram import LickRateHistogram
+
+Y_HEADROOM = 1.5
+"""When a rate outgrows the y axis, the axis is grown to this multiple of the highest rate so it is not grown again every trial."""
+
+
+class LickRatePSTH:
+    """
+    Draws the lick rate histogram of each stimulus as a step line onto a Matplotlib axes, repainting them with blitting.
+
+    Attributes
+    ----------
+    - **canvas** (*FigureCanvasBase*): The canvas the axes are drawn on.
+    - **axes** (*Axes*): The axes holding the histograms.
+    - **histogram** (*LickRateHistogram*): The running histograms that are drawn.
+    - **lines** (*list[Line2D]*): One animated step line per stimulus, in the order of `histogram.stimuli`.
+
+    Methods
+    -------
+    - `add_trial`(port_licks)
+        Adds a trial's licks to the histograms and repaints the lines.
+    - `set_bin_width`(bin_width_s)
+        Rebins the histograms and redraws the plot.
+    """
+
+    def __init__(self, canvas: FigureCanvasBase, axes: Axes, histogram: LickRateHistogram):
+        self.canvas = canvas
+        self.axes = axes
+        self.histogram = histogram
+
+        colors = matplotlib.colormaps["tab10"]
+        self.lines = [
+            axes.plot(
+                [], [], drawstyle="steps-post", color=colors(i % 10), label=stimulus, animated=True
+            )[0]
+            for i, stimulus in enumerate(histogram.stimuli)
+        ]
+
+        axes.set_xlim(0, histogram.window_s)
+        axes.set_ylim(0, 1)
+        axes.set_xlabel("Time From Trial Start (s)")
+        axes.set_ylabel("Lick Rate (licks / s)")
+        if self.lines:
+            axes.legend(loc="upper right", fontsize="small")
+
+        self._update_lines()
+
+        self._background = None
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event) -> None:
+        """
+        Caches the freshly drawn axes, which holds everything but the animated lines, then paints the lines over it.
+        """
+        self._background = self.canvas.copy_from_bbox(self.axes.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self) -> None:
+        for line in self.lines:
+            self.axes.draw_artist(line)
+        self.canvas.blit(self.axes.bbox)
+
+    def _update_lines(self) -> float:
+        """
+        Sets the data of every line from the histograms.
+
+        Returns
+        -------
+        - *float*: The highest rate in any bin.
+        """
+        edges = self.histogram.bin_edges()
+        rates = self.histogram.rates()
+
+        for line, rate in zip(self.lines, rates):
+            # repeat the last bin so steps-post draws it all the way to its right edge
+            line.set_data(edges, np.append(rate, rate[-1]))
+
+        return float(rates.max()) if rates.size else 0.0
+
+    def _repaint(self, highest_rate: float) -> None:
+        """
+        Blits the lines over the cached background, or schedules a full draw if there is no background yet or the y axis must grow.
+        """
+        if highest_rate > self.axes.get_ylim()[1]:
+            self.axes.set_ylim(0, highest_rate * Y_HEADROOM)
+            self.canvas.draw_idle()
+            return
+
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+
+        self.canvas.restore_region(self._background)
+        self._draw_lines()
+
+    def add_trial(self, port_licks: list[tuple[str, list[float]]]) -> None:
+        """
+        Adds a trial's licks to the histograms and repaints the lines.
+
+        Parameters
+        ----------
+        - **port_licks** (*list[tuple[str, list[float]]]*): For each port, the stimulus presented on it and its lick times relative to
+        the start of the trial, in seconds.
+        """
+        if not self.histogram.add_trial(port_licks):
+            return
+
+        self._repaint(self._update_lines())
+
+    def set_bin_width(self, bin_width_s: float) -> None:
+        """
+        Rebins the histograms with a new bin width and redraws the plot, resetting the y axis to fit the new rates.
+
+        Parameters
+        ----------
+        - **bin_width_s** (*float*): The new bin width in seconds.
+        """
+        self.histogram.set_bin_width(bin_width_s)
+        highest_rate = self._update_lines()
+
+        self.axes.set_ylim(0, max(highest_rate * Y_HEADROOM, 1))
+        self.canvas.draw_idle()
@@ -1,6 +1,7 @@
 """
-`main_gui` is the module which all program GUI elements originate from. We first initialize the primary app window, then initialize and hide
-all secondary windows so that they will not take resources being created later.
+`main_gui` is the module which all program GUI elements originate from. We first initialize the primary app window, then register
+all secondary windows with a `views.window_registry` WindowRegistry, which builds each of them the first time it is shown (or in idle time
+once the main window has painted) and keeps it hidden for reuse after that.
 
 """
 
@@ -16,9 +17,15 @@ from models.experiment_process_data import ExperimentProcessData
 # used for type hinting
 
 from views.gui_common import GUIUtils
+import system_config
+from rig_config_service import rig_config
+from views.render_scheduler import RenderScheduler, GUI_CONFIG
+from views.lag_watchdog import LagWatchdog, WATCHDOG_CONFIG
+from views.window_registry import WindowRegistry, REGISTRY_CONFIG
 
 # import other GUI classes that can spawn from main GUI
 from views.rasterized_data_window import RasterizedDataWindow
+from views.psth_window import LickRatePSTHWindow
 from views.experiment_control_window import ExperimentCtlWindow
 from views.event_window import EventWindow
 from views.valve_testing.valve_testing_window import ValveTestWindow
@@ -47,8 +54,12 @@ class MainGUI(tk.Tk):
     GUI to attempt state transitions.
     - **scheduled_tasks** (*dict[str,str]*): self.scheduled_tasks is a dict where keys are short task descriptions (e.g ttc_to_iti) and the values are
         the str ids for tkinter.after scheduling calls. This allows for tracking and cancellations of scheduled tasks.
-    - (**windows**) (*dict*): A dictionary that holds window titles as keys, and instances of GUI sublasses as values. Allows for easy access of windows and their methods
-        and attributes given a title.
+    - **render_scheduler** (*RenderScheduler*): Batches GUI updates requested from anywhere in the program into frames drawn at a fixed rate
+        on the main thread, see `views.render_scheduler`.
+    - **lag_watchdog** (*LagWatchdog*): Measures how late the event loop runs and logs what blocks it, see `views.lag_watchdog`.
+    - (**windows**) (*WindowRegistry*): Holds the secondary windows by title, building each instance of the GUI subclasses the first time it is
+        looked up with `windows[title]`. Allows for easy access of windows and their methods and attributes given a title.
+    - **created_at** (*float*): `time.perf_counter()` when construction of the window started, used to measure time to first paint.
 
     Methods
     -------
@@ -59,9 +70,11 @@ class MainGUI(tk.Tk):
         the data stored in the model is also updated.
     - `build_gui_widgets`()
         Setup all widgets to be placed in the MainGUI window.
-    - `preload_secondary_windows`()
-        This method loads all secondary windows and all content available at start time. This was done to reduce strain on system while program is running. Windows always
-        exist and are simply hidden when not shown to user.
+    - `register_secondary_windows`()
+        This method registers how to build each secondary window. Windows are built the first time they are needed (or prewarmed once the main window
+        has painted), then always exist and are simply hidden when not shown to user.
+    - `on_first_paint`()
+        Logs the time to first paint of the main window and starts prewarming the secondary windows.
     - `show_secondary_window`()
         Takes a window description string for the `windows` dictionary. Access is given to the instance of the class for the description, where the windows `show` method is
         called.
@@ -80,15 +93,25 @@ class MainGUI(tk.Tk):
     - `save_button_handler`()
         Define behavior for saving all data to xlsx files.
     - `update_clock_label`()
-        Hold logic for updating GUI clocks every 100ms.
+        Hold logic for updating GUI clocks, run every frame of the render scheduler while the program runs.
     - `update_max_time`()
         Calculate max program runtime.
+    - `start_clock`()
+        Start redrawing the clocks every frame once the program starts.
+    - `stop_clock`()
+        Stop redrawing the clocks and log GUI frame times and event loop lag.
+    - `update_lag_indicator`()
+        Show the latest event loop lag percentiles in the status area.
+    - `on_gui_config_change`()
+        Apply edits to the `gui_config` section of the rig config (frame rate, watchdog thresholds) in the next frame.
     - `update_on_new_trial`()
-        Define GUI objects to update each iteration (new ITI state) of program.
+        Request the GUI objects to update each iteration (new ITI state) of program, drawn by `draw_new_trial`.
     - `update_on_state_change`()
-        Define GUI objects to update upon each state (state timer, label, etc).
+        Request the GUI objects to update upon each state (state timer, label, etc), drawn by `draw_state_change`.
     - `update_on_stop`()
-        Update GUI objects to reflect "IDLE" program state once stopped.
+        Request the GUI objects to update to reflect "IDLE" program state once stopped, drawn by `draw_stop`.
+    - `reset_views`()
+        Return every widget to its state at launch for a warm reset, and rebuild the secondary windows.
     - `on_close`()
         Defines GUI shutdown behavior when primary window is closed.
     """
@@ -100,8 +123,9 @@ class MainGUI(tk.Tk):
         arduino_controller: ArduinoManager,
     ) -> None:
         """
-        Initialize the MainGUI window. Build all frames and widgets required by the main window *and* loads all secondary windows that can
-        be opened by the lower control buttons. These are hidden after generation and deiconified (shown) when the button is pressed.
+        Initialize the MainGUI window. Build all frames and widgets required by the main window *and* registers all secondary windows that can
+        be opened by the lower control buttons. These are built when first needed, hidden after generation and deiconified (shown) when the
+        button is pressed.
 
         Parameters
         ----------
@@ -114,6 +138,8 @@ class MainGUI(tk.Tk):
         ValveTestWindow, and `views.valve_control_window` require references here to communicate with Arduino to calibrate and open/close
         valves. This is also used in `on_close` to stop the Arduino listener thread to avoid thread errors on window close.
         """
+        self.created_at = time.perf_counter()
+
         # init tk.Tk to use this class as a tk.root.
         super().__init__()
 
@@ -123,6 +149,8 @@ class MainGUI(tk.Tk):
 
         self.scheduled_tasks: dict[str, str] = {}
 
+        self.render_scheduler = RenderScheduler(self)
+
         self.setup_basic_window_attr()
         self.setup_tkinter_variables()
         self.build_gui_widgets()
@@ -132,8 +160,17 @@ class MainGUI(tk.Tk):
         self.update_idletasks()
         GUIUtils.center_window(self)
 
-        # create all secondary windows early so that loading when program is running is fast
-        self.preload_secondary_windows()
+        # secondary windows are built when first shown, or prewarmed once the main window has painted
+        self.register_secondary_windows()
+        self._first_paint_binding = self.bind("<Expose>", self._on_expose, add="+")
+
+        self.render_scheduler.start()
+
+        self.lag_watchdog = LagWatchdog(self, on_stats=self.update_lag_indicator)
+        self.lag_watchdog.start()
+
+        # frame rate and watchdog thresholds follow edits to the rig config while the program runs
+        rig_config.subscribe("gui_config", self.on_gui_config_change)
 
         logger.info("MainGUI initialized.")
 
@@ -144,7 +181,9 @@ class MainGUI(tk.Tk):
         we set the grid rows and columns to expand and contract as window gets larger or smaller (weight=1).
         """
 
-        self.title("Samuelsen Lab Photologic Rig")
+        rig_name = system_config.get_rig_name()
+        # several rigs may be run from one pc, see rig_manager
+        self.title("Samuelsen Lab Photologic Rig" + (f" - {rig_name}" if rig_name else ""))
         self.bind("<Control-w>", lambda event: self.on_close())
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
@@ -222,30 +261,56 @@ class MainGUI(tk.Tk):
             logger.error(f"Error setting up GUI: {e}")
             raise
 
-    def preload_secondary_windows(self) -> None:
+    def register_secondary_windows(self) -> None:
         """
-        Build all secondary windows (windows that require a button push to view) and get them ready
-        to be opened (deiconified in tkinter terms) when the user clicks the corresponding button.
+        Register how to build all secondary windows (windows that require a button push to view). Each is built the first time it is
+        needed and kept ready to be opened (deiconified in tkinter terms) when the user clicks the corresponding button.
         """
         # define the data that ExperimentCtlWindow() needs to function
         stimuli_data = self.exp_data.stimuli_data
         event_data = self.exp_data.event_data
 
-        self.windows = {
-            "Experiment Control": ExperimentCtlWindow(
-                self.exp_data, stimuli_data, self.trigger
-            ),
-            "Program Schedule": ProgramScheduleWindow(
-                self.exp_data,
-            ),
-            "Raster Plot": (
+        self.windows = WindowRegistry(self)
+
+        self.windows.register(
+            "Experiment Control",
+            lambda: ExperimentCtlWindow(self.exp_data, stimuli_data, self.trigger),
+        )
+        self.windows.register(
+            "Program Schedule", lambda: ProgramScheduleWindow(self.exp_data)
+        )
+        self.windows.register(
+            "Raster Plot",
+            lambda: (
                 RasterizedDataWindow(1, self.exp_data),
                 RasterizedDataWindow(2, self.exp_data),
             ),
-            "Event Data": EventWindow(event_data),
-            "Valve Testing": ValveTestWindow(self.arduino_controller),
-            "Valve Control": ValveControlWindow(self.arduino_controller),
-        }
+        )
+        self.windows.register("Lick Rate PSTH", lambda: LickRatePSTHWindow(self.exp_data))
+        self.windows.register("Event Data", lambda: EventWindow(event_data))
+        self.windows.register(
+            "Valve Testing", lambda: ValveTestWindow(self.arduino_controller)
+        )
+        self.windows.register(
+            "Valve Control", lambda: ValveControlWindow(self.arduino_controller)
+        )
+
+    def _on_expose(self, event: tk.Event) -> None:
+        # the first expose event of any widget means the window is being painted, the rest of the paint is done in idle callbacks
+        # already queued, so first paint is complete at the next idle callback
+        self.unbind("<Expose>", self._first_paint_binding)
+        self.after_idle(self.on_first_paint)
+
+    def on_first_paint(self) -> None:
+        """
+        Logs how long the main window took to paint for the first time after it started being built, then prewarms the secondary windows
+        if `PREWARM_WINDOWS` is set in the `gui_config` section of the rig config.
+        """
+        first_paint_ms = (time.perf_counter() - self.created_at) * 1000
+        logger.info(f"Main window first painted {first_paint_ms:.0f} ms after it was created.")
+
+        if REGISTRY_CONFIG["PREWARM_WINDOWS"]:
+            self.windows.prewarm()
 
     def show_secondary_window(self, window: str) -> None:
         """
@@ -257,19 +322,21 @@ class MainGUI(tk.Tk):
         - **window** (*str*): A key to the `windows` dictionary. This will return an instance of the corresponding class to the provided
         'key' (window).
         """
-        if isinstance(self.windows[window], tuple):
-            for instance in self.windows[window]:
-                instance.deiconify()
-        else:
-            df = self.exp_data.program_schedule_df
-            if window == "Valve Testing" and not df.empty:
-                GUIUtils.display_error(
-                    "CANNOT DISPLAY WINDOW",
-                    "Since the schedule has been generated, valve testing has been disabled for this experiment. Reset the application to test again.",
-                )
-                return
+        if window == "Valve Testing" and not self.exp_data.program_schedule_df.empty:
+            GUIUtils.display_error(
+                "CANNOT DISPLAY WINDOW",
+                "Since the schedule has been generated, valve testing has been disabled for this experiment. Reset the application to test again.",
+            )
+            return
+
+        # built here if this is the first time the window is shown
+        instance = self.windows[window]
 
-            self.windows[window].show()
+        if isinstance(instance, tuple):
+            for sub_window in instance:
+                sub_window.deiconify()
+        else:
+            instance.show()
 
     def hide_secondary_window(self, window: str) -> None:
         """
@@ -281,7 +348,10 @@ class MainGUI(tk.Tk):
         - **window** (*str*): A key to the `windows` dictionary. This will return an instance of the corresponding class to the provided
         'key' (window).
         """
-        self.windows[window].withdraw()
+        # a window that was never built is not shown
+        instance = self.windows.get_if_built(window)
+        if instance is not None:
+            instance.withdraw()
 
     def create_top_control_buttons(self) -> None:
         """
@@ -404,6 +474,13 @@ class MainGUI(tk.Tk):
             )
             self.progress.grid(row=2, column=0, pady=5)
 
+            self.gui_lag_label = tk.Label(
+                self.program_status_statistic_frame,
+                text="GUI Lag: --",
+                font=("Helvetica", 10),
+            )
+            self.gui_lag_label.grid(row=3, column=0)
+
             self.stimuli_label = tk.Label(
                 self.stimuli_information_frame,
                 text="Side One | VS | Side Two",
@@ -536,6 +613,14 @@ class MainGUI(tk.Tk):
                 row=0,
                 column=2,
             )
+            self.psth_button_frame, _ = GUIUtils.create_button(
+                parent=self.lower_control_buttons_frame,
+                button_text="Lick Rate PSTH",
+                command=lambda: self.show_secondary_window("Lick Rate PSTH"),
+                bg="grey",
+                row=0,
+                column=3,
+            )
             self.exp_ctrl_button_frame = GUIUtils.create_button(
                 parent=self.lower_control_buttons_frame,
                 button_text="Valve / Stimuli",
@@ -595,8 +680,8 @@ class MainGUI(tk.Tk):
     def update_clock_label(self) -> None:
         """
         This method defines logic to update primary timers such as main program timer and state timer. Max time is only updated once, but this
-        operation is separated from this method. This task is scheduled via a tkinter.after call to execute every 100ms so that the main timer
-        is responsive without overwhelming the main thread.
+        operation is separated from this method. `start_clock` registers this method to run in every frame of the `render_scheduler` so that the
+        main timer is responsive without overwhelming the main thread.
         """
         try:
             elapsed_time = time.time() - self.exp_data.start_time
@@ -610,13 +695,63 @@ class MainGUI(tk.Tk):
             )
 
             self.state_timer_text.configure(text="{:.1f}s".format(state_elapsed_time))
-
-            clock_update_task = self.after(100, self.update_clock_label)
-            self.scheduled_tasks["CLOCK UPDATE"] = clock_update_task
         except Exception as e:
             logger.error(f"Error updating clock label: {e}")
             raise
 
+    def start_clock(self) -> None:
+        """
+        Starts redrawing the clocks in every frame, and draws the maximum runtime once. Safe to call from worker threads.
+        """
+        self.render_scheduler.set_periodic("CLOCK UPDATE", self.update_clock_label)
+        self.render_scheduler.request("MAX TIME", self.update_max_time)
+
+    def stop_clock(self) -> None:
+        """
+        Stops redrawing the clocks and logs how long GUI frames took and how late the event loop ran during the run.
+        """
+        self.render_scheduler.remove_periodic("CLOCK UPDATE")
+        self.render_scheduler.log_frame_stats()
+        self.lag_watchdog.log_lag_stats()
+
+    def update_lag_indicator(self, stats: dict[str, float]) -> None:
+        """
+        Shows the median and 95th percentile event loop lag, colored by how close the 95th percentile is to the stall threshold.
+
+        Parameters
+        ----------
+        - **stats** (*dict[str, float]*): `LagWatchdog.lag_stats` of the lag watchdog.
+        """
+        threshold = WATCHDOG_CONFIG["STALL_THRESHOLD_MS"]
+
+        if stats["p95_ms"] > threshold:
+            color = "red"
+        elif stats["p95_ms"] > threshold / 2:
+            color = "orange"
+        else:
+            color = "dark green"
+
+        self.gui_lag_label.configure(
+            text=f"GUI Lag: p50 {stats['p50_ms']:.0f} ms | p95 {stats['p95_ms']:.0f} ms | {stats['stalls']} stalls",
+            fg=color,
+        )
+
+    def on_gui_config_change(self, changed: dict) -> None:
+        """
+        Called by `rig_config_service` on its watcher thread when the `gui_config` section of the rig config is edited. The new values are
+        applied in the next frame, on the main thread.
+
+        Parameters
+        ----------
+        - **changed** (*dict*): The keys of `gui_config` that changed and their new values.
+        """
+        self.render_scheduler.request("GUI CONFIG", self.apply_gui_config)
+
+    def apply_gui_config(self) -> None:
+        self.render_scheduler.set_rate(GUI_CONFIG["REFRESH_RATE_HZ"])
+        self.lag_watchdog.heartbeat_ms = WATCHDOG_CONFIG["HEARTBEAT_MS"]
+        self.lag_watchdog.stall_threshold_ms = WATCHDOG_CONFIG["STALL_THRESHOLD_MS"]
+
     def update_max_time(self) -> None:
         """
         This method updates the maximum runtime timer by retreiving this value from `models.experiment_process_data` and configuring the
@@ -643,11 +778,30 @@ class MainGUI(tk.Tk):
         `app_logic` 'StateMachine' to provide the new stimulus for the upcoming trial for side one.
         - **side_2_stimulus** (*str*): This parameter mirrors `side_1_stimulus` in all aspects except that this one reflects the stmulus for
         side two.
+
+        The widgets are drawn in the next frame of the `render_scheduler`, so this can be called from worker threads.
         """
-        try:
-            trial_number = self.exp_data.current_trial_number
-            total_trials = self.exp_data.exp_var_entries["Num Trials"]
+        trial_number = self.exp_data.current_trial_number
+        total_trials = self.exp_data.exp_var_entries["Num Trials"]
+
+        self.render_scheduler.request(
+            "NEW TRIAL",
+            lambda: self.draw_new_trial(
+                trial_number, total_trials, side_1_stimulus, side_2_stimulus
+            ),
+        )
 
+    def draw_new_trial(
+        self,
+        trial_number: int,
+        total_trials: int,
+        side_1_stimulus: str,
+        side_2_stimulus: str,
+    ) -> None:
+        """
+        Draws the widgets requested by `update_on_new_trial`.
+        """
+        try:
             self.trials_completed_label.configure(
                 text=f"{trial_number} / {total_trials} Trials Completed"
             )
@@ -677,6 +831,16 @@ class MainGUI(tk.Tk):
         - **state_duration_ms** (*float*): Provides the duration of this state in ms. Is generally pulled from the program schedule df for
         the current trial. Converted to seconds by dividing the parameter by 1000.0.
         - **state** (*str*): Provides the current to program state to update state label to inform user that program has changed state.
+
+        The widgets are drawn in the next frame of the `render_scheduler`, so this can be called from worker threads.
+        """
+        self.render_scheduler.request(
+            "STATE CHANGE", lambda: self.draw_state_change(state_duration_ms, state)
+        )
+
+    def draw_state_change(self, state_duration_ms: float, state: str) -> None:
+        """
+        Draws the widgets requested by `update_on_state_change`.
         """
         try:
             ### clear full state time ###
@@ -698,9 +862,16 @@ class MainGUI(tk.Tk):
     def update_on_stop(self) -> None:
         """
         Here we define the GUI objects that need to be updated when the program is stopped for any reason. This includes the current
-        state label (change to "IDLE), and removing state timer information.
+        state label (change to "IDLE), and removing state timer information. The clocks are stopped and the widgets are drawn in the next
+        frame of the `render_scheduler`, replacing any state change still waiting to be drawn.
         """
+        self.stop_clock()
+        self.render_scheduler.request("STATE CHANGE", self.draw_stop)
 
+    def draw_stop(self) -> None:
+        """
+        Draws the widgets requested by `update_on_stop`.
+        """
         try:
             self.state_timer_text.configure(text="0.0s")
 
@@ -712,12 +883,58 @@ class MainGUI(tk.Tk):
             logger.error(f"Error updating GUI on stop: {e}")
             raise
 
+    def reset_views(self) -> None:
+        """
+        Returns the main window to how it looked at launch, for a warm reset where this window is reused for the next experiment instead of
+        being destroyed. Must be called after `exp_data` has been reset, since the entries are refilled from it.
+
+        Secondary windows hold the tables and plots of the last experiment, so they are destroyed and built again by `windows` when next
+        needed (or prewarmed).
+        """
+        self.render_scheduler.remove_periodic("CLOCK UPDATE")
+        # drop updates still waiting to be drawn for the last experiment
+        self.render_scheduler.stop()
+        self.render_scheduler.start()
+
+        self.windows.reset()
+
+        # the traces on these variables write the defaults back into the model
+        for variables in (self.tkinter_entries, self.exp_var_entries):
+            for key, variable in variables.items():
+                variable.set(self.exp_data.get_default_value(key))
+
+        self.main_timer_text.configure(text="0.0s")
+        self.main_timer_min_sec_text.configure(text="")
+        self.maximum_total_time.configure(text="0 Minutes, 0 S")
+        self.state_timer_text.configure(text="0.0s")
+        self.full_state_time_text.configure(text="/ 0.0s")
+
+        self.status_label.configure(text="Status: Idle")
+        self.trials_completed_label.configure(text="0 / 0 Trials Completed")
+        self.progress["value"] = 0
+        self.stimuli_label.configure(text="Side One | VS | Side Two")
+        self.trial_number_label.configure(text="Trial Number: ")
+
+        self.start_button.configure(
+            text="Start", bg="green", command=lambda: self.trigger("START")
+        )
+
+        if REGISTRY_CONFIG["PREWARM_WINDOWS"]:
+            self.windows.prewarm()
+
+        logger.info("GUI reset for a new experiment.")
+
     def on_close(self):
         """
         This method is called any time the main program window is closed via the red X or <C-w> shortcut. We stop the listener thread if it
         is running, then quit() the tkinter mainloop and destroy() the window and all descendent widgets.
         """
         try:
+            rig_config.unsubscribe("gui_config", self.on_gui_config_change)
+            self.render_scheduler.stop()
+            self.lag_watchdog.stop()
+            self.windows.stop_prewarm()
+
             if self.arduino_controller.listener_thread is not None:
                 # stop the listener thread so that it will not block exit
                 self.arduino_controller.stop_listener_thread()
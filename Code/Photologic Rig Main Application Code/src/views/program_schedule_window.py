@@ -6,9 +6,15 @@ This view presents the pre-generated trial sequence, stimuli details, and allows
 for updates of trial outcomes (like lick counts and actual `TTC` state completion time)
 as the experiment progresses. It relies on data provided by external objects
 (like `models.experiment_process_data` ExperimentProcessData) to populate and update its content.
+
+The table is a `ttk.Treeview`. Rows of a Treeview are plain data items rather than widgets, and only the rows scrolled into view are
+drawn, so the window opens quickly no matter how many trials the schedule has. Rows are identified by their trial index, which lets
+single cells be updated and the current trial be scrolled into view without searching the table.
 """
 
 import tkinter as tk
+from tkinter import font as tkfont
+from tkinter import ttk
 
 ### Type Hinting###
 from models.experiment_process_data import ExperimentProcessData
@@ -16,14 +22,20 @@ from models.experiment_process_data import ExperimentProcessData
 
 from views.gui_common import GUIUtils
 
+MAX_VISIBLE_ROWS = 20
+"""Height of the table in rows, the rest of the schedule is reached by scrolling."""
+
+BLOCK_COLORS = ("white", "gray90")
+"""Backgrounds alternated between trial blocks, so blocks stand apart as the separators between them used to."""
+
+CURRENT_TRIAL_COLOR = "yellow"
+
 
 class ProgramScheduleWindow(tk.Toplevel):
     """
     A Toplevel window that displays the experimental program schedule as a table.
 
-    This window visualizes the `program_schedule_df` DataFrame.
-    Accomplished by creating a scrollable canvas containing a grid
-    of Tkinter Labels representing the schedule data. It updates
+    This window visualizes the `program_schedule_df` DataFrame in a `ttk.Treeview`, with one row per trial. It updates
     cell contents (licks, TTC) and highlights the currently active trial row
     based on calls from the main `app_logic` StateMachine.
 
@@ -33,13 +45,11 @@ class ProgramScheduleWindow(tk.Toplevel):
     ----------
     - **exp_data** (*ExperimentProcessData*): An instance that allows for access to experiment related data and methods. (E.g stimuli names,
       access trial lick data, etc.)
-    - **canvas_frame** (*tk.Frame*): The main frame holding the canvas and scrollbar.
-    - **canvas** (*tk.Canvas*): The widget providing the scrollable area for the table.
-    - **scrollbar** (*tk.Scrollbar*): The scrollbar linked to the canvas.
-    - **stimuli_frame** (*tk.Frame*): The frame placed inside the canvas, containing the grid of Label widgets that form the table.
-    - **header_labels** (*list[tk.Label] OR None*): List of tk.Label widgets for the table column headers. `None` until populated.
-    - **cell_labels** (*list[list[tk.Label]] OR  None*): A 2D list (list of rows, each row is a list of tk.Label widgets)
-        representing the table data cells. `None` until populated.
+    - **table_frame** (*tk.Frame*): The frame holding the table and scrollbar.
+    - **table** (*ttk.Treeview*): The table widget, its row item IDs are the zero-based trial indices as strings.
+    - **scrollbar** (*tk.Scrollbar*): The scrollbar linked to the table.
+    - **populated** (*bool*): Whether the table has been filled from the schedule yet.
+    - **current_row** (*int | None*): The zero-based index of the highlighted trial row.
 
     Methods
     -------
@@ -52,11 +62,11 @@ class ProgramScheduleWindow(tk.Toplevel):
     - `update_licks(...)`
         Specifically updates the lick count cells ('Port 1 Licks', 'Port 2 Licks') for a given trial.
     - `update_row_color(...)`
-        Highlights the current trial row in yellow and resets the previous row's color.
+        Highlights the current trial row in yellow, resets the previous row's color and scrolls the row into view.
     - `show()`
         Makes the window visible. Populates the table with data on the first call if not already done.
     - `populate_stimuli_table()`
-        Creates the header and data cell Label widgets within `stimuli_frame` based on `exp_data.program_schedule_df`.
+        Creates the table columns and inserts one row per trial from `exp_data.program_schedule_df`.
     """
 
     def __init__(self, exp_process_data: ExperimentProcessData) -> None:
@@ -74,32 +84,29 @@ class ProgramScheduleWindow(tk.Toplevel):
         self.bind("<Control-w>", lambda event: self.withdraw())
         self.protocol("WM_DELETE_WINDOW", lambda: self.withdraw())
 
-        # Setup the canvas and scrollbar
-        self.canvas_frame = tk.Frame(self)
-        self.canvas_frame.grid(row=0, column=0, sticky="nsew")
-        self.canvas_frame.grid_rowconfigure(0, weight=1)
-        self.canvas_frame.grid_columnconfigure(0, weight=1)
+        # Setup the table and scrollbar
+        self.table_frame = tk.Frame(self)
+        self.table_frame.grid(row=0, column=0, sticky="nsew")
+        self.table_frame.grid_rowconfigure(0, weight=1)
+        self.table_frame.grid_columnconfigure(0, weight=1)
 
-        self.canvas = tk.Canvas(self.canvas_frame)
+        self.table = ttk.Treeview(self.table_frame, show="headings", selectmode="none")
 
         self.scrollbar = tk.Scrollbar(
-            self.canvas_frame, orient="vertical", command=self.canvas.yview
+            self.table_frame, orient="vertical", command=self.table.yview
         )
 
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
-        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.table.configure(yscrollcommand=self.scrollbar.set)
+        self.table.grid(row=0, column=0, sticky="nsew")
         self.scrollbar.grid(row=0, column=1, sticky="ns")
 
-        self.grid_rowconfigure(0, weight=1)
-        self.grid_columnconfigure(0, weight=1)
-
-        self.stimuli_frame = tk.Frame(self.canvas)
-        self.canvas.create_window((0, 0), window=self.stimuli_frame, anchor="nw")
+        for i, color in enumerate(BLOCK_COLORS):
+            self.table.tag_configure(f"block{i}", background=color)
+        self.table.tag_configure("current", background=CURRENT_TRIAL_COLOR)
 
-        # initialize stimuli table variables to None, this is used in show() method to
-        # understand if window has been initialized yet
-        self.header_labels: list[tk.Label] | None = None
-        self.cell_labels: list[list[tk.Label]] | None = None
+        # populated is used in show() method to understand if window has been initialized yet
+        self.populated = False
+        self.current_row: int | None = None
 
         self.withdraw()
 
@@ -108,32 +115,28 @@ class ProgramScheduleWindow(tk.Toplevel):
         Updates the table display with data from a completed trial.
 
         Specifically calls methods to update lick counts and the actual
-        Trial Completion Time (TTC) for the given trial index. Forces an
-        update of the display using update_idletasks.
+        Trial Completion Time (TTC) for the given trial index. Only the changed cells are touched, Tkinter redraws them
+        the next time it is idle.
 
         Parameters
         ----------
         - **logical_trial** (*int*): The zero-based index of the trial that just ended, corresponding to the row in the
-            DataFrame and `cell_labels`.
+            DataFrame and the table.
 
         Raises
         ------
         - *AttributeError*: If `self.exp_data` or its `program_schedule_df` is not properly initialized.
-        - *IndexError*: If `logical_trial` is out of bounds for `self.cell_labels`.
         - *KeyError*: If expected columns ('Port 1 Licks', etc.) are missing from the DataFrame.
-        - *tk.TclError*: If there's an issue updating the Label widgets.
+        - *tk.TclError*: If `logical_trial` has no row in the table.
         """
         self.update_licks(logical_trial)
         self.update_ttc_actual(logical_trial)
 
-        self.update_idletasks()
-
     def refresh_start_trial(self, current_trial: int) -> None:
         """
         Updates the table display to indicate the trial that is starting.
 
-        Specifically highlights the row corresponding to the `current_trial`.
-        Forces an update of the display.
+        Specifically highlights the row corresponding to the `current_trial` and scrolls it into view.
 
         Parameters
         ----------
@@ -141,20 +144,16 @@ class ProgramScheduleWindow(tk.Toplevel):
 
         Raises
         ------
-        - *AttributeError*: If `self.cell_labels` is not initialized (i.e., table not populated).
-        - *IndexError*: If `current_trial` (adjusted for zero-based index) is out of bounds.
-        - *tk.TclError*: If there's an issue updating the Label widgets' background color.
+        - *tk.TclError*: If `current_trial` has no row in the table.
         """
-        self.update_row_color(current_trial)
-
-        self.update_idletasks()
+        self.update_row_color(current_trial - 1)
 
     def update_ttc_actual(self, logical_trial: int) -> None:
         """
         Updates the 'TTC Actual' cell for the specified trial row.
 
         Retrieves the value from `self.exp_data.program_schedule_df` and sets
-        the text of the corresponding Label widget in `self.cell_labels`.
+        the corresponding cell of the table.
 
         Parameters
         ----------
@@ -163,18 +162,17 @@ class ProgramScheduleWindow(tk.Toplevel):
         Raises
         ------
         - *AttributeError*: If `self.exp_data` or `program_schedule_df` is None.
-        - *IndexError*: If `logical_trial` or the column index (9) is out of bounds.
         - *KeyError*: If the column 'TTC Actual' does not exist in the DataFrame.
-        - *tk.TclError*: If updating the Label text fails.
+        - *tk.TclError*: If `logical_trial` has no row in the table.
         """
-        df = self.exp_data.program_schedule_df
-
-        if self.cell_labels is None:
+        if not self.populated:
             return
 
+        df = self.exp_data.program_schedule_df
+
         # ttc actual time taken update
-        self.cell_labels[logical_trial][9].configure(
-            text=df.loc[logical_trial, "TTC Actual"]
+        self.table.set(
+            str(logical_trial), "TTC Actual", df.loc[logical_trial, "TTC Actual"]
         )
 
     def update_licks(self, logical_trial: int) -> None:
@@ -182,7 +180,7 @@ class ProgramScheduleWindow(tk.Toplevel):
         Updates the 'Port 1 Licks' and 'Port 2 Licks' cells for the specified trial row.
 
         Retrieves values from `self.exp_data.program_schedule_df` and sets
-        the text of the corresponding Label widgets in `self.cell_labels`.
+        the corresponding cells of the table.
 
         Parameters
         ----------
@@ -191,31 +189,24 @@ class ProgramScheduleWindow(tk.Toplevel):
         Raises
         ------
         - *AttributeError*: If `self.exp_data` or `program_schedule_df` is None.
-        - *IndexError*: If `logical_trial` or column indices (4, 5) are out of bounds.
         - *KeyError*: If columns 'Port 1 Licks' or 'Port 2 Licks' do not exist.
-        - *tk.TclError*: If updating the Label text fails.
+        - *tk.TclError*: If `logical_trial` has no row in the table.
         """
-
-        if self.cell_labels is None:
+        if not self.populated:
             return
 
         df = self.exp_data.program_schedule_df
-        # side 1 licks update
-        self.cell_labels[logical_trial][4].configure(
-            text=df.loc[logical_trial, "Port 1 Licks"]
-        )
-        # side 2 licks update
-        self.cell_labels[logical_trial][5].configure(
-            text=df.loc[logical_trial, "Port 2 Licks"]
-        )
+        row = str(logical_trial)
+
+        for column in ("Port 1 Licks", "Port 2 Licks"):
+            self.table.set(row, column, df.loc[logical_trial, column])
 
     def update_row_color(self, logical_trial: int) -> None:
         """
         Highlights the current trial row and resets the previous trial row's color.
 
-        Sets the background color of all labels in the `current_trial` row (one-based)
-        to yellow. If it's not the first trial, it also resets the background color
-        of the previous trial's row labels to white.
+        Gives the row of `logical_trial` the yellow `current` tag, and returns the previously highlighted row to its
+        block color. The row is then scrolled into view, which the Treeview does directly from the row's ID.
 
         Parameters
         ----------
@@ -223,34 +214,41 @@ class ProgramScheduleWindow(tk.Toplevel):
 
         Raises
         ------
-        - *AttributeError*: If `self.cell_labels` is None.
-        - *IndexError*: If `current_trial` (adjusted for zero-based index) is out of bounds for `self.cell_labels`.
-        - *tk.TclError*: If configuring label background colors fails.
+        - *tk.TclError*: If `logical_trial` has no row in the table.
         """
-        # Adjust indices for zero-based indexing
-        if self.cell_labels is None:
+        if not self.populated:
+            # remembered so the row can be highlighted once the table is populated
+            self.current_row = logical_trial
             return
 
-        if logical_trial == 1:
-            for i in range(10):
-                self.cell_labels[logical_trial][i].configure(bg="yellow")
-        else:
-            for i in range(10):
-                self.cell_labels[logical_trial - 1][i].configure(bg="white")
-            for i in range(10):
-                self.cell_labels[logical_trial][i].configure(bg="yellow")
+        if self.current_row is not None and self.current_row != logical_trial:
+            previous = str(self.current_row)
+            if self.table.exists(previous):
+                self.table.item(previous, tags=(self.block_tag(self.current_row),))
+
+        row = str(logical_trial)
+        self.table.item(row, tags=("current",))
+        self.table.see(row)
+
+        self.current_row = logical_trial
+
+    def block_tag(self, logical_trial: int) -> str:
+        """
+        Returns the background tag of a trial's block. Blocks are `Num Stimuli / 2` trials long, as each trial presents two stimuli.
+        """
+        block_size = max(int(self.exp_data.exp_var_entries["Num Stimuli"] / 2), 1)
+        return f"block{(logical_trial // block_size) % len(BLOCK_COLORS)}"
 
     def show(self) -> None:
         """
         Makes the window visible and populates the schedule table if not already done.
 
-        Checks if the table labels (`header_labels`) have been created. If not, it
+        Checks if the table has been populated. If not, it
         attempts to populate the table using `populate_stimuli_table()`. Before
         populating, it checks if the required DataFrame (`program_schedule_df`) exists
         and displays an error via `GUIUtils.display_error` if it's missing.
         After successful population (or if already populated), it makes the window
-        visible using `deiconify()`. It also sets the canvas size and scroll region
-        after the first population.
+        visible using `deiconify()`.
 
         Raises
         ------
@@ -261,7 +259,7 @@ class ProgramScheduleWindow(tk.Toplevel):
 
         # if we have already initialized we don't need to do anything. updating the window is handled
         # by the main app when a trial ends
-        if self.header_labels is None:
+        if not self.populated:
             if self.exp_data.program_schedule_df.empty:
                 GUIUtils.display_error(
                     "Schedule Not Generated",
@@ -269,95 +267,47 @@ class ProgramScheduleWindow(tk.Toplevel):
                 )
                 return
             self.populate_stimuli_table()
-            # Calculate dimensions for canvas and scrollbar
-            canvas_width = self.stimuli_frame.winfo_reqwidth()
-
-            # max height 500px
-            canvas_height = min(500, self.stimuli_frame.winfo_reqheight() + 50)
 
-            # Adjust the canvas size and center the window
-            self.canvas.config(scrollregion=self.canvas.bbox("all"))
-            self.canvas.config(width=canvas_width, height=canvas_height)
-
-            # self.update_row_color(self.controller.data_mgr.current_trial_number)
         self.deiconify()
 
     def populate_stimuli_table(self) -> None:
         """
-        Creates and .grid()s the Tkinter Label widgets for the schedule table headers and data.
+        Creates the table columns and inserts one row per trial.
 
-        Reads data from `self.exp_data.program_schedule_df`. Creates a header row
-        and then iterates through the DataFrame rows, creating a Label for each cell.
-        Stores the created labels in `self.header_labels` and `self.cell_labels`.
-        Adds horizontal separators periodically based on experiment settings
-        (Num Stimuli / 2). Assumes `self.stimuli_frame` exists.
+        Reads data from `self.exp_data.program_schedule_df`. Each column is sized to fit its header and its
+        longest value. Rows are inserted with their zero-based trial index as item ID and shaded by trial block
+        (Num Stimuli / 2). If a trial is already running its row is highlighted.
 
         Raises
         ------
         - *AttributeError*: If `self.exp_data` or `program_schedule_df` is None or malformed.
-        - *KeyError*: If `exp_data.exp_var_entries["Num Stimuli"]` is missing or invalid when calculating separator frequency.
-        - *tk.TclError*: If widget creation or grid placement fails.
-        - *TypeError*: If data types in the DataFrame are incompatible with Label text.
+        - *KeyError*: If `exp_data.exp_var_entries["Num Stimuli"]` is missing or invalid when calculating block size.
+        - *tk.TclError*: If widget configuration fails.
         """
-
         df = self.exp_data.program_schedule_df
-        self.header_labels = []
-        self.cell_labels = []
-
-        # Create labels for the column headers
-        for j, col in enumerate(df.columns):
-            header_label = tk.Label(
-                self.stimuli_frame,
-                text=col,
-                bg="light blue",
-                fg="black",
-                font=("Helvetica", 10, "bold"),
-                highlightthickness=2,
-                highlightbackground="dark blue",
+        columns = list(df.columns)
+
+        self.table["columns"] = columns
+
+        cell_font = tkfont.nametofont("TkDefaultFont")
+        heading_font = tkfont.nametofont("TkHeadingFont")
+
+        for col in columns:
+            # measure only the longest string of the column rather than every cell
+            longest = max(df[col].astype(str), key=len, default="")
+            width = max(heading_font.measure(col), cell_font.measure(longest)) + 20
+
+            self.table.heading(col, text=col)
+            self.table.column(col, width=width, minwidth=width, anchor="center", stretch=False)
+
+        for i, row in enumerate(df.itertuples(index=False)):
+            self.table.insert(
+                "", "end", iid=str(i), values=row, tags=(self.block_tag(i),)
             )
-            header_label.grid(row=0, column=j, sticky="nsew", padx=5, pady=2.5)
-            self.header_labels.append(header_label)
-
-        # Get the total number of columns for spanning the separator
-        total_columns = len(df.columns)
-        current_row = 1  # Start at 1 to account for the header row
-
-        # Create cells for each row of data
-        for i, row in enumerate(df.itertuples(index=False), start=1):
-            row_labels = []
-            for j, value in enumerate(row):
-                cell_label = tk.Label(
-                    self.stimuli_frame,
-                    text=value,
-                    bg="white",
-                    fg="black",
-                    font=("Helvetica", 10),
-                    highlightthickness=1,
-                    highlightbackground="black",
-                )
-                cell_label.grid(
-                    row=current_row, column=j, sticky="nsew", padx=5, pady=2.5
-                )
-                row_labels.append(cell_label)
-            self.cell_labels.append(row_labels)
-            current_row += 1  # Move to the next row
-
-            # Insert a horizontal line below every two rows
-            if i % (self.exp_data.exp_var_entries["Num Stimuli"] / 2) == 0:
-                separator_frame = tk.Frame(self.stimuli_frame, height=2, bg="black")
-                separator_frame.grid(
-                    row=current_row,
-                    column=0,
-                    columnspan=total_columns,
-                    sticky="ew",
-                    padx=5,
-                )
-                self.stimuli_frame.grid_rowconfigure(current_row, minsize=2)
-                current_row += (
-                    1  # Increment the current row to account for the separator
-                )
 
-        # Make sure the last separator is not placed outside the data rows
-        if len(df) % 2 == 0:
-            self.stimuli_frame.grid_rowconfigure(current_row - 1, minsize=0)
-        self.stimuli_frame.update_idletasks()
+        self.table.configure(height=min(MAX_VISIBLE_ROWS, len(df)))
+
+        self.populated = True
+
+        if self.current_row is not None:
+            self.update_row_color(self.current_row)
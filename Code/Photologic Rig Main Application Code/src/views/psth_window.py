@@ -0,0 +1,179 @@
+"""
+Defines the LickRatePSTHWindow class, a Tkinter Toplevel window that shows a live peri-stimulus time histogram (PSTH) of the lick rate
+for every stimulus in the experiment, next to the per port `views.rasterized_data_window` raster plots.
+
+Where the raster shows every lick of one port, this view pools licks by stimulus so preference between many stimuli can be judged at
+a glance. The histograms are kept by `models.lick_rate_histogram.LickRateHistogram`, which only bins the newest trial's licks, and are
+painted with blitting by `views.lick_rate_psth.LickRatePSTH`. Like the raster plots, Matplotlib is only imported once the plot is created.
+"""
+
+from __future__ import annotations
+
+import logging
+import tkinter as tk
+from typing import TYPE_CHECKING
+
+from models.lick_rate_histogram import LickRateHistogram
+from views.gui_common import GUIUtils
+
+### Type Hinting###
+from models.experiment_process_data import ExperimentProcessData
+
+if TYPE_CHECKING:
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+    from views.lick_rate_psth import LickRatePSTH
+### Type Hinting###
+
+logger = logging.getLogger()
+
+DEFAULT_BIN_WIDTH_S = 0.5
+"""Bin width used until the user enters another one."""
+
+class LickRatePSTHWindow(tk.Toplevel):
+    """
+    A Toplevel window showing the live lick rate PSTH of every stimulus.
+
+    Attributes
+    ----------
+    - **exp_data** (*ExperimentProcessData*): An instance holding experiment-related data, the program schedule is used to find which
+      stimulus was on each port in each trial and how long trials can last.
+    - **bin_width** (*tk.DoubleVar*): The bin width in seconds entered by the user.
+    - **canvas** (*FigureCanvasTkAgg | None*): The Matplotlib canvas widget embedded in the window. Initialized in `create_plot`.
+    - **psth** (*LickRatePSTH | None*): Draws the histograms. Initialized in `create_plot`.
+
+    Methods
+    -------
+    - `show()`
+        Makes the window visible.
+    - `create_plot()`
+        Creates the figure, canvas, toolbar and histograms for the current schedule.
+    - `update_plot(logical_trial)`
+        Adds the licks of a finished trial to the histograms.
+    - `apply_bin_width()`
+        Rebins the histograms with the entered bin width.
+    """
+
+    def __init__(self, exp_data: ExperimentProcessData) -> None:
+        """
+        Initializes the LickRatePSTHWindow. Sets basic window attributes and creates the bin width controls.
+
+        Parameters
+        ----------
+        - **exp_data** (*ExperimentProcessData*): The data object containing the program schedule and event data.
+        """
+        super().__init__()
+        self.exp_data = exp_data
+        self.event_data = self.exp_data.event_data
+
+        self.protocol("WM_DELETE_WINDOW", lambda: self.withdraw())
+        self.bind("<Control-w>", lambda e: self.withdraw())
+
+        self.title("Lick Rate PSTH")
+
+        self.bin_width = tk.DoubleVar(value=DEFAULT_BIN_WIDTH_S)
+
+        controls = tk.Frame(self)
+        controls.pack(side=tk.TOP, fill=tk.X)
+
+        tk.Label(controls, text="Bin Width (s)", font=("Helvetica", 12)).pack(
+            side=tk.LEFT, padx=5, pady=5
+        )
+        entry = tk.Entry(controls, textvariable=self.bin_width, width=6)
+        entry.pack(side=tk.LEFT, pady=5)
+        entry.bind("<Return>", lambda e: self.apply_bin_width())
+
+        tk.Button(
+            controls, text="Apply", command=self.apply_bin_width, bg="grey"
+        ).pack(side=tk.LEFT, padx=5, pady=5)
+
+        self.container: tk.Frame | None = None
+        self.canvas: FigureCanvasTkAgg | None = None
+        self.psth: LickRatePSTH | None = None
+
+        self.withdraw()
+
+    def show(self):
+        """
+        Unhides the window.
+        """
+        self.deiconify()
+
+    def create_plot(self) -> None:
+        """
+        Creates the Matplotlib figure, canvas and toolbar, and the histograms of the stimuli in the current program schedule.
+
+        The histograms span the longest trial in the schedule (TTC plus sample time). Any plot from a previous experiment is removed.
+        """
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.backends._backend_tk import NavigationToolbar2Tk
+        from matplotlib.figure import Figure
+
+        from views.lick_rate_psth import LickRatePSTH
+
+        if self.container is not None:
+            self.container.destroy()
+
+        schedule = self.exp_data.program_schedule_df
+
+        # stimuli in the order they first appear in the schedule
+        stimuli = list(dict.fromkeys(schedule[["Port 1", "Port 2"]].to_numpy().ravel()))
+        window_s = float((schedule["TTC"] + schedule["SAMPLE"]).max()) / 1000
+
+        bin_width = GUIUtils.safe_tkinter_get(self.bin_width) or DEFAULT_BIN_WIDTH_S
+        if bin_width <= 0:
+            bin_width = DEFAULT_BIN_WIDTH_S
+
+        self.container = tk.Frame(self)
+        self.container.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+
+        # a plain Figure rather than pyplot, so figures are not kept alive by pyplot across program resets
+        fig = Figure()
+        axes = fig.add_subplot()
+        canvas = FigureCanvasTkAgg(fig, self.container)
+
+        canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+
+        toolbar = NavigationToolbar2Tk(canvas, self.container)
+        toolbar.update()
+
+        self.canvas = canvas
+        self.psth = LickRatePSTH(
+            canvas, axes, LickRateHistogram(stimuli, window_s, bin_width)
+        )
+
+    def update_plot(self, logical_trial: int) -> None:
+        """
+        Adds the licks of a finished trial to the histogram of the stimulus on each port.
+
+        Parameters
+        ----------
+        - **logical_trial** (*int*): The zero-based index of the finished trial.
+        """
+        if self.psth is None:
+            return
+
+        schedule = self.exp_data.program_schedule_df
+        licks = self.event_data.get_lick_timestamps(logical_trial, trial_relative=True)
+
+        port_licks = [
+            (schedule.loc[logical_trial, "Port 1"], licks[0]),
+            (schedule.loc[logical_trial, "Port 2"], licks[1]),
+        ]
+        self.psth.add_trial(port_licks)
+
+    def apply_bin_width(self) -> None:
+        """
+        Rebins the histograms with the bin width in the entry, if it is a positive number.
+        """
+        bin_width = GUIUtils.safe_tkinter_get(self.bin_width)
+
+        if bin_width is None or bin_width <= 0:
+            GUIUtils.display_error(
+                "Invalid Bin Width", "The bin width must be a positive number of seconds."
+            )
+            return
+
+        if self.psth is not None:
+            self.psth.set_bin_width(bin_width)
+            logger.info(f"Lick rate PSTH rebinned with {bin_width} s bins.")
@@ -5,17 +5,24 @@ to display lick event data as a raster plot using Matplotlib figures.
 This view provides a visualization of lick timestamps for a specific recording side (e.g., Port 1 or Port 2),
 plotting each lick as a marker against trial number and time within the trial (relative to the first lick).
 It updates as new trial data becomes available.
+
+The licks are drawn by `views.lick_raster.LickRaster`, which paints each new trial with blitting. Matplotlib and that module are
+imported when the plot is first created rather than when this module is imported, so they are not loaded at program launch.
 """
 
+from __future__ import annotations
+
 import tkinter as tk
-from typing import Optional
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.backends._backend_tk import NavigationToolbar2Tk
+from typing import TYPE_CHECKING, Optional
 
 ### Type Hinting###
 from models.experiment_process_data import ExperimentProcessData
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+    from views.lick_raster import LickRaster
 ### Type Hinting###
 
 
@@ -25,7 +32,7 @@ class RasterizedDataWindow(tk.Toplevel):
 
     This window displays lick timestamps for a specific experimental side (passed during
     initialization) against the trial number. Each lick within a trial is plotted
-    as a vertical marker (|). The time axis typically represents the time elapsed since
+    as a vertical tick. The time axis typically represents the time elapsed since
     the first lick in that trial. The plot updates as new lick data arrives
     via the `update_plot` method.
 
@@ -33,14 +40,11 @@ class RasterizedDataWindow(tk.Toplevel):
     ----------
     - **exp_data** (*ExperimentProcessData*): An instance holding experiment-related data,
       including trial parameters (`exp_var_entries`) used for setting Y-axis plot limits.
-    - **color_cycle** (*Colormap*): A Matplotlib colormap instance (`tab10`) used
-      to cycle through colors for plotting data from different trials/updates.
-      In other words, makes it easier to distinguish trials.
-    - **color_index** (*int*): The current index into the `color_cycle`.
     - **canvas** (*FigureCanvasTkAgg | None*): The Matplotlib canvas widget embedded in the
       Tkinter window. Initialized in `create_plot`.
     - **axes** (*Axes | None*): The Matplotlib axes object where the raster
       plot is drawn. Initialized in `create_plot`.
+    - **raster** (*LickRaster | None*): Draws the licks onto `axes`. Initialized in `create_plot`.
 
     Methods
     -------
@@ -49,7 +53,7 @@ class RasterizedDataWindow(tk.Toplevel):
     - `create_plot()`
         Creates the initial Matplotlib figure, axes, canvas, and toolbar. Sets axis limits.
     - `update_plot(lick_times, logical_trial)`
-        Adds lick data for a specific trial to the plot and redraws the canvas.
+        Adds lick data for a specific trial to the plot, painting only the new row.
     """
 
     def __init__(self, side: int, exp_data: ExperimentProcessData) -> None:
@@ -71,11 +75,9 @@ class RasterizedDataWindow(tk.Toplevel):
 
         self.title(f"Side {side} Lick Time Raster Plot")
 
-        # Initialize the color cycle
-        self.color_cycle = cm.get_cmap("tab10", 10)
-
-        # Initialize the color index
-        self.color_index = 0
+        self.canvas: FigureCanvasTkAgg | None = None
+        self.axes: Axes | None = None
+        self.raster: LickRaster | None = None
 
         self.withdraw()
 
@@ -91,19 +93,26 @@ class RasterizedDataWindow(tk.Toplevel):
 
         Sets up a container frame. Initializes the Matplotlib figure and axes.
         Sets the X and Y axis limits based on expected time range and total trial number.
-        Adds labels to the axes and a title to the plot. Plades the figure
-        in a Tkinter canvas and adds the navigation toolbar. Assigns the created
-        components to instance attributes `self.fig`, `self.axes`, and `self.canvas`.
+        Places the figure in a Tkinter canvas and adds the navigation toolbar. Creates the `LickRaster` that draws
+        licks onto the axes.
 
         Raises
         ------
         - *KeyError*: If "Num Trials" is not found in `self.exp_data.exp_var_entries`.
         - *tk.TclError*: If Tkinter widget creation or packing fails.
         """
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.backends._backend_tk import NavigationToolbar2Tk
+        from matplotlib.figure import Figure
+
+        from views.lick_raster import LickRaster
+
         container = tk.Frame(self)
         container.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
-        fig, axes = plt.subplots()
+        # a plain Figure rather than pyplot, so figures are not kept alive by pyplot across program resets
+        fig = Figure()
+        axes = fig.add_subplot()
         canvas = FigureCanvasTkAgg(fig, container)
 
         canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
@@ -118,6 +127,7 @@ class RasterizedDataWindow(tk.Toplevel):
 
         self.canvas = canvas
         self.axes = axes
+        self.raster = LickRaster(canvas, axes)
 
     def update_plot(
         self,
@@ -125,14 +135,11 @@ class RasterizedDataWindow(tk.Toplevel):
         logical_trial: Optional[int] = None,
     ) -> None:
         """
-        Adds lick data for a specific trial to the raster plot and redraws the canvas.
+        Adds lick data for a specific trial to the raster plot.
 
-        Checks if the plot components (`axes`, `canvas`) have been initialized.
-        If `lick_times` data is provided and valid, it calculates the time relative
-        to the first lick in the trial, assigns a color based on the trial index,
-        and plots the lick times as vertical markers ('|') at the corresponding
-        `logical_trial` row using `scatter`. Finally, it redraws the canvas to display
-        the updated plot.
+        Checks if the plot has been initialized. If `lick_times` data is provided and valid, the licks are handed
+        to `LickRaster.add_trial`, which plots them as vertical ticks at the corresponding `logical_trial` row
+        relative to the first lick in the trial, and paints only that row.
 
         Parameters
         ----------
@@ -140,26 +147,8 @@ class RasterizedDataWindow(tk.Toplevel):
           recorded during the trial. If None or empty, the plot is not updated for this trial.
         - **logical_trial** (*Optional[int]*): The zero-based index of the trial corresponding
           to the `lick_times`. Used as the Y-coordinate for plotting. If None, the plot is not updated.
-
-        Raises
-        ------
-        - *TypeError*: If `logical_trial` is not an integer when provided.
-        - *IndexError*: Potentially if `lick_times` is accessed incorrectly (though unlikely with current logic).
         """
-        axes = self.axes
-        canvas = self.canvas
-
-        self.color_index = (self.color_index + 1) % 10
-
-        if lick_times and len(lick_times) > 0:
-            color = [self.color_cycle(self.color_index)]
-
-            # x values for this trial
-            lick_times = [stamp - lick_times[0] for stamp in lick_times]
-
-            # we need a y for each x value (lick timestamp)
-            y_values = [logical_trial] * len(lick_times)
-
-            axes.scatter(lick_times, y_values, marker="|", c=color, s=100)
+        if self.raster is None or logical_trial is None:
+            return
 
-        canvas.draw()
+        self.raster.add_trial(lick_times or [], logical_trial)
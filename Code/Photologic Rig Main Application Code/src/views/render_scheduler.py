@@ -0,0 +1,182 @@
+"""
+This module defines the RenderScheduler class, which batches every pending GUI update into a single refresh at a fixed frame rate.
+
+GUI updates are requested from many places: the state classes of `app_logic` (many of which run in worker threads), the trial end
+updates of the program schedule and plots, and the running clocks. Instead of each of them touching Tkinter directly, they hand a
+callback to the scheduler with `request`. Requests are keyed, so a newer request for the same key replaces an older one that has not been
+drawn yet (e.g. two state changes within one frame only draw the second). Once per frame, on the Tkinter main thread, the scheduler runs
+every pending callback and every periodic callback (such as the clocks), then measures how long the frame took.
+
+`request` only takes a lock and stores a callback, so threads handling experiment data never wait on drawing. The frame rate is set by
+`REFRESH_RATE_HZ` in the `gui_config` section of the rig config.
+"""
+
+import logging
+import threading
+import time
+import tkinter as tk
+from typing import Callable, Hashable
+
+import numpy as np
+
+from rig_config_service import rig_config
+
+logger = logging.getLogger()
+
+GUI_CONFIG = rig_config.section("gui_config")
+
+FRAME_HISTORY = 1024
+"""Number of most recent frame times kept for `frame_stats`."""
+
+
+class RenderScheduler:
+    """
+    Coalesces GUI updates into frames drawn at a fixed rate on the Tkinter main thread.
+
+    Attributes
+    ----------
+    - **root** (*tk.Tk*): The Tkinter root whose `after` loop draws the frames.
+    - **interval_ms** (*int*): Time between frames in milliseconds.
+    - **frames** (*int*): Number of frames that ran at least one callback.
+    - **overruns** (*int*): Number of those frames that took longer than `interval_ms`.
+
+    Methods
+    -------
+    - `start`()
+        Starts drawing frames.
+    - `stop`()
+        Stops drawing frames, pending requests are dropped.
+    - `request`(key, callback)
+        Schedules a callback for the next frame, replacing any pending callback with the same key. Safe to call from any thread.
+    - `set_periodic`(key, callback)
+        Runs a callback every frame until it is removed.
+    - `remove_periodic`(key)
+        Stops running a periodic callback.
+    - `set_rate`(rate_hz)
+        Changes the frame rate, from the next frame on.
+    - `frame_stats`()
+        Returns statistics on how long recent frames took.
+    - `log_frame_stats`()
+        Writes `frame_stats` to the log.
+    """
+
+    def __init__(self, root: tk.Tk, rate_hz: float | None = None):
+        """
+        Parameters
+        ----------
+        - **root** (*tk.Tk*): The Tkinter root, frames are drawn in its mainloop.
+        - **rate_hz** (*float | None, optional*): Frames per second. Defaults to `REFRESH_RATE_HZ` from the rig config.
+        """
+        self.root = root
+        self.set_rate(rate_hz if rate_hz is not None else GUI_CONFIG["REFRESH_RATE_HZ"])
+
+        self._lock = threading.Lock()
+        self._pending: dict[Hashable, Callable[[], None]] = {}
+        self._periodic: dict[Hashable, Callable[[], None]] = {}
+
+        self._frame_times_ms = np.zeros(FRAME_HISTORY, dtype=np.float64)
+        self.frames = 0
+        self.overruns = 0
+
+        self._job: str | None = None
+
+    def start(self) -> None:
+        if self._job is None:
+            self._job = self.root.after(self.interval_ms, self._tick)
+
+    def set_rate(self, rate_hz: float) -> None:
+        # the frame already scheduled keeps its delay, every frame after it uses the new interval
+        self.interval_ms = max(int(1000 / rate_hz), 1)
+
+    def stop(self) -> None:
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+        with self._lock:
+            self._pending.clear()
+
+    def request(self, key: Hashable, callback: Callable[[], None]) -> None:
+        """
+        Schedules `callback` to run in the next frame. If a callback with the same `key` is already waiting, it is replaced, so only
+        the latest state of that part of the GUI is drawn. Use a distinct key (e.g. including the trial number) for updates that must
+        all be drawn.
+
+        Parameters
+        ----------
+        - **key** (*Hashable*): Identifies the part of the GUI the callback draws.
+        - **callback** (*Callable[[], None]*): Draws the update, run on the Tkinter main thread.
+        """
+        with self._lock:
+            self._pending[key] = callback
+
+    def set_periodic(self, key: Hashable, callback: Callable[[], None]) -> None:
+        """
+        Runs `callback` in every frame, e.g. to redraw a running clock, until `remove_periodic` is called with the same key.
+        """
+        with self._lock:
+            self._periodic[key] = callback
+
+    def remove_periodic(self, key: Hashable) -> None:
+        with self._lock:
+            self._periodic.pop(key, None)
+
+    def _tick(self) -> None:
+        """
+        Draws one frame: runs every periodic callback and every pending request, records the frame time and schedules the next frame
+        so frames keep to `interval_ms` regardless of how long this one took.
+        """
+        start = time.perf_counter()
+
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            callbacks = list(self._periodic.items()) + list(pending.items())
+
+        for key, callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                # one failing view should not stop every other view from updating
+                logger.error(f"Error drawing GUI update {key}: {e}")
+
+        frame_ms = (time.perf_counter() - start) * 1000
+
+        if callbacks:
+            self._frame_times_ms[self.frames % FRAME_HISTORY] = frame_ms
+            self.frames += 1
+            if frame_ms > self.interval_ms:
+                self.overruns += 1
+                logger.debug(
+                    f"GUI frame took {frame_ms:.1f} ms (budget {self.interval_ms} ms) drawing {[key for key, _ in callbacks]}"
+                )
+
+        self._job = self.root.after(
+            max(self.interval_ms - int(frame_ms), 1), self._tick
+        )
+
+    def frame_stats(self) -> dict[str, float]:
+        """
+        Returns
+        -------
+        - *dict[str, float]*: The number of frames drawn, the mean, 95th percentile and maximum time of the most recent
+        `FRAME_HISTORY` frames in milliseconds, and the number of frames over budget.
+        """
+        recent = self._frame_times_ms[: min(self.frames, FRAME_HISTORY)]
+        if recent.size == 0:
+            return {"frames": 0, "mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0, "overruns": 0}
+
+        return {
+            "frames": self.frames,
+            "mean_ms": float(recent.mean()),
+            "p95_ms": float(np.percentile(recent, 95)),
+            "max_ms": float(recent.max()),
+            "overruns": self.overruns,
+        }
+
+    def log_frame_stats(self) -> None:
+        stats = self.frame_stats()
+        logger.info(
+            f"GUI frames: {stats['frames']} drawn at {1000 / self.interval_ms:.0f} Hz, frame time mean {stats['mean_ms']:.1f} ms, "
+            f"p95 {stats['p95_ms']:.1f} ms, max {stats['max_ms']:.1f} ms, {stats['overruns']} over budget."
+        )
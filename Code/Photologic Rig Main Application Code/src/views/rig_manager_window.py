@@ -0,0 +1,157 @@
+"""
+This module defines the RigManagerWindow class, the window of `rig_manager` that shows every rig run from this PC in one table.
+
+Each row shows a rig's process, the state and trial of its experiment, and its Arduino link, as published by the rig's program (see
+`rig_status`). The table is refreshed every `REFRESH_INTERVAL_MS` by reading the status files, which is all this window does with the
+rigs while they run, so it never has to wait on one of them. A rig that is running but has not published for `rig_status.STALE_AFTER_S`
+is shown as not responding.
+"""
+
+import logging
+import time
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable
+
+from rig_status import STALE_AFTER_S
+from views.gui_common import GUIUtils
+
+#### USED FOR TYPE HINTS ####
+from rig_manager import RigProcess
+#### USED FOR TYPE HINTS ####
+
+logger = logging.getLogger()
+
+REFRESH_INTERVAL_MS = 1000
+"""How often the table reads the rigs' status files."""
+
+COLUMNS = ("Rig", "Process", "State", "Trial", "Arduino", "Port", "Link Drops", "Updated")
+
+
+class RigManagerWindow(tk.Tk):
+    """
+    The rig manager's main window, a table with one row per rig and buttons to start or stop the selected rig.
+
+    Attributes
+    ----------
+    - **rigs** (*list[RigProcess]*): The rigs being managed.
+    - **request_start** (*Callable[[RigProcess], None]*): Asks `rig_manager` to start a rig.
+    - **rig_table** (*ttk.Treeview*): The table of rigs.
+
+    Methods
+    -------
+    - `refresh`()
+        Updates every row from the rigs' status, then schedules itself again.
+    - `row_values`(rig)
+        Returns the values shown for a rig.
+    - `start_selected`()
+        Starts the selected rig if it is not running.
+    - `stop_selected`()
+        Stops the selected rig after asking for confirmation.
+    """
+
+    def __init__(self, rigs: list[RigProcess], request_start: Callable[[RigProcess], None]) -> None:
+        super().__init__()
+        self.rigs = rigs
+        self.request_start = request_start
+
+        self.title("Samuelsen Lab Photologic Rig Manager")
+        self.bind("<Control-w>", lambda event: self.destroy())
+
+        icon_path = GUIUtils.get_window_icon_path()
+        GUIUtils.set_program_icon(self, icon_path=icon_path)
+
+        self.build_table()
+        self.refresh()
+
+    def build_table(self) -> None:
+        button_frame = tk.Frame(self)
+        button_frame.pack(fill="x")
+
+        for text, command in (
+            ("Start Rig", self.start_selected),
+            ("Stop Rig", self.stop_selected),
+        ):
+            tk.Button(button_frame, text=text, command=command, bg="grey").pack(
+                side=tk.LEFT, padx=5, pady=5
+            )
+
+        self.rig_table = ttk.Treeview(self, show="headings", height=max(len(self.rigs), 4), selectmode="browse")
+        self.rig_table["columns"] = COLUMNS
+        for col in COLUMNS:
+            self.rig_table.heading(col, text=col)
+            self.rig_table.column(col, width=110, anchor="center")
+
+        for rig in self.rigs:
+            self.rig_table.insert("", tk.END, iid=rig.name, values=self.row_values(rig))
+
+        self.rig_table.pack(fill="both", expand=True)
+
+    def refresh(self) -> None:
+        for rig in self.rigs:
+            self.rig_table.item(rig.name, values=self.row_values(rig))
+
+        self.after(REFRESH_INTERVAL_MS, self.refresh)
+
+    def row_values(self, rig: RigProcess) -> tuple:
+        if rig.process is None:
+            return (rig.name, "waiting to start", "", "", "", "", "", "")
+
+        if not rig.is_running():
+            process = f"exited ({rig.process.returncode})"
+        else:
+            process = f"running ({rig.process.pid})"
+
+        status = rig.status()
+        if status is None:
+            state = "STARTING" if rig.is_running() else ""
+            return (rig.name, process, state, "", "", "", "", "")
+
+        age = time.time() - status["updated_at"]
+        state = status.get("state", "STARTING")
+        if status.get("exited"):
+            state = "EXITED"
+        elif rig.is_running() and age > STALE_AFTER_S:
+            state = "NOT RESPONDING"
+
+        trial = ""
+        if "trial" in status:
+            trial = f"{status['trial']} / {status['num_trials']}"
+
+        return (
+            rig.name,
+            process,
+            state,
+            trial,
+            status.get("arduino", ""),
+            status.get("arduino_port") or "",
+            status.get("link_drops", ""),
+            f"{age:.0f} s ago",
+        )
+
+    def selected_rig(self) -> RigProcess | None:
+        selection = self.rig_table.selection()
+        if not selection:
+            return None
+        return next(rig for rig in self.rigs if rig.name == selection[0])
+
+    def start_selected(self) -> None:
+        rig = self.selected_rig()
+        if rig is None or rig.is_running():
+            return
+
+        self.request_start(rig)
+
+    def stop_selected(self) -> None:
+        rig = self.selected_rig()
+        if rig is None or not rig.is_running():
+            return
+
+        status = rig.status() or {}
+        if status.get("state") not in (None, "IDLE", "STOP PROGRAM"):
+            message = f"Rig {rig.name} is running an experiment ({status['state']}). Stop it anyway? Its data will not be saved."
+        else:
+            message = f"Stop rig {rig.name}?"
+
+        if GUIUtils.askyesno("Stop Rig", message):
+            rig.stop()
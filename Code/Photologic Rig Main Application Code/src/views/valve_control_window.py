@@ -9,17 +9,13 @@ allows toggling their state (Open/Closed), and provides a button to move the mot
 """
 
 import tkinter as tk
-import toml
 import numpy as np
 from controllers.arduino_control import ArduinoManager
-import system_config
+from rig_config_service import rig_config
 
 from views.gui_common import GUIUtils
 
-rig_config = system_config.get_rig_config()
-
-with open(rig_config, "r") as f:
-    VALVE_CONFIG = toml.load(f)["valve_config"]
+VALVE_CONFIG = rig_config.section("valve_config")
 
 # pull total valves constant from toml config
 TOTAL_CURRENT_VALVES = VALVE_CONFIG["TOTAL_CURRENT_VALVES"]
@@ -0,0 +1,127 @@
+"""
+This module defines the CalibrationReport class, a Tkinter Toplevel window that displays the outcome of a multi-round calibration
+session run from `views.valve_testing.valve_testing_window`.
+
+It shows a table with one row per calibrated valve, the volume error measured in every round, the final duration and whether the valve
+converged to within the session tolerance. It relies on a `models.calibration_session.CalibrationSession` for the data and
+`views.gui_common.GUIUtils` for window management.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+from models.calibration_session import CalibrationSession
+from views.gui_common import GUIUtils
+
+
+class CalibrationReport(tk.Toplevel):
+    """
+    Implements a Tkinter Toplevel window summarizing a calibration session.
+
+    Attributes
+    ----------
+    - **`session`** (*CalibrationSession*): The session being reported.
+    - **`report_table`** (*ttk.Treeview*): Table of per round errors for each valve.
+
+    Methods
+    -------
+    - `create_interface`()
+        Builds the summary label, report table and close button.
+    """
+
+    def __init__(self, session: CalibrationSession):
+        """
+        Initializes and shows the CalibrationReport window.
+
+        Parameters
+        ----------
+        - **session** (*CalibrationSession*): The finished (or aborted) calibration session to display.
+
+        Raises
+        ------
+        - Propagates exceptions from `GUIUtils` methods during icon setting or window centering.
+        """
+        super().__init__()
+        self.title("CALIBRATION SESSION REPORT")
+        self.bind("<Control-w>", lambda event: self.destroy())
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        self.session = session
+
+        self.create_interface()
+
+        self.update_idletasks()
+        GUIUtils.center_window(self)
+
+        window_icon_path = GUIUtils.get_window_icon_path()
+        GUIUtils.set_program_icon(self, icon_path=window_icon_path)
+
+    def create_interface(self):
+        """
+        Constructs the summary label, the report table and the close button.
+
+        The table has one column per round holding the signed volume error in percent, followed by the final duration and the
+        convergence status of each valve. Valves that converged are highlighted green, the rest red.
+        """
+        session = self.session
+        summary = session.summary()
+        converged = sum(1 for result in summary.values() if result["converged"])
+
+        status = "ABORTED" if session.aborted else "COMPLETE"
+        summary_label = tk.Label(
+            self,
+            text=(
+                f"Session {status}: {converged} of {len(session.valves)} valves within "
+                f"+/-{session.tolerance_pct}% of {session.desired_ul} uL after {len(session.rounds)} round(s)"
+            ),
+            bg="light blue",
+            font=("Helvetica", 18),
+            highlightthickness=1,
+            highlightbackground="dark blue",
+        )
+        summary_label.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+
+        headings = (
+            ["Valve"]
+            + [f"Round {i + 1} Error (%)" for i in range(len(session.rounds))]
+            + ["Final Duration (us)", "Status"]
+        )
+
+        self.report_table = ttk.Treeview(
+            self, columns=headings, show="headings", height=len(session.valves)
+        )
+        for heading in headings:
+            self.report_table.heading(heading, text=heading)
+            self.report_table.column(heading, anchor="center", width=140)
+
+        self.report_table.tag_configure("converged", background="pale green")
+        self.report_table.tag_configure("not_converged", background="tomato")
+
+        for valve in session.valves:
+            errors = []
+            for round_results in session.rounds:
+                result = round_results.get(valve)
+                errors.append(f"{result['error_pct']:+.1f}" if result else "")
+
+            result = summary.get(valve)
+            if result is None:
+                values = [valve] + errors + ["", "Not Tested"]
+                tag = "not_converged"
+            else:
+                values = [valve] + errors + [result["duration"]]
+                if result["converged"]:
+                    values.append("Converged")
+                    tag = "converged"
+                else:
+                    values.append("Not Converged")
+                    tag = "not_converged"
+
+            self.report_table.insert("", "end", values=values, tags=(tag,))
+
+        self.report_table.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
+
+        GUIUtils.create_button(
+            self, "Close", lambda: self.destroy(), "light blue", 2, 0
+        )
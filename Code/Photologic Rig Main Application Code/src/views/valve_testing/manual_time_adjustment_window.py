@@ -4,7 +4,7 @@ responsible for allowing users to view, modify, and save valve open duration
 timings used by the Arduino controller.
 
 It provides an interface to load different timing profiles (default, last used,
-archived), edit individual valve timings (in microseconds), and save the
+and any version from the valve duration history, paged and optionally filtered by valve), edit individual valve timings (in microseconds), and save the
 updated configuration, which also involves archiving the previously active
 timings. It relies on configuration loaded via `system_config` and interacts
 with an `models.arduino_data` object so that the Arduino can 'remember' durations
@@ -13,41 +13,41 @@ over many experiments.
 
 import tkinter as tk
 from tkinter import ttk
+import datetime
 import numpy as np
-import toml
 from models.arduino_data import ArduinoData
-import system_config
+from rig_config_service import rig_config
 import logging
 
 from views.gui_common import GUIUtils
 
 ###TYPE HINTS###
 import numpy.typing as npt
-import datetime
 ###TYPE HINTS###
 
 logger = logging.getLogger()
 
-rig_config = system_config.get_rig_config()
-
-with open(rig_config, "r") as f:
-    VALVE_CONFIG = toml.load(f)["valve_config"]
+VALVE_CONFIG = rig_config.section("valve_config")
 
 # pull total valves constant from toml config
 TOTAL_VALVES = VALVE_CONFIG["TOTAL_CURRENT_VALVES"]
 
 VALVES_PER_SIDE = TOTAL_VALVES // 2
 
+HISTORY_PAGE_SIZE = 25
+"""Number of duration history versions listed in the profile dropdown at once."""
+
 
 class ManualTimeAdjustment(tk.Toplevel):
     """
     Implements a Tkinter Toplevel window for manually adjusting valve open durations.
 
     This window allows users to:
-    - Select and load different valve timing profiles (Default, Last Used, Archives).
+    - Select and load different valve timing profiles (Default, Last Used, any version in the duration history).
+    - Page through the duration history, optionally only versions that changed a given valve.
     - View and edit the open duration (in microseconds) for each valve.
-    - Save the modified timings, which automatically archives the previously
-      'selected' timings and sets the new ones as 'selected'.
+    - Save the modified timings, which automatically records the previously
+      'selected' timings in the duration history and sets the new ones as 'selected'.
 
     It interacts with `models.arduino_data` object (passed during initialization)
     to load and persist timing configurations. Uses `views.gui_common.GUIUtils` for standard
@@ -64,7 +64,10 @@ class ManualTimeAdjustment(tk.Toplevel):
     - **`date_used_label`** (*tk.Label*): Label displaying the timestamp of the currently loaded profile.
     - **`timing_frame`** (*tk.Frame*): Frame containing the grid of labeled entries for valve timings.
     - **`save_changes_bttn`** (*tk.Button*): Button to trigger the save operation.
-    - **`duration_types`** (*dict[str, str]*): Maps user friendly display names in the dropdown to internal keys used for loading profiles.
+    - **`duration_types`** (*dict[str, str | int]*): Maps user friendly display names in the dropdown to internal keys used for loading profiles.
+    TOML profile names are strings, duration history versions are ints.
+    - **`history_page`** (*int*): Page of the duration history currently listed in the dropdown, 0 is the most recent.
+    - **`valve_filter`** (*ttk.Combobox*): Widget restricting the listed history versions to those that changed one valve.
 
     Methods
     -------
@@ -73,13 +76,17 @@ class ManualTimeAdjustment(tk.Toplevel):
     - `update_interface`(...)
         Callback for dropdown selection; loads and displays the chosen timing profile.
     - `create_dropdown`()
-        Creates and configures the Combobox for selecting duration profiles.
+        Creates and configures the Combobox for selecting duration profiles, along with the history paging controls.
+    - `refresh_dropdown`()
+        Lists the current page of the duration history in the profile dropdown.
+    - `change_history_page`(...)
+        Moves to a newer or older page of the duration history.
     - `create_interface`(...)
         Constructs the main GUI layout, including labels, dropdown, entry fields, and buttons.
     - `fill_tk_vars`(...)
         Populates `self.tk_vars` with Tkinter variables based on loaded duration arrays.
     - `write_timing_changes`()
-        Handles archiving old timings, validating user input, and saving new timings in 'selected' profile.
+        Handles archiving old timings to the duration history, validating user input, and saving new timings in 'selected' profile.
     """
 
     def __init__(self, arduino_data: ArduinoData):
@@ -107,6 +114,8 @@ class ManualTimeAdjustment(tk.Toplevel):
         self.tk_vars: dict[str, tk.IntVar] = {}
         self.labelled_entries: list[tuple | None] = [None] * TOTAL_VALVES
 
+        self.history_page = 0
+
         # load default 'selected' dur profile
         side_one, side_two, date_used = self.arduino_data.load_durations()
 
@@ -119,7 +128,9 @@ class ManualTimeAdjustment(tk.Toplevel):
     def show(self):
         """
         Updates the interface with either default 'Last Used' profile data or selected profile from dropdown and makes the window visible.
+        Re-lists the history so versions saved since the window was last shown appear.
         """
+        self.refresh_dropdown()
         self.update_interface(event=None)
         self.deiconify()
 
@@ -128,7 +139,8 @@ class ManualTimeAdjustment(tk.Toplevel):
         Loads and displays the valve timings based on the selected profile from the dropdown.
 
         If `event` is None (e.g., called from `show`), it loads the 'Last Used'
-        profile. Otherwise, it uses the profile selected in the dropdown. Updates
+        profile. Otherwise, it uses the profile selected in the dropdown, reading a single version
+        from the duration history if a history entry was chosen. Updates
         the *tk.IntVar* variables, which refreshes the Entry widgets, and updates
         the 'date last used' label.
 
@@ -139,7 +151,7 @@ class ManualTimeAdjustment(tk.Toplevel):
 
         Raises
         ------
-        - Propagates exceptions from `arduino_data.load_durations()`.
+        - Propagates exceptions from `arduino_data.load_durations()` or `arduino_data.load_history_version()`.
         """
 
         # event is the selection event of the self.combobox. using .get gets the self.duration_type dict key
@@ -149,7 +161,16 @@ class ManualTimeAdjustment(tk.Toplevel):
         else:
             load_durations_key = self.duration_types[f"{event.widget.get()}"]
 
-        side_one, side_two, _ = self.arduino_data.load_durations(load_durations_key)
+        if isinstance(load_durations_key, int):
+            side_one, side_two, date_used = self.arduino_data.load_history_version(
+                load_durations_key
+            )
+        else:
+            side_one, side_two, date_used = self.arduino_data.load_durations(
+                load_durations_key
+            )
+
+        self.date_used_label.configure(text=self.format_date_used(date_used))
 
         # set default durations for side one
         for i, duration in enumerate(side_one):
@@ -162,21 +183,91 @@ class ManualTimeAdjustment(tk.Toplevel):
         """
         Creates the `ttk.Combobox` widget for selecting duration profiles.
 
-        Populates the dropdown with user-friendly names for duration profiles and maps them to keys in
-        `self.duration_types` dict, sets the default selection to 'Last Used',
-        and binds the selection event to `self.update_interface`.
+        The dropdown is placed in a frame next to a valve filter and 'Newer' / 'Older' buttons that page through the duration
+        history. The selection event is bound to `self.update_interface`, and the contents are filled by `refresh_dropdown`.
+        """
+        self.dropdown_frame = tk.Frame(self)
+        self.dropdown_frame.grid(row=1, column=0, sticky="e", padx=10)
+
+        self.valve_filter = ttk.Combobox(
+            self.dropdown_frame,
+            values=["All Valves"] + [f"Valve {i + 1}" for i in range(TOTAL_VALVES)],
+            state="readonly",
+            width=10,
+        )
+        self.valve_filter.current(0)
+        self.valve_filter.grid(row=0, column=0, padx=5)
+        self.valve_filter.bind("<<ComboboxSelected>>", lambda e: self.change_history_page(None))
+
+        self.newer_bttn = tk.Button(
+            self.dropdown_frame,
+            text="< Newer",
+            command=lambda: self.change_history_page(-1),
+        )
+        self.newer_bttn.grid(row=0, column=1)
+
+        self.dropdown = ttk.Combobox(self.dropdown_frame, state="readonly", width=40)
+        self.dropdown.grid(row=0, column=2, padx=5)
+        self.dropdown.bind("<<ComboboxSelected>>", lambda e: self.update_interface(e))
+
+        self.older_bttn = tk.Button(
+            self.dropdown_frame,
+            text="Older >",
+            command=lambda: self.change_history_page(1),
+        )
+        self.older_bttn.grid(row=0, column=3)
+
+        self.refresh_dropdown()
+
+    def refresh_dropdown(self):
+        """
+        Fills the profile dropdown with 'Default', 'Last Used' and the current page of the duration history. Only the history index is
+        consulted here, profiles themselves are read when selected.
         """
         self.duration_types = {
             "Default": "default_durations",
             "Last Used": "selected_durations",
-            "(most recent) Archive 1": "archive_1",
-            "Archive 2": "archive_2",
-            "(oldest) Archive 3": "archive_3",
         }
-        self.dropdown = ttk.Combobox(self, values=list(self.duration_types.keys()))
+
+        history = self.arduino_data.duration_history
+
+        selected_filter = self.valve_filter.get()
+        valve = None
+        if selected_filter != "All Valves":
+            valve = int(selected_filter.split()[1])
+            # the history indexes every stored duration slot (all possible valves per side), while the rig numbers side two
+            # valves directly after the valves currently in use on side one
+            if valve > VALVES_PER_SIDE:
+                valve = valve - VALVES_PER_SIDE + history.valves_per_side
+        entries, total = history.page(self.history_page, HISTORY_PAGE_SIZE, valve)
+
+        for entry in entries:
+            timestamp = datetime.datetime.fromisoformat(entry["timestamp"])
+            label = f"v{entry['version']} - {timestamp.strftime('%Y-%m-%d %I:%M %p')} ({entry['source']})"
+            self.duration_types[label] = entry["version"]
+
+        self.dropdown.configure(values=list(self.duration_types.keys()))
         self.dropdown.current(1)
-        self.dropdown.grid(row=1, column=0, sticky="e", padx=10)
-        self.dropdown.bind("<<ComboboxSelected>>", lambda e: self.update_interface(e))
+
+        self.newer_bttn.configure(state="normal" if self.history_page > 0 else "disabled")
+        has_older = (self.history_page + 1) * HISTORY_PAGE_SIZE < total
+        self.older_bttn.configure(state="normal" if has_older else "disabled")
+
+    def change_history_page(self, step: int | None):
+        """
+        Moves the dropdown to a newer or older page of the duration history.
+
+        Parameters
+        ----------
+        - **step** (*int | None*): -1 for the next newer page, 1 for the next older page, None to return to the newest page (used when
+        the valve filter changes).
+        """
+        if step is None:
+            self.history_page = 0
+        else:
+            self.history_page = max(self.history_page + step, 0)
+
+        self.refresh_dropdown()
 
     def create_interface(self, date_used: datetime.datetime):
         """
@@ -207,13 +298,9 @@ class ManualTimeAdjustment(tk.Toplevel):
 
         warning.grid(row=0, column=0, sticky="nsew", pady=10, padx=10)
 
-        self.create_dropdown()
-
-        formatted_date = date_used.strftime("%B/%d/%Y")
-        formatted_time = date_used.strftime("%I:%M %p")
         self.date_used_label = tk.Label(
             self,
-            text=f"Timing profile created on: {formatted_date} at {formatted_time}",
+            text=self.format_date_used(date_used),
             bg="white",
             fg="black",
             font=("Helvetica", 15),
@@ -222,6 +309,8 @@ class ManualTimeAdjustment(tk.Toplevel):
         )
         self.date_used_label.grid(row=1, column=0, sticky="w", padx=10)
 
+        self.create_dropdown()
+
         self.timing_frame = tk.Frame(
             self, highlightbackground="black", highlightthickness=1
         )
@@ -251,7 +340,7 @@ class ManualTimeAdjustment(tk.Toplevel):
 
         warning = tk.Label(
             self,
-            text="This action will archive the current timing configuration into assets/valve_durations.toml\n and set these new timings to selected timings",
+            text="This action will archive the current timing configuration into the valve duration history\n and set these new timings to selected timings",
             bg="white",
             fg="black",
             font=("Helvetica", 15),
@@ -269,6 +358,15 @@ class ManualTimeAdjustment(tk.Toplevel):
             column=0,
         )[1]
 
+    @staticmethod
+    def format_date_used(date_used: datetime.datetime) -> str:
+        """
+        Formats the creation date of a timing profile for `date_used_label`.
+        """
+        formatted_date = date_used.strftime("%B/%d/%Y")
+        formatted_time = date_used.strftime("%I:%M %p")
+        return f"Timing profile created on: {formatted_date} at {formatted_time}"
+
     def fill_tk_vars(
         self, side_one: npt.NDArray[np.int32], side_two: npt.NDArray[np.int32]
     ):
@@ -307,7 +405,7 @@ class ManualTimeAdjustment(tk.Toplevel):
         """
         side_one, side_two, _ = self.arduino_data.load_durations()
 
-        ## save durations in the oldest valve duration archival location
+        ## save current durations to the duration history
         self.arduino_data.save_durations(side_one, side_two, "archive")
 
         timings = [GUIUtils.safe_tkinter_get(value) for value in self.tk_vars.values()]
@@ -328,4 +426,6 @@ class ManualTimeAdjustment(tk.Toplevel):
             side_two_new[i] = timings[i + 8]
 
         # save new durations in the selected slot of the configuration file
-        self.arduino_data.save_durations(side_one_new, side_two_new, "selected")
+        self.arduino_data.save_durations(
+            side_one_new, side_two_new, "selected", source="manual"
+        )
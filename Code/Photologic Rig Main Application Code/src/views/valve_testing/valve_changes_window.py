@@ -11,8 +11,7 @@ standard widget creation and window management.
 """
 
 import tkinter as tk
-import toml
-import system_config
+from rig_config_service import rig_config
 
 ###TYPE HINTS###
 from typing import Callable
@@ -21,10 +20,7 @@ from typing import Callable
 from views.gui_common import GUIUtils
 
 
-rig_config = system_config.get_rig_config()
-
-with open(rig_config, "r") as f:
-    VALVE_CONFIG = toml.load(f)["valve_config"]
+VALVE_CONFIG = rig_config.section("valve_config")
 
 # pull total valves constant from toml config
 TOTAL_VALVES = VALVE_CONFIG["TOTAL_CURRENT_VALVES"]
@@ -48,6 +44,8 @@ class ValveChanges(tk.Toplevel):
     - **`valve_changes`** (*List[Tuple[int, Tuple[int, int]]]*): A list where each element is a tuple containing the valve number (int)
         and another tuple with (old_duration, new_duration).
     - **`confirm_callback`** (*Callable*): The function to execute when the "Confirm Changes" button is pressed.
+    - **`confidence_bands`** (*dict[int, tuple[int, int]]*): 95% confidence band (lower, upper) of the new duration for each valve whose
+        duration was predicted from a calibration curve.
     - **`valve_frame`** (*tk.Frame*): The main container frame holding the side-by-side valve change displays.
     - **`side_one_valves_frame`** (*tk.Frame*): Frame displaying changes for valves on the first side (e.g., 1-8).
     - **`side_two_valves_frame`** (*tk.Frame*): Frame displaying changes for valves on the second side (e.g., 9-16).
@@ -67,6 +65,7 @@ class ValveChanges(tk.Toplevel):
         self,
         valve_changes: list[tuple[int, tuple[int, int]]],
         confirm_callback: Callable,
+        confidence_bands: dict[int, tuple[int, int]] | None = None,
     ):
         """
         Initializes the ValveChanges confirmation Toplevel window.
@@ -77,6 +76,8 @@ class ValveChanges(tk.Toplevel):
           Each inner tuple has the format `(valve_number, (old_duration_microseconds, new_duration_microseconds))`.
         - **confirm_callback** (*Callable*): The function that should be called if the user confirms the changes.
           This function takes no arguments.
+        - **confidence_bands** (*dict[int, tuple[int, int]] | None, optional*): Maps valve numbers to the (lower, upper) 95% confidence
+          band of their new duration in microseconds. Valves without an entry are shown without a band.
 
         Raises
         ------
@@ -95,6 +96,7 @@ class ValveChanges(tk.Toplevel):
 
         self.valve_changes = valve_changes
         self.confirm_callback = confirm_callback
+        self.confidence_bands = confidence_bands if confidence_bands is not None else {}
 
         self.create_interface()
 
@@ -189,7 +191,8 @@ class ValveChanges(tk.Toplevel):
         Iterates through the `self.valve_changes` list. For each change, it
         determines which side frame (left or right) the valve belongs to and
         creates two labels: one for the valve number and one showing the
-        'From old_duration --> new_duration' information. Labels are placed
+        'From old_duration --> new_duration' information, followed by the confidence band of the
+        new duration when one is available. Labels are placed
         in sequence within the appropriate side frame.
         """
 
@@ -225,9 +228,14 @@ class ValveChanges(tk.Toplevel):
             )
             label.grid(row=row, column=column, padx=10, pady=10, sticky="nsew")
 
+            text = f"From {old_duration} --> {new_duration}"
+            if valve in self.confidence_bands:
+                lower, upper = self.confidence_bands[valve]
+                text += f"\n(95% band {lower} - {upper})"
+
             label = tk.Label(
                 frame,
-                text=f"From {old_duration} --> {new_duration}",
+                text=text,
                 bg="light blue",
                 font=("Helvetica", 24),
                 highlightthickness=1,
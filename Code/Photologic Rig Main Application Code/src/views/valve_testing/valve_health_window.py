@@ -0,0 +1,128 @@
+"""
+This module defines the ValveHealthReport class, a Tkinter Toplevel window that displays the valve health report built by
+`models.valve_health.ValveHealthMonitor` from the calibration measurements and valve duration history.
+
+It shows a table with one row per valve holding its flow and duration drift, measurement scatter and any warnings, highlighting valves
+that are trending out of spec so they can be cleaned or replaced before the next session. It relies on `views.gui_common.GUIUtils` for
+window management.
+"""
+
+from __future__ import annotations
+
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+
+from lazy_imports import lazy_import
+
+from models.valve_health import HORIZON_DAYS
+from views.gui_common import GUIUtils
+
+pd = lazy_import("pandas")
+
+
+class ValveHealthReport(tk.Toplevel):
+    """
+    Implements a Tkinter Toplevel window showing the health of every valve.
+
+    Attributes
+    ----------
+    - **`report`** (*pd.DataFrame*): The report from `ValveHealthMonitor.report`.
+    - **`report_table`** (*ttk.Treeview*): Table of the report, one row per valve.
+
+    Methods
+    -------
+    - `create_interface`()
+        Builds the summary label, report table and close button.
+    """
+
+    def __init__(self, report: pd.DataFrame):
+        """
+        Initializes and shows the ValveHealthReport window.
+
+        Parameters
+        ----------
+        - **report** (*pd.DataFrame*): The valve health report to display.
+
+        Raises
+        ------
+        - Propagates exceptions from `GUIUtils` methods during icon setting or window centering.
+        """
+        super().__init__()
+        self.title("VALVE HEALTH REPORT")
+        self.bind("<Control-w>", lambda event: self.destroy())
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        self.report = report
+
+        self.create_interface()
+
+        self.update_idletasks()
+        GUIUtils.center_window(self)
+
+        window_icon_path = GUIUtils.get_window_icon_path()
+        GUIUtils.set_program_icon(self, icon_path=window_icon_path)
+
+    def create_interface(self):
+        """
+        Constructs the summary label, the report table and the close button.
+
+        Numeric columns are shown to one decimal place, or blank for valves without enough data to fit a trend. Valves with warnings are
+        highlighted red, healthy valves green, and valves without enough data are left white.
+        """
+        report = self.report
+        flagged = int((report["Warnings"] != "").sum())
+
+        summary_label = tk.Label(
+            self,
+            text=(
+                f"{flagged} of {len(report)} valves trending out of spec within the next {HORIZON_DAYS} days"
+                if flagged
+                else f"No valves trending out of spec within the next {HORIZON_DAYS} days"
+            ),
+            bg="light blue",
+            font=("Helvetica", 18),
+            highlightthickness=1,
+            highlightbackground="dark blue",
+        )
+        summary_label.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+
+        headings = list(report.columns)
+
+        self.report_table = ttk.Treeview(
+            self, columns=headings, show="headings", height=len(report)
+        )
+        for heading in headings:
+            self.report_table.heading(heading, text=heading)
+            width = 420 if heading == "Warnings" else 140
+            self.report_table.column(heading, anchor="center", width=width)
+
+        self.report_table.tag_configure("healthy", background="pale green")
+        self.report_table.tag_configure("flagged", background="tomato")
+        self.report_table.tag_configure("no_data", background="white")
+
+        for row in report.itertuples(index=False):
+            values = []
+            for value in row:
+                if isinstance(value, float):
+                    values.append("" if np.isnan(value) else f"{value:.1f}")
+                else:
+                    values.append(value)
+
+            if row.Warnings:
+                tag = "flagged"
+            elif np.isnan(row[4]):
+                tag = "no_data"
+            else:
+                tag = "healthy"
+
+            self.report_table.insert("", "end", values=values, tags=(tag,))
+
+        self.report_table.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
+
+        GUIUtils.create_button(
+            self, "Close", lambda: self.destroy(), "light blue", 2, 0
+        )
@@ -8,8 +8,12 @@ It allows users to:
 - Configure test parameters like desired dispense volume and number of actuations.
 - Initiate automated valve tests, calculating new opening durations based on
   user-provided dispensed volumes.
+- Run multi-round calibration sessions that automatically retest valves until they are within a tolerance of the desired volume.
+- Read dispensed volumes from balances (`controllers.balance_control`) instead of prompting the user, when balances are configured.
+- Pipeline tests so the next valve pair actuates while the user measures the liquid dispensed by the previous pair.
 - Initiate valve test/priming sequences.
 - Manually override and adjust valve timings via a separate window (`ManualTimeAdjustment`).
+- Check every valve for clogging or wear trends across its calibration history (`ValveHealthReport`).
 - View test results and current valve timings in a table format.
 - Confirm or abort automatically calculated timing changes.
 
@@ -29,26 +33,29 @@ import numpy as np
 ### USED FOR TYPE HINTING ###
 import numpy.typing as npt
 
+from collections import deque
 from enum import Enum
 import threading
 import logging
-import toml
+import time
 
-from controllers.arduino_control import ArduinoManager
+from controllers.arduino_control import ArduinoManager, READ_TIMEOUT_S
+from controllers.balance_control import BalanceManager, BalanceError
 from models.arduino_data import ArduinoData
+from models.calibration_session import CalibrationSession
+from models.valve_health import ValveHealthMonitor
 from views.gui_common import GUIUtils
+from views.valve_testing.calibration_report_window import CalibrationReport
 from views.valve_testing.manual_time_adjustment_window import ManualTimeAdjustment
+from views.valve_testing.valve_health_window import ValveHealthReport
 from views.valve_testing.valve_changes_window import ValveChanges
-import system_config
+from rig_config_service import rig_config
 
 
 logger = logging.getLogger()
 """Get the logger in use for the app."""
 
-rig_config = system_config.get_rig_config()
-
-with open(rig_config, "r") as f:
-    VALVE_CONFIG = toml.load(f)["valve_config"]
+VALVE_CONFIG = rig_config.section("valve_config")
 
 # pull total valves constant from toml config
 TOTAL_VALVES = VALVE_CONFIG["TOTAL_CURRENT_VALVES"]
@@ -89,6 +96,23 @@ class ValveTestWindow(tk.Toplevel):
     - **`desired_volume`** (*tk.DoubleVar*): Tkinter variable storing the target volume (in microliters) per actuation for automatic duration calculation.
     - **`actuations`** (*tk.IntVar*): Tkinter variable storing the number of times each valve should be actuated during a test or prime sequence.
     - **`ml_dispensed`** (*list[tuple[int, float]]*): Stores tuples of (valve_number, dispensed_volume_ml) entered by the user during a test.
+    - **`session_mode`** (*tk.BooleanVar*): Whether starting a test starts a multi-round calibration session.
+    - **`tolerance_pct`** (*tk.DoubleVar*): Allowed error, in percent of the desired volume, for a valve to be considered calibrated in a session.
+    - **`max_rounds`** (*tk.IntVar*): Maximum number of test rounds run by a calibration session.
+    - **`calibration_session`** (*CalibrationSession | None*): The calibration session in progress, None if no session is running.
+    - **`balances`** (*BalanceManager | None*): Balances that weigh dispensed liquid during tests. None if balances are disabled in the rig config.
+    - **`balance_recorded_pairs`** (*set[int]*): Pair numbers of the current test whose volumes were read from the balances. Any other pair falls
+    back to manual entry in `take_input`.
+    - **`test_actuations`** (*int*): Actuations per valve of the running test, captured when it starts. Used by `run_test` and when the
+    test's results are recorded, so editing the actuations field during a test has no effect on them.
+    - **`pipeline_mode`** (*tk.BooleanVar*): Whether tests start the next pair as soon as the user has collected the previous pair's liquid,
+    instead of after its volumes are entered.
+    - **`pipelined_test`** (*bool*): Whether the running test is pipelined. Pipelining is not used with balances, which weigh each pair in place.
+    - **`prompt_queue`** (*deque[tuple[str, int]]*): Pending ("collect" | "measure", pair number) prompts of a pipelined test, shown one at a time.
+    - **`prompt_open`** (*bool*): True while a pipelined test prompt is on screen, so a pair finishing meanwhile is queued instead of
+    opening a second dialog on top of it.
+    - **`test_reported_complete`** (*bool*): True once the Arduino has reported the final pair of a pipelined test.
+    - **`test_started_at`** (*float*): perf_counter time the running test started, used to log its total duration.
     - **`valve_buttons`** (*list[tk.Button | None]*): List holding the Tkinter Button widgets for each valve selection.
     - **`valve_test_button`** (*tk.Button | None*): The main button used to start/abort tests or start/stop priming.
     - **`table_entries`** (*list[str | None]*): List holding the item IDs for each row in the ttk.Treeview table, used for modifying/hiding/showing specific rows.
@@ -111,6 +135,8 @@ class ValveTestWindow(tk.Toplevel):
         Configures basic window properties like title, key bindings, and icon.
     - `show`()
         Makes the window visible (deiconifies).
+    - `destroy`()
+        Stops the test listener thread and closes the balances before destroying the window.
     - `switch_window_mode`()
         Toggles the window between Testing and Priming modes, adjusting UI elements accordingly.
     - `create_interface`()
@@ -127,6 +153,8 @@ class ValveTestWindow(tk.Toplevel):
         Updates the entire valve table, showing/hiding rows based on selections and refreshing currently loaded durations.
     - `toggle_valve_button`(...)
         Handles clicks on valve selection buttons, updating their appearance and the `valve_selections` array.
+    - `show_health_report`()
+        Computes the drift of every valve across the calibration history, logs it and opens the `ValveHealthReport` window.
     - `verify_variables`(...)
         Reads verification data back from Arduino to confirm test parameters were received correctly.
     - `verify_schedule`(...)
@@ -135,16 +163,37 @@ class ValveTestWindow(tk.Toplevel):
         Sends the command, parameters (schedule lengths, actuations), and valve schedule to the Arduino. Handles mode-specific commands and confirmations.
     - `stop_priming`()
         Sends a command to the Arduino to stop an ongoing priming sequence.
+    - `valves_in_pair`(...)
+        Returns the 1-indexed valves tested in a given test pair.
+    - `record_balance_readings`(...)
+        Reads the volumes dispensed by a completed test pair from the balances (runs on the `run_test` thread).
     - `take_input`(...)
-        Prompts the user (via simpledialog) to enter the dispensed volume for a completed valve test pair. Sends confirmation back to Arduino.
+        Prompts the user (via simpledialog) to enter the dispensed volume for a completed valve test pair, unless the balances already recorded
+        it. Sends confirmation back to Arduino.
+    - `queue_prompt`(...)
+        Queues a collect or measure prompt of a pipelined test.
+    - `process_prompt_queue`()
+        Shows queued pipelined test prompts one at a time, starting the next pair as soon as the previous pair's liquid is collected.
     - `run_test`()
         Runs in a separate thread to listen for messages from the Arduino during a test, triggering events for input prompts or completion.
     - `abort_test`()
         Sends a command to the Arduino to abort the current test and stops the listener thread.
     - `testing_complete`(...)
         Handles the event triggered when the Arduino signals the end of the entire test sequence. Initiates duration updates.
+    - `finish_test`()
+        Resets the test state once every volume has been entered and processes the results.
+    - `collect_measurements`(...)
+        Pairs each result in `ml_dispensed` with the duration it was tested at.
+    - `calculate_new_durations`(...)
+        Records test results in the calibration model and calculates the new duration of each tested valve.
     - `auto_update_durations`()
         Calculates new valve durations based on test results (`ml_dispensed`) and opens the `ValveChanges` confirmation window.
+    - `continue_calibration_session`()
+        Records a session round, applies new durations to out of tolerance valves and starts the next round if needed.
+    - `finish_calibration_session`()
+        Ends the calibration session, logging and displaying its report.
+    - `abort_calibration_session`()
+        Aborts the calibration session in progress, if there is one.
     - `confirm_valve_changes`(...)
         Callback function executed if the user confirms changes in the `ValveChanges` window. Saves new durations and archives old ones via `ArduinoData`.
     """
@@ -179,6 +228,30 @@ class ValveTestWindow(tk.Toplevel):
 
         self.ml_dispensed: list[tuple[int, float]] = []
 
+        self.session_mode: tk.BooleanVar = tk.BooleanVar(value=False)
+        self.tolerance_pct: tk.DoubleVar = tk.DoubleVar(value=5.0)
+        self.max_rounds: tk.IntVar = tk.IntVar(value=4)
+        self.calibration_session: CalibrationSession | None = None
+
+        self.balance_recorded_pairs: set[int] = set()
+        self.test_actuations: int = 0
+
+        self.pipeline_mode: tk.BooleanVar = tk.BooleanVar(value=False)
+        self.pipelined_test: bool = False
+        self.prompt_queue: deque[tuple[str, int]] = deque()
+        self.prompt_open: bool = False
+        self.test_reported_complete: bool = False
+        self.test_started_at: float = 0.0
+        try:
+            self.balances: BalanceManager | None = BalanceManager.from_config(
+                VALVES_PER_SIDE
+            )
+        except BalanceError as e:
+            self.balances = None
+            msg = f"{e}. Dispensed volumes will need to be entered manually."
+            GUIUtils.display_error("BALANCE NOT FOUND", msg)
+            logger.error(msg)
+
         self.valve_buttons: list[tk.Button | None] = [None] * TOTAL_VALVES
 
         self.valve_test_button: tk.Button | None = None
@@ -194,6 +267,9 @@ class ValveTestWindow(tk.Toplevel):
 
         self.stop_event: threading.Event = threading.Event()
 
+        # perf_counter time the Arduino reported each pair complete, used to measure how long the user waits for the prompt
+        self.pair_completed_at: dict[int, float] = {}
+
         self.create_interface()
 
         # hide main window for now until we deliberately enter this window.
@@ -237,6 +313,19 @@ class ValveTestWindow(tk.Toplevel):
         """
         self.deiconify()
 
+    def destroy(self) -> None:
+        """
+        Stops the `run_test` listener thread and closes the balances before destroying the window. A warm reset rebuilds this window, and the
+        rebuilt window could not reopen serial balances that were still held open by this one.
+        """
+        self.stop_event.set()
+
+        if self.balances is not None:
+            self.balances.close()
+            self.balances = None
+
+        super().destroy()
+
     def switch_window_mode(self) -> None:
         """
         Toggles the window's operational mode between Testing and Priming.
@@ -356,6 +445,8 @@ class ValveTestWindow(tk.Toplevel):
         )
         entry.grid(row=1, sticky="nsew", pady=5, ipady=14)
 
+        self.create_session_controls()
+
         # create another new frame to contain the amount of times each
         # valve should actuate label and frame
         frame = tk.Frame(self)
@@ -420,12 +511,60 @@ class ValveTestWindow(tk.Toplevel):
         self.update_idletasks()
         GUIUtils.center_window(self)
 
+    def create_session_controls(self) -> None:
+        """
+        Creates the calibration session controls below the desired volume entry: a checkbox enabling session mode, entries for the
+        tolerance and the maximum number of rounds, and a checkbox enabling pipelined tests.
+        """
+        session_frame = tk.Frame(
+            self.dispensed_vol_frame, highlightthickness=1, highlightbackground="black"
+        )
+        session_frame.grid(row=2, sticky="nsew", pady=5)
+
+        for i in range(5):
+            session_frame.grid_columnconfigure(i, weight=1)
+
+        tk.Checkbutton(
+            session_frame,
+            text="Repeat Until Within Tolerance",
+            variable=self.session_mode,
+            font=("Helvetica", 16),
+        ).grid(row=0, column=0, sticky="w", padx=5)
+
+        tk.Label(session_frame, text="Tolerance (%)", font=("Helvetica", 16)).grid(
+            row=0, column=1, sticky="e"
+        )
+        tk.Entry(
+            session_frame,
+            textvariable=self.tolerance_pct,
+            font=("Helvetica", 16),
+            width=6,
+        ).grid(row=0, column=2, sticky="w", padx=5)
+
+        tk.Label(session_frame, text="Max Rounds", font=("Helvetica", 16)).grid(
+            row=0, column=3, sticky="e"
+        )
+        tk.Entry(
+            session_frame,
+            textvariable=self.max_rounds,
+            font=("Helvetica", 16),
+            width=4,
+        ).grid(row=0, column=4, sticky="w", padx=5)
+
+        tk.Checkbutton(
+            session_frame,
+            text="Test Next Pair While Measuring",
+            variable=self.pipeline_mode,
+            font=("Helvetica", 16),
+        ).grid(row=1, column=0, columnspan=5, sticky="w", padx=5)
+
     def start_testing_toggle(self) -> None:
         """
         Handles the action of the main button when in Testing mode.
 
         If a test is running, it calls `abort_test()` and updates the button appearance.
-        If no test is running, it calls `send_schedules()` to initiate a new test.
+        If no test is running, it calls `send_schedules()` to initiate a new test, first starting a
+        `CalibrationSession` if session mode is enabled.
         """
 
         if self.test_running:
@@ -433,6 +572,23 @@ class ValveTestWindow(tk.Toplevel):
                 self.valve_test_button.configure(text="Start Testing", bg="green")
             self.abort_test()
         else:
+            if self.session_mode.get():
+                tolerance = GUIUtils.safe_tkinter_get(self.tolerance_pct)
+                max_rounds = GUIUtils.safe_tkinter_get(self.max_rounds)
+                if not tolerance or not max_rounds or tolerance <= 0 or max_rounds <= 0:
+                    GUIUtils.display_error(
+                        "INVALID SESSION SETTINGS",
+                        "Tolerance and max rounds must both be greater than zero to run a calibration session.",
+                    )
+                    return
+
+                selected = self.valve_selections[self.valve_selections != 0]
+                self.calibration_session = CalibrationSession(
+                    self.desired_volume.get(),
+                    tolerance,
+                    max_rounds,
+                    selected.tolist(),
+                )
             self.send_schedules()
 
     def create_buttons(self) -> None:
@@ -522,6 +678,17 @@ class ValveTestWindow(tk.Toplevel):
 
         button.grid(row=0, sticky="e")
 
+        health_button = tk.Button(
+            self.valve_table_frame,
+            text="Valve Health Report",
+            command=lambda: self.show_health_report(),
+            bg="light blue",
+            highlightbackground="black",
+            highlightthickness=1,
+        )
+
+        health_button.grid(row=0, sticky="w")
+
         # Configure the columns
         for col in self.valve_table["columns"]:
             self.valve_table.heading(col, text=col)
@@ -632,12 +799,27 @@ class ValveTestWindow(tk.Toplevel):
             self.valve_selections[valve_num] = 0
         self.update_table_entries()
 
+    def show_health_report(self) -> None:
+        """
+        Builds a `ValveHealthMonitor` report from every stored calibration measurement and duration profile, writes it to the log and
+        displays it in a `ValveHealthReport` window.
+        """
+        monitor = ValveHealthMonitor(
+            self.arduino_data.duration_history, self.arduino_data.calibration_model
+        )
+        report = monitor.report()
+
+        for line in monitor.report_lines(report):
+            logger.info(line)
+
+        ValveHealthReport(report)
+
     def verify_variables(self, original_data: bytes) -> bool:
         """
         Verifies that the Arduino correctly received the test/prime parameters.
 
-        Waits for and reads back the schedule lengths and actuation count echoed
-        by the Arduino. Compares the received bytes with the originally sent data.
+        Waits (without spinning, see `ArduinoManager.read_exact`) for and reads back the schedule lengths and actuation count echoed
+        by the Arduino. Compares the received bytes with the originally sent data. A timeout counts as a mismatch.
 
         Parameters
         ----------
@@ -648,24 +830,11 @@ class ValveTestWindow(tk.Toplevel):
         - *bool*: `True` if the received data matches the original data, `False` otherwise (logs error and shows message box on mismatch).
         """
         # wait until all data is on the wire ready to be read (4 bytes),
-        # then read it all in quick succession
-        if self.arduino_controller.arduino is None:
-            msg = "====INCORRECT SCHEDULE DETECTED, TRY AGAIN===="
-            GUIUtils.display_error("TRANSMISSION ERROR", msg)
-            logger.error(msg)
-            return False
-
-        while self.arduino_controller.arduino.in_waiting < 4:
-            pass
-
-        ver_len_sched_sd_one = self.arduino_controller.arduino.read()
-        ver_len_sched_sd_two = self.arduino_controller.arduino.read()
-
-        ver_valve_act_time = self.arduino_controller.arduino.read(2)
-
-        verification_data = (
-            ver_len_sched_sd_one + ver_len_sched_sd_two + ver_valve_act_time
+        # sched len side one, sched len side two, then the 2 byte actuation count
+        verification_data = self.arduino_controller.read_exact(
+            4, timeout=READ_TIMEOUT_S
         )
+
         if verification_data == original_data:
             logger.info("====VERIFIED TEST VARIABLES====")
             return True
@@ -694,22 +863,16 @@ class ValveTestWindow(tk.Toplevel):
         -------
         - *bool*: `True` if the received schedule matches the sent schedule, `False` otherwise (logs error and shows message box on mismatch).
         """
-        # np array used for verification later
-        received_sched = np.zeros((len_sched,), dtype=np.int8)
+        data = self.arduino_controller.read_exact(len_sched, timeout=READ_TIMEOUT_S)
 
-        if self.arduino_controller.arduino is None:
-            msg = "====INCORRECT SCHEDULE DETECTED, TRY AGAIN===="
+        if data is None:
+            msg = "====NO SCHEDULE RECEIVED FROM ARDUINO, TRY AGAIN===="
             GUIUtils.display_error("TRANSMISSION ERROR", msg)
             logger.error(msg)
             return False
 
-        while self.arduino_controller.arduino.in_waiting < len_sched:
-            pass
-
-        for i in range(len_sched):
-            received_sched[i] = int.from_bytes(
-                self.arduino_controller.arduino.read(), byteorder="little", signed=False
-            )
+        # np array used for verification
+        received_sched = np.frombuffer(data, dtype=np.int8)
 
         if np.array_equal(received_sched, sent_schedule):
             logger.info(f"===TESTING SCHEDULE VERIFIED as ==> {received_sched}===")
@@ -764,6 +927,17 @@ class ValveTestWindow(tk.Toplevel):
 
         self.arduino_controller.send_valve_durations()
         if self.window_mode == WindowMode.TESTING:
+            # results are collected per test, don't carry over the previous test's volumes
+            self.ml_dispensed = []
+            self.balance_recorded_pairs = set()
+            self.pair_completed_at = {}
+
+            # balances weigh each pair where it was dispensed, so the next pair cannot run on top of it
+            self.pipelined_test = self.pipeline_mode.get() and self.balances is None
+            self.prompt_queue.clear()
+            self.test_reported_complete = False
+            self.test_actuations = int(valve_acuations)
+
             ###====SENDING TEST COMMAND====###
             command = "TEST VOL\n".encode("utf-8")
             self.arduino_controller.send_command(command)
@@ -782,8 +956,9 @@ class ValveTestWindow(tk.Toplevel):
         )
         self.arduino_controller.send_command(data_bytes)
 
-        # verify the data
+        # verify the data. a session cannot go on without its test, so it ends here and the next test starts fresh
         if not self.verify_variables(data_bytes):
+            self.abort_calibration_session()
             return
 
         ###====SENDING SCHEDULE====###
@@ -791,6 +966,7 @@ class ValveTestWindow(tk.Toplevel):
         self.arduino_controller.send_command(sched_data_bytes)
 
         if not self.verify_schedule(len_sched, schedule):
+            self.abort_calibration_session()
             return
 
         schedule += 1
@@ -799,10 +975,18 @@ class ValveTestWindow(tk.Toplevel):
         if self.window_mode == WindowMode.TESTING:
             ####### ARDUINO HALTS HERE UNTIL THE GO-AHEAD IS GIVEN #######
             # inc each sched element by one so that it is 1-indexes and matches the valve labels
-            test_confirmed = GUIUtils.askyesno(
-                "CONFIRM THE TEST SCHEDULE",
-                f"Valves {valves}, will be tested. Review the test table to confirm schedule and timings. Each valve will be actuated {valve_acuations} times. Ok to begin?",
-            )
+            session = self.calibration_session
+            if session is not None and session.round_number > 1:
+                # the user confirmed the session when it started, later rounds run on their own
+                test_confirmed = True
+                logger.info(
+                    f"Calibration session round {session.round_number} retesting valves {valves}"
+                )
+            else:
+                test_confirmed = GUIUtils.askyesno(
+                    "CONFIRM THE TEST SCHEDULE",
+                    f"Valves {valves}, will be tested. Review the test table to confirm schedule and timings. Each valve will be actuated {valve_acuations} times. Ok to begin?",
+                )
 
             ### include section to manually modify timings
             if test_confirmed:
@@ -848,6 +1032,68 @@ class ValveTestWindow(tk.Toplevel):
         stop = np.int8(1).tobytes()
         self.arduino_controller.send_command(command=stop)
 
+    def valves_in_pair(self, pair_number: int) -> list[int]:
+        """
+        Decides which valves were tested in a test pair. Pairs run one valve from each side at the same time until one side runs
+        out of valves to test.
+
+        Parameters
+        ----------
+        - **pair_number** (*int*): The 0-indexed pair number reported by the Arduino.
+
+        Returns
+        -------
+        - *list[int]*: The 1-indexed valve numbers tested in the pair, side one first.
+        """
+        # decide how many valves were tested last. if 0 we will not arrive
+        # here so we need not test for this.
+        if pair_number < len(self.side_one_tests) and pair_number < len(
+            self.side_two_tests
+        ):
+            return [
+                self.side_one_tests[pair_number],
+                self.side_two_tests[pair_number],
+            ]
+        elif pair_number < len(self.side_one_tests):
+            return [
+                self.side_one_tests[pair_number],
+            ]
+        else:
+            return [
+                self.side_two_tests[pair_number],
+            ]
+
+    def record_balance_readings(self, pair_number: int) -> None:
+        """
+        Weighs the liquid dispensed by each valve in a completed test pair and stores the volumes in `self.ml_dispensed`. Runs on the
+        `run_test` thread so waiting for the balances to settle never blocks the GUI. If a balance fails, the pair is left for
+        `take_input` to ask the user for instead.
+
+        Parameters
+        ----------
+        - **pair_number** (*int*): The 0-indexed pair number reported by the Arduino.
+        """
+        side_one, side_two, _ = self.arduino_data.load_durations()
+
+        readings = []
+        try:
+            for valve in self.valves_in_pair(pair_number):
+                if valve > VALVES_PER_SIDE:
+                    duration = side_two[(valve - 1) - VALVES_PER_SIDE]
+                else:
+                    duration = side_one[valve - 1]
+
+                dispensed_ml = self.balances.measure_dispensed(
+                    valve, int(duration), self.test_actuations
+                )
+                readings.append((valve, dispensed_ml))
+        except BalanceError as e:
+            logger.error(f"{e}. Falling back to manual entry for pair {pair_number}.")
+            return
+
+        self.ml_dispensed.extend(readings)
+        self.balance_recorded_pairs.add(pair_number)
+
     def take_input(
         self, event: tk.Event | None, pair_num_override: int | None = None
     ) -> None:
@@ -857,7 +1103,8 @@ class ValveTestWindow(tk.Toplevel):
         Determines which valve(s) were just tested based on the pair number received
         from the Arduino (via the event state or override). Uses `simpledialog.askfloat`
         to get the dispensed volume (in mL) for each valve in the pair. Stores the
-        results in `self.ml_dispensed`.
+        results in `self.ml_dispensed`. Pairs already weighed by `record_balance_readings` are not prompted for. In a pipelined test the
+        pair is handed to `queue_prompt` instead.
 
         Sends a byte back to the Arduino to instruct if further pairs will be tested or if this is the final iteration,
         (1 if via event, 0 if via override/final pair).
@@ -875,23 +1122,23 @@ class ValveTestWindow(tk.Toplevel):
         else:
             pair_number = pair_num_override
 
-        # decide how many valves were tested last. if 0 we will not arrive
-        # here so we need not test for this.
-        if pair_number < len(self.side_one_tests) and pair_number < len(
-            self.side_two_tests
-        ):
-            valves_tested = [
-                self.side_one_tests[pair_number],
-                self.side_two_tests[pair_number],
-            ]
-        elif pair_number < len(self.side_one_tests):
-            valves_tested = [
-                self.side_one_tests[pair_number],
-            ]
-        else:
-            valves_tested = [
-                self.side_two_tests[pair_number],
-            ]
+        if self.pipelined_test:
+            # the Arduino waits for the liquid to be collected, measuring happens while the next pair runs
+            self.queue_prompt("collect", pair_number)
+            return
+
+        valves_tested = self.valves_in_pair(pair_number)
+
+        # the balances already weighed this pair on the listener thread
+        if pair_number in self.balance_recorded_pairs:
+            valves_tested = []
+
+        completed_at = self.pair_completed_at.pop(pair_number, None)
+        if valves_tested and completed_at is not None:
+            latency_ms = (time.perf_counter() - completed_at) * 1000
+            logger.info(
+                f"Pair {pair_number} prompt shown {latency_ms:.1f} ms after the Arduino reported it complete."
+            )
 
         # for each test that we ran store the amount dispensed or abort
         for valve in valves_tested:
@@ -908,16 +1155,91 @@ class ValveTestWindow(tk.Toplevel):
         else:
             self.arduino_controller.send_command(np.int8(1).tobytes())
 
+    def queue_prompt(self, kind: str, pair_number: int) -> None:
+        """
+        Queues a prompt of a pipelined test and shows it once no other prompt is open. Collect prompts go to the front of the queue
+        because the Arduino is idle until the liquid is collected, measure prompts go to the back.
+
+        Parameters
+        ----------
+        - **kind** (*str*): "collect" to ask the user to collect a finished pair's liquid, or "measure" to ask for its volumes.
+        - **pair_number** (*int*): The 0-indexed pair number reported by the Arduino.
+        """
+        if kind == "collect":
+            self.prompt_queue.appendleft((kind, pair_number))
+        else:
+            self.prompt_queue.append((kind, pair_number))
+
+        # if a prompt is open the loop in process_prompt_queue picks this up when it closes
+        if not self.prompt_open:
+            self.after_idle(self.process_prompt_queue)
+
+    def process_prompt_queue(self) -> None:
+        """
+        Shows the queued prompts of a pipelined test one at a time.
+
+        For a collect prompt the user is asked to collect the finished pair's liquid, then the continue byte is sent right away so the
+        Arduino starts the next pair, and a measure prompt is queued for the collected pair. A measure prompt asks for the volume
+        dispensed by each valve of a pair while the Arduino actuates the next one. Once the final pair has been reported and measured
+        the test is finished with `finish_test`. Cancelling any prompt aborts the test.
+        """
+        if self.prompt_open:
+            return
+
+        self.prompt_open = True
+        try:
+            while self.prompt_queue and self.test_running:
+                kind, pair_number = self.prompt_queue.popleft()
+                valves = self.valves_in_pair(pair_number)
+
+                if kind == "collect":
+                    completed_at = self.pair_completed_at.pop(pair_number, None)
+                    if completed_at is not None:
+                        latency_ms = (time.perf_counter() - completed_at) * 1000
+                        logger.info(
+                            f"Pair {pair_number} prompt shown {latency_ms:.1f} ms after the Arduino reported it complete."
+                        )
+
+                    collected = GUIUtils.askyesno(
+                        "COLLECT DISPENSED LIQUID",
+                        f"Valves {', '.join(str(valve) for valve in valves)} finished. Collect their liquid and set up for the next pair, "
+                        "you will be asked for the amounts while the next pair runs. Ok to continue?",
+                    )
+                    if not collected:
+                        self.abort_test()
+                        return
+
+                    self.arduino_controller.send_command(np.int8(1).tobytes())
+                    self.prompt_queue.append(("measure", pair_number))
+                    continue
+
+                for valve in valves:
+                    response = simpledialog.askfloat(
+                        "INPUT AMOUNT DISPENSED",
+                        f"Please input the amount of liquid dispensed for the test of valve {valve}",
+                    )
+                    if response is None:
+                        self.abort_test()
+                        return
+                    self.ml_dispensed.append((valve, response))
+        finally:
+            self.prompt_open = False
+
+        if self.test_running and self.test_reported_complete and not self.prompt_queue:
+            self.finish_test()
+
     def run_test(self) -> None:
         """
         Listens for messages from the Arduino during an active test sequence (runs in a background thread).
 
-        Sends the initial 'start test' command byte to the Arduino. Enters a loop
-        that continues as long as `self.test_running` is True and `self.stop_event`
-        is not set. Checks for incoming data from the Arduino. Reads bytes indicating
-        if more tests remain and the number of the just-completed pair. Generates
+        Tares the balances if they are configured, then sends the initial 'start test' command byte to the Arduino. Each pass of the
+        loop blocks in `ArduinoManager.read_exact` until the Arduino sends its two byte pair report (whether more tests remain and the
+        number of the just-completed pair), so the thread sleeps between pairs instead of spinning on the port. If balances are
+        configured the pair is weighed here with `record_balance_readings` before the GUI is notified. Generates
         custom Tkinter events (`<<event1>>` for input dispensed liquid prompt, `<<event0>>` for test completion)
         to communicate back to the main GUI thread safely. Updates the main button state to 'ABORT TESTING'.
+
+        The thread exits after the final pair is reported, or when `abort_test` sets `self.stop_event` and cancels the blocked read.
         """
         if self.stop_event.is_set():
             self.stop_event.clear()
@@ -926,32 +1248,44 @@ class ValveTestWindow(tk.Toplevel):
             self.valve_test_button.configure(text="ABORT TESTING", bg="red")
 
         self.test_running = True
+        self.test_started_at = time.perf_counter()
+
+        if self.balances is not None:
+            try:
+                self.balances.tare_all()
+            except BalanceError as e:
+                logger.error(f"{e}. Dispensed volumes will need to be entered manually.")
+
         ###====SENDING BEGIN TEST COMMAND====###
         command = np.int8(1).tobytes()
         self.arduino_controller.send_command(command)
 
         while self.test_running:
-            # if stop event, shut down the thread
-            if self.stop_event.is_set():
+            # a pair of valves can take minutes to actuate, so wait as long as it takes
+            report = self.arduino_controller.read_exact(2, cancel_event=self.stop_event)
+
+            # None means the test was aborted (or the port failed), shut down the thread
+            if report is None:
                 break
-            if self.arduino_controller.arduino.in_waiting > 0:
-                remaining_tests = self.arduino_controller.arduino.read()
-                pair_number = int.from_bytes(
-                    self.arduino_controller.arduino.read(),
-                    byteorder="little",
-                    signed=False,
-                )
 
-                if remaining_tests == np.int8(1).tobytes():
-                    self.event_generate("<<event1>>", when="tail", state=pair_number)
-                if remaining_tests == np.int8(0).tobytes():
-                    self.event_generate("<<event0>>", when="tail", state=pair_number)
+            remaining_tests = report[0]
+            pair_number = report[1]
+            self.pair_completed_at[pair_number] = time.perf_counter()
+
+            if self.balances is not None:
+                self.record_balance_readings(pair_number)
+
+            if remaining_tests == 1:
+                self.event_generate("<<event1>>", when="tail", state=pair_number)
+            else:
+                self.event_generate("<<event0>>", when="tail", state=pair_number)
+                break
 
     def abort_test(self) -> None:
         """
         Aborts an ongoing test sequence.
 
-        Sets the `self.stop_event` to signal the `run_test` listener thread to exit.
+        Sets the `self.stop_event` to signal the `run_test` listener thread to exit and cancels its pending read so it exits immediately.
         Sets `self.test_running` to False. Sends the abort *testing* command byte
         (`np.int8(0).tobytes()`) to the Arduino. Resets the main button state to 'Start Testing'.
         """
@@ -961,26 +1295,45 @@ class ValveTestWindow(tk.Toplevel):
 
         self.stop_event.set()
         self.test_running = False
+        self.prompt_queue.clear()
+        # wake the run_test thread if it is waiting on the Arduino
+        self.arduino_controller.cancel_read()
         ###====SENDING ABORT TEST COMMAND====###
         command = np.int8(0).tobytes()
         self.arduino_controller.send_command(command)
 
+        self.abort_calibration_session()
+
     def testing_complete(self, event: tk.Event) -> None:
         """
         Handles the final steps after the Arduino signals test completion.
 
-        Calls `take_input` one last time for the final test pair (using `pair_num_override`).
-
-        Resets the main button state and `self.test_running` flag. Sets the
-        `self.stop_event` to ensure the listener thread terminates cleanly.
-        Calls `auto_update_durations` to process the collected data and suggest timing changes.
+        Calls `take_input` one last time for the final test pair (using `pair_num_override`), then `finish_test`. In a pipelined
+        test the final pair is queued for measurement instead, and `process_prompt_queue` calls `finish_test` once every queued
+        volume has been entered.
 
         Parameters
         ----------
         - **event** (*tk.Event*): The custom event (`<<event0>>`) generated by `run_test`, carrying the final pair number in `event.state`.
         """
+        if self.pipelined_test:
+            # the Arduino has already exited the test, answer it the same way take_input does for the final pair
+            self.arduino_controller.send_command(np.int8(0).tobytes())
+            self.test_reported_complete = True
+            self.queue_prompt("measure", event.state)
+            return
+
         # take input from last pair/valve
         self.take_input(event=None, pair_num_override=event.state)
+        self.finish_test()
+
+    def finish_test(self) -> None:
+        """
+        Resets the main button state and `self.test_running` flag, and sets the
+        `self.stop_event` to ensure the listener thread terminates cleanly.
+        Calls `auto_update_durations` to process the collected data and suggest timing changes, or
+        `continue_calibration_session` if a calibration session is running.
+        """
         # reconfigure the testing button and testing state
         if isinstance(self.valve_test_button, tk.Button):
             self.valve_test_button.configure(text="Start Testing", bg="green")
@@ -989,72 +1342,255 @@ class ValveTestWindow(tk.Toplevel):
         # stop the arduino testing listener thread
         self.stop_event.set()
 
+        mode = "pipelined" if self.pipelined_test else "sequential"
+        logger.info(
+            f"Valve test ({mode}) finished in {time.perf_counter() - self.test_started_at:.1f} s."
+        )
+
         # update valves and such
-        self.auto_update_durations()
+        if self.calibration_session is not None:
+            self.continue_calibration_session()
+        else:
+            self.auto_update_durations()
 
-    def auto_update_durations(self):
+    def collect_measurements(
+        self, side_one: npt.NDArray[np.int32], side_two: npt.NDArray[np.int32]
+    ) -> list[tuple[int, int, int, float]]:
         """
-        This function is similar to the `views.valve_testing.manual_time_adjustment_window.ManualTimeAdjustment.write_timing_changes` function, it
-        calculates new valve durations based on test results and desired volume.
+        Pairs each result in `self.ml_dispensed` with the duration its valve was tested at and the actuations the test ran with.
+
+        Parameters
+        ----------
+        - **side_one** (*npt.NDArray[np.int32]*): Durations the side one valves were tested at.
+        - **side_two** (*npt.NDArray[np.int32]*): Durations the side two valves were tested at.
+
+        Returns
+        -------
+        - *list[tuple[int, int, int, float]]*: (valve number, tested duration, actuations, dispensed mL) for each tested valve.
+        """
+        measurements = []
+        for valve, dispensed_amt in self.ml_dispensed:
+            if valve > VALVES_PER_SIDE:
+                tested_duration = side_two[(valve - 1) - VALVES_PER_SIDE]
+            else:
+                tested_duration = side_one[valve - 1]
+            measurements.append(
+                (valve, int(tested_duration), self.test_actuations, dispensed_amt)
+            )
+        return measurements
+
+    def calculate_new_durations(self, desired_ul: float, keep_valves=frozenset()):
+        """
+        Calculates new valve durations based on test results and desired volume.
 
         Loads the current 'selected' durations. Iterates through the collected
-        `self.ml_dispensed` data. For each tested valve, it calculates the actual
-        volume dispensed per actuation and compares it to the desired volume per actuation.
-        It computes a new duration using a ratio (`new_duration = old_duration * (desired_vol / actual_vol)`).
+        `self.ml_dispensed` data and stores each result in the `models.valve_calibration` model, which
+        then fits a calibration curve to every test ever run on each valve. The new duration for each valve is
+        the curve's prediction for the desired volume per actuation. If the curve cannot be used (e.g. no usable
+        measurements) it falls back to a ratio (`new_duration = old_duration * (desired_vol / actual_vol)`).
 
         Updates the corresponding duration in the local copies of the side_one/side_two arrays.
         Updates the table display for the valve using `update_table_entry_test_status`.
-        Compiles a list of changes (`changed_durations`) and opens the `ValveChanges`
-        confirmation window, passing the changes and the `confirm_valve_changes` callback.
+
+        Parameters
+        ----------
+        - **desired_ul** (*float*): Target volume per actuation in microliters.
+        - **keep_valves** (*Collection[int], optional*): Valves whose durations are left unchanged, e.g. valves a calibration session
+        found to already be within tolerance. Their results are still recorded in the calibration model.
+
+        Returns
+        -------
+        - *tuple*: (side_one, side_two, side_one_old, side_two_old, changed_durations, confidence_bands, calibration) where the side
+        arrays hold the new and old durations, `changed_durations` is a list of `(valve, (old_dur, new_dur))`, `confidence_bands` maps
+        valves to the (lower, upper) band of their predicted duration and `calibration` holds the inputs to store in the duration history.
         """
         # list of tuples of tuples ==> [(valve, (old_dur, new_dur))] sent to ChangesWindow instance, so that
         # user can confirm duration changes
         changed_durations = []
 
-        ## save current durations in the oldest valve duration archival location
-        side_one, side_two, date_used = self.arduino_data.load_durations()
+        # per valve test results, stored with the new durations in the duration history
+        tested_valves = {}
 
-        side_one_old = side_one.copy()
-        side_two_old = side_two.copy()
+        ## current durations, archived to the duration history when changes are confirmed
+        side_one_old, side_two_old, date_used = self.arduino_data.load_durations()
 
-        for valve, dispensed_amt in self.ml_dispensed:
+        # loaded durations are read-only views of the cached profile, work on copies
+        side_one = side_one_old.copy()
+        side_two = side_two_old.copy()
+
+        calibration_model = self.arduino_data.calibration_model
+
+        # divide by 1000 to get to mL from ul
+        desired_per_open_vol = desired_ul / 1000
+
+        # record every result first so each valve's curve includes this test
+        measurements = self.collect_measurements(side_one_old, side_two_old)
+        calibration_model.add_measurements(measurements)
+
+        # valve -> (lower, upper) 95% confidence band of the predicted duration
+        confidence_bands = {}
+
+        for valve, tested_duration, actuations, dispensed_amt in measurements:
             logical_valve = None
-            tested_duration = None
             side_durations = None
 
             if valve > VALVES_PER_SIDE:
                 logical_valve = (valve - 1) - VALVES_PER_SIDE
-
-                tested_duration = side_two[logical_valve]
                 side_durations = side_two
             else:
                 logical_valve = valve - 1
-
-                tested_duration = side_one[logical_valve]
                 side_durations = side_one
 
-            # divide by 1000 to get to mL from ul
-            desired_per_open_vol = self.desired_volume.get() / 1000
-
             # divide by 1000 to get amount per opening, NOT changing units
-            actual_per_open_vol = dispensed_amt / self.actuations.get()
+            actual_per_open_vol = dispensed_amt / actuations
 
             self.update_table_entry_test_status(valve, actual_per_open_vol)
 
-            new_duration = round(
-                tested_duration * (desired_per_open_vol / actual_per_open_vol)
+            if valve in keep_valves:
+                continue
+
+            prediction = calibration_model.predict_duration(
+                valve, desired_per_open_vol * 1000
             )
 
+            if prediction is not None:
+                new_duration, lower, upper, method = prediction
+                confidence_bands[valve] = (lower, upper)
+            else:
+                method = "ratio"
+                new_duration = round(
+                    tested_duration * (desired_per_open_vol / actual_per_open_vol)
+                )
+
             side_durations[logical_valve] = new_duration
 
             changed_durations.append((valve, (tested_duration, new_duration)))
 
+            tested_valves[str(valve)] = {
+                "tested_duration": int(tested_duration),
+                "dispensed_ml": dispensed_amt,
+                "method": method,
+                "band": list(confidence_bands.get(valve, (new_duration, new_duration))),
+            }
+
+        # inputs that produced these durations, kept alongside them in the duration history
+        calibration = {
+            "desired_volume_ul": desired_ul,
+            "actuations": self.test_actuations,
+            "valves": tested_valves,
+        }
+
+        return (
+            side_one,
+            side_two,
+            side_one_old,
+            side_two_old,
+            changed_durations,
+            confidence_bands,
+            calibration,
+        )
+
+    def auto_update_durations(self):
+        """
+        This function is similar to the `views.valve_testing.manual_time_adjustment_window.ManualTimeAdjustment.write_timing_changes` function, it
+        calculates new valve durations based on test results and desired volume using `calculate_new_durations`.
+
+        Opens the `ValveChanges` confirmation window, passing the changes, the confidence band of each prediction and the
+        `confirm_valve_changes` callback.
+        """
+        (
+            side_one,
+            side_two,
+            side_one_old,
+            side_two_old,
+            changed_durations,
+            confidence_bands,
+            calibration,
+        ) = self.calculate_new_durations(self.desired_volume.get())
+
         ValveChanges(
             changed_durations,
             lambda: self.confirm_valve_changes(
-                side_one, side_two, side_one_old, side_two_old
+                side_one, side_two, side_one_old, side_two_old, calibration
             ),
+            confidence_bands,
+        )
+
+    def continue_calibration_session(self) -> None:
+        """
+        Handles the end of one round of a calibration session.
+
+        Records the volume error of every valve tested this round in the session. Valves within tolerance keep their durations, every
+        other valve gets a new duration from `calculate_new_durations`, which is saved immediately (no confirmation window, the user
+        confirmed the session when it started). If the session is not finished, only the valves still outside of tolerance are selected
+        and the next round is started with `send_schedules`, which pushes the updated durations to the Arduino.
+        """
+        session = self.calibration_session
+
+        side_one_tested, side_two_tested, _ = self.arduino_data.load_durations()
+        measurements = self.collect_measurements(side_one_tested, side_two_tested)
+
+        pending = session.record_round(
+            [
+                (valve, duration, dispensed_amt * 1000 / actuations)
+                for valve, duration, actuations, dispensed_amt in measurements
+            ]
         )
+        converged = {valve for valve, *_ in measurements if valve not in pending}
+
+        (
+            side_one,
+            side_two,
+            side_one_old,
+            side_two_old,
+            changed_durations,
+            _,
+            calibration,
+        ) = self.calculate_new_durations(session.desired_ul, keep_valves=converged)
+
+        if changed_durations:
+            calibration["session_round"] = len(session.rounds)
+            calibration["tolerance_pct"] = session.tolerance_pct
+            self.confirm_valve_changes(
+                side_one, side_two, side_one_old, side_two_old, calibration
+            )
+
+        if session.is_finished():
+            self.finish_calibration_session()
+            return
+
+        # select only the valves that still need work for the next round
+        for i, button in enumerate(self.valve_buttons):
+            if i + 1 in pending:
+                self.valve_selections[i] = i + 1
+                button.configure(relief="sunken")
+            else:
+                self.valve_selections[i] = 0
+                button.configure(relief="raised")
+        self.update_table_entries()
+
+        self.after(100, self.send_schedules)
+
+    def finish_calibration_session(self) -> None:
+        """
+        Ends the current calibration session, writes its per round report to the log and opens a `CalibrationReport` window.
+        """
+        session = self.calibration_session
+        self.calibration_session = None
+
+        for line in session.report_lines():
+            logger.info(line)
+
+        CalibrationReport(session)
+
+    def abort_calibration_session(self) -> None:
+        """
+        Aborts the calibration session in progress, if there is one, and reports the rounds it completed. Called whenever a session's test
+        is aborted or cannot be started, so a later ordinary test never continues a stale session.
+        """
+        if self.calibration_session is not None:
+            self.calibration_session.abort()
+            self.finish_calibration_session()
 
     def confirm_valve_changes(
         self,
@@ -1062,13 +1598,14 @@ class ValveTestWindow(tk.Toplevel):
         side_two: npt.NDArray[np.int32],
         side_one_old: npt.NDArray[np.int32],
         side_two_old: npt.NDArray[np.int32],
+        calibration: dict | None = None,
     ):
         """
         Callback function executed when changes are confirmed in the ValveChanges window.
 
         Instructs `self.arduino_data` to first save the `side_one_old` and `side_two_old`
-        arrays to an archive slot, and then save the newly calculated `side_one` and `side_two`
-        arrays as the 'selected' durations.
+        arrays to the duration history, and then save the newly calculated `side_one` and `side_two`
+        arrays as the 'selected' durations along with the calibration inputs that produced them.
 
         Parameters
         ----------
@@ -1076,6 +1613,9 @@ class ValveTestWindow(tk.Toplevel):
         - **side_two** (*npt.NDArray[np.int32]*): The numpy array containing the newly calculated durations for side two valves.
         - **side_one_old** (*npt.NDArray[np.int32]*): The numpy array containing the durations for side one valves *before* the test.
         - **side_two_old** (*npt.NDArray[np.int32]*): The numpy array containing the durations for side two valves *before* the test.
+        - **calibration** (*dict | None, optional*): Desired volume, actuations and per valve test results used to calculate the new durations.
         """
         self.arduino_data.save_durations(side_one_old, side_two_old, "archive")
-        self.arduino_data.save_durations(side_one, side_two, "selected")
+        self.arduino_data.save_durations(
+            side_one, side_two, "selected", source="calibration", calibration=calibration
+        )
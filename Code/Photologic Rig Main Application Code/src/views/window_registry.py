@@ -0,0 +1,175 @@
+"""
+This module defines the WindowRegistry class, which builds the secondary windows of `views.main_gui` (windows opened from the buttons of the
+main window) the first time they are needed and keeps them for reuse.
+
+Building every secondary window up front (the valve testing window alone loads valve durations and builds its manual adjustment child)
+made the main window wait for all of them before it could be shown. Instead, each window is registered with a factory and built on its
+first `get`, after which it is only hidden and shown again like before. Once the main window has painted, the windows that have not been
+asked for yet can be prewarmed: they are built one at a time in idle callbacks so the main window stays responsive, and a window the user
+asks for first is simply built on the spot. Prewarming is switched on with `PREWARM_WINDOWS` in the `gui_config` section of the rig config.
+"""
+
+import logging
+import time
+import tkinter as tk
+from typing import Any, Callable
+
+from rig_config_service import rig_config
+
+logger = logging.getLogger()
+
+REGISTRY_CONFIG = rig_config.section("gui_config")
+
+
+class WindowRegistry:
+    """
+    Builds windows on demand from registered factories and caches the instances.
+
+    A window may be a single `tk.Toplevel` or a tuple of them that are shown together, like the two raster plots. Windows must only be
+    built on the Tkinter main thread, so code running in worker threads should look them up inside a callback handed to
+    `views.render_scheduler.RenderScheduler.request`.
+
+    Attributes
+    ----------
+    - **root** (*tk.Tk*): The Tkinter root, used to schedule prewarming.
+    - **build_times_ms** (*dict[str, float]*): How long each window that has been built took to build, in milliseconds.
+
+    Methods
+    -------
+    - `register`(name, factory)
+        Registers the factory that builds a window.
+    - `get`(name)
+        Returns a window, building it first if needed.
+    - `get_if_built`(name)
+        Returns a window only if it has already been built.
+    - `is_built`(name)
+        Returns whether a window has been built.
+    - `prewarm`(names)
+        Builds windows that have not been asked for yet in idle time.
+    - `stop_prewarm`()
+        Cancels any prewarming still waiting.
+    - `reset`()
+        Destroys every built window so it is built again, for the next experiment.
+    """
+
+    def __init__(self, root: tk.Tk):
+        self.root = root
+
+        self._factories: dict[str, Callable[[], Any]] = {}
+        self._windows: dict[str, Any] = {}
+        self.build_times_ms: dict[str, float] = {}
+
+        self._prewarm_queue: list[str] = []
+        self._prewarm_job: str | None = None
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """
+        Parameters
+        ----------
+        - **name** (*str*): The window's name, e.g. "Program Schedule".
+        - **factory** (*Callable[[], Any]*): Builds the (hidden) window, or a tuple of windows.
+        """
+        self._factories[name] = factory
+
+    def __getitem__(self, name: str) -> Any:
+        return self.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._factories
+
+    def get(self, name: str) -> Any:
+        """
+        Returns the window registered as `name`, building it the first time it is asked for.
+
+        Raises
+        ------
+        - *KeyError*: If no window is registered as `name`.
+        """
+        window = self._windows.get(name)
+        if window is not None:
+            return window
+
+        factory = self._factories[name]
+
+        start = time.perf_counter()
+        window = factory()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        self._windows[name] = window
+        self.build_times_ms[name] = build_ms
+        logger.info(f"Built window '{name}' in {build_ms:.1f} ms.")
+
+        return window
+
+    def get_if_built(self, name: str) -> Any | None:
+        return self._windows.get(name)
+
+    def is_built(self, name: str) -> bool:
+        return name in self._windows
+
+    def prewarm(
+        self,
+        names: list[str] | None = None,
+        interval_ms: int | None = None,
+    ) -> None:
+        """
+        Builds the given windows (all registered windows by default) one per idle callback, leaving `interval_ms` between them so
+        events that arrive meanwhile are handled first. `interval_ms` defaults to `PREWARM_INTERVAL_MS` from the rig config. Windows
+        already built are skipped.
+        """
+        if interval_ms is None:
+            interval_ms = REGISTRY_CONFIG["PREWARM_INTERVAL_MS"]
+        self._prewarm_queue = [
+            name for name in (names if names is not None else self._factories) if name not in self._windows
+        ]
+        if self._prewarm_queue and self._prewarm_job is None:
+            self._prewarm_job = self.root.after_idle(self._prewarm_next, interval_ms)
+
+    def _prewarm_next(self, interval_ms: int) -> None:
+        self._prewarm_job = None
+
+        while self._prewarm_queue:
+            name = self._prewarm_queue.pop(0)
+            if name in self._windows:
+                continue
+
+            try:
+                self.get(name)
+            except Exception as e:
+                # the window will be built again, and the error shown, when it is asked for
+                logger.error(f"Error prewarming window '{name}': {e}")
+            break
+
+        if self._prewarm_queue:
+            # after_idle from inside an after callback, so the next window waits for pending events and redraws
+            self._prewarm_job = self.root.after(
+                interval_ms, lambda: self._schedule_idle(interval_ms)
+            )
+        else:
+            logger.info("Finished prewarming windows.")
+
+    def _schedule_idle(self, interval_ms: int) -> None:
+        self._prewarm_job = self.root.after_idle(self._prewarm_next, interval_ms)
+
+    def stop_prewarm(self) -> None:
+        if self._prewarm_job is not None:
+            self.root.after_cancel(self._prewarm_job)
+            self._prewarm_job = None
+        self._prewarm_queue = []
+
+    def reset(self) -> None:
+        """
+        Destroys every window that has been built and forgets it, so the next `get` (or `prewarm`) builds it again from its factory.
+        Windows hold the tables and plots of one experiment, rebuilding them is how they are cleared between experiments.
+        """
+        self.stop_prewarm()
+
+        for name, window in self._windows.items():
+            for instance in window if isinstance(window, tuple) else (window,):
+                try:
+                    instance.destroy()
+                except tk.TclError as e:
+                    logger.error(f"Error destroying window '{name}': {e}")
+
+        self._windows.clear()
+        self.build_times_ms.clear()